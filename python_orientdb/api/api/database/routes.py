@@ -3,8 +3,8 @@ try:
 except ImportError:
     from typing_extensions import Annotated
 
-from fastapi import APIRouter, HTTPException, responses
-from api.api.middlewares import orient
+from fastapi import APIRouter, HTTPException, Request, responses
+from api.api.middlewares import orient, open_session, POOLS
 from .schemas import ConnectHost, ConnectDatabase
 
 
@@ -12,22 +12,56 @@ router = APIRouter()
 
 
 @router.post('/all')
-def connect_host(data: ConnectHost):
+async def connect_host(data: ConnectHost):
     """
     send host, port, user and password to connect the host have orient
     response will be list of databases
     """
-    orient.connect_to_orient(data.user, data.password)
-    database_list = orient.list_databases()
+    await orient.connect_to_orient(data.user, data.password)
+    database_list = await orient.list_databases()
     return database_list
 
 
 @router.post('/')
-def connect_database(data: ConnectDatabase):
+async def connect_database(data: ConnectDatabase, request: Request):
     """
     send host, port, user, password and database name to connect to database
-    response ok
+    next requests with the same X-user-id will borrow connections from the database pool
+    response is the database schema
     """
-    orient.open_database(data.database, data.user, data.password)
-    result = orient.get_schema()
+    pool = open_session(request, data.host, data.port, data.database, data.user, data.password)
+    async with orient.borrow(pool):
+        result = await orient.get_schema(data.database)
     return result
+
+
+@router.get('/pools')
+async def get_pools():
+    """
+    connection pools statistics, by host:port/database@user
+    """
+    return POOLS.stats()
+
+
+@router.get('/cache')
+async def get_cache():
+    """
+    result cache statistics: size, hits, misses, hit rate, evictions and invalidations
+    """
+    return orient.result_cache.stats
+
+
+@router.get('/schema-cache')
+async def get_schema_cache():
+    """
+    schema cache statistics: downloads, version checks, hits and invalidations
+    """
+    return orient.schema_cache.stats
+
+
+@router.get('/placement')
+async def get_placement():
+    """
+    vertex placement statistics: records created by class and cluster, records left to orientdb
+    """
+    return orient.placement.stats
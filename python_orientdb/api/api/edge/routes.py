@@ -2,9 +2,9 @@ try:
     from typing import Annotated
 except ImportError:
     from typing_extensions import Annotated
-from fastapi import APIRouter, Depends, responses
+from fastapi import APIRouter, Depends, HTTPException, responses
 
-from api.api.middlewares import orient
+from api.api.middlewares import orient, parse_filters
 from core import Orient
 from .schemas import EdgeCreate, EdgeUpdate, EdgeDelete
 
@@ -47,10 +47,28 @@ async def delete_edge(edge_data: EdgeDelete):
 
 
 @router.get("/")
-async def get_edge(class_name: str, in_filter: str = "", out_filter: str = "", data: dict = None):
+async def get_edge(class_name: str, in_filters: str = None, out_filters: str = None):
     """
     will query in MATCH, edge class name is mandatory, else optional
+    in_filters and out_filters select the vertices, JSON objects of fields and values, {"name": "Luca"}
     """
-    result = await orient.edge_manager.retrieve(class_name, out_filter, in_filter, data)
+    try:
+        result = await orient.edge_manager.retrieve(class_name, parse_filters(out_filters), parse_filters(in_filters))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     response = {"detail": "retrieve edges", "method": "delete", "result": result}
     return responses.JSONResponse(status_code=200, content=response)
+
+
+@router.get("/scan")
+async def scan_edges(class_name: str, page_size: int = 100, cursor: str = None, filters: str = None):
+    """
+    one page of the edges of a class in rid order
+    pass the returned cursor to get the next page, it is null after the last page
+    filters is a JSON object of fields and values, {"name": "Luca"}, a bad class name, field or cursor is a 400
+    """
+    try:
+        page = await orient.edge_manager.scan(class_name, page_size, cursor, parse_filters(filters))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"detail": f"{class_name} edges", "method": "scan", "result": page["result"], "cursor": page["cursor"]}
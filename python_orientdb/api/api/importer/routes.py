@@ -0,0 +1,41 @@
+import io
+
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+
+from api.api.middlewares import SESSIONS, identify_user, orient
+from core.importer import FORMATS, BulkImporter, read_records
+from .schemas import ImportResult
+
+router = APIRouter()
+
+
+@router.post("/", response_model=ImportResult)
+async def bulk_import(
+        request: Request,
+        file: UploadFile = File(...),
+        format: str = "ndjson",
+        class_name: str = None,
+        key: str = "@key",
+        batch_size: int = 1000,
+        concurrency: int = 4,
+):
+    """
+    import the vertices and edges of an NDJSON or CSV file (see core.importer for the record format)
+    the batches are committed over connections of the pool of the database opened with POST /database/
+    response is the import stats, records that could not be imported are counted in failed
+    cached vertex and edge results of the imported classes are dropped
+    """
+    pool = SESSIONS.get(identify_user(request))
+    if pool is None:
+        raise HTTPException(status_code=400, detail="open a database with POST /database/ first")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    # the request holds a connection of the pool too
+    concurrency = max(1, min(concurrency, pool.max_size - 1))
+    try:
+        importer = BulkImporter(pool, batch_size, concurrency, class_name, key, cache=orient.result_cache)
+        lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+        stats = await importer.run(read_records(lines, format))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stats.as_dict()
@@ -0,0 +1,16 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ImportResult(BaseModel):
+    read: int
+    vertices: int
+    edges: int
+    batches: int
+    commits: int
+    retries: int
+    failed: int
+    errors: List[str]
+    elapsed: float
+    rate: float
@@ -1,12 +1,17 @@
-from typing import Tuple
+import json
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Tuple, Union
 from fastapi import Request, HTTPException
 
-from pyorient import OrientDB
+from pyorient import AsyncOrientDB
+from pyorient.pool import OrientConnectionPool, OrientPoolRegistry
 
 from core import Orient
 
 orient = Orient()
-CLIENTS = {}
+POOLS = OrientPoolRegistry(min_size=1, max_size=10, timeout=30)
+# X-user-id -> pool of the database the user opened with POST /database/
+SESSIONS: Dict[str, OrientConnectionPool] = {}
 
 
 def get_user_db_credential(request: Request) -> Tuple:
@@ -20,12 +25,53 @@ def identify_user(request: Request) -> str:
     return user_id
 
 
-async def set_client(request: Request):
-    user_id = identify_user(request)
+def parse_filters(filters: Union[str, None]) -> Dict[str, Any]:
+    """
+    filters of a query string, a JSON object of fields and the values they must equal ({"name": "Luca"})
+        bad JSON or anything but an object is a 400
+    """
+    if not filters:
+        return {}
+    try:
+        parsed = json.loads(filters)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="filters must be a JSON object")
+    if not isinstance(parsed, dict):
+        raise HTTPException(status_code=400, detail="filters must be a JSON object")
+    return parsed
+
+
+def open_session(
+        request: Request, host: str, port: int, database: str, user: str, password: str
+) -> OrientConnectionPool:
+    """
+    attach the user to the pool of database, next requests of the user borrow from it
+    """
+    pool = POOLS.get(host, port, database, user, password)
+    SESSIONS[identify_user(request)] = pool
+    return pool
 
-    if user_id not in CLIENTS:
-        host, port = get_user_db_credential(request)
-        CLIENTS[user_id] = OrientDB(host=host, port=port)
 
-    orient.client = CLIENTS[user_id]
+@asynccontextmanager
+async def set_client(request: Request):
+    """
+    lend a client to orient for the duration of the request
+        users with an opened database borrow a pooled connection,
+        others get a fresh connection to the host, closed after the request
+    """
+    pool = SESSIONS.get(identify_user(request))
+    if pool is not None:
+        async with orient.borrow(pool):
+            request.state.orient = orient
+            yield
+        return
+
+    host, port = get_user_db_credential(request)
+    client = AsyncOrientDB(host=host, port=int(port)) if host and port else None
+    orient.client = client
     request.state.orient = orient
+    try:
+        yield
+    finally:
+        if client is not None:
+            client.close()
@@ -3,9 +3,9 @@ try:
 except ImportError:
     from typing_extensions import Annotated
 
-from fastapi import APIRouter, Depends, responses
+from fastapi import APIRouter, Depends, HTTPException, responses
 
-from api.api.middlewares import orient
+from api.api.middlewares import orient, parse_filters
 from core import Orient
 from .schemas import VertexCreate, VertexUpdate, VertexDelete
 
@@ -43,9 +43,26 @@ async def delete_vertex(vertex_data: VertexDelete):
 
 
 @router.get("/")
-async def get_vertex(class_name: str, vertex_filter: str = ""):
+async def get_vertex(class_name: str, filters: str = None):
     """
-    query MATCH by class name, can have filter
+    query MATCH by class name, can have filters: a JSON object of fields and values, {"name": "Luca"}
     """
-    result = await orient.vertex_manager.retrieve(class_name, vertex_filter)
+    try:
+        result = await orient.vertex_manager.retrieve(class_name, parse_filters(filters))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
+
+
+@router.get("/scan")
+async def scan_vertices(class_name: str, page_size: int = 100, cursor: str = None, filters: str = None):
+    """
+    one page of the vertices of a class in rid order
+    pass the returned cursor to get the next page, it is null after the last page
+    filters is a JSON object of fields and values, {"name": "Luca"}, a bad class name, field or cursor is a 400
+    """
+    try:
+        page = await orient.vertex_manager.scan(class_name, page_size, cursor, parse_filters(filters))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"detail": f"{class_name} vertices", "method": "scan", "result": page["result"], "cursor": page["cursor"]}
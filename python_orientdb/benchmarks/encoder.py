@@ -0,0 +1,119 @@
+"""
+Encoding time of write heavy traffic (RecordCreateMessage and CommandMessage requests),
+compiled struct layouts against the previous per field struct.pack + b''.join.
+
+run from python_orientdb/:
+    python -m benchmarks.encoder [requests] [rounds]
+"""
+import struct
+import sys
+import time
+
+import pyorient.messages.database
+from pyorient.constants import BOOLEAN, BYTE, BYTES, FIELDS, INT, LONG, QUERY_CMD, SHORT, STRING, STRINGS
+from pyorient.messages.commands import CommandMessage
+from pyorient.messages.encoder import encode_fields
+from pyorient.messages.parser import OfflineSocket
+from pyorient.messages.records import RecordCreateMessage
+
+
+def legacy_encode_field(field):
+    """
+    BaseMessage._encode_field before the compiled layouts
+    """
+    t, v = field
+    if t['type'] == INT:
+        return struct.pack("!i", v)
+    elif t['type'] == SHORT:
+        return struct.pack("!h", v)
+    elif t['type'] == LONG:
+        return struct.pack("!q", v)
+    elif t['type'] == BOOLEAN:
+        return bytes([1]) if v else bytes([0])
+    elif t['type'] == BYTE:
+        return bytes([ord(v)])
+    elif t['type'] == BYTES:
+        return struct.pack("!i", len(v)) + v
+    elif t['type'] == STRING:
+        if isinstance(v, str):
+            v = v.encode('utf-8')
+        return struct.pack("!i", len(v)) + v
+    elif t['type'] == STRINGS:
+        _content = b''
+        for s in v:
+            if isinstance(s, str):
+                s = s.encode('utf-8')
+            _content += struct.pack("!i", len(s)) + s
+        return _content
+    elif t['type'] == FIELDS:
+        # CommandMessage joined its payload first, then encoded it again as a string
+        payload = b''.join(legacy_encode_field(x) for x in v)
+        return struct.pack("!i", len(payload)) + payload
+
+
+def legacy_encode_fields(fields):
+    return b''.join(legacy_encode_field(x) for x in fields)
+
+
+def record_create(sock, n):
+    return RecordCreateMessage(sock).prepare(
+        (12, {'name': 'person %d' % n, 'age': n % 90, 'email': 'p%d@example.com' % n})
+    ).send()
+
+
+def command(sock, n):
+    return CommandMessage(sock).prepare(
+        (QUERY_CMD, "UPDATE Person SET visits = visits + 1 WHERE name = 'person %d'" % n)
+    ).send()
+
+
+def run(build, requests, encoder):
+    """
+    prepare and send `requests` messages, encoding them with `encoder`
+    :return: elapsed seconds, bytes written and the encoded field lists
+    """
+    captured = []
+
+    def encode(fields):
+        captured.append(fields)
+        return encoder(fields)
+
+    pyorient.messages.database.encode_fields = encode
+    sock = OfflineSocket(session_id=1, auth_token=b'x' * 64, db_opened='bench')
+    started = time.perf_counter()
+    for n in range(requests):
+        build(sock, n)
+    elapsed = time.perf_counter() - started
+    return elapsed, b''.join(sock.written), captured
+
+
+def encode_only(encoder, captured):
+    started = time.perf_counter()
+    for fields in captured:
+        encoder(fields)
+    return time.perf_counter() - started
+
+
+def main(requests=20000, rounds=5):
+    print("%d requests per round, %d rounds, best round" % (requests, rounds))
+    print("%-28s %12s %12s %8s" % ("", "legacy ms", "compiled ms", "speedup"))
+    try:
+        for name, build in (("RecordCreate", record_create), ("Command", command)):
+            legacy = min(run(build, requests, legacy_encode_fields)[:2] for _ in range(rounds))
+            compiled = min(run(build, requests, encode_fields)[:2] for _ in range(rounds))
+            assert legacy[1] == compiled[1], "encoders disagree"
+
+            captured = run(build, requests, encode_fields)[2]
+            legacy_encode = min(encode_only(legacy_encode_fields, captured) for _ in range(rounds))
+            compiled_encode = min(encode_only(encode_fields, captured) for _ in range(rounds))
+
+            for label, old, new in (("encode", legacy_encode, compiled_encode),
+                                    ("prepare + send", legacy[0], compiled[0])):
+                print("%-28s %12.2f %12.2f %7.2fx" % (
+                    "%s %s" % (name, label), old * 1000, new * 1000, old / new))
+    finally:
+        pyorient.messages.database.encode_fields = encode_fields
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,86 @@
+"""
+End to end load test of the driver against the in-process fake server:
+sequential sync queries, one pipeline and concurrent asyncio sessions sharing
+one connection, with the given server latency.
+
+run from python_orientdb/:
+    python -m benchmarks.fake_server [queries] [latency ms] [records]
+"""
+import asyncio
+import sys
+import time
+
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.testing import FakeOrientServer
+
+QUERY = "select from Person where age < 50"
+
+
+def populate(port: int, records: int):
+    client = OrientDB("127.0.0.1", port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    client.batch("\n".join("insert into Person set name = 'person %d', age = %d" % (n, n % 90)
+                           for n in range(records)))
+    client.close()
+
+
+def sequential(port: int, queries: int):
+    client = OrientDB("127.0.0.1", port)
+    client.db_open("demo", "root", "root")
+    started = time.perf_counter()
+    for _ in range(queries):
+        client.query(QUERY, -1)
+    elapsed = time.perf_counter() - started
+    client.close()
+    return elapsed
+
+
+def pipelined(port: int, queries: int):
+    client = OrientDB("127.0.0.1", port)
+    client.db_open("demo", "root", "root")
+    started = time.perf_counter()
+    pipeline = client.pipeline()
+    for _ in range(queries):
+        pipeline.query(QUERY, -1)
+    pipeline.execute()
+    elapsed = time.perf_counter() - started
+    client.close()
+    return elapsed
+
+
+async def concurrent_sessions(port: int, queries: int, sessions: int = 8):
+    client = AsyncOrientDB("127.0.0.1", port)
+    await client.db_open("demo", "root", "root")
+    clients = [client] + [client.session() for _ in range(sessions - 1)]
+    for session in clients[1:]:
+        await session.db_open("demo", "root", "root")
+
+    async def worker(session, n):
+        for _ in range(n):
+            await session.query(QUERY, -1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(session, queries // sessions) for session in clients))
+    elapsed = time.perf_counter() - started
+    client.close()
+    return elapsed
+
+
+def main(queries: int = 200, latency_ms: float = 1.0, records: int = 100):
+    with FakeOrientServer(latency=latency_ms / 1000) as server:
+        populate(server.port, records)
+        print(f"{queries} queries over {records} records, server latency {latency_ms} ms")
+        print(f"{'client':<28}{'total ms':>12}{'queries/s':>12}")
+        for name, elapsed in (
+                ("sync, one at a time", sequential(server.port, queries)),
+                ("sync, one pipeline", pipelined(server.port, queries)),
+                ("async, 8 sessions", asyncio.run(concurrent_sessions(server.port, queries)))):
+            print(f"{name:<28}{elapsed * 1000:>12.1f}{queries / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 200,
+         float(args[1]) if len(args) > 1 else 1.0,
+         int(args[2]) if len(args) > 2 else 100)
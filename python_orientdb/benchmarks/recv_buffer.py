@@ -0,0 +1,127 @@
+"""
+Decode time and syscalls of a large CommandMessage response, buffered OrientSocket.read
+against the previous one select + recv_into per field.
+
+run from python_orientdb/:
+    python -m benchmarks.recv_buffer [records] [rounds]
+"""
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+
+import pyorient.orient
+from pyorient.messages.commands import CommandMessage
+from pyorient.exceptions import PyOrientConnectionException
+from pyorient.orient import OrientSocket
+
+
+def command_response(records: int) -> bytes:
+    """
+    sync `l` response of a query returning `records` documents
+    """
+    def string(value: bytes) -> bytes:
+        return struct.pack("!i", len(value)) + value
+
+    body = b"".join(
+        struct.pack("!h", 0) + b"d" + struct.pack("!hqi", 12, n, 1)
+        + string(b'Person@name:"person %d",age:%d,email:"p%d@example.com"' % (n, n % 90, n))
+        for n in range(records)
+    )
+    return b"\x00" + struct.pack("!i", 1) + string(b"") + b"l" + struct.pack("!i", records) + body + b"\x00"
+
+
+class LegacyOrientSocket(OrientSocket):
+    """
+    OrientSocket.read before the receive buffer
+    """
+    def read(self, _len_to_read):
+        while True:
+            ready_to_read, _, in_error = select.select([self._socket, ], [], [self._socket, ], 30)
+            if len(ready_to_read) > 0:
+                buf = bytearray(_len_to_read)
+                view = memoryview(buf)
+                while _len_to_read:
+                    n_bytes = self._socket.recv_into(view, _len_to_read)
+                    if not n_bytes:
+                        raise PyOrientConnectionException("Server seems to have went down", [])
+                    view = view[n_bytes:]
+                    _len_to_read -= n_bytes
+                return bytes(buf)
+            if len(in_error) > 0:
+                raise PyOrientConnectionException("Socket error", [])
+
+
+class CountingSocket:
+    """
+    socket proxy counting recv_into calls
+    """
+    def __init__(self, sock):
+        self._sock = sock
+        self.recv_calls = 0
+
+    def recv_into(self, *args):
+        self.recv_calls += 1
+        return self._sock.recv_into(*args)
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def close(self):
+        self._sock.close()
+
+
+class CountingSelect:
+    error = select.error
+
+    def __init__(self):
+        self.calls = 0
+
+    def select(self, *args):
+        self.calls += 1
+        return select.select(*args)
+
+
+def run(socket_class, payload: bytes, rounds: int):
+    server, client = socket.socketpair()
+    counting = CountingSocket(client)
+    orient_socket = socket_class("localhost", 2424)
+    orient_socket._socket.close()
+    orient_socket._socket = counting
+    orient_socket.connected = True
+    orient_socket.protocol = 38
+
+    selector = CountingSelect()
+    pyorient.orient.select, original = selector, pyorient.orient.select
+    writer = threading.Thread(target=lambda: [server.sendall(payload) for _ in range(rounds)])
+    writer.start()
+    try:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            message = CommandMessage(orient_socket)
+            message._reset_fields_definition()  # as send() does
+            records = message.fetch_response()
+        elapsed = time.perf_counter() - started
+    finally:
+        pyorient.orient.select = original
+        writer.join()
+        server.close()
+        client.close()
+
+    return elapsed / rounds, (selector.calls + counting.recv_calls) / rounds, len(records)
+
+
+def main(records: int = 1000, rounds: int = 20):
+    payload = command_response(records)
+    print(f"CommandMessage response: {records} records, {len(payload)} bytes, {rounds} rounds")
+    print(f"{'read path':<12}{'decode ms':>12}{'syscalls':>12}")
+    for name, socket_class in (("legacy", LegacyOrientSocket), ("buffered", OrientSocket)):
+        elapsed, syscalls, decoded = run(socket_class, payload, rounds)
+        assert decoded == records
+        print(f"{name:<12}{elapsed * 1000:>12.2f}{syscalls:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
@@ -0,0 +1,103 @@
+"""
+Decode time of the responses of a capture file, replayed without a server.
+
+Record a capture on a live connection with
+    client._connection.capture = WireCapture("session.pyorcap")
+then, from python_orientdb/:
+    python -m benchmarks.replay [capture] [rounds]
+
+Without a capture file, one is recorded from synthetic traffic: a sync query,
+an async query and a transaction commit creating records.
+"""
+import os
+import struct
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from pyorient.capture import WireCapture, exchanges
+from pyorient.constants import QUERY_ASYNC, QUERY_SYNC
+from pyorient.messages.commands import CommandMessage, _TXCommitMessage
+from pyorient.messages.parser import OfflineSocket
+from pyorient.messages.records import RecordCreateMessage
+
+from .recv_buffer import command_response
+
+
+def async_query_response(records: int) -> bytes:
+    """
+    async query response sending `records` documents
+    """
+    def string(value: bytes) -> bytes:
+        return struct.pack("!i", len(value)) + value
+
+    return b"\x00" + struct.pack("!i", 1) + string(b"") + b"".join(
+        b"\x01" + struct.pack("!h", 0) + b"d" + struct.pack("!hqi", 12, n, 1)
+        + string(b'Person@name:"person %d",age:%d' % (n, n % 90))
+        for n in range(records)
+    ) + b"\x00"
+
+
+def tx_commit_response(records: int) -> bytes:
+    """
+    commit response of a transaction creating `records` records
+    """
+    return b"\x00" + struct.pack("!i", 1) + struct.pack("!i", 0) + struct.pack("!i", records) + b"".join(
+        struct.pack("!hqhq", -1, -2 - n, 12, n) for n in range(records)
+    ) + struct.pack("!i", 0) + struct.pack("!i", 0)
+
+
+def record_synthetic(path: str, records: int = 1000):
+    sock = OfflineSocket(session_id=1, db_opened="bench")
+    sock.capture = capture = WireCapture(path)
+
+    message = CommandMessage(sock).prepare((QUERY_SYNC, "select from Person", -1)).send()
+    capture.response(message, command_response(records))
+
+    message = CommandMessage(sock).prepare((QUERY_ASYNC, "select from Person", -1, "*:0", print)).send()
+    capture.response(message, async_query_response(records))
+
+    tx = _TXCommitMessage(sock).begin()
+    for n in range(records):
+        tx.attach(RecordCreateMessage(sock).prepare((12, {"name": "person %d" % n})))
+    sock.in_transaction = False
+    tx.prepare().send()
+    capture.response(tx, tx_commit_response(records))
+
+    capture.close()
+
+
+def report(path: str, rounds: int):
+    totals = defaultdict(lambda: [0, 0, 0.0])  # exchanges, bytes, best seconds
+    replayable = [exchange for exchange in exchanges(path) if exchange.state]
+    for exchange in replayable:
+        best = float("inf")
+        for _ in range(rounds):
+            message = exchange.message()
+            started = time.perf_counter()
+            response = exchange.decode(message)
+            best = min(best, time.perf_counter() - started)
+            response.result()
+        total = totals[exchange.name]
+        total[0] += 1
+        total[1] += len(exchange.response)
+        total[2] += best
+
+    print("%s: %d replayable exchanges, best of %d rounds" % (path, len(replayable), rounds))
+    print("%-24s %10s %12s %12s %10s" % ("message", "exchanges", "bytes", "decode ms", "MB/s"))
+    for name, (count, size, best) in sorted(totals.items()):
+        print("%-24s %10d %12d %12.2f %10.1f" % (name, count, size, best * 1000, size / best / 1e6))
+
+
+def main(path: str = None, rounds: int = 20):
+    if path is not None:
+        return report(path, rounds)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.pyorcap")
+        record_synthetic(path)
+        report(path, rounds)
+
+
+if __name__ == "__main__":
+    main(*(sys.argv[1:2] + [int(arg) for arg in sys.argv[2:3]]))
@@ -0,0 +1,110 @@
+from typing import Any, Dict, List, Union
+
+from pyorient import OrientDB, AsyncOrientDB
+from pyorient.exceptions import PyOrientCommandException
+
+from .utils import resolve
+
+# last item of the RETURN of every script: a value that isn't a record makes orientdb wrap the results
+# in the "result" field of a document (the 'w' response), whatever the statements return
+END = "end of batch"
+
+
+def _one_line(statement: str) -> str:
+    """
+    return statement with its line breaks outside of string literals replaced by spaces,
+        a script ends a statement at a line break, string literals are kept as they are
+    """
+    chars, quote = [], None
+    for i, char in enumerate(statement):
+        if quote:
+            if char == quote and statement[i - 1] != "\\":
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "\r\n":
+            char = " "
+        chars.append(char)
+    return "".join(chars)
+
+
+class Batch:
+    """
+    statements sent together as one sql script (QUERY_SCRIPT), a single round trip whatever their number
+        with transaction=True they run between BEGIN and COMMIT: all of them are applied or none
+        every statement result is kept in a script variable, execute returns them in statement order
+    usage:
+        batch = Batch(client, transaction=True)
+        batch.add("CREATE VERTEX Person SET name = :name", {"name": "Luca"})
+        batch.add("CREATE VERTEX Person SET name = 'Santo'")
+        luca, santo = await batch.execute()
+    """
+
+    def __init__(
+            self,
+            client: Union[OrientDB, AsyncOrientDB],
+            transaction: bool = False,
+            retry: Union[int, None] = None,
+    ):
+        self.client = client
+        self.transaction = transaction
+        self.retry = retry
+        self._statements: List[str] = []
+        self._params: Dict[str, Any] = {}
+
+    def add(self, statement: str, params: Union[Dict[str, Any], None] = None) -> int:
+        """
+        queue a statement, with the values of its named parameters
+            parameters are shared by the whole script, a name can't be bound to two values
+        return index of the statement result
+        """
+        statement = _one_line(statement.strip().rstrip(";"))
+        if not statement:
+            raise ValueError("empty statement")
+        for name, value in (params or {}).items():
+            if name in self._params and self._params[name] != value:
+                raise ValueError(f"parameter {name} is already bound to another value")
+            self._params[name] = value
+        self._statements.append(statement)
+        return len(self._statements) - 1
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def script(self) -> str:
+        """
+        return the sql script of the statements
+        example:
+          BEGIN
+          LET s0 = CREATE VERTEX Person SET name = :name
+          LET s1 = CREATE VERTEX Person SET name = 'Santo'
+          COMMIT
+          RETURN [$s0, $s1, 'end of batch']
+        """
+        lines = ["BEGIN"] if self.transaction else []
+        lines += [f"LET s{n} = {statement}" for n, statement in enumerate(self._statements)]
+        if self.transaction:
+            lines.append("COMMIT" if self.retry is None else f"COMMIT RETRY {int(self.retry)}")
+        lines.append("RETURN [%s]" % ", ".join([f"$s{n}" for n in range(len(self._statements))] + [f"'{END}'"]))
+        return "\n".join(lines)
+
+    async def execute(self) -> List[Any]:
+        """
+        send the script and clear the batch
+        return one result per statement, in the order they were added
+        """
+        if not self._statements:
+            return []
+        script = self.script()
+        kwargs = {"params": self._params} if self._params else {}
+        count = len(self._statements)
+        self._statements, self._params = [], {}
+
+        results = await resolve(self.client.batch(script, **kwargs))
+        # the wrapper document, its records as links (see OrientDB.load_links)
+        if len(results) != 1 or not isinstance(results[0], list) or results[0][-1:] != [END]:
+            raise PyOrientCommandException(f"batch of {count} statements got an unexpected response", [results])
+        results = results[0][:-1]
+        if len(results) != count:
+            raise PyOrientCommandException(f"batch of {count} statements returned {len(results)} results", [results])
+        return results
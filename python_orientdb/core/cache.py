@@ -0,0 +1,120 @@
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Iterable, Tuple, Union
+
+_SPACES = re.compile(r"\s+")
+
+# returned by ResultCache.get when the key isn't cached, results can be None
+MISSING = object()
+
+
+def normalize(query: str) -> str:
+    """
+    return query with its whitespace collapsed, queries differing only by spacing share one entry
+    """
+    return _SPACES.sub(" ", query).strip()
+
+
+def database_key(client: Any) -> Tuple:
+    """
+    return (host, port, database) of the client, results of different databases never mix
+    """
+    connection = getattr(client, "_connection", None)
+    return (
+        getattr(connection, "host", None),
+        getattr(connection, "port", None),
+        getattr(connection, "db_opened", None),
+    )
+
+
+class ResultCache:
+    """
+    bounded LRU of query results, each one expiring ttl seconds after it was stored
+        entries are tagged with the classes their result reads,
+        writes to a class drop the entries tagged with it (see invalidate)
+        safe to share between asyncio tasks and threads
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, frozenset]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(client: Any, query: str, fetch_plan: str = "*:0", params: Union[Dict[str, Any], None] = None) -> Tuple:
+        """
+        return cache key of a query: database, normalized query, fetch plan and parameters
+        """
+        bound = tuple(sorted((name, repr(value)) for name, value in params.items())) if params else ()
+        return database_key(client), normalize(query), fetch_plan, bound
+
+    def get(self, key: Hashable) -> Any:
+        """
+        return cached result of key, MISSING when it isn't cached or has expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key: Hashable, result: Any, tags: Iterable[str]) -> None:
+        """
+        store result of key, tags are the names of the classes the result reads
+            tags are case-insensitive, like orientdb class names
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result, frozenset(tag.lower() for tag in tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """
+        drop the entries tagged with any of tags
+        return number of dropped entries
+        """
+        tags = frozenset(tag.lower() for tag in tags)
+        with self._lock:
+            stale = [key for key, (_, _, entry_tags) in self._entries.items() if entry_tags & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        return hit/miss metrics and current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
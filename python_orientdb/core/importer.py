@@ -0,0 +1,369 @@
+"""
+bulk import of vertices and edges from NDJSON or CSV files
+
+records are read as a stream and grouped in batches of batch_size, every batch is committed
+as one transaction (see core.unit_of_work.UnitOfWork) by one of concurrency workers, each one
+borrowing its own connection from an OrientConnectionPool
+    record format, the same for both: an NDJSON object per line or a CSV row with a header
+        "@class": class of the record, defaults to the class option
+        "@key": key of a vertex, used by the edges instead of its rid, not stored
+        "@from", "@to": keys (or rids) of the vertices of an edge, the records holding them are edges
+        the other fields are stored, CSV values are read as numbers when they are written as one:
+        an optional minus, digits without leading zeros and an optional fraction ("007", "1_000", "nan" stay strings)
+    the vertices are imported before the edges following them: a vertex key is known to the edges
+    once its batch is committed, edges to unknown keys are counted as failed
+usage:
+    python -m core.importer people.ndjson knows.csv --database demo --key id --concurrency 8
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from pyorient.exceptions import PyOrientException
+from pyorient.pool import OrientConnectionPool
+
+from .cache import ResultCache
+from .unit_of_work import UnitOfWork
+
+FORMATS = ("ndjson", "csv")
+INTEGER = re.compile(r"^-?(0|[1-9][0-9]*)$")
+DECIMAL = re.compile(r"^-?(0|[1-9][0-9]*)\.[0-9]+$")
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    yield a record per non empty line
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"line {number}: a record must be a JSON object")
+        yield record
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    yield a record per row, empty values are left out
+    """
+    for row in csv.DictReader(lines):
+        yield {name: _csv_value(value) for name, value in row.items() if name and value not in ("", None)}
+
+
+def read_records(lines: Iterable[str], format: str) -> Iterator[Dict[str, Any]]:
+    if format == "ndjson":
+        return read_ndjson(lines)
+    if format == "csv":
+        return read_csv(lines)
+    raise ValueError(f"unknown format {format}, expected one of {', '.join(FORMATS)}")
+
+
+def _is_edge(record: Dict[str, Any]) -> bool:
+    return "@from" in record or "@to" in record
+
+
+def _csv_value(value: str) -> Any:
+    if INTEGER.match(value):
+        return int(value)
+    if DECIMAL.match(value):
+        return float(value)
+    return value
+
+
+class ImportStats:
+    """
+    progress of an import, handed to the progress callback after every batch
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.read = 0
+        self.vertices = 0
+        self.edges = 0
+        self.batches = 0
+        self.commits = 0
+        self.retries = 0
+        self.failed = 0
+        self.errors: List[str] = []
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        """
+        return records imported per second
+        """
+        elapsed = self.elapsed
+        return (self.vertices + self.edges) / elapsed if elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "read": self.read,
+            "vertices": self.vertices,
+            "edges": self.edges,
+            "batches": self.batches,
+            "commits": self.commits,
+            "retries": self.retries,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed": round(self.elapsed, 3),
+            "rate": round(self.rate, 1),
+        }
+
+    def __str__(self) -> str:
+        return (f"{self.read} read, {self.vertices} vertices, {self.edges} edges, {self.failed} failed, "
+                f"{self.retries} retries in {self.elapsed:.1f}s ({self.rate:.0f} records/s)")
+
+
+class BulkImporter:
+    """
+    commit batches of records concurrently over the connections of pool
+        at most concurrency batches are committed at once and as many wait for a worker:
+        reading the input stops until one of them is done (backpressure)
+        a failed batch is committed again up to max_retries times, waiting retry_delay seconds
+        doubled at every attempt; then its records are counted as failed and the import goes on
+        keys holds the rid of every imported vertex key
+        with a cache, the results of the imported classes are dropped from it as their batches are committed
+    usage:
+        importer = BulkImporter(pool, batch_size=1000, concurrency=8, progress=print)
+        stats = await importer.run(read_records(open("graph.ndjson"), "ndjson"))
+    """
+
+    def __init__(
+            self,
+            pool: OrientConnectionPool,
+            batch_size: int = 1000,
+            concurrency: int = 4,
+            class_name: Union[str, None] = None,
+            key: str = "@key",
+            max_retries: int = 3,
+            retry_delay: float = 0.1,
+            progress: Union[Callable[[ImportStats], Any], None] = None,
+            cache: Union[ResultCache, None] = None,
+    ):
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("batch_size and concurrency must be positive")
+        self.pool = pool
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.class_name = class_name
+        self.key = key
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.progress = progress
+        self.cache = cache
+        self.keys: Dict[str, str] = {}
+        self.stats = ImportStats()
+        self._queue: Union[asyncio.Queue, None] = None
+        # vertex batches queued or being committed, edge batches wait for them
+        self._vertex_batches = 0
+        self._vertices_committed: Union[asyncio.Event, None] = None
+
+    async def run(self, records: Iterable[Dict[str, Any]]) -> ImportStats:
+        """
+        import records, return the stats once every batch is committed or has failed
+        """
+        self.stats = ImportStats()
+        self._queue = asyncio.Queue(self.concurrency)
+        self._vertex_batches = 0
+        self._vertices_committed = asyncio.Event()
+        workers = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+        try:
+            batch: List[Dict[str, Any]] = []
+            for record in records:
+                self.stats.read += 1
+                if batch and (len(batch) == self.batch_size or _is_edge(record) != _is_edge(batch[0])):
+                    await self._put(batch)
+                    batch = []
+                batch.append(record)
+            if batch:
+                await self._put(batch)
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.stats
+
+    async def _put(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        queue a batch, waiting for a free worker; edge batches first wait for the vertex batches before them
+        """
+        if _is_edge(batch[0]):
+            while self._vertex_batches:
+                self._vertices_committed.clear()
+                await self._vertices_committed.wait()
+        else:
+            self._vertex_batches += 1
+        await self._queue.put(batch)
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._queue.get()
+            try:
+                await self._commit(batch)
+            except Exception as e:
+                self._fail(len(batch), f"batch of {len(batch)} records: {e!r}")
+            finally:
+                if not _is_edge(batch[0]):
+                    self._vertex_batches -= 1
+                    if not self._vertex_batches:
+                        self._vertices_committed.set()
+                self._queue.task_done()
+                if self.progress is not None:
+                    self.progress(self.stats)
+
+    async def _commit(self, batch: List[Dict[str, Any]]) -> None:
+        edges = _is_edge(batch[0])
+        items = self._edges(batch) if edges else self._vertices(batch)
+        if not items:
+            return
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.pool.connection() as client:
+                    # creations plus the out_/in_ links of two vertices per edge: one transaction
+                    uow = UnitOfWork(client, 3 * len(items), self.cache)
+                    if edges:
+                        rids = [await uow.create_edge(*item) for item in items]
+                    else:
+                        rids = [await uow.create_vertex(class_name, fields) for _, class_name, fields in items]
+                    await uow.commit()
+            except PyOrientException as e:
+                if attempt == self.max_retries:
+                    self._fail(len(items), f"batch of {len(items)} records: {e}")
+                    return
+                self.stats.retries += 1
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            else:
+                break
+        self.stats.batches += 1
+        self.stats.commits += uow.commits
+        if edges:
+            self.stats.edges += len(rids)
+        else:
+            self.keys.update((key, uow.resolve(rid)) for (key, _, _), rid in zip(items, rids) if key is not None)
+            self.stats.vertices += len(rids)
+
+    def _vertices(self, batch: List[Dict[str, Any]]) -> List[Tuple[Union[str, None], str, Dict[str, Any]]]:
+        """
+        return (key, class name, fields) of the vertices
+        """
+        items = []
+        for record in batch:
+            class_name, fields = self._split(record)
+            key = fields.pop(self.key, None) if self.key.startswith("@") else fields.get(self.key)
+            items.append((None if key is None else str(key), class_name, fields))
+        return items
+
+    def _edges(self, batch: List[Dict[str, Any]]) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        """
+        return (class name, from rid, to rid, fields) of the edges, the ones with an unknown vertex fail
+        """
+        items = []
+        for record in batch:
+            class_name, fields = self._split(record)
+            ends = self._vertex(fields.pop("@from", None)), self._vertex(fields.pop("@to", None))
+            if None in ends:
+                self._fail(1, f"edge {record.get('@from')} -> {record.get('@to')}: unknown vertex")
+                continue
+            items.append((class_name, *ends, fields))
+        return items
+
+    def _split(self, record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        fields = dict(record)
+        class_name = fields.pop("@class", None) or self.class_name
+        if not class_name:
+            raise ValueError(f"record without class: {record}")
+        return class_name, fields
+
+    def _vertex(self, key: Any) -> Union[str, None]:
+        """
+        return rid of a vertex key, keys looking like a rid are rids
+        """
+        if key is None:
+            return None
+        key = str(key)
+        if key.startswith("#"):
+            return key
+        return self.keys.get(key)
+
+    def _fail(self, records: int, error: str) -> None:
+        self.stats.failed += records
+        if len(self.stats.errors) < 100:
+            self.stats.errors.append(error)
+
+
+def _format_of(path: str, format: Union[str, None]) -> str:
+    if format:
+        return format
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if path.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"can't tell the format of {path}, pass --format")
+
+
+def _read_files(paths: Iterable[str], format: Union[str, None]) -> Iterator[Dict[str, Any]]:
+    """
+    yield the records of the files one after the other, so vertices of a file are known to the edges of the next
+    """
+    for path in paths:
+        if path == "-":
+            yield from read_records(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8"), format or "ndjson")
+            continue
+        with open(path, newline="", encoding="utf-8") as lines:
+            yield from read_records(lines, _format_of(path, format))
+
+
+async def import_files(args: argparse.Namespace) -> ImportStats:
+    pool = OrientConnectionPool(args.host, args.port, args.database, args.user, args.password,
+                                min_size=0, max_size=args.concurrency)
+    progress = None if args.quiet else lambda stats: print(f"\r{stats}", end="", file=sys.stderr, flush=True)
+    importer = BulkImporter(pool, args.batch_size, args.concurrency, args.class_name, args.key,
+                            args.retries, progress=progress)
+    try:
+        return await importer.run(_read_files(args.files, args.format))
+    finally:
+        await pool.close()
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.importer",
+                                     description="bulk import of vertices and edges from NDJSON or CSV files")
+    parser.add_argument("files", nargs="+", help="files imported in order, - reads NDJSON from stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2424)
+    parser.add_argument("--database", required=True)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="root")
+    parser.add_argument("--format", choices=FORMATS, help="format of the files, by default from their extension")
+    parser.add_argument("--class", dest="class_name", help="class of the records without @class")
+    parser.add_argument("--key", default="@key", help="field holding the vertex keys the edges refer to (@key)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="records per transaction (1000)")
+    parser.add_argument("--concurrency", type=int, default=4, help="transactions committed at once (4)")
+    parser.add_argument("--retries", type=int, default=3, help="attempts of a failed batch after the first (3)")
+    parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(import_files(args))
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(json.dumps(stats.as_dict()))
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Union
+
+from pyorient import OrientDB, AsyncOrientDB, QUERY_PAGE_SIZE
+
+from ..batch import Batch
+from ..cache import MISSING, ResultCache
+from ..unit_of_work import UnitOfWork
+from ..utils import resolve
+
 
 class Manager(ABC):
     """
     abstract class for managers
         sub_classes will use query_builder to execute queries on orientdb
+        client can be OrientDB or AsyncOrientDB, calls should go through `core.utils.resolve`
+        with a cache, retrieve results are kept in it and writes invalidate them
     """
 
+    def __init__(self, client: Union[OrientDB, AsyncOrientDB], cache: Union[ResultCache, None] = None):
+        self.client = client
+        self.cache = cache
+
     @abstractmethod
     async def create(self, class_name: str, data: Dict[str, Any]) -> str:
         pass
@@ -22,3 +36,112 @@ class Manager(ABC):
     @abstractmethod
     async def retrieve(self, filters: Dict[str, Any]) -> Any:
         pass
+
+    def batch(self, transaction: bool = False, retry: Union[int, None] = None) -> Batch:
+        """
+        statements to send in one round trip, see core.batch.Batch
+        """
+        return Batch(self.client, transaction, retry)
+
+    def unit_of_work(self, commit_size: int = 1000) -> UnitOfWork:
+        """
+        record writes buffered on the client and committed in transactions, see core.unit_of_work.UnitOfWork
+        """
+        return UnitOfWork(self.client, commit_size, self.cache)
+
+    async def _cached(
+            self,
+            query: str,
+            params: Union[Dict[str, Any], None],
+            tags: Iterable[str],
+            fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        result of query from the cache, fetched and stored when it isn't there
+            tags are the classes the result reads, see ResultCache.put
+        """
+        if self.cache is None:
+            return await fetch()
+        key = self.cache.key(self.client, query, params=params)
+        result = self.cache.get(key)
+        if result is MISSING:
+            result = await fetch()
+            self.cache.put(key, result, tags)
+        return result
+
+    def _invalidate(self, *tags: str) -> None:
+        """
+        drop cached results reading any of the classes tags
+        """
+        if self.cache is not None:
+            self.cache.invalidate(*tags)
+
+    @staticmethod
+    def _bind(params: Union[Dict[str, Any], None]) -> Dict[str, Any]:
+        """
+        keyword arguments of the client passing params, none for a query without parameters
+        """
+        return {"params": params} if params else {}
+
+    async def _retrieve_page(
+            self,
+            query: str,
+            page_size: int,
+            cursor: Union[str, None],
+            params: Union[Dict[str, Any], None] = None,
+    ) -> Dict[str, Any]:
+        """
+        one page of the result of query, kept by orientdb in a server side cursor
+            cursor is None for the first page, then the cursor returned with the previous page,
+            which only exists in the session that opened it
+            returned cursor is None after the last page
+        """
+        if cursor is None:
+            query_cursor = await resolve(self.client.query_cursor(query, page_size, **self._bind(params)))
+        else:
+            query_cursor = self.client.resume_query(cursor, page_size)
+            await resolve(query_cursor.next_page())
+        return {
+            "result": query_cursor.records,
+            "cursor": query_cursor.query_id if query_cursor.has_next_page else None,
+        }
+
+    async def scan(
+            self,
+            class_name: str,
+            page_size: int = QUERY_PAGE_SIZE,
+            cursor: Union[str, None] = None,
+            filters: Union[Dict[str, Any], None] = None,
+    ) -> Dict[str, Any]:
+        """
+        one page of the records of a class in rid order, paged by keyset
+            cursor is None for the first page, then the cursor returned with the previous page
+            returned cursor is the rid of the last record of the page ("12:40"), None after the last page
+            pages stay stable while records are added, the cursor can be kept as long as needed
+            filters ({"field": value}) are sent as parameters, every page is then the same query
+            ValueError for a class_name, field or cursor that can't be written in the query
+        """
+        query, params = self._query_builder.query_scan(class_name, cursor, page_size, filters)
+        records = await resolve(self.client.query(query, -1, **self._bind(params)))
+        next_cursor = None
+        if len(records) == page_size:
+            next_cursor = records[-1]._rid.lstrip("#")
+        return {"result": records, "cursor": next_cursor}
+
+    async def iter_scan(
+            self,
+            class_name: str,
+            page_size: int = QUERY_PAGE_SIZE,
+            filters: Union[Dict[str, Any], None] = None,
+    ) -> AsyncIterator:
+        """
+        every record of a class in rid order, fetched page by page
+        """
+        cursor = None
+        while True:
+            page = await self.scan(class_name, page_size, cursor, filters)
+            for record in page["result"]:
+                yield record
+            cursor = page["cursor"]
+            if cursor is None:
+                return
@@ -1,11 +1,13 @@
-from typing import List, Dict, Union
+from typing import AsyncIterator, List, Dict, Union
 
 import pyorient.exceptions
-from pyorient.orient import OrientDB
-from httpx import AsyncClient
+from pyorient import OrientDB, AsyncOrientDB
 
 from .base import Manager
+from ..cache import ResultCache
 from ..query_builders import ClassQueryBuilder
+from ..schema_cache import SchemaCache
+from ..utils import iterate, resolve
 
 
 class ClassManager(Manager):
@@ -13,10 +15,18 @@ class ClassManager(Manager):
     concrete binary manager for `orientdb classes`
     implements abstract manager
     methods will execute command and queries on orientdb using orient binary protocol
+    cached results are tagged with "schema", every class change drops them
+        and the schema of schema_cache, the one the vertex and edge managers validate writes with
     """
 
-    def __init__(self, client: OrientDB):
-        self.client = client
+    def __init__(
+            self,
+            client: Union[OrientDB, AsyncOrientDB],
+            cache: Union[ResultCache, None] = None,
+            schema_cache: Union[SchemaCache, None] = None,
+    ):
+        super().__init__(client, cache)
+        self.schema_cache = schema_cache
         self._query_builder = ClassQueryBuilder()
 
     async def create(
@@ -30,7 +40,9 @@ class ClassManager(Manager):
         """
         query = self._query_builder.query_create(class_name, extends, abstract)
         try:
-            result = self.client.command(query)
+            result = await resolve(self.client.command(query))
+            self._invalidate("schema", class_name)
+            self._invalidate_schema()
             return True
         except pyorient.exceptions.PyOrientSchemaException as e:
             if "already exists in current database" in e:
@@ -38,16 +50,37 @@ class ClassManager(Manager):
 
     async def update(self, class_name: str, data: Dict[str, List]) -> bool:
         commands: List = self._query_builder.query_update(class_name, data)
-        (self.client.command(command) for command in commands)
+        batch = self.batch()
+        for command in commands:
+            batch.add(command)
+        await batch.execute()
+        self._invalidate("schema", class_name)
+        self._invalidate_schema()
         return True
 
+    def _invalidate_schema(self) -> None:
+        if self.schema_cache is not None:
+            self.schema_cache.invalidate(self.client)
+
     async def delete(self, instance_id: str) -> Exception:
         raise Exception("Classes cant be deleted temporary.")
 
     async def retrieve(self, class_name: Union[str, None] = None) -> List[Dict]:
         query = self._query_builder.query_retrieve(class_name)
-        res = self.client.query(query)
-        if not res:
-            raise Exception("nothing found!")
-        result = [r.__dict__ for r in res]
+
+        async def fetch() -> List[Dict]:
+            res = await resolve(self.client.query(query))
+            if not res:
+                raise Exception("nothing found!")
+            return [r.__dict__ for r in res]
+
+        result = await self._cached(query, None, ("schema",), fetch)
         return result
+
+    async def iter_retrieve(self, class_name: Union[str, None] = None) -> AsyncIterator[Dict]:
+        """
+        like retrieve, yields each class as soon as it is received
+        """
+        query = self._query_builder.query_retrieve(class_name)
+        async for record in iterate(self.client.query_stream(query)):
+            yield record.__dict__
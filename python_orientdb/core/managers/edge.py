@@ -1,10 +1,14 @@
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Union
 
-from pyorient.orient import OrientDB
+from pyorient import OrientDB, AsyncOrientDB, QUERY_PAGE_SIZE
 
 from .base import Manager
+from ..cache import ResultCache
 from ..query_builders import EdgeQueryBuilder
+from ..schema_cache import SchemaCache
 from ..schema_validator import SchemaValidator
+from ..unit_of_work import UnitOfWork
+from ..utils import resolve
 
 
 class EdgeManager(Manager):
@@ -12,24 +16,57 @@ class EdgeManager(Manager):
     concrete manager for `orientdb edges`
     implements abstract manager
     methods will execute command and queries on orientdb
+    cached results are tagged with the edge class, "E" and "V": they read vertices too,
+        and edge writes change the edge fields of vertices, so they drop the vertex results
+    creates are checked against the schema of schema_cache (see core.schema_cache), share it between managers
     """
 
-    def __init__(self, client: OrientDB):
-        super().__init__(client)
-        self.client = client
+    def __init__(
+            self,
+            client: Union[OrientDB, AsyncOrientDB],
+            cache: Union[ResultCache, None] = None,
+            schema_cache: Union[SchemaCache, None] = None,
+    ):
+        super().__init__(client, cache)
         self._query_builder = EdgeQueryBuilder()
-        self._schema_validator = SchemaValidator(self.client)
+        self._schema_validator = SchemaValidator(self.client, schema_cache)
 
     async def create(self, class_name: str, data: Dict[str, Any]) -> Dict:
-        self._schema_validator.validate_class_properties(class_name, data)
-        command = self._query_builder.query_create(class_name, data)
-        result = self.client.command(command)
+        await self._schema_validator.validate_class_properties(class_name, data, reserved=("from", "to"))
+        command, params = self._query_builder.query_create(class_name, data)
+        result = await resolve(self.client.command(command, **self._bind(params)))
+        self._invalidate(class_name, "V")
         return result[0].__dict__
 
+    async def create_many(
+            self,
+            class_name: str,
+            items: Iterable[Dict[str, Any]],
+            unit_of_work: Union[UnitOfWork, None] = None,
+            commit_size: int = 1000,
+    ) -> List[str]:
+        """
+        create edges with one transaction per commit_size of them, like VertexManager.create_many
+            items hold the rids of the vertices in "from" and "to",
+            temporary rids of vertices created by the same unit of work included
+        input example: ("Knows", [{"from": "#12:0", "to": "#-1:-3", "since": 2020}])
+        return rids of the edges, in the order of items
+        """
+        uow = unit_of_work if unit_of_work is not None else self.unit_of_work(commit_size)
+        rids = []
+        for data in items:
+            data = dict(data)
+            rids.append(await uow.create_edge(class_name, data.pop("from"), data.pop("to"), data))
+        if unit_of_work is not None:
+            return rids
+        await uow.commit()
+        return [uow.resolve(rid) for rid in rids]
+
     async def update(self, rid: str, data: Dict[str, Any]) -> Dict:
         query = self._query_builder.query_update(rid, data)
-        i = self.client.command(query)
-        result = self.client.record_load(rid)
+        # the update and the load of the updated edge in one round trip
+        _, result = await resolve(self.client.pipeline().command(query).record_load(rid).execute())
+        self._invalidate("E", "V")
         return result.__dict__
 
     async def delete(self, rid: str) -> Any:
@@ -38,18 +75,27 @@ class EdgeManager(Manager):
         used orient.record_delete() and it destroyed the whole database,
         """
         command = self._query_builder.query_delete(rid)
-        result = self.client.command(command)
+        result = await resolve(self.client.command(command))
+        self._invalidate("E", "V")
         return result
 
     async def retrieve(
             self,
             class_name: str,
-            out_filter: str = "1=1",
-            in_filter: str = "1=1",
-            data: Dict[str, Any] = None,
+            out_filters: Union[Dict[str, Any], None] = None,
+            in_filters: Union[Dict[str, Any], None] = None,
+            page_size: Union[int, None] = None,
+            cursor: Union[str, None] = None,
     ) -> Any:
-        query = self._query_builder.query_retrieve(
-            class_name, out_filter, in_filter, data
+        """
+        edges of class_name between vertices whose fields equal out_filters and in_filters ({"field": value}),
+            sent as parameters, the query then stays the same whatever the values
+        with page_size (or cursor) returns one page {"result": [...], "cursor": ...}, see Manager._retrieve_page
+        """
+        query, params = self._query_builder.query_retrieve(class_name, out_filters, in_filters)
+        if page_size is not None or cursor is not None:
+            return await self._retrieve_page(query, page_size or QUERY_PAGE_SIZE, cursor, params)
+        result = await self._cached(
+            query, params, (class_name, "E", "V"), lambda: resolve(self.client.query(query, **self._bind(params)))
         )
-        result = self.client.query(query)
         return result
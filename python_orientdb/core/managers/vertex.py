@@ -1,10 +1,16 @@
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Iterable, List, Union
 
-from pyorient.orient import OrientDB
+from pyorient import OrientDB, AsyncOrientDB, QUERY_PAGE_SIZE
 
 from .base import Manager
+from ..cache import ResultCache
+from ..placement import Placement
+from ..schema_cache import SchemaCache
 from ..query_builders import VertexQueryBuilder
 from ..schema_validator import SchemaValidator
+from ..unacked import UnackedVertices
+from ..unit_of_work import UnitOfWork
+from ..utils import iterate, resolve
 
 
 class VertexManager(Manager):
@@ -12,31 +18,108 @@ class VertexManager(Manager):
     concrete manager for `orientdb Vertices`
     implements abstract manager
     methods will execute command and queries on orientdb
+    cached results of a class are tagged with its name and "V",
+        creates drop the results of their class (results of its superclasses expire with the ttl),
+        updates and deletes only know the rid and drop every vertex result (and the edge ones, tagged "V" too)
+    with a placement, creates go to the cluster it chooses instead of the one orientdb does, see core.placement
+    creates are checked against the schema of schema_cache (see core.schema_cache), share it between managers
     """
 
-    def __init__(self, client: OrientDB):
-        super().__init__(client)
-        self.client = client
+    def __init__(
+            self,
+            client: Union[OrientDB, AsyncOrientDB],
+            cache: Union[ResultCache, None] = None,
+            placement: Union[Placement, None] = None,
+            schema_cache: Union[SchemaCache, None] = None,
+    ):
+        super().__init__(client, cache)
+        self.placement = placement
         self._query_builder = VertexQueryBuilder()
-        self._schema_validator = SchemaValidator(self.client)
+        self._schema_validator = SchemaValidator(self.client, schema_cache)
 
     async def create(self, class_name: str, data: Dict[str, Any]) -> Dict:
-        self._schema_validator.validate_class_properties(class_name, data)
+        await self._schema_validator.validate_class_properties(class_name, data)
         d = {f"@{class_name}": data}
-        result = self.client.record_create(-1, d)
+        result = await resolve(self.client.record_create(await self._cluster_id(class_name, data), d))
+        self._invalidate(class_name)
         return result
 
+    async def create_many(
+            self,
+            class_name: str,
+            items: Iterable[Dict[str, Any]],
+            unit_of_work: Union[UnitOfWork, None] = None,
+            commit_size: int = 1000,
+    ) -> List[str]:
+        """
+        create vertices with one transaction per commit_size of them
+            with unit_of_work they are only queued on it and their temporary rids are returned,
+            which EdgeManager.create_many of the same unit of work can link
+        return rids of the vertices, in the order of items
+        """
+        uow = unit_of_work if unit_of_work is not None else self.unit_of_work(commit_size)
+        rids = [await uow.create_vertex(class_name, data) for data in items]
+        if unit_of_work is not None:
+            return rids
+        await uow.commit()
+        return [uow.resolve(rid) for rid in rids]
+
+    def unacked_writes(self, max_pending: int = 1000) -> UnackedVertices:
+        """
+        vertex writes that don't wait for orientdb, confirmed by UnackedVertices.flush
+            for high throughput ingest, records are not validated against the schema
+        """
+        return UnackedVertices(self.client, max_pending, self.cache, self.placement)
+
+    async def _cluster_id(self, class_name: str, data: Dict[str, Any]) -> int:
+        """
+        cluster to create a vertex of class_name in, -1 lets orientdb choose
+        """
+        if self.placement is None:
+            return -1
+        return await self.placement.cluster_id(self.client, class_name, data)
+
     async def update(self, rid: str, data: Dict[str, Any]) -> Dict:
         query = self._query_builder.query_update(rid, data)
-        result = self.client.command(query)
+        result = await resolve(self.client.command(query))
+        self._invalidate("V")
         return result[0].__dict__
 
     async def delete(self, rid: str) -> bool:
         cluster, instance_id = map(int, rid.split("#")[1].split(":"))
-        result = self.client.record_delete(cluster, instance_id)
+        result = await resolve(self.client.record_delete(cluster, instance_id))
+        self._invalidate("V")
         return result
 
-    async def retrieve(self, class_name: str, vertex_filter: str = "1=1") -> Dict:
-        query = self._query_builder.query_retrieve(class_name, vertex_filter)
-        result = self.client.query(query)
+    async def retrieve(
+            self,
+            class_name: str,
+            filters: Union[Dict[str, Any], None] = None,
+            page_size: Union[int, None] = None,
+            cursor: Union[str, None] = None,
+    ) -> Dict:
+        """
+        vertices of class_name whose fields equal filters ({"field": value}), sent as parameters
+            the query then stays the same whatever the values
+        with page_size (or cursor) returns one page {"result": [...], "cursor": ...}, see Manager._retrieve_page
+        """
+        query, params = self._query_builder.query_retrieve(class_name, filters)
+        if page_size is not None or cursor is not None:
+            return await self._retrieve_page(query, page_size or QUERY_PAGE_SIZE, cursor, params)
+        result = await self._cached(
+            query, params, (class_name, "V"), lambda: resolve(self.client.query(query, **self._bind(params)))
+        )
         return result
+
+    async def iter_retrieve(
+            self,
+            class_name: str,
+            filters: Union[Dict[str, Any], None] = None,
+    ) -> AsyncIterator:
+        """
+        like retrieve, yields each record as soon as it is received
+            the result is never held in memory
+        """
+        query, params = self._query_builder.query_retrieve(class_name, filters)
+        async for record in iterate(self.client.query_stream(query, **self._bind(params))):
+            yield record
@@ -1,12 +1,29 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Union, Any, List
 import pyorient as pyorient
+from pyorient.pool import OrientConnectionPool
 
+from .cache import ResultCache
 from .managers import ClassManager, EdgeManager, VertexManager
+from .placement import AffinityPlacement
+from .schema_cache import SchemaCache
+from .utils import resolve
+
+# client of the current request, every request (asyncio task) sees its own
+_client: ContextVar = ContextVar("orient_client", default=None)
 
 
 class Orient:
+    # retrieve results of the managers, shared by every request and keyed by database
+    result_cache = ResultCache()
+    # clusters of the vertices created, each pooled connection writes to its own cluster of a class
+    placement = AffinityPlacement()
+    # schema the vertex and edge creates are validated with, by database, dropped by the class manager
+    schema_cache = SchemaCache()
+
     def __init__(self):
-        self.client: Union[pyorient.OrientDB, None] = None
+        self.client: Union[pyorient.OrientDB, pyorient.AsyncOrientDB, None] = None
 
     # Singleton
     _instance = None
@@ -16,48 +33,68 @@ class Orient:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    @property
+    def client(self) -> Union[pyorient.OrientDB, pyorient.AsyncOrientDB, None]:
+        return _client.get()
+
+    @client.setter
+    def client(self, client: Union[pyorient.OrientDB, pyorient.AsyncOrientDB, None]):
+        _client.set(client)
+
+    @asynccontextmanager
+    async def borrow(self, pool: OrientConnectionPool):
+        """
+        set a connection from pool as client until the block exits, then give it back to the pool
+        """
+        async with pool.connection() as client:
+            token = _client.set(client)
+            try:
+                yield client
+            finally:
+                _client.reset(token)
+
     @property
     def class_manager(self):
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        return ClassManager(self.client)
+        return ClassManager(self.client, self.result_cache, self.schema_cache)
 
     @property
     def edge_manager(self):
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        return EdgeManager(self.client)
+        return EdgeManager(self.client, self.result_cache, self.schema_cache)
 
     @property
     def vertex_manager(self):
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        return VertexManager(self.client)
+        return VertexManager(self.client, self.result_cache, self.placement, self.schema_cache)
 
-    def connect_to_orient(self, user: str, password: str):
+    async def connect_to_orient(self, user: str, password: str):
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        self.client.connect(user, password)
+        await resolve(self.client.connect(user, password))
 
-    def list_databases(self) -> List:
+    async def list_databases(self) -> List:
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        result = self.client.query("LIST DATABASES")
+        result = await resolve(self.client.query("LIST DATABASES"))
         return result
 
-    def open_database(self, db_name: str, user: str, password: str):
+    async def open_database(self, db_name: str, user: str, password: str):
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        self.client.db_open(db_name, user, password)
+        await resolve(self.client.db_open(db_name, user, password))
 
-    def get_schema(self, db_name: str):
+    async def get_schema(self, db_name: str):
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        result = self.client.query("select * from metadata:schema")
+        result = await resolve(self.client.query("select * from metadata:schema"))
         return result
 
-    def close(self):
+    async def close(self):
         if not self.client:
             raise AttributeError("Orient.client should not be None")
-        self.client.db_close()
+        await resolve(self.client.db_close())
         self.client.close()
@@ -0,0 +1,185 @@
+import zlib
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from itertools import count
+from threading import Lock
+from typing import Any, Dict, List, Union
+from weakref import WeakKeyDictionary
+
+from pyorient import OrientDB, AsyncOrientDB
+
+from .schema_cache import SCHEMA_QUERY
+from .utils import resolve
+
+
+def cluster_name(cluster: Any) -> str:
+    """
+    return name of a cluster of OrientDB.clusters as str, the protocol gives bytes
+    """
+    name = cluster.name
+    return name.decode("utf-8") if isinstance(name, bytes) else name
+
+
+class Placement(ABC):
+    """
+    strategy choosing the cluster of the records created in a class
+        the clusters of a class are its clusterIds in the schema (the names can't tell person_1 of Person
+        from the cluster of a class named Person_1), read once per client
+        and read again for a class missing from them (created since) or when db_open or db_reload
+        gave the client new clusters
+        a class without clusters is left to orientdb (cluster -1)
+        safe to share between managers, asyncio tasks and threads
+    """
+
+    name = ""
+
+    def __init__(self):
+        self._lock = Lock()
+        # client -> (clusters list read, {class name: cluster ids})
+        self._clusters: "WeakKeyDictionary[Any, tuple]" = WeakKeyDictionary()
+        self.placed: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.unplaced = 0
+        self.refreshes = 0
+
+    async def class_clusters(self, client: Union[OrientDB, AsyncOrientDB], class_name: str) -> List[int]:
+        """
+        return ids of the clusters of class_name, sorted
+        """
+        key = class_name.lower()
+        with self._lock:
+            seen, classes = self._clusters.get(client, (None, None))
+            if seen is client.clusters and key in classes:
+                return classes[key]
+        schema = await resolve(client.query(SCHEMA_QUERY))
+        classes = {
+            schema_class["name"].lower(): sorted(
+                cluster_id for cluster_id in schema_class.get("clusterIds") or () if cluster_id >= 0)
+            for schema_class in getattr(schema[0], "oRecordData", schema[0])["classes"]
+        }
+        with self._lock:
+            self._clusters[client] = (client.clusters, classes)
+            self.refreshes += 1
+        return classes.get(key, [])
+
+    async def cluster_id(self, client: Union[OrientDB, AsyncOrientDB], class_name: str, data: Dict[str, Any]) -> int:
+        """
+        return cluster id to create a record of class_name with data in, -1 for orientdb to choose
+        """
+        cluster_ids = await self.class_clusters(client, class_name)
+        with self._lock:
+            if not cluster_ids:
+                self.unplaced += 1
+                return -1
+            cluster_id = self._choose(client, class_name, cluster_ids, data)
+            self.placed[class_name][cluster_id] += 1
+        return cluster_id
+
+    @abstractmethod
+    def _choose(self, client: Any, class_name: str, cluster_ids: List[int], data: Dict[str, Any]) -> int:
+        pass
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        return records placed by class and cluster, records left to orientdb and schemas read
+        """
+        with self._lock:
+            return {
+                "strategy": self.name,
+                "placed": {class_name: dict(clusters) for class_name, clusters in self.placed.items()},
+                "unplaced": self.unplaced,
+                "refreshes": self.refreshes,
+            }
+
+
+class RoundRobinPlacement(Placement):
+    """
+    each class writes to its clusters in turn
+    """
+
+    name = "round_robin"
+
+    def __init__(self):
+        super().__init__()
+        self._turns: Dict[str, count] = defaultdict(count)
+
+    def _choose(self, client: Any, class_name: str, cluster_ids: List[int], data: Dict[str, Any]) -> int:
+        return cluster_ids[next(self._turns[class_name.lower()]) % len(cluster_ids)]
+
+
+class AffinityPlacement(Placement):
+    """
+    each client (connection) writes to one cluster of a class, the clients take the clusters in turn
+        concurrent ingest over pooled connections then never contends on a cluster
+        while there are at least as many clusters as connections
+    """
+
+    name = "affinity"
+
+    def __init__(self):
+        super().__init__()
+        self._slots: "WeakKeyDictionary[Any, int]" = WeakKeyDictionary()
+        self._next_slot = count()
+
+    def _choose(self, client: Any, class_name: str, cluster_ids: List[int], data: Dict[str, Any]) -> int:
+        if client not in self._slots:
+            self._slots[client] = next(self._next_slot)
+        return cluster_ids[self._slots[client] % len(cluster_ids)]
+
+
+class HashPlacement(Placement):
+    """
+    records with the same value of a key field always go to the same cluster
+        key is the field name for every class, or {class name: field name}
+        records without the key, or of a class without one, are placed round robin
+    """
+
+    name = "hash"
+
+    def __init__(self, key: Union[str, Dict[str, str]]):
+        super().__init__()
+        self.key = key
+        self._fallback = RoundRobinPlacement()
+
+    def _choose(self, client: Any, class_name: str, cluster_ids: List[int], data: Dict[str, Any]) -> int:
+        field = self.key if isinstance(self.key, str) else self.key.get(class_name)
+        if field is None or data.get(field) is None:
+            return self._fallback._choose(client, class_name, cluster_ids, data)
+        # crc32 is stable between processes, unlike hash()
+        return cluster_ids[zlib.crc32(str(data[field]).encode("utf-8")) % len(cluster_ids)]
+
+
+class ClassPlacement(Placement):
+    """
+    one strategy per class, default for the other classes (None leaves them to orientdb)
+        ClassPlacement({"Sample": AffinityPlacement(), "User": HashPlacement("email")})
+    """
+
+    name = "by_class"
+
+    def __init__(self, strategies: Dict[str, Placement], default: Union[Placement, None] = None):
+        super().__init__()
+        self.strategies = {class_name.lower(): strategy for class_name, strategy in strategies.items()}
+        self.default = default
+
+    def _strategy(self, class_name: str) -> Union[Placement, None]:
+        return self.strategies.get(class_name.lower(), self.default)
+
+    async def cluster_id(self, client: Union[OrientDB, AsyncOrientDB], class_name: str, data: Dict[str, Any]) -> int:
+        strategy = self._strategy(class_name)
+        if strategy is None:
+            with self._lock:
+                self.unplaced += 1
+            return -1
+        return await strategy.cluster_id(client, class_name, data)
+
+    def _choose(self, client: Any, class_name: str, cluster_ids: List[int], data: Dict[str, Any]) -> int:
+        return self._strategy(class_name)._choose(client, class_name, cluster_ids, data)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        stats = {class_name: strategy.stats for class_name, strategy in self.strategies.items()}
+        if self.default is not None:
+            stats["default"] = self.default.stats
+        with self._lock:
+            return {"strategy": self.name, "classes": stats, "unplaced": self.unplaced}
@@ -1,5 +1,58 @@
+import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Union
+
+from pyorient.otypes import OrientRecordLink
+
+RID = re.compile(r"^#?(-?\d+):(\d+)$")
+IDENTIFIER = re.compile(r"^@?[A-Za-z_]\w*$")
+
+
+def identifier(name: str) -> str:
+    """
+    return name if it can be written in a query as a class or field name, otherwise ValueError
+        names can't be parameters, so they are checked instead
+    """
+    if not isinstance(name, str) or IDENTIFIER.match(name) is None:
+        raise ValueError(f"{name!r} is not a valid name")
+    return name
+
+
+def record_id(rid: str) -> str:
+    """
+    return rid as written in a query (#12:0) if it is a record id ("#12:0" or "12:0"), otherwise ValueError
+    """
+    match = RID.match(rid) if isinstance(rid, str) else None
+    if match is None:
+        raise ValueError(f"{rid!r} is not a record id")
+    return f"#{match.group(1)}:{match.group(2)}"
+
+
+def parameter(field: str, prefix: str = "") -> str:
+    """
+    return name of the parameter of a field, "@" of a record attribute becomes "at_"
+    input example: ("@rid", "f_")
+    return example: f_at_rid
+    """
+    field = identifier(field)
+    return prefix + ("at_" + field[1:] if field.startswith("@") else field)
+
+
+@lru_cache(maxsize=256)
+def where_template(fields: Tuple[str, ...], prefix: str = "") -> str:
+    """
+    return the condition matching each field with its parameter, the same for any value
+        ValueError when two fields would share a parameter ("@rid" and "at_rid")
+    input example: (("name", "age"), "from_")
+    return example: name = :from_name AND age = :from_age
+    """
+    if not fields:
+        return "1=1"
+    names = [parameter(field, prefix) for field in fields]
+    if len(set(names)) != len(names):
+        raise ValueError(f"fields {', '.join(fields)} share a parameter name")
+    return " AND ".join(f"{field} = :{name}" for field, name in zip(fields, names))
 
 
 class QueryBuilder(ABC):
@@ -9,7 +62,7 @@ class QueryBuilder(ABC):
     """
 
     @abstractmethod
-    def query_create(self, class_name: str, data: Dict[str, Any]) -> str:
+    def query_create(self, *args, **kwargs) -> Union[str, Tuple[str, Dict[str, Any]]]:
         pass
 
     @abstractmethod
@@ -21,5 +74,53 @@ class QueryBuilder(ABC):
         pass
 
     @abstractmethod
-    def query_retrieve(self, *args, **kwargs) -> str:
+    def query_retrieve(self, *args, **kwargs) -> Union[str, Tuple[str, Dict[str, Any]]]:
         pass
+
+    def query_set(self, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        return SET clause template and its parameters for fields to be given values
+        input example: ({"name": "Luca", "age": 30})
+        return example: ("SET name = :name, age = :age", {"name": "Luca", "age": 30})
+        """
+        if not data:
+            return "", {}
+        for field in data:
+            if identifier(field).startswith("@"):
+                raise ValueError(f"{field!r} can't be set")
+        return "SET " + ", ".join(f"{field} = :{field}" for field in data), dict(data)
+
+    def query_where(self, filters: Dict[str, Any], prefix: str = "") -> Tuple[str, Dict[str, Any]]:
+        """
+        return condition template and its parameters for fields equal to values
+        input example: ({"name": "Luca", "age": 30})
+        return example: ("name = :name AND age = :age", {"name": "Luca", "age": 30})
+        """
+        template = where_template(tuple(filters), prefix)
+        params = {parameter(field, prefix): value for field, value in filters.items()}
+        return template, params
+
+    def query_scan(
+            self,
+            class_name: str,
+            last_rid: Union[str, None] = None,
+            limit: int = 100,
+            filters: Union[Dict[str, Any], None] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        return query for one page of a class, in rid order, after last_rid, and its parameters
+            pages by keyset instead of SKIP so every page costs the same,
+            the values are parameters so the query is the same for every page,
+            the ones of filters are prefixed by "f_" not to be mistaken for last_rid
+        input example: ("Person", "#12:40", 100, {"name": "Luca"})
+        return example:
+          ("SELECT FROM Person WHERE @rid > :last_rid AND (name = :f_name) ORDER BY @rid LIMIT 100",
+           {"last_rid": #12:40, "f_name": "Luca"})
+        """
+        where, params = self.query_where(filters or {}, "f_")
+        query = f"SELECT FROM {identifier(class_name)} WHERE "
+        if last_rid is not None:
+            params["last_rid"] = OrientRecordLink(record_id(last_rid).lstrip("#"))
+            query += "@rid > :last_rid AND "
+        query += f"({where}) ORDER BY @rid LIMIT {int(limit)}"
+        return query, params
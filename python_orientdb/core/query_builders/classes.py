@@ -1,6 +1,19 @@
+import re
 from typing import Dict, List, Union, Any
 
-from .base import QueryBuilder
+from .base import QueryBuilder, identifier
+
+ATTRIBUTE_VALUE = re.compile(r"^-?[\w.]+$")
+
+
+def attribute_value(value: Any) -> str:
+    """
+    return value of a property attribute (true, 10, 2.5, STRING...) as written in ALTER PROPERTY, otherwise ValueError
+    """
+    value = str(value)
+    if ATTRIBUTE_VALUE.match(value) is None:
+        raise ValueError(f"{value!r} is not a valid attribute value")
+    return value
 
 
 class ClassQueryBuilder(QueryBuilder):
@@ -19,9 +32,9 @@ class ClassQueryBuilder(QueryBuilder):
         """
         return query creates a class that can be abstract or extend other class
         """
-        query = f"CREATE CLASS {class_name} "
+        query = f"CREATE CLASS {identifier(class_name)} "
         if extends:
-            query += f"EXTENDS {extends} "
+            query += f"EXTENDS {identifier(extends)} "
         if abstract:
             query += "ABSTRACT"
         return query
@@ -33,6 +46,7 @@ class ClassQueryBuilder(QueryBuilder):
                 ({"update": [{"property":"Age", "attribute":"MANDATORY", "value":"true"}, ...],
                   "create": [{"property": "birth", "type": "STRING"}, ...]})
         """
+        class_name = identifier(class_name)
         commands = []
         if "create" in data:
             # [reference](https://orientdb.com/docs/last/general/Types.html)
@@ -41,8 +55,8 @@ class ClassQueryBuilder(QueryBuilder):
                 raise ValueError("types not supported")
 
             try:
-                commands + [
-                    f"CREATE PROPERTY {class_name}.{prop['property']} {prop['type']}"
+                commands += [
+                    f"CREATE PROPERTY {class_name}.{identifier(prop['property'])} {prop['type']}"
                     for prop in data["create"]
                 ]
             except KeyError as e:
@@ -50,8 +64,9 @@ class ClassQueryBuilder(QueryBuilder):
 
         if "update" in data:
             try:
-                commands + [
-                    f"ALTER PROPERTY {class_name}.{prop['property']} {prop['attribute']} {prop['value']}"
+                commands += [
+                    f"ALTER PROPERTY {class_name}.{identifier(prop['property'])} {identifier(prop['attribute'])} "
+                    f"{attribute_value(prop['value'])}"
                     for prop in data["update"]
                 ]
             except KeyError:
@@ -67,6 +82,6 @@ class ClassQueryBuilder(QueryBuilder):
     def query_retrieve(self, class_name: Union[str, None] = None) -> str:
         query = "SELECT classes FROM metadata:schema"
         if class_name:
-            query = f"SELECT * FROM (SELECT expand(classes) FROM metadata:schema) WHERE name='{class_name}'"
+            query = f"SELECT * FROM (SELECT expand(classes) FROM metadata:schema) WHERE name='{identifier(class_name)}'"
 
         return query
@@ -1,7 +1,7 @@
 from json import dumps
-from typing import Any, Dict
+from typing import Any, Dict, Tuple, Union
 
-from .base import QueryBuilder
+from .base import QueryBuilder, identifier, record_id
 
 
 class EdgeQueryBuilder(QueryBuilder):
@@ -13,16 +13,20 @@ class EdgeQueryBuilder(QueryBuilder):
 
     def query_create(
             self, class_name: str, data: Dict[str, Any]
-    ) -> str:
+    ) -> Tuple[str, Dict[str, Any]]:
         """
-        return query can be used for create an edge instance
+        return query can be used for create an edge instance, and its parameters
+        input example: ("Knows", {"from": "#12:0", "to": "#12:1", "since": 2020})
+        return example: ("CREATE EDGE Knows FROM #12:0 TO #12:1 SET since = :since", {"since": 2020})
         """
-        query = f"CREATE EDGE {class_name} FROM {data.pop('from')} TO {data.pop('to')}"
-        props = " ".join(f"{key}={value}" for key, value in data.items())
+        data = dict(data)
+        ends = record_id(data.pop('from')), record_id(data.pop('to'))
+        query = f"CREATE EDGE {identifier(class_name)} FROM {ends[0]} TO {ends[1]}"
+        props, params = self.query_set(data)
         if props:
-            query += f"SET {props}"
+            query += f" {props}"
 
-        return query
+        return query, params
 
     def query_update(self, instance_id: str, data: Dict[str, Any]) -> str:
         """
@@ -37,36 +41,30 @@ class EdgeQueryBuilder(QueryBuilder):
 
     def query_delete(self, instance_id: str) -> str:
         """
-        return instance delete query by its id
+        return instance delete query by its id, ValueError if it isn't a record id
         """
-        query = f"DELETE {instance_id}"
+        query = f"DELETE {record_id(instance_id)}"
         return query
 
     def query_retrieve(
             self,
             class_name: str,
-            from_filter: str,
-            to_filter: str,
-            data: Dict[str, Any] = None,
-    ) -> str:
+            from_filters: Union[Dict[str, Any], None] = None,
+            to_filters: Union[Dict[str, Any], None] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
         """
-        return query for getting some edges based on conditions:
-        input example:
-          {"class_name": "Watched","from_filter": "(name = 'Luca')", "to_filter": "()", "direction": "<->", "data": {}}
+        return query for getting the edges of a class between vertices equal to filters, and its parameters:
+        input example: ("Watched", {"name": "Luca"}, {})
         return example:
-          MATCH {Class: Profiles, as: profile, where: (Name='Santo' AND Surname='OrientDB')
-            }-HasFriend-{
-          Class: Profiles, as: friend}
-            RETURN $pathelements
+          ("MATCH {Class:V, as:a, where:(name = :from_name)}-Watched-{Class:V, as:b, where:(1=1)} RETURN $pathelements",
+           {"from_name": "Luca"})
             (https://orientdb.com/docs/last/gettingstarted/demodb/queries/DemoDB-Queries-Friendship.html)
         """
+        from_filter, params = self.query_where(from_filters or {}, "from_")
+        to_filter, to_params = self.query_where(to_filters or {}, "to_")
+        params.update(to_params)
         query = f"MATCH {{Class:V, as:a, where:({from_filter})}}"
-        query += f"-{class_name}-"
+        query += f"-{identifier(class_name)}-"
         query += f"{{Class:V, as:b, where:({to_filter})}}"
-
-        if data:
-            props = " AND ".join(f"{key}={value}" for key, value in data.items())
-            query += props
         query += " RETURN $pathelements"
-
-        return query
+        return query, params
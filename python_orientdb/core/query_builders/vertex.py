@@ -1,7 +1,7 @@
 from json import dumps
-from typing import Any, Dict
+from typing import Any, Dict, Tuple, Union
 
-from .base import QueryBuilder
+from .base import QueryBuilder, identifier, record_id
 
 
 class VertexQueryBuilder(QueryBuilder):
@@ -11,16 +11,18 @@ class VertexQueryBuilder(QueryBuilder):
     methods will return queries for vertex instances crud
     """
 
-    def query_create(self, class_name: str, data: Dict[str, Any]) -> str:
+    def query_create(self, class_name: str, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
         """
-        return query can be used for create a vertex instance
+        return query can be used for create a vertex instance, and its parameters
+        input example: ("Person", {"name": "Luca"})
+        return example: ("CREATE VERTEX Person SET name = :name", {"name": "Luca"})
         """
-        query = f"CREATE VERTEX {class_name}"
-        props = " ".join(f"{key}={value}" for key, value in data.items())
+        query = f"CREATE VERTEX {identifier(class_name)}"
+        props, params = self.query_set(data)
         if props:
-            query += f"SET {props}"
+            query += f" {props}"
 
-        return query
+        return query, params
 
     def query_update(self, instance_id: str, data: Dict[str, Any]) -> str:
         """
@@ -35,19 +37,22 @@ class VertexQueryBuilder(QueryBuilder):
 
     def query_delete(self, instance_id: str) -> str:
         """
-        return instance delete query by its id
+        return instance delete query by its id, ValueError if it isn't a record id
         """
-        query = f"DELETE {instance_id}"
+        query = f"DELETE {record_id(instance_id)}"
         return query
 
     def query_retrieve(
             self,
             class_name: str,
-            vertex_filter: str,
-    ) -> str:
-        # query = f"SELECT FROM {class_name} "
-        # query += filter
-
-        query = "MATCH {class:%s, as:c, where:(%s)} RETURN $pathelements" % (class_name, vertex_filter,)
-
-        return query
+            filters: Union[Dict[str, Any], None] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        return MATCH query of the vertices of a class equal to filters, and its parameters
+        input example: ("Person", {"name": "Luca"})
+        return example:
+          ("MATCH {class:Person, as:c, where:(name = :name)} RETURN $pathelements", {"name": "Luca"})
+        """
+        where, params = self.query_where(filters or {})
+        query = "MATCH {class:%s, as:c, where:(%s)} RETURN $pathelements" % (identifier(class_name), where)
+        return query, params
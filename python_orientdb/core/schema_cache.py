@@ -0,0 +1,158 @@
+import time
+from threading import Lock
+from typing import Any, Dict, FrozenSet, Hashable, List, NamedTuple, Tuple, Union
+
+from pyorient import OrientDB, AsyncOrientDB
+
+from .cache import database_key
+from .utils import resolve
+
+SCHEMA_QUERY = "SELECT FROM metadata:schema"
+# the schema record gets a new version on every class or property change
+VERSION_QUERY = "SELECT @version FROM metadata:schema"
+
+
+class ClassSchema(NamedTuple):
+    """
+    what writes of a class are checked against, inherited properties included
+    """
+    name: str
+    properties: FrozenSet[str]
+    mandatory: FrozenSet[str]
+
+
+class _Entry(NamedTuple):
+    version: Union[int, None]
+    loaded_at: float
+    checked_at: float
+    classes: Dict[str, ClassSchema]
+
+
+def index_classes(classes: List[Dict[str, Any]]) -> Dict[str, ClassSchema]:
+    """
+    return ClassSchema of the classes of metadata:schema by lowercase name
+    """
+    by_name = {schema_class["name"].lower(): schema_class for schema_class in classes}
+    index = {}
+    for key, schema_class in by_name.items():
+        properties, mandatory = set(), set()
+        seen, pending = set(), [key]
+        while pending:
+            name = pending.pop()
+            if name in seen or name not in by_name:
+                continue
+            seen.add(name)
+            for prop in by_name[name].get("properties") or ():
+                properties.add(prop["name"])
+                if prop.get("mandatory"):
+                    mandatory.add(prop["name"])
+            parents = list(by_name[name].get("superClasses") or ())
+            if by_name[name].get("superClass"):
+                parents.append(by_name[name]["superClass"])
+            pending.extend(parent.lower() for parent in parents)
+        index[key] = ClassSchema(schema_class["name"], frozenset(properties), frozenset(mandatory))
+    return index
+
+
+def _fields(row: Any) -> Dict[str, Any]:
+    """
+    fields of a result row, an OrientRecord or the dict some clients return
+    """
+    return getattr(row, "oRecordData", row)
+
+
+class SchemaCache:
+    """
+    schema of each database, indexed by class name, for writes to be checked without downloading it
+        the schema is downloaded again when
+            ClassManager.create/update (or anyone) calls invalidate,
+            its version changed, checked at most once every check_interval seconds (None never checks),
+            ttl seconds went by since it was downloaded
+        safe to share between asyncio tasks and threads
+    """
+
+    def __init__(self, ttl: float = 300.0, check_interval: Union[float, None] = 5.0):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries: Dict[Tuple, _Entry] = {}
+        self._lock = Lock()
+        # incremented by invalidate, a download started before is not kept
+        self._generation = 0
+        self.hits = 0
+        self.loads = 0
+        self.checks = 0
+        self.invalidations = 0
+
+    async def get(self, client: Union[OrientDB, AsyncOrientDB], class_name: str) -> Union[ClassSchema, None]:
+        """
+        return schema of class_name in the database of client, None if the class doesn't exist
+        """
+        classes = await self.classes(client)
+        return classes.get(class_name.lower())
+
+    async def classes(self, client: Union[OrientDB, AsyncOrientDB]) -> Dict[str, ClassSchema]:
+        """
+        return every ClassSchema of the database of client by lowercase class name
+        """
+        key = database_key(client)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or now - entry.loaded_at >= self.ttl:
+            return await self._load(client, key)
+        if self.check_interval is not None and now - entry.checked_at >= self.check_interval:
+            with self._lock:
+                self.checks += 1
+            if await self._version(client) != entry.version:
+                return await self._load(client, key)
+            with self._lock:
+                self._entries[key] = entry._replace(checked_at=now)
+        with self._lock:
+            self.hits += 1
+        return entry.classes
+
+    def invalidate(self, client: Union[OrientDB, AsyncOrientDB, None] = None) -> None:
+        """
+        drop the schema of the database of client, of every database without client
+        """
+        with self._lock:
+            if client is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(database_key(client), None)
+            self._generation += 1
+            self.invalidations += 1
+
+    async def _load(self, client: Union[OrientDB, AsyncOrientDB], key: Hashable) -> Dict[str, ClassSchema]:
+        generation = self._generation
+        schema = (await resolve(client.query(SCHEMA_QUERY)))[0]
+        data = _fields(schema)
+        classes = index_classes(data["classes"])
+        version = getattr(schema, "_version", data.get("@version"))
+        now = time.monotonic()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = _Entry(version, now, now, classes)
+            self.loads += 1
+        return classes
+
+    @staticmethod
+    async def _version(client: Union[OrientDB, AsyncOrientDB]) -> Union[int, None]:
+        result = await resolve(client.query(VERSION_QUERY))
+        return _fields(result[0]).get("version") if result else None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        return schema downloads, version checks, hits and invalidations
+        """
+        with self._lock:
+            return {
+                "databases": len(self._entries),
+                "ttl": self.ttl,
+                "check_interval": self.check_interval,
+                "hits": self.hits,
+                "loads": self.loads,
+                "checks": self.checks,
+                "invalidations": self.invalidations,
+            }
@@ -1,34 +1,47 @@
-from typing import Any
+from typing import Any, Iterable, Union
 
+from pyorient import OrientDB, AsyncOrientDB
 from pyorient.exceptions import PyOrientSchemaException
-from pyorient.orient import OrientDB
+
+from .schema_cache import ClassSchema, SchemaCache
 
 
 class SchemaValidator:
-    def __init__(self, client: OrientDB):
+    """
+    checks the data of a write against the schema of its class
+        the schema comes from schema_cache, shared by the validators of a process to download it once
+    """
+
+    def __init__(self, client: Union[OrientDB, AsyncOrientDB], schema_cache: Union[SchemaCache, None] = None):
         self.client = client
+        self.schema_cache = schema_cache if schema_cache is not None else SchemaCache()
 
-    def get_schema(self, class_name: str) -> dict:
-        classes = self.client.query("SELECT FROM metadata:schema")[0]['classes']
-        return classes[class_name]
+    async def get_schema(self, class_name: str) -> ClassSchema:
+        class_schema = await self.schema_cache.get(self.client, class_name)
+        if class_schema is None:
+            raise PyOrientSchemaException(f"class '{class_name}' is not defined.", [])
+        return class_schema
 
-    def validate_class_properties(
-            self, class_name: str, properties: dict[str, Any]
+    async def validate_class_properties(
+            self, class_name: str, properties: dict[str, Any], reserved: Iterable[str] = ()
     ) -> None:
-        class_schema = self.get_schema(class_name)
+        """
+        reserved keys of properties are not fields of the record (e.g. "from" and "to" of an edge)
+        """
+        class_schema = await self.get_schema(class_name)
 
         # Checking for non exist keys
-        for key, prop in properties.items():
-            if not any(p["name"] == prop["name"] for p in class_schema["properties"]):
-                raise PyOrientSchemaException(
-                    f"property '{prop['name']}' is not defined for class '{class_name}'.",
-                    [],
-                )
+        undefined = properties.keys() - class_schema.properties - set(reserved)
+        if undefined:
+            raise PyOrientSchemaException(
+                f"property '{sorted(undefined)[0]}' is not defined for class '{class_name}'.",
+                [],
+            )
 
         # Checking for existence of mandatory keys
-        for prop in class_schema["properties"]:
-            if prop["mandatory"] and prop["name"] not in properties:
-                raise PyOrientSchemaException(
-                    f"Mandatory property '{prop['name']}' is missing in create data for class '{class_name}'.",
-                    [],
-                )
+        missing = class_schema.mandatory - properties.keys()
+        if missing:
+            raise PyOrientSchemaException(
+                f"Mandatory property '{sorted(missing)[0]}' is missing in create data for class '{class_name}'.",
+                [],
+            )
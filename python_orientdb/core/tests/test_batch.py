@@ -0,0 +1,79 @@
+import pytest
+from pyorient import OrientDB
+from pyorient.testing import FakeOrientServer
+
+from pyorient.exceptions import PyOrientCommandException
+from core.batch import END, Batch
+from core.managers import ClassManager
+
+
+@pytest.mark.asyncio
+class TestBatch:
+    async def test_script(self, mock_orient_client):
+        mock_orient_client.batch.return_value = [[1, None, END]]
+        batch = Batch(mock_orient_client, transaction=True, retry=3)
+        assert batch.add("CREATE VERTEX Person SET name = :name;\n", {"name": "Luca"}) == 0
+        assert batch.add("DELETE VERTEX Person\nWHERE name = 'x'") == 1
+        assert await batch.execute() == [1, None]
+        mock_orient_client.batch.assert_called_once_with(
+            "BEGIN\n"
+            "LET s0 = CREATE VERTEX Person SET name = :name\n"
+            "LET s1 = DELETE VERTEX Person WHERE name = 'x'\n"
+            "COMMIT RETRY 3\n"
+            "RETURN [$s0, $s1, 'end of batch']",
+            params={"name": "Luca"})
+        assert len(batch) == 0
+        assert await batch.execute() == []
+
+    async def test_parameters_are_shared(self, mock_orient_client):
+        batch = Batch(mock_orient_client)
+        batch.add("SELECT FROM V WHERE name = :name", {"name": "a"})
+        batch.add("SELECT FROM E WHERE name = :name", {"name": "a"})
+        with pytest.raises(ValueError):
+            batch.add("SELECT FROM V WHERE name = :name", {"name": "b"})
+        with pytest.raises(ValueError):
+            batch.add(" ; ")
+
+    async def test_results_are_checked(self, mock_orient_client):
+        batch = Batch(mock_orient_client)
+        batch.add("UPDATE Person SET note = 'a\nb' WHERE name = :name", {"name": "Luca"})
+        # a line break in a string literal is kept
+        assert "SET note = 'a\nb' WHERE" in batch.script()
+
+        # one statement returning a list of records
+        mock_orient_client.batch.return_value = [[["#12:0", "#12:1"], END]]
+        assert await batch.execute() == [["#12:0", "#12:1"]]
+
+        for response in ([["#12:0", "#12:1"]], [[END]], [[1, 2, END]]):
+            mock_orient_client.batch.return_value = response
+            batch.add("SELECT FROM Person")
+            with pytest.raises(PyOrientCommandException):
+                await batch.execute()
+
+    async def test_one_round_trip(self):
+        with FakeOrientServer() as server:
+            client = OrientDB("127.0.0.1", server.port)
+            client.db_open("demo", "root", "root")
+            client.command("create class Person extends V")
+            sent = []
+            write = client._connection.write
+            client._connection.write = lambda buff: sent.append(buff) or write(buff)
+
+            assert await ClassManager(client).update("Person", {
+                "create": [{"property": "age", "type": "INTEGER"}],
+                "update": [{"property": "age", "attribute": "MANDATORY", "value": "true"}],
+            })
+            batch = Batch(client, transaction=True)
+            batch.add("INSERT INTO Person SET name = 'a', age = 1")
+            batch.add("INSERT INTO Person SET name = 'b', age = 2")
+            batch.add("SELECT count(*) FROM Person")
+            first, second, count = await batch.execute()
+            assert len(sent) == 2
+            assert client.load_links(first + second)[1].name == "b"
+            assert count == [{"count": 2}]
+
+            classes = client.query("select from metadata:schema")[0].oRecordData["classes"]
+            person = [c for c in classes if c["name"] == "Person"][0]
+            age = [p for p in person["properties"] if p["name"] == "age"][0]
+            assert age["mandatory"] is True
+            client.close()
@@ -0,0 +1,52 @@
+import time
+
+from core.cache import MISSING, ResultCache, normalize
+
+
+class TestResultCache:
+    def test_lru(self):
+        cache = ResultCache(max_size=2)
+        cache.put("a", 1, ["A"])
+        cache.put("b", 2, ["B"])
+        assert cache.get("a") == 1
+        cache.put("c", 3, ["C"])
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats["evictions"] == 1
+
+    def test_ttl(self, monkeypatch):
+        cache = ResultCache(ttl=10)
+        cache.put("a", None, ["A"])
+        assert cache.get("a") is None
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert cache.get("a") is MISSING
+        assert len(cache) == 0
+
+    def test_invalidate_by_class(self):
+        cache = ResultCache()
+        cache.put("a", 1, ["Person", "V"])
+        cache.put("b", 2, ["Knows", "E", "V"])
+        cache.put("c", 3, ["schema"])
+        assert cache.invalidate("Person") == 1
+        assert cache.invalidate("V") == 1
+        assert cache.get("c") == 3
+        assert cache.stats["invalidations"] == 2
+
+        cache.put("d", 4, ["Person"])
+        assert cache.invalidate("PERSON") == 1
+
+    def test_key_and_metrics(self, mocker):
+        client = mocker.Mock()
+        client._connection.host, client._connection.port, client._connection.db_opened = "h", 2424, "demo"
+        assert normalize(" SELECT  FROM\n Person ") == "SELECT FROM Person"
+        assert ResultCache.key(client, "select  from V") == ResultCache.key(client, "select from V\n")
+        assert ResultCache.key(client, "q", params={"a": 1}) != ResultCache.key(client, "q", params={"a": 2})
+        client._connection.db_opened = "other"
+        assert ResultCache.key(client, "q")[0] == ("h", 2424, "other")
+
+        cache = ResultCache()
+        cache.get("a")
+        cache.put("a", 1, [])
+        cache.get("a")
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1 and cache.stats["hit_rate"] == 0.5
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+from pyorient import OrientDB
+from pyorient.exceptions import PyOrientConnectionException
+from pyorient.pool import OrientConnectionPool
+from pyorient.testing import FakeOrientServer
+
+from core import importer
+from core.cache import MISSING, ResultCache
+from core.importer import BulkImporter, read_records
+from core.unit_of_work import UnitOfWork
+
+
+@pytest.fixture()
+def server():
+    with FakeOrientServer() as server:
+        client = OrientDB("127.0.0.1", server.port)
+        client.db_open("demo", "root", "root")
+        client.command("create class Person extends V")
+        client.command("create class Knows extends E")
+        client.close()
+        yield server
+
+
+@pytest.fixture()
+def client(server):
+    client = OrientDB("127.0.0.1", server.port)
+    client.db_open("demo", "root", "root")
+    yield client
+    client.close()
+
+
+def graph(people: int):
+    yield from ({"@class": "Person", "@key": f"p{n}", "name": f"person {n}"} for n in range(people))
+    yield from ({"@class": "Knows", "@from": f"p{n}", "@to": f"p{(n + 1) % people}", "n": n} for n in range(people))
+
+
+def count(client, class_name):
+    return client.query(f"select count(*) from {class_name}")[0].count
+
+
+class TestReaders:
+    def test_ndjson(self):
+        assert list(read_records(['{"a": 1}', "", ' {"b": "x"} '], "ndjson")) == [{"a": 1}, {"b": "x"}]
+        with pytest.raises(ValueError, match="line 2"):
+            list(read_records(['{"a": 1}', "[1]"], "ndjson"))
+
+    def test_csv(self):
+        lines = ["@class,@key,name,age,score", "Person,p1,Luca,30,1.5", "Person,p2,,,"]
+        assert list(read_records(lines, "csv")) == [
+            {"@class": "Person", "@key": "p1", "name": "Luca", "age": 30, "score": 1.5},
+            {"@class": "Person", "@key": "p2"},
+        ]
+        with pytest.raises(ValueError):
+            read_records(lines, "xml")
+
+    def test_csv_strings_that_look_like_numbers(self):
+        values = ["007", "1_000", "NaN", "nan", "inf", "Infinity", "1e5", "+3", " 4", "0.50", "-0", "-12.25"]
+        lines = [",".join(f"c{n}" for n in range(len(values))), ",".join(values)]
+        assert list(read_records(lines, "csv"))[0] == {
+            f"c{n}": value for n, value in enumerate(
+                ["007", "1_000", "NaN", "nan", "inf", "Infinity", "1e5", "+3", " 4", 0.5, 0, -12.25])
+        }
+
+
+@pytest.mark.asyncio
+class TestBulkImporter:
+    async def test_import(self, server, client):
+        pool = OrientConnectionPool("127.0.0.1", server.port, "demo", "root", "root", min_size=0, max_size=3)
+        reports = []
+        cache = ResultCache()
+        cache.put("people", [], ["Person", "V"])
+        cache.put("schema", [], ["schema"])
+        bulk = BulkImporter(pool, batch_size=50, concurrency=3, progress=lambda stats: reports.append(stats.batches),
+                            cache=cache)
+        records = list(graph(200)) + [{"@class": "Knows", "@from": "p1", "@to": "nobody"}]
+        stats = await bulk.run(iter(records))
+        await pool.close()
+
+        assert (stats.read, stats.vertices, stats.edges, stats.failed) == (401, 200, 200, 1)
+        assert stats.batches == stats.commits == 8 and len(reports) == 9
+        assert stats.errors == ["edge p1 -> nobody: unknown vertex"]
+        assert pool.stats()["created"] <= 3
+        assert (count(client, "Person"), count(client, "Knows")) == (200, 200)
+        assert cache.get("people") is MISSING and cache.get("schema") == []
+
+        person = client.record_load(bulk.keys["p5"])
+        assert person.name == "person 5" and "@key" not in person.oRecordData
+        edge = client.record_load(person.oRecordData["out_Knows"][0])
+        assert (edge.n, str(edge.oRecordData["in"])) == (5, bulk.keys["p6"])
+
+    async def test_retry(self, server, client, monkeypatch):
+        commit = UnitOfWork.commit
+        failures = []
+
+        async def failing_commit(self):
+            if len(failures) < 2:
+                failures.append(self)
+                raise PyOrientConnectionException("Server seems to have went down", [])
+            return await commit(self)
+
+        monkeypatch.setattr(UnitOfWork, "commit", failing_commit)
+        pool = OrientConnectionPool("127.0.0.1", server.port, "demo", "root", "root", min_size=0)
+        bulk = BulkImporter(pool, batch_size=10, concurrency=1, retry_delay=0.001)
+        stats = await bulk.run(graph(10))
+        assert (stats.vertices, stats.edges, stats.retries, stats.failed) == (10, 10, 2, 0)
+        # the connections of the failed attempts are discarded
+        assert pool.stats()["discarded"] == 2
+
+        failures.clear()
+        bulk.max_retries = 1
+        stats = await bulk.run({"@class": "Person", "name": "x"} for _ in range(3))
+        assert (stats.vertices, stats.retries, stats.failed) == (0, 1, 3)
+        await pool.close()
+        assert count(client, "Person") == 10
+
+
+def test_cli(server, client, tmp_path, capsys):
+    people = tmp_path / "people.csv"
+    people.write_text("id,name\n1,a\n2,b\n3,c\n")
+    knows = tmp_path / "knows.ndjson"
+    knows.write_text("\n".join(json.dumps({"@from": n, "@to": n % 3 + 1, "@class": "Knows"}) for n in (1, 2, 3)))
+
+    assert importer.main([str(people), str(knows), "--port", str(server.port), "--database", "demo",
+                          "--class", "Person", "--key", "id", "--batch-size", "2", "--quiet"]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert (stats["vertices"], stats["edges"], stats["batches"]) == (3, 3, 4)
+    assert sorted(p.id for p in client.query("select from Person")) == [1, 2, 3]
+    assert count(client, "Knows") == 3
@@ -1,5 +1,9 @@
 import pytest
+from pyorient import AsyncOrientDB, QueryCursor
+from pyorient.otypes import OrientRecord
 
+from core.batch import END
+from core.cache import ResultCache
 from core.managers import ClassManager, EdgeManager, VertexManager
 
 
@@ -19,13 +23,16 @@ class TestClassManager:
 
     async def test_update(self, mock_orient_client):
         cm = ClassManager(mock_orient_client)
+        mock_orient_client.batch.return_value = [[1, None, END]]
         class_name = "Foo"
         result = await cm.update(class_name,
                                  data={"update": [{"property": "Name", "attribute": "MANDATORY", "value": "true"}],
                                        "create": [{"property": "Age", "type": "INTEGER"}]})
         assert result == True
-        mock_orient_client.command.assert_called_with(
-            f"CREATE PROPERTY {class_name}.Age INTEGER; ALTER PROPERTY {class_name}.Name MANDATORY true")
+        mock_orient_client.batch.assert_called_once_with(
+            f"LET s0 = CREATE PROPERTY {class_name}.Age INTEGER\n"
+            f"LET s1 = ALTER PROPERTY {class_name}.Name MANDATORY true\n"
+            "RETURN [$s0, $s1, 'end of batch']")
 
     async def test_delete(self, mock_orient_client):
         cm = ClassManager(mock_orient_client)
@@ -73,10 +80,15 @@ class TestEdgeManager:
 
     async def test_retrieve(self, mock_orient_client):
         em = EdgeManager(mock_orient_client)
-        result = await em.retrieve("Foo", "(Name = 'John')", "(Name = 'Jane')")
+        result = await em.retrieve("Foo", {"Name": "John"}, {"Name": "Jane"})
         assert result == [{"key": "value"}, {"key": "value"}]
         mock_orient_client.query.assert_called_with(
-            "MATCH {Class:V, as:a, where:((Name = 'John'))}-Foo-{Class:V, as:b, where:((Name = 'Jane'))} RETURN $pathelements")
+            "MATCH {Class:V, as:a, where:(Name = :from_Name)}-Foo-{Class:V, as:b, where:(Name = :to_Name)} "
+            "RETURN $pathelements",
+            params={"from_Name": "John", "to_Name": "Jane"})
+
+        with pytest.raises(ValueError):
+            await em.retrieve("Foo-E-Bar", {"Name": "John"})
 
 
 @pytest.mark.asyncio
@@ -105,7 +117,122 @@ class TestVertexManager:
 
     async def test_retrieve(self, mock_orient_client):
         em = VertexManager(mock_orient_client)
-        result = await em.retrieve("Foo", "(Name = 'John')")
+        result = await em.retrieve("Foo", {"Name": "John"})
         assert result == [{"key": "value"}, {"key": "value"}]
         mock_orient_client.query.assert_called_with(
-            "MATCH {class:Foo, as:c, where:((Name = 'John'))} RETURN $pathelements")
+            "MATCH {class:Foo, as:c, where:(Name = :Name)} RETURN $pathelements", params={"Name": "John"})
+
+    async def test_retrieve_with_async_client(self, mocker):
+        async_client = mocker.AsyncMock(spec=AsyncOrientDB)
+        async_client.query.return_value = [{"key": "value"}]
+        em = VertexManager(async_client)
+        result = await em.retrieve("Foo", {"Name": "John"})
+        assert result == [{"key": "value"}]
+        async_client.query.assert_awaited_with(
+            "MATCH {class:Foo, as:c, where:(Name = :Name)} RETURN $pathelements", params={"Name": "John"})
+
+    async def test_iter_retrieve(self, mock_orient_client):
+        mock_orient_client.query_stream.return_value = iter([{"key": "value"}, {"key": "other"}])
+        em = VertexManager(mock_orient_client)
+        result = [record async for record in em.iter_retrieve("Foo", {"Name": "John"})]
+        assert result == [{"key": "value"}, {"key": "other"}]
+        mock_orient_client.query_stream.assert_called_with(
+            "MATCH {class:Foo, as:c, where:(Name = :Name)} RETURN $pathelements", params={"Name": "John"})
+
+    async def test_retrieve_page(self, mocker, mock_orient_client):
+        mock_orient_client.query_cursor.return_value = QueryCursor(mock_orient_client, "q1", [{"key": 1}], True, 1)
+        em = VertexManager(mock_orient_client)
+        result = await em.retrieve("Foo", {"Name": "John"}, page_size=1)
+        assert result == {"result": [{"key": 1}], "cursor": "q1"}
+        mock_orient_client.query_cursor.assert_called_with(
+            "MATCH {class:Foo, as:c, where:(Name = :Name)} RETURN $pathelements", 1, params={"Name": "John"})
+
+        cursor = QueryCursor(mock_orient_client, "q1", [], True, 1)
+        mocker.patch.object(cursor, "_fetch", return_value=("q1", [{"key": 2}], False))
+        mock_orient_client.resume_query.return_value = cursor
+        result = await em.retrieve("Foo", {"Name": "John"}, page_size=1, cursor="q1")
+        assert result == {"result": [{"key": 2}], "cursor": None}
+        mock_orient_client.resume_query.assert_called_with("q1", 1)
+
+    async def test_scan(self, mock_orient_client):
+        records = [OrientRecord({"__rid": "#12:%d" % n}) for n in range(3)]
+        mock_orient_client.query.side_effect = [records[:2], records[2:]]
+        em = VertexManager(mock_orient_client)
+
+        assert await em.scan("Foo", 2) == {"result": records[:2], "cursor": "12:1"}
+        mock_orient_client.query.assert_called_with("SELECT FROM Foo WHERE (1=1) ORDER BY @rid LIMIT 2", -1)
+        assert await em.scan("Foo", 2, "12:1") == {"result": records[2:], "cursor": None}
+        query, params = mock_orient_client.query.call_args.args[0], mock_orient_client.query.call_args.kwargs["params"]
+        assert query == "SELECT FROM Foo WHERE @rid > :last_rid AND (1=1) ORDER BY @rid LIMIT 2"
+        assert params["last_rid"].get_hash() == "#12:1"
+
+        with pytest.raises(ValueError):
+            await em.scan("Foo", 2, "12:1 OR 1=1")
+        with pytest.raises(ValueError):
+            await em.scan("Foo WHERE 1=1", 2)
+
+    async def test_iter_scan(self, mock_orient_client):
+        records = [OrientRecord({"__rid": "#12:%d" % n}) for n in range(4)]
+        mock_orient_client.query.side_effect = [records[:2], records[2:], []]
+        em = VertexManager(mock_orient_client)
+        assert [r async for r in em.iter_scan("Foo", 2)] == records
+        assert mock_orient_client.query.call_count == 3
+
+    async def test_retrieve_with_filters(self, mock_orient_client):
+        mock_orient_client.query.return_value = [{"key": "value"}]
+        em = VertexManager(mock_orient_client)
+        assert await em.retrieve("Foo", filters={"name": "x' OR 1=1", "age": 3}) == [{"key": "value"}]
+        mock_orient_client.query.assert_called_with(
+            "MATCH {class:Foo, as:c, where:(name = :name AND age = :age)} RETURN $pathelements",
+            params={"name": "x' OR 1=1", "age": 3})
+
+        with pytest.raises(ValueError):
+            await em.retrieve("Foo", filters={"name = name OR 1": 1})
+        with pytest.raises(ValueError):
+            await em.retrieve("Foo WHERE 1=1", filters={})
+
+    async def test_scan_with_filters(self, mock_orient_client):
+        mock_orient_client.query.return_value = []
+        em = VertexManager(mock_orient_client)
+        assert await em.scan("Foo", 2, "12:1", filters={"name": "n"}) == {"result": [], "cursor": None}
+        query, params = mock_orient_client.query.call_args.args[0], mock_orient_client.query.call_args.kwargs["params"]
+        assert query == "SELECT FROM Foo WHERE @rid > :last_rid AND (name = :f_name) ORDER BY @rid LIMIT 2"
+        assert params["f_name"] == "n" and params["last_rid"].get_hash() == "#12:1"
+
+        await em.scan("Foo", 10, "9:3", filters={"last_rid": "x", "@rid": "#1:1", "rid": 2})
+        query, params = mock_orient_client.query.call_args.args[0], mock_orient_client.query.call_args.kwargs["params"]
+        assert "(last_rid = :f_last_rid AND @rid = :f_at_rid AND rid = :f_rid)" in query
+        assert (params["f_last_rid"], params["f_at_rid"], params["f_rid"]) == ("x", "#1:1", 2)
+        assert params["last_rid"].get_hash() == "#9:3"
+        with pytest.raises(ValueError):
+            await em.scan("Foo", 10, filters={"@rid": "#1:1", "at_rid": "#1:2"})
+
+    async def test_cached_retrieve(self, mocker, mock_orient_client):
+        cache = ResultCache()
+        vm = VertexManager(mock_orient_client, cache)
+        em = EdgeManager(mock_orient_client, cache)
+        assert await vm.retrieve("Foo") == await vm.retrieve("Foo")
+        await em.retrieve("Bar")
+        assert mock_orient_client.query.call_count == 2
+
+        # another class of vertices keeps the cached results of Foo
+        vm._schema_validator.validate_class_properties = mocker.AsyncMock()
+        await vm.create("Baz", {})
+        await vm.retrieve("Foo")
+        assert mock_orient_client.query.call_count == 2
+
+        await vm.create("Foo", {})
+        await vm.retrieve("Foo")
+        assert mock_orient_client.query.call_count == 3
+
+        # class names are case-insensitive
+        await vm.create("foo", {})
+        await vm.retrieve("Foo")
+        assert mock_orient_client.query.call_count == 4
+
+        # deletes only know the rid, every vertex and edge result goes
+        await vm.delete("#12:0")
+        await vm.retrieve("Foo")
+        await em.retrieve("Bar")
+        assert mock_orient_client.query.call_count == 6
+        assert cache.stats["hits"] == 2
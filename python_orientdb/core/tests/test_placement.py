@@ -0,0 +1,122 @@
+import pytest
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.testing import FakeOrientServer
+
+from core.managers import VertexManager
+from core.placement import AffinityPlacement, ClassPlacement, HashPlacement, RoundRobinPlacement
+
+
+@pytest.fixture()
+def server():
+    with FakeOrientServer() as server:
+        client = OrientDB("127.0.0.1", server.port)
+        client.db_open("demo", "root", "root")
+        client.command("create class Person extends V clusters 3")
+        client.command("create class Sample extends V clusters 2")
+        client.close()
+        yield server
+
+
+@pytest.fixture()
+def client(server):
+    client = OrientDB("127.0.0.1", server.port)
+    client.db_open("demo", "root", "root")
+    yield client
+    client.close()
+
+
+@pytest.fixture()
+def vertex_manager(mocker):
+    def vertex_manager(client, placement):
+        manager = VertexManager(client, placement=placement)
+        manager._schema_validator.validate_class_properties = mocker.AsyncMock()
+        return manager
+
+    return vertex_manager
+
+
+def cluster_of(record):
+    return int(record._rid.split(":")[0][1:])
+
+
+@pytest.mark.asyncio
+class TestPlacement:
+    async def test_round_robin(self, client, vertex_manager):
+        person = [client.get_class_position(name) for name in (b"person", b"person_1", b"person_2")]
+        placement = RoundRobinPlacement()
+        manager = vertex_manager(client, placement)
+        created = [await manager.create("Person", {"n": n}) for n in range(6)]
+        assert [cluster_of(record) for record in created] == person * 2
+        await manager.create("Nobody", {})
+        assert placement.stats == {
+            "strategy": "round_robin",
+            "placed": {"Person": {cluster_id: 2 for cluster_id in person}},
+            "unplaced": 1,
+            # the schema is read again for the missing class
+            "refreshes": 2,
+        }
+
+    async def test_refresh(self, client):
+        placement = RoundRobinPlacement()
+        assert len(await placement.class_clusters(client, "Sample")) == 2
+        client.command("alter class Sample addcluster sample_2")
+        # the clusters of a known class are read again on db_reload
+        assert len(await placement.class_clusters(client, "Sample")) == 2
+        client.db_reload()
+        assert await placement.class_clusters(client, "Sample") == sorted(
+            client.get_class_position(name) for name in (b"sample", b"sample_1", b"sample_2"))
+        assert placement.stats["refreshes"] == 2
+
+        # a class created since is read at once, without db_reload
+        client.command("create class Pet extends V")
+        assert len(await placement.class_clusters(client, "Pet")) == 1
+        assert placement.stats["refreshes"] == 3
+
+    async def test_clusters_of_the_class_only(self, client, vertex_manager):
+        client.command("create class Person_1 extends V")
+        placement = RoundRobinPlacement()
+        manager = vertex_manager(client, placement)
+        person = await placement.class_clusters(client, "Person")
+        created = [cluster_of(await manager.create("Person", {"n": n})) for n in range(6)]
+        assert len(person) == 3 and set(created) == set(person)
+        assert await placement.class_clusters(client, "Person_1") not in ([], person)
+        assert not set(await placement.class_clusters(client, "Person_1")) & set(person)
+
+    async def test_affinity(self, server, client, vertex_manager):
+        placement = AffinityPlacement()
+        other = AsyncOrientDB("127.0.0.1", server.port)
+        await other.db_open("demo", "root", "root")
+        first = vertex_manager(client, placement)
+        second = vertex_manager(other, placement)
+        created = []
+        for n in range(3):
+            created.append(await first.create("Sample", {"n": n}))
+            created.append(await second.create("Sample", {"n": n}))
+        # every connection sticks to its cluster, the two never share one
+        assert len({cluster_of(record) for record in created[0::2]}) == 1
+        assert len({cluster_of(record) for record in created[1::2]}) == 1
+        assert cluster_of(created[0]) != cluster_of(created[1])
+        other.close()
+
+    async def test_hash(self, client, vertex_manager):
+        placement = ClassPlacement({"Person": HashPlacement("email")})
+        manager = vertex_manager(client, placement)
+        emails = [f"user{n}@example.com" for n in range(10)]
+        first = [cluster_of(await manager.create("Person", {"email": email})) for email in emails]
+        again = [cluster_of(await manager.create("Person", {"email": email})) for email in emails]
+        assert first == again and len(set(first)) > 1
+
+        sample = await manager.create("Sample", {})
+        assert placement.stats["unplaced"] == 1
+        assert placement.stats["classes"]["person"]["placed"]["Person"] == {
+            cluster_id: first.count(cluster_id) * 2 for cluster_id in set(first)}
+        assert sample._rid
+
+    async def test_unacked(self, client):
+        placement = RoundRobinPlacement()
+        async with VertexManager(client, placement=placement).unacked_writes() as writes:
+            for n in range(4):
+                await writes.create("Sample", {"n": n})
+        assert writes.failures == []
+        rids = [record._rid for record in client.query("select from Sample", -1)]
+        assert len({rid.split(":")[0] for rid in rids}) == 2
@@ -0,0 +1,36 @@
+import pytest
+
+from core.query_builders import ClassQueryBuilder, EdgeQueryBuilder, VertexQueryBuilder
+
+
+def test_create_binds_values():
+    data = {"from": "#9:0", "to": "9:1", "note": "1 ; DELETE VERTEX V"}
+    assert EdgeQueryBuilder().query_create("Knows", data) == (
+        "CREATE EDGE Knows FROM #9:0 TO #9:1 SET note = :note", {"note": "1 ; DELETE VERTEX V"})
+    assert "from" in data
+    assert EdgeQueryBuilder().query_create("Knows", {"from": "#9:0", "to": "#9:1"}) == (
+        "CREATE EDGE Knows FROM #9:0 TO #9:1", {})
+    assert VertexQueryBuilder().query_create("Person", {"name": "Luca", "age": 3}) == (
+        "CREATE VERTEX Person SET name = :name, age = :age", {"name": "Luca", "age": 3})
+
+    with pytest.raises(ValueError):
+        EdgeQueryBuilder().query_create("Knows", {"from": "#9:0 DELETE", "to": "#9:1"})
+    with pytest.raises(ValueError):
+        VertexQueryBuilder().query_create("Person", {"name = 1, age": 3})
+    with pytest.raises(ValueError):
+        VertexQueryBuilder().query_create("Person", {"@class": "V"})
+
+
+def test_delete_takes_a_record_id():
+    assert EdgeQueryBuilder().query_delete("12:0") == "DELETE #12:0"
+    assert VertexQueryBuilder().query_delete("#12:0") == "DELETE #12:0"
+    for builder in (EdgeQueryBuilder(), VertexQueryBuilder()):
+        with pytest.raises(ValueError):
+            builder.query_delete("VERTEX V")
+
+
+def test_class_names_are_checked():
+    with pytest.raises(ValueError):
+        ClassQueryBuilder().query_update("Foo.x STRING; DROP CLASS Bar", {"create": [{"property": "a", "type": "STRING"}]})
+    with pytest.raises(ValueError):
+        ClassQueryBuilder().query_create("Foo EXTENDS V; DROP CLASS Bar")
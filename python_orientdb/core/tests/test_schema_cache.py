@@ -0,0 +1,91 @@
+import pytest
+from pyorient import OrientDB
+from pyorient.exceptions import PyOrientSchemaException
+from pyorient.testing import FakeOrientServer
+
+from core.managers import ClassManager, VertexManager
+from core.schema_cache import SchemaCache
+from core.schema_validator import SchemaValidator
+
+
+@pytest.fixture()
+def client():
+    with FakeOrientServer() as server:
+        client = OrientDB("127.0.0.1", server.port)
+        client.db_open("demo", "root", "root")
+        client.command("create class Named extends V abstract")
+        client.command("create property Named.name STRING")
+        client.command("alter property Named.name MANDATORY true")
+        client.command("create class Person extends Named")
+        client.command("create property Person.age INTEGER")
+        yield client
+        client.close()
+
+
+@pytest.fixture()
+def downloads(client, monkeypatch):
+    """
+    schema queries sent by client
+    """
+    queries = []
+    query = client.query
+    monkeypatch.setattr(client, "query", lambda sql, *args, **kwargs: queries.append(sql) or query(sql, *args, **kwargs))
+    return queries
+
+
+@pytest.mark.asyncio
+class TestSchemaCache:
+    async def test_validate(self, client, downloads):
+        validator = SchemaValidator(client, SchemaCache(check_interval=None))
+        schema = await validator.get_schema("person")
+        assert (schema.name, schema.properties, schema.mandatory) == ("Person", {"name", "age"}, {"name"})
+
+        for _ in range(10):
+            await validator.validate_class_properties("Person", {"name": "a", "age": 3})
+        with pytest.raises(PyOrientSchemaException, match="property 'email' is not defined"):
+            await validator.validate_class_properties("Person", {"name": "a", "email": "a@b"})
+        with pytest.raises(PyOrientSchemaException, match="Mandatory property 'name' is missing"):
+            await validator.validate_class_properties("Person", {"age": 3})
+        with pytest.raises(PyOrientSchemaException, match="class 'Nobody' is not defined"):
+            await validator.validate_class_properties("Nobody", {})
+        await validator.validate_class_properties("E", {"from": "#1:0", "to": "#1:1"}, reserved=("from", "to"))
+        assert downloads == ["SELECT FROM metadata:schema"]
+
+    async def test_version_check(self, client, downloads):
+        schema_cache = SchemaCache(check_interval=0)
+        assert (await schema_cache.get(client, "Person")).properties == {"name", "age"}
+        assert (await schema_cache.get(client, "Person")).properties == {"name", "age"}
+        assert downloads == ["SELECT FROM metadata:schema", "SELECT @version FROM metadata:schema"]
+
+        # changed by another client, found by the version of the schema
+        client.command("create property Person.email STRING")
+        assert (await schema_cache.get(client, "Person")).properties == {"name", "age", "email"}
+        assert schema_cache.stats["loads"] == 2 and schema_cache.stats["checks"] == 2
+
+    async def test_ttl(self, client, downloads):
+        schema_cache = SchemaCache(ttl=0, check_interval=None)
+        await schema_cache.get(client, "Person")
+        await schema_cache.get(client, "Person")
+        assert downloads == ["SELECT FROM metadata:schema"] * 2
+
+    async def test_class_manager_invalidates(self, client):
+        schema_cache = SchemaCache(check_interval=None)
+        vertex_manager = VertexManager(client, schema_cache=schema_cache)
+        with pytest.raises(PyOrientSchemaException):
+            await vertex_manager.create("Pet", {"name": "rex"})
+
+        await ClassManager(client, schema_cache=schema_cache).create("Pet", "Named")
+        assert schema_cache.stats["invalidations"] == 1
+        assert (await vertex_manager.create("Pet", {"name": "rex"}))._rid
+        assert schema_cache.stats["loads"] == 2
+
+    async def test_dict_rows(self, mocker):
+        client = mocker.Mock(spec=OrientDB)
+        client.query.side_effect = [
+            [{"@version": 3, "classes": [{"name": "Person", "properties": [{"name": "name", "mandatory": True}]}]}],
+            [{"version": 3}],
+        ]
+        schema_cache = SchemaCache(check_interval=0)
+        assert (await schema_cache.get(client, "person")).mandatory == {"name"}
+        assert (await schema_cache.get(client, "Person")).properties == {"name"}
+        assert schema_cache.stats["loads"] == 1 and schema_cache.stats["checks"] == 1
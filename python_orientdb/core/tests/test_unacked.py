@@ -0,0 +1,38 @@
+import pytest
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.testing import FakeOrientServer
+
+from core.cache import MISSING, ResultCache
+from core.managers import VertexManager
+
+
+@pytest.mark.asyncio
+class TestUnackedVertices:
+    async def test_flush(self):
+        with FakeOrientServer() as server:
+            client = OrientDB("127.0.0.1", server.port)
+            client.db_open("demo", "root", "root")
+            client.command("create class Person extends V")
+            client.command("create class Shape extends V abstract")
+            cache = ResultCache()
+            cache.put("people", 1, ["Person"])
+
+            async with VertexManager(client, cache).unacked_writes(max_pending=10) as writes:
+                for n in range(25):
+                    await writes.create("Person", {"n": n})
+                await writes.create("Shape", {})
+                assert 0 < writes.pending <= 10
+                assert cache.get("people") == 1
+            assert writes.pending == 0 and cache.get("people") is MISSING
+            assert [f.args[1].oRecordData for f in writes.failures] == [{}]
+            assert client.query("select count(*) from Person")[0].count == 25
+
+            async_client = AsyncOrientDB("127.0.0.1", server.port)
+            await async_client.db_open("demo", "root", "root")
+            writes = VertexManager(async_client).unacked_writes()
+            for person in client.query("select from Person where n < 5"):
+                await writes.delete(person._rid)
+            assert await writes.flush() == []
+            assert (await async_client.query("select count(*) from Person"))[0].count == 20
+            async_client.close()
+            client.close()
@@ -0,0 +1,118 @@
+import pytest
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.testing import FakeOrientServer
+
+from core.cache import MISSING, ResultCache
+from core.managers import EdgeManager, VertexManager
+from core.unit_of_work import UnitOfWork
+
+
+@pytest.fixture()
+def server():
+    with FakeOrientServer() as server:
+        client = OrientDB("127.0.0.1", server.port)
+        client.db_open("demo", "root", "root")
+        client.command("create class Person extends V")
+        client.command("create class Knows extends E")
+        client.close()
+        yield server
+
+
+@pytest.fixture()
+def client(server):
+    client = OrientDB("127.0.0.1", server.port)
+    client.db_open("demo", "root", "root")
+    yield client
+    client.close()
+
+
+def people(client):
+    return {p.name: p for p in client.query("select from Person", -1)}
+
+
+def links(record, field):
+    return sorted(str(link) for link in record.oRecordData.get(field, []))
+
+
+@pytest.mark.asyncio
+class TestUnitOfWork:
+    async def test_one_commit(self, client):
+        sent = []
+        write = client._connection.write
+        client._connection.write = lambda buff: sent.append(buff) or write(buff)
+
+        async with UnitOfWork(client) as uow:
+            luca = await uow.create_vertex("Person", {"name": "Luca"})
+            santo = await uow.create_vertex("Person", {"name": "Santo"})
+            knows = await uow.create_edge("Knows", luca, santo, {"since": 2020})
+            await uow.update(santo, {"age": 30})
+        assert uow.commits == 1 and len(sent) == 1
+        assert len(uow) == 0
+
+        found = people(client)
+        edge = client.record_load(uow.resolve(knows))
+        assert (str(edge.oRecordData["out"]), str(edge.oRecordData["in"])) == (uow.rids[luca], uow.rids[santo])
+        assert edge.since == 2020
+        assert links(found["Luca"], "out_Knows") == links(found["Santo"], "in_Knows") == [edge._rid]
+        assert found["Santo"].age == 30
+
+    async def test_edges_across_commits(self, client):
+        vertices, edges = VertexManager(client), EdgeManager(client)
+        uow = vertices.unit_of_work(commit_size=4)
+        rids = await vertices.create_many("Person", [{"name": str(n)} for n in range(6)], unit_of_work=uow)
+        chain = await edges.create_many(
+            "Knows", [{"from": rids[n], "to": rids[n + 1], "n": n} for n in range(5)], unit_of_work=uow)
+        # every commit holds at most commit_size creations, plus the vertices they link
+        await uow.commit()
+        assert 3 <= uow.commits <= 5
+
+        found = people(client)
+        for n, rid in enumerate(chain):
+            edge = client.record_load(uow.resolve(rid))
+            assert edge.n == n
+            assert str(edge.oRecordData["out"]) == found[str(n)]._rid
+            assert str(edge.oRecordData["in"]) == found[str(n + 1)]._rid
+            assert links(found[str(n)], "out_Knows") == [edge._rid]
+            assert links(found[str(n + 1)], "in_Knows") == [edge._rid]
+
+    async def test_existing_records(self, client):
+        client.command("insert into Person set name = 'a'")
+        a = people(client)["a"]
+        rids = await VertexManager(client).create_many("Person", [{"name": "b"}])
+        assert rids == [people(client)["b"]._rid]
+        await EdgeManager(client).create_many("Knows", [{"from": a._rid, "to": rids[0]}])
+
+        found = people(client)
+        assert len(links(found["a"], "out_Knows")) == 1 and found["a"]._version == a._version + 1
+        async with UnitOfWork(client) as uow:
+            await uow.delete(found["b"]._rid)
+            await uow.update(a._rid, {"age": 3})
+        assert list(people(client)) == ["a"] and people(client)["a"].age == 3
+
+    async def test_rollback(self, client):
+        with pytest.raises(RuntimeError):
+            async with UnitOfWork(client) as uow:
+                await uow.create_vertex("Person", {"name": "a"})
+                raise RuntimeError()
+        assert uow.commits == 0 and people(client) == {}
+        with pytest.raises(ValueError):
+            await uow.create_edge("Knows", "#-1:-7", "#-1:-8")
+
+    async def test_cache_invalidation(self, client):
+        cache = ResultCache()
+        cache.put("people", 1, ["Person"])
+        cache.put("knows", 1, ["Knows"])
+        cache.put("other", 1, ["Other"])
+        async with VertexManager(client, cache).unit_of_work() as uow:
+            await uow.create_edge("Knows", await uow.create_vertex("Person", {}), await uow.create_vertex("Person", {}))
+        assert [cache.get(key) for key in ("people", "knows", "other")] == [MISSING, MISSING, 1]
+
+    async def test_async(self, server):
+        client = AsyncOrientDB("127.0.0.1", server.port)
+        await client.db_open("demo", "root", "root")
+        rids = await VertexManager(client).create_many("Person", [{"name": "a"}, {"name": "b"}])
+        edges = await EdgeManager(client).create_many("Knows", [{"from": rids[0], "to": rids[1]}], commit_size=1)
+        edge = await client.record_load(edges[0])
+        assert (str(edge.oRecordData["out"]), str(edge.oRecordData["in"])) == tuple(rids)
+        assert links(await client.record_load(rids[0]), "out_Knows") == edges
+        client.close()
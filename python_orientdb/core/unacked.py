@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Union
+
+from pyorient import OrientDB, AsyncOrientDB, WriteFailure
+from pyorient.otypes import OrientRecord
+
+from .cache import ResultCache
+from .placement import Placement
+from .utils import resolve
+
+
+class UnackedVertices:
+    """
+    vertex writes sent without waiting for orientdb, see pyorient.unacked
+        for ingest that can be reconciled later: a write may still fail after it returns,
+        flush reads the acknowledgements and returns the failures of the writes since the last flush
+        with a cache, flush drops the results of the classes written
+    usage:
+        async with VertexManager(client).unacked_writes() as writes:
+            for sample in samples:
+                await writes.create("Sample", sample)
+        writes.failures
+    """
+
+    def __init__(
+            self,
+            client: Union[OrientDB, AsyncOrientDB],
+            max_pending: int = 1000,
+            cache: Union[ResultCache, None] = None,
+            placement: Union[Placement, None] = None,
+    ):
+        self.client = client
+        self.cache = cache
+        self.placement = placement
+        self.writes = client.unacked_writes(max_pending)
+        # failures of every flush
+        self.failures: List[WriteFailure] = []
+        self._tags = set()
+
+    @property
+    def pending(self) -> int:
+        """
+        return number of writes sent and not acknowledged yet
+        """
+        return self.writes.pending
+
+    async def __aenter__(self) -> "UnackedVertices":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # the writes are sent already, their acknowledgements are read anyway
+        await self.flush()
+
+    async def create(self, class_name: str, data: Dict[str, Any]) -> None:
+        """
+        send the creation of a vertex, in the cluster of class_name chosen by the placement (or orientdb)
+        """
+        cluster_id = -1 if self.placement is None else await self.placement.cluster_id(self.client, class_name, data)
+        await resolve(self.writes.record_create(cluster_id, OrientRecord({f"@{class_name}": data})))
+        self._tags.add(class_name)
+
+    async def delete(self, rid: str) -> None:
+        """
+        send the deletion of a vertex, its edges are left as they are (like VertexManager.delete)
+        """
+        cluster, position = map(int, rid.split("#")[1].split(":"))
+        await resolve(self.writes.record_delete(cluster, position))
+        self._tags.add("V")
+
+    async def flush(self) -> List[WriteFailure]:
+        """
+        wait for orientdb to acknowledge every write sent
+        return failures of the writes sent since the last flush
+        """
+        failures = await resolve(self.writes.flush())
+        self.failures.extend(failures)
+        tags, self._tags = self._tags, set()
+        if self.cache is not None and tags:
+            self.cache.invalidate(*tags)
+        return failures
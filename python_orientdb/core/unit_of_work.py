@@ -0,0 +1,240 @@
+import re
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from pyorient import OrientDB, AsyncOrientDB
+from pyorient.cache import rid_of
+from pyorient.otypes import OrientRecord, OrientRecordLink
+
+from .cache import ResultCache
+from .utils import resolve
+
+TEMPORARY_RID = re.compile(r"^#-1:-\d+$")
+
+
+def link(rid: Union[str, OrientRecordLink]) -> OrientRecordLink:
+    """
+    return link to rid ("#12:0", "12:0" or a link)
+    """
+    return OrientRecordLink(rid_of(rid)[1:])
+
+
+class UnitOfWork:
+    """
+    record writes buffered on the client and sent as transactions (TX_COMMIT), one per commit_size operations
+        created records get a temporary rid ("#-1:-2") at once, it can be used as link by the records
+        created after them: orientdb resolves the links inside a commit, the unit of work across commits
+        edges keep the out_/in_ links of their vertices up to date, in the content of the vertices
+        still to send, otherwise by loading and updating the vertices in the commit of the edge
+        with a cache, a commit drops the results of the classes it wrote (and "V", "E" for updates and edges)
+    usage:
+        async with manager.unit_of_work() as uow:
+            luca = await uow.create_vertex("Person", {"name": "Luca"})
+            santo = await uow.create_vertex("Person", {"name": "Santo"})
+            await uow.create_edge("Knows", luca, santo, {"since": 2020})
+        uow.rids[luca]  # "#12:0"
+    """
+
+    def __init__(
+            self,
+            client: Union[OrientDB, AsyncOrientDB],
+            commit_size: int = 1000,
+            cache: Union[ResultCache, None] = None,
+    ):
+        if commit_size < 1:
+            raise ValueError("commit_size must be positive")
+        self.client = client
+        self.commit_size = commit_size
+        self.cache = cache
+        # temporary rid -> rid, for the created records already committed
+        self.rids: Dict[str, str] = {}
+        self.commits = 0
+        self._next_position = 2
+        # temporary rid -> [class name, fields] of the records to create
+        self._creates: Dict[str, List[Any]] = {}
+        # rid -> {"set": fields, "add": {field: links}} of the existing records to update
+        self._patches: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._deletes: List[str] = []
+        self._tags = set()
+
+    def __len__(self) -> int:
+        """
+        return number of operations waiting for the next commit
+        """
+        return len(self._creates) + len(self._patches) + len(self._deletes)
+
+    async def __aenter__(self) -> "UnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            self.rollback()
+
+    async def create(self, class_name: str, data: Dict[str, Any]) -> str:
+        """
+        queue the creation of a record
+        return its temporary rid, see resolve
+        """
+        await self._make_room()
+        rid = f"#-1:-{self._next_position}"
+        self._next_position += 1
+        self._creates[rid] = [class_name, dict(data)]
+        self._tags.add(class_name)
+        return rid
+
+    async def create_vertex(self, class_name: str, data: Dict[str, Any]) -> str:
+        return await self.create(class_name, data)
+
+    async def create_edge(
+            self,
+            class_name: str,
+            from_rid: str,
+            to_rid: str,
+            data: Union[Dict[str, Any], None] = None,
+    ) -> str:
+        """
+        queue the creation of an edge from_rid -> to_rid, the rids can be temporary ones of this unit of work
+        return its temporary rid
+        """
+        edge = await self.create(class_name, dict(data or {}, out=link(from_rid), **{"in": link(to_rid)}))
+        self._add_link(from_rid, f"out_{class_name}", edge)
+        self._add_link(to_rid, f"in_{class_name}", edge)
+        self._tags.add("V")
+        return edge
+
+    async def update(self, rid: str, data: Dict[str, Any]) -> None:
+        """
+        queue setting fields of a record
+        """
+        rid = self.resolve(rid)
+        if rid in self._creates:
+            self._creates[rid][1].update(data)
+            return
+        await self._make_room()
+        self._patch(rid)["set"].update(data)
+        self._tags.update(("V", "E"))
+
+    async def delete(self, rid: str) -> None:
+        """
+        queue the deletion of a record, links to it are left as they are (like VertexManager.delete)
+        """
+        rid = self.resolve(rid)
+        if rid in self._creates:
+            raise ValueError(f"{rid} is created by this unit of work, it isn't committed yet")
+        await self._make_room()
+        self._patches.pop(rid, None)
+        if rid not in self._deletes:
+            self._deletes.append(rid)
+        self._tags.update(("V", "E"))
+
+    def resolve(self, rid: Union[str, OrientRecordLink]) -> str:
+        """
+        return the rid of a record, the committed records created by the unit of work have left their temporary rid
+        """
+        rid = rid_of(rid)
+        return self.rids.get(rid, rid)
+
+    async def commit(self) -> Dict[str, str]:
+        """
+        send the queued operations in one transaction
+        return temporary rid -> rid of the records it created
+        """
+        if not len(self):
+            return {}
+        creates, patches, deletes = self._creates, self._patches, self._deletes
+        self._creates, self._patches, self._deletes = {}, {}, []
+        tags, self._tags = self._tags, set()
+
+        loaded = await self._load(list(patches) + deletes)
+        # temporary rids -> rids, committed or as they are numbered in this transaction
+        links = dict(self.rids)
+        links.update((rid, f"#-1:{-2 - n}") for n, rid in enumerate(creates))
+
+        tx = self.client.tx_commit()
+        tx.begin()
+        created: List[Tuple[str, OrientRecord]] = []
+        try:
+            for rid, (class_name, fields) in creates.items():
+                record = OrientRecord({f"@{class_name}": self._links(fields, links)})
+                tx.attach(self.client.get_message("RecordCreateMessage").prepare((-1, record)))
+                created.append((rid, record))
+            for rid, patch in patches.items():
+                record = loaded[rid]
+                fields = dict(record.oRecordData)
+                fields.update(patch["set"])
+                for name, added in patch["add"].items():
+                    fields[name] = list(fields.get(name) or []) + added
+                cluster, position = self._position(rid)
+                content = OrientRecord({f"@{record._class}": self._links(fields, links)})
+                tx.attach(self.client.get_message("RecordUpdateMessage").prepare(
+                    (cluster, position, content, record._version)))
+            for rid in deletes:
+                cluster, position = self._position(rid)
+                tx.attach(self.client.get_message("RecordDeleteMessage").prepare(
+                    (cluster, position, loaded[rid]._version)))
+        except Exception:
+            tx.rollback()
+            raise
+        await resolve(tx.commit())
+
+        self.commits += 1
+        committed = {rid: record._rid for rid, record in created}
+        self.rids.update(committed)
+        if self.cache is not None:
+            self.cache.invalidate(*tags)
+        return committed
+
+    def rollback(self) -> None:
+        """
+        forget the operations waiting for the next commit, the committed ones stay
+        """
+        self._creates, self._patches, self._deletes = {}, {}, []
+        self._tags = set()
+
+    async def _make_room(self) -> None:
+        if len(self) >= self.commit_size:
+            await self.commit()
+
+    def _patch(self, rid: str) -> Dict[str, Dict[str, Any]]:
+        return self._patches.setdefault(rid, {"set": {}, "add": {}})
+
+    def _add_link(self, rid: str, field: str, edge: str) -> None:
+        rid = self.resolve(rid)
+        if rid in self._creates:
+            self._creates[rid][1].setdefault(field, []).append(link(edge))
+        elif TEMPORARY_RID.match(rid):
+            raise ValueError(f"{rid} is not a record of this unit of work")
+        else:
+            self._patch(rid)["add"].setdefault(field, []).append(link(edge))
+
+    async def _load(self, rids: Iterable[str]) -> Dict[str, OrientRecord]:
+        """
+        return the current version of records, loaded in one round trip
+        """
+        rids = list(rids)
+        if not rids:
+            return {}
+        records = await resolve(self.client.record_load_many(rids))
+        for rid, record in zip(rids, records):
+            if record is None:
+                raise ValueError(f"record {rid} was not found")
+        return dict(zip(rids, records))
+
+    def _links(self, value: Any, links: Dict[str, str]) -> Any:
+        """
+        return value with the temporary rids replaced, the strings holding a temporary rid become links
+        """
+        if isinstance(value, OrientRecordLink) or (isinstance(value, str) and TEMPORARY_RID.match(value)):
+            rid = rid_of(value)
+            return link(links.get(rid, rid))
+        if isinstance(value, list):
+            return [self._links(item, links) for item in value]
+        if isinstance(value, dict):
+            return {key: self._links(item, links) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def _position(rid: str) -> Tuple[int, int]:
+        cluster, position = rid.lstrip("#").split(":")
+        return int(cluster), int(position)
@@ -0,0 +1,27 @@
+import inspect
+from typing import Any, AsyncIterator
+
+
+async def resolve(result: Any) -> Any:
+    """
+    return result of a client call
+        AsyncOrientDB returns coroutines and they are awaited here,
+        OrientDB results are returned as they are
+    """
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+async def iterate(result: Any) -> AsyncIterator:
+    """
+    iterate over a streaming client call
+        AsyncOrientDB streams are asynchronous generators,
+        OrientDB streams are plain generators
+    """
+    if hasattr(result, "__aiter__"):
+        async for item in result:
+            yield item
+    else:
+        for item in result:
+            yield item
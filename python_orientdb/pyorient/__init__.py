@@ -1,6 +1,11 @@
 __author__ = 'Ostico <ostico@gmail.com>'
 
 from .orient import OrientDB, OrientSocket
+from .async_orient import AsyncOrientDB, AsyncOrientSocket, AsyncSessionSocket
+from .pipeline import Pipeline
+from .unacked import UnackedWrites, AsyncUnackedWrites, WriteFailure
+from .cursor import QueryCursor, AsyncQueryCursor
+from .cache import RecordCache
 from .exceptions import *
 from .otypes import *
 from .constants import *
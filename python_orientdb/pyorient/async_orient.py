@@ -0,0 +1,741 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio transport for the binary protocol.
+
+:class:`AsyncOrientSocket` speaks the same protocol as :class:`OrientSocket
+<pyorient.orient.OrientSocket>` but over asyncio streams, and
+:class:`AsyncOrientDB` exposes the :class:`OrientDB <pyorient.orient.OrientDB>`
+commands as coroutines.
+
+Requests and responses are still encoded and decoded by the message classes of
+:mod:`pyorient.messages`. Received chunks are handed to a
+:class:`ResponseParser <pyorient.messages.parser.ResponseParser>`, which
+decodes them incrementally with the sans-IO decoders of the messages.
+
+Requests are written without waiting for the previous responses: the server
+answers in order, so concurrent calls share round trips, and the futures of
+the sent messages are resolved in that order. Several sessions can share one
+connection through :meth:`AsyncOrientDB.session`.
+"""
+from collections import deque
+from typing import Union
+import asyncio
+import ssl
+import struct
+
+from .constants import FIELD_SHORT, QUERY_ASYNC, QUERY_CMD, QUERY_GREMLIN, \
+    QUERY_SCRIPT, QUERY_SYNC, SUPPORTED_PROTOCOL, SOCK_CONN_TIMEOUT, \
+    ERROR_ON_NEWER_PROTOCOL, DB_TYPE_DOCUMENT, STORAGE_TYPE_PLOCAL, QUERY_OPERATION_QUERY, QUERY_PAGE_SIZE
+from .cursor import AsyncQueryCursor
+from .exceptions import PyOrientConnectionException, \
+    PyOrientConnectionPoolException, PyOrientWrongProtocolVersionException
+from .messages.parser import ResponseParser
+from .orient import OrientDB, _skip
+from .properties import GlobalProperties
+from .serializations import OrientSerialization
+from .cache import RecordCache
+from .live import LiveQueries
+from .unacked import AsyncUnackedWrites
+from .capture import WireCapture
+from .utils import dlog, is_debug_active
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+class AsyncOrientSocket(object):
+    """Binary connection to the database built on asyncio streams.
+
+    Exposes the same attributes as :class:`OrientSocket <pyorient.orient.OrientSocket>`,
+    so the message classes can be bound to it unchanged.
+
+    .. DANGER::
+      Should not be used directly
+
+    :param host: hostname of the server to connect
+    :param port: integer port of the server
+    :param serialization_type: Whether to use CSV or Binary serialization
+    :param ssl_context: An instance of ssl.SSLContext
+    """
+
+    #: minimum number of bytes asked to the stream on every refill
+    read_size = 65536
+
+    def __init__(self, host, port, serialization_type=OrientSerialization.CSV, ssl_context=None,
+                 serialize_props=None):
+        self.connected = False
+        self.host = host
+        self.port = port
+        self.protocol = -1
+        self.session_id = -1
+        self.auth_token = b''
+        self.db_opened = None
+        self.serialization_type = serialization_type
+        self.in_transaction = False
+        self._props = serialize_props if serialize_props else {}
+        # opt-in WireCapture of the traffic, see pyorient.capture
+        self.capture = WireCapture(echo=True) if is_debug_active() else None
+        # records pre-fetched by fetch plans, see pyorient.cache
+        self.record_cache = RecordCache()
+        # subscriptions of the sessions of the connection, see pyorient.live
+        self.live_queries = LiveQueries()
+        self._ssl_context = ssl_context
+        self._reader = None
+        self._writer = None
+        self._parser = ResponseParser(self._push_message)
+        # futures of the sent messages, in the order their responses arrive
+        self._waiting = deque()
+        self._read_lock = asyncio.Lock()
+        # push requests received while no response was due, their records may wait for decode_deferred()
+        self._pushes = []
+
+    def get_connection(self):
+        if not self.connected:
+            raise PyOrientConnectionException(
+                "AsyncOrientSocket must be connected with 'await connect()' first", [])
+
+        return self._writer
+
+    async def connect(self):
+        """
+        Connects to the server and reads the protocol version it speaks.
+
+        Could raise :class:`PyOrientConnectionPoolException`
+        """
+        dlog("Trying to connect...")
+        ssl_context = self._ssl_context if 2434 <= self.port <= 2440 else None
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=ssl_context),
+                SOCK_CONN_TIMEOUT
+            )
+            _value = await asyncio.wait_for(
+                self._reader.readexactly(FIELD_SHORT['bytes']), SOCK_CONN_TIMEOUT
+            )
+        except asyncio.IncompleteReadError:
+            self._writer.close()
+            raise PyOrientConnectionPoolException("Server sent empty string", [])
+        except (OSError, asyncio.TimeoutError) as e:
+            self.connected = False
+            raise PyOrientConnectionException("Socket Error: %s" % e, [])
+
+        self.protocol = struct.unpack('!h', _value)[0]
+        # Raise exception on higher protocol version than supported, if enabled
+        if self.protocol > SUPPORTED_PROTOCOL and ERROR_ON_NEWER_PROTOCOL:
+            raise PyOrientWrongProtocolVersionException(
+                "Protocol version " + str(self.protocol) + " is not supported by this client version. "
+                "Please check, if there's a new pyorient version available", [])
+
+        self._parser.reset()
+        self._waiting.clear()
+        self._pushes = []
+        self.connected = True
+
+    def close(self):
+        """Close the inner connection."""
+        self.host = ''
+        self.port = 0
+        self.protocol = -1
+        self.session_id = -1
+        if self._writer is not None:
+            self._writer.close()
+        self.connected = False
+        self.live_queries.clear()
+
+    def write(self, buff):
+        """Queue ``buff`` on the transport, :meth:`drain` flushes it."""
+        if self._writer is None or self._writer.is_closing():
+            self.connected = False
+            raise PyOrientConnectionException("Socket error", [])
+
+        self._writer.write(buff)
+        return len(buff)
+
+    async def drain(self):
+        try:
+            await self._writer.drain()
+        except OSError as e:
+            self.close()
+            raise PyOrientConnectionException("Socket Error: %s" % e, [])
+
+    def expect(self, message):
+        """Register a message that has just been written.
+
+        :return: future resolved with the :class:`Response <pyorient.messages.parser.Response>`
+            to the message, see :meth:`wait`
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        self._parser.expect(message)
+        self._dispatch()
+        return future
+
+    async def wait(self, future):
+        """Await the response of a message registered with :meth:`expect`.
+
+        The waiter holding the read lock reads for everybody and resolves the
+        futures in order, so responses of pipelined messages are read once.
+        Once the connection is closed every waiter gets the end of stream.
+
+        :return: the decoded response
+        """
+        while not future.done():
+            await self.receive(future)
+
+        response = future.result()
+        pushes, self._pushes = self._pushes, self._pushes[-1:]  # the last one may still be decoded
+        messages = [message for message in [response.message] + pushes if message._undecoded]
+        if messages:
+            await self.decode_deferred(messages)
+        return response.result()
+
+    async def decode_deferred(self, messages):
+        """Decode the records left for later by ``messages``, whose response is read:
+        they reference global properties not known yet, refreshed first,
+        see :mod:`pyorient.properties`.
+
+        The refresh is queued after the requests already sent, on the session of each message.
+        """
+        from .messages.commands import CommandMessage
+
+        refreshed = set()
+        for message in messages:
+            sock = message._orientSocket
+            if id(sock) not in refreshed:
+                refreshed.add(id(sock))
+                refresh = CommandMessage(sock).prepare((QUERY_CMD, sock._props.query())).send()
+                future = self.expect(refresh)
+                await self.drain()
+                sock._props.merge(await self.wait(future))
+            message._decode_undecoded()
+
+    async def settle_pushes(self):
+        """Decode the records left for later by the push requests read while
+        no response was awaited, see :meth:`decode_deferred`.
+        """
+        pushes, self._pushes = self._pushes, self._pushes[-1:]  # the last one may still be decoded
+        messages = [message for message in pushes if message._undecoded]
+        if messages:
+            await self.decode_deferred(messages)
+
+    async def receive(self, future):
+        """Read and decode one chunk of the stream, unless ``future`` is already resolved."""
+        async with self._read_lock:
+            if future.done():
+                return
+
+            chunk = await self._reader.read(max(self._parser.bytes_wanted, self.read_size))
+            if not chunk:
+                self.close()
+                raise PyOrientConnectionException("Server seems to have went down", [])
+
+            self._parser.feed(chunk)
+            self._dispatch()
+
+    async def fetch_response(self, message):
+        """Decode the response to an already sent ``message``."""
+        return await self.wait(self.expect(message))
+
+    def _push_message(self):
+        from .messages.database import PushMessage
+        message = PushMessage(self)
+        self._pushes.append(message)
+        return message
+
+    def _dispatch(self):
+        response = self._parser.pop()
+        while response is not None:
+            future = self._waiting.popleft()
+            # the waiter may have been cancelled, the response is consumed anyway
+            if not future.done():
+                future.set_result(response)
+            response = self._parser.pop()
+
+
+class AsyncSessionSocket(object):
+    """Database session multiplexed over a shared :class:`AsyncOrientSocket`.
+
+    Every request carries its session id and token in the header, so a
+    session only needs its own copy of those attributes; the bytes go
+    through the shared socket, which matches the responses in order.
+
+    .. DANGER::
+      Should not be used directly, see :meth:`AsyncOrientDB.session`
+
+    :param connection: the shared :class:`AsyncOrientSocket`
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.session_id = -1
+        self.auth_token = b''
+        self.db_opened = None
+        self.serialization_type = connection.serialization_type
+        self.in_transaction = False
+        self._props = {}
+        # every session caches its own records
+        self.record_cache = RecordCache()
+
+    @property
+    def connected(self):
+        return self._connection.connected
+
+    @property
+    def host(self):
+        return self._connection.host
+
+    @property
+    def port(self):
+        return self._connection.port
+
+    @property
+    def protocol(self):
+        return self._connection.protocol
+
+    @property
+    def capture(self):
+        return self._connection.capture
+
+    @property
+    def live_queries(self):
+        return self._connection.live_queries
+
+    def get_connection(self):
+        return self._connection.get_connection()
+
+    async def connect(self):
+        if not self._connection.connected:
+            await self._connection.connect()
+
+    def close(self):
+        """Forget the session, the shared connection stays open."""
+        self.session_id = -1
+        self.auth_token = b''
+        self.db_opened = None
+
+    def write(self, buff):
+        return self._connection.write(buff)
+
+    async def drain(self):
+        await self._connection.drain()
+
+    def expect(self, message):
+        return self._connection.expect(message)
+
+    async def wait(self, future):
+        return await self._connection.wait(future)
+
+    async def settle_pushes(self):
+        await self._connection.settle_pushes()
+
+    async def receive(self, future):
+        await self._connection.receive(future)
+
+    async def fetch_response(self, message):
+        return await self._connection.fetch_response(message)
+
+
+class AsyncOrientDB(OrientDB):
+    """OrientDB client whose commands are coroutines
+
+    Same commands and arguments as :class:`OrientDB <pyorient.orient.OrientDB>`,
+    each one awaiting the network instead of blocking on it.
+    Requests on one client are serialized, several clients run concurrently.
+
+    Usage::
+
+        >>> from pyorient import AsyncOrientDB
+        >>> client = AsyncOrientDB("localhost", 2424)
+        >>> await client.db_open('MyDatabase', 'admin', 'admin')
+        >>> await client.query("select from V")
+
+    """
+
+    def __init__(self,
+                 host: Union[str, AsyncOrientSocket, AsyncSessionSocket] = 'localhost',
+                 port: int = 2424,
+                 serialization_type: OrientSerialization = OrientSerialization.CSV,
+                 ssl_context: ssl.SSLContext = None, serialize_props: dict = None):
+        if not isinstance(host, (AsyncOrientSocket, AsyncSessionSocket)):
+            connection = AsyncOrientSocket(host, port, serialization_type, ssl_context, serialize_props)
+
+        else:
+            connection = host
+
+        self.version = None
+        self.clusters = []
+        self.nodes = []
+
+        self._cluster_map = None
+        self._cluster_reverse_map = None
+        self._connection = connection
+        self._serialization_type = serialization_type
+        self._lock = asyncio.Lock()
+
+    def __getattr__(self, item):
+
+        # No special handling for private attributes/methods.
+        if item.startswith("_"):
+            return super(AsyncOrientDB, self).__getattr__(item)
+
+        _names = "".join([i.capitalize() for i in item.split('_')])
+
+        async def wrapper(*args, **kw):
+            return await self._execute(_names + "Message", args)
+
+        return wrapper
+
+    #: messages opening a session, the following requests need their session id and token
+    _SESSION_MESSAGES = frozenset(["ConnectMessage", "DbOpenMessage"])
+
+    async def _execute(self, command, params, query_params=None):
+        """Send one message and await its response.
+
+        The request is written without waiting for the responses of the
+        previous ones, only messages opening a session keep the lock until
+        their response is in.
+
+        :param query_params: values of the parameters of a CommandMessage
+        """
+        async with self._lock:
+            if not self._connection.connected:
+                await self._connection.connect()
+
+            message = self.get_message(command)
+            if query_params is not None:
+                message.set_query_params(query_params)
+            message = message.prepare(params).send()
+            response = self._connection.expect(message)
+            if command in self._SESSION_MESSAGES:
+                await self._connection.drain()
+                return await self._connection.wait(response)
+
+        await self._connection.drain()
+        return await self._connection.wait(response)
+
+    def session(self):
+        """Client with a session of its own on the connection of this one.
+
+        Usage::
+
+            >>> reports = client.session()
+            >>> await reports.db_open('Reports', 'reader', 'reader')
+
+        :return: :class:`AsyncOrientDB` sharing the socket, :meth:`close` on it only ends the session
+        """
+        connection = self._connection
+        if isinstance(connection, AsyncSessionSocket):
+            connection = connection._connection
+        return AsyncOrientDB(AsyncSessionSocket(connection), serialization_type=self._serialization_type)
+
+    # SERVER COMMANDS
+
+    async def connect(self, user, password, client_id=''):
+        return await self._execute("ConnectMessage", (user, password, client_id, self._serialization_type))
+
+    async def db_count_records(self):
+        return await self._execute("DbCountRecordsMessage", ())
+
+    async def db_create(self, name, type=DB_TYPE_DOCUMENT, storage=STORAGE_TYPE_PLOCAL):
+        await self._execute("DbCreateMessage", (name, type, storage))
+        return None
+
+    async def db_drop(self, name, type=STORAGE_TYPE_PLOCAL):
+        await self._execute("DbDropMessage", (name, type))
+        return None
+
+    async def db_exists(self, name, type=STORAGE_TYPE_PLOCAL):
+        return await self._execute("DbExistsMessage", (name, type))
+
+    async def db_open(self, db_name, user, password, db_type=DB_TYPE_DOCUMENT, client_id=''):
+        info, clusters, nodes = await self._execute(
+            "DbOpenMessage", (db_name, user, password, db_type, client_id)
+        )
+
+        self.version = info
+        self.clusters = clusters
+        self._reload_clusters()
+        self.nodes = nodes
+
+        self._share_properties(db_name)
+        await self.update_properties()
+
+        return self.clusters
+
+    async def db_reload(self):
+        self.clusters = await self._execute("DbReloadMessage", [])
+        self._reload_clusters()
+        await self.update_properties()
+        return self.clusters
+
+    async def update_properties(self):
+        """
+        Async counterpart of :meth:`OrientDB.update_properties <pyorient.orient.OrientDB.update_properties>`
+        """
+        if self._serialization_type == OrientSerialization.Binary:
+            properties = self._connection._props
+            if not isinstance(properties, GlobalProperties):
+                properties = self._connection._props = GlobalProperties(properties)
+            properties.merge(await self.command(properties.query()))
+
+    async def shutdown(self, *args):
+        return await self._execute("ShutdownMessage", args)
+
+    # DATABASE COMMANDS
+
+    async def gremlin(self, *args):
+        return await self._execute("CommandMessage", (QUERY_GREMLIN,) + args)
+
+    async def command(self, *args, params=None):
+        return await self._execute("CommandMessage", (QUERY_CMD,) + args, params)
+
+    async def batch(self, *args, params=None):
+        return await self._execute("CommandMessage", (QUERY_SCRIPT,) + args, params)
+
+    async def query(self, *args, params=None):
+        return await self._execute("CommandMessage", (QUERY_SYNC,) + args, params)
+
+    async def query_async(self, *args, params=None):
+        return await self._execute("CommandMessage", (QUERY_ASYNC,) + args, params)
+
+    async def query_stream(self, query, limit=-1, fetch_plan='*:0', params=None):
+        """
+        Async counterpart of :meth:`OrientDB.query_stream <pyorient.orient.OrientDB.query_stream>`,
+        an asynchronous generator yielding the records decoded from every received chunk.
+
+        Other requests can still go on the connection meanwhile, their
+        responses come after the end of the stream.
+
+        Usage::
+
+            >>> async for record in client.query_stream("select from Person"):
+            ...     print(record.name)
+
+        """
+        records = deque()
+        async with self._lock:
+            if not self._connection.connected:
+                await self._connection.connect()
+
+            message = self.get_message("CommandMessage").set_query_params(params) \
+                .prepare((QUERY_SYNC, query, limit, fetch_plan)) \
+                .set_record_sink(records.append).send()
+            response = self._connection.expect(message)
+
+        await self._connection.drain()
+        try:
+            while True:
+                while records:
+                    yield records.popleft()
+                if response.done():
+                    break
+                await self._connection.receive(response)
+            # raises the error of the response, hands out the records left for later
+            await self._connection.wait(response)
+            while records:
+                yield records.popleft()
+        finally:
+            # stopped early: the rest of the response is read by the next waiter
+            message.set_record_sink(_skip)
+            records.clear()
+
+    iter_query = query_stream
+
+    async def query_cursor(self, query, page_size=QUERY_PAGE_SIZE, params=None, operation=QUERY_OPERATION_QUERY):
+        """
+        Async counterpart of :meth:`OrientDB.query_cursor <pyorient.orient.OrientDB.query_cursor>`
+
+        :return: :class:`AsyncQueryCursor <pyorient.cursor.AsyncQueryCursor>`
+        """
+        page = await self._execute("QueryMessage", (query, page_size, operation, params or {}))
+        return AsyncQueryCursor(self, *page, page_size=page_size)
+
+    def resume_query(self, query_id, page_size=QUERY_PAGE_SIZE):
+        return AsyncQueryCursor(self, query_id, [], True, page_size)
+
+    async def close_query(self, query_id):
+        return await self._execute("CloseQueryMessage", (query_id,))
+
+    async def live_query(self, query, callback=None, params=None):
+        """
+        Async counterpart of :meth:`OrientDB.live_query <pyorient.orient.OrientDB.live_query>`,
+        the events are dispatched as soon as they arrive
+
+        Usage::
+
+            >>> live = await client.live_query("LIVE SELECT FROM Person")
+            >>> async for event in live:
+            ...     print(event.operation, event.record)
+
+        """
+        return self._subscribe(query, await self.command(query, params=params), callback)
+
+    async def live_unsubscribe(self, token):
+        result = await self.command("LIVE UNSUBSCRIBE %d" % token)
+        self._connection.live_queries.end(token)
+        return result
+
+    async def poll_live_events(self, timeout=0):
+        """Read the push requests the server sent while nothing read the connection,
+        dispatching the live query events to their subscriptions.
+
+        Events arriving while a request is awaited or a live query iterated are
+        read then, this waits for them when neither happens.
+
+        :param timeout: seconds to wait for the first one, None waits until one arrives
+        :return: number of live query events dispatched
+        """
+        live_queries = self._connection.live_queries
+        dispatched = live_queries.dispatched
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        idle = loop.create_future()
+        while live_queries.dispatched == dispatched:
+            reading = asyncio.ensure_future(self._connection.receive(idle))
+            done, _ = await asyncio.wait(
+                [reading], timeout=None if deadline is None else max(deadline - loop.time(), 0))
+            if not done:
+                reading.cancel()
+                await asyncio.gather(reading, return_exceptions=True)
+                break
+            reading.result()
+            await self._connection.settle_pushes()
+        return live_queries.dispatched - dispatched
+
+    async def data_cluster_add(self, *args):
+        return await self._execute("DataClusterAddMessage", args)
+
+    async def data_cluster_count(self, *args):
+        return await self._execute("DataClusterCountMessage", args)
+
+    async def data_cluster_data_range(self, *args):
+        return await self._execute("DataClusterDataRangeMessage", args)
+
+    async def data_cluster_drop(self, *args):
+        return await self._execute("DataClusterDropMessage", args)
+
+    async def db_close(self, *args):
+        return await self._execute("DbCloseMessage", args)
+
+    async def db_size(self, *args):
+        return await self._execute("DbSizeMessage", args)
+
+    async def db_list(self, *args):
+        return await self._execute("DbListMessage", args)
+
+    async def record_create(self, *args):
+        return await self._execute("RecordCreateMessage", args)
+
+    async def record_delete(self, *args):
+        return await self._execute("RecordDeleteMessage", args)
+
+    async def record_load(self, *args):
+        record = self._cached_record(args)
+        if record is not None:
+            return record
+        return await self._execute("RecordLoadMessage", args)
+
+    async def record_load_many(self, rids, fetch_plan='*:0'):
+        """
+        Async counterpart of :meth:`OrientDB.record_load_many <pyorient.orient.OrientDB.record_load_many>`
+        """
+        rids = list(rids)
+        records, missing = self._split_cached(rids, fetch_plan)
+        if missing:
+            pipeline = self.pipeline()
+            for rid in missing:
+                pipeline.record_load(rid, fetch_plan)
+            self._fill(rids, records, missing, await pipeline.execute())
+        return records
+
+    async def load_links(self, links):
+        """
+        Async counterpart of :meth:`OrientDB.load_links <pyorient.orient.OrientDB.load_links>`
+        """
+        return await self.record_load_many(links)
+
+    async def record_update(self, *args):
+        return await self._execute("RecordUpdateMessage", args)
+
+    def tx_commit(self):
+        """
+        :return: :class:`AsyncTxCommit`, the operations of a transaction committed by one request
+        """
+        return AsyncTxCommit(self)
+
+    def unacked_writes(self, max_pending=1000):
+        """
+        :return: :class:`AsyncUnackedWrites <pyorient.unacked.AsyncUnackedWrites>`, see :meth:`OrientDB.unacked_writes
+            <pyorient.orient.OrientDB.unacked_writes>`
+        """
+        return AsyncUnackedWrites(self, max_pending)
+
+
+class AsyncTxCommit(object):
+    """Transaction of an :class:`AsyncOrientDB`, committed by a single TX_COMMIT.
+
+    Unlike with :meth:`OrientDB.tx_commit <pyorient.orient.OrientDB.tx_commit>`
+    the session is not switched to a transaction mode, other tasks keep using
+    it: the operations are messages prepared but never sent on their own.
+    Records created in the transaction get temporary record ids (``#-1:-2``,
+    ``#-1:-3`` ... in the order they are attached), which the records of the
+    same transaction can link to.
+
+    Usage::
+
+        >>> tx = client.tx_commit().begin()
+        >>> tx.record_create(-1, {"@Person": {"name": "a"}})
+        >>> tx.record_delete(12, 0, 1)
+        >>> records = await tx.commit()
+
+    :param client: the :class:`AsyncOrientDB` of the session
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._transaction = None
+
+    def begin(self):
+        self._transaction = self._client.get_message("TxCommitMessage")._transaction
+        self._transaction.get_transaction_id()
+        return self
+
+    def attach(self, operation):
+        """Add a prepared RecordCreateMessage, RecordUpdateMessage or RecordDeleteMessage."""
+        if self._transaction is None:
+            self.begin()
+        self._transaction.attach(operation)
+        return self
+
+    def record_create(self, *args):
+        return self._operation("RecordCreateMessage", args)
+
+    def record_update(self, *args):
+        return self._operation("RecordUpdateMessage", args)
+
+    def record_delete(self, *args):
+        return self._operation("RecordDeleteMessage", args)
+
+    def _operation(self, name, args):
+        message = self._client.get_message(name).prepare(args)
+        self.attach(message)
+        return message
+
+    async def commit(self):
+        """
+        :return: the created and updated records by record id, see :meth:`OrientDB.tx_commit
+            <pyorient.orient.OrientDB.tx_commit>`
+        """
+        transaction, self._transaction = self._transaction, None
+        if transaction is None:
+            return {}
+
+        connection = self._client._connection
+        async with self._client._lock:
+            response = connection.expect(transaction.prepare().send())
+        await connection.drain()
+        return await connection.wait(response)
+
+    def rollback(self):
+        """Forget the attached operations, nothing was sent."""
+        self._transaction = None
+        return self
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Session record cache.
+
+Queries and loads with a fetch plan (``*:1``, ``*:-1`` ...) receive the
+records linked by their result along with it, as "pre-fetched" records. The
+session keeps them in its :class:`RecordCache`, an identity map by record id:
+:meth:`OrientDB.record_load <pyorient.orient.OrientDB.record_load>` and
+:meth:`OrientDB.load_links <pyorient.orient.OrientDB.load_links>` return them
+without a round trip.
+
+Usage::
+
+    >>> people = client.query("select from Person", -1, "*:1")
+    >>> friends = client.load_links(people[0].out_Knows)    # no request sent
+
+The cache drops the records changed through the session by
+``record_update`` and ``record_delete``, and empties itself on every command,
+script or transaction the session sends, as they may change any record.
+The changes of other sessions are not seen: records expire ``ttl`` seconds
+after they were cached, :meth:`RecordCache.clear` drops them at once.
+"""
+from collections import OrderedDict
+import time
+
+from .otypes import OrientRecordLink
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+def rid_of(value):
+    """Record id of a record, a link or a rid string, always as ``#cluster:position``."""
+    if isinstance(value, OrientRecordLink):
+        return value.get_hash()
+    rid = getattr(value, '_rid', value)
+    if rid is None:
+        return None
+    rid = str(rid)
+    return rid if rid.startswith('#') else '#' + rid
+
+
+class RecordCache(object):
+    """Records of a session by record id, the least recently used ones go first.
+
+    :param size: records kept at most
+    :param ttl: seconds a record is kept, None keeps it until it is dropped
+    """
+
+    def __init__(self, size=10000, ttl=60.0):
+        self.size = size
+        self.ttl = ttl
+        # rid: (record, expiry time)
+        self._records = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, record):
+        """Keep ``record``, unless the cache already holds a newer version of it."""
+        rid = rid_of(record)
+        if rid is None:
+            return
+        cached = self._get(rid)
+        if cached is not None and (cached._version or 0) > (record._version or 0):
+            self._records.move_to_end(rid)
+            return
+        self._records[rid] = (record, None if self.ttl is None else time.monotonic() + self.ttl)
+        self._records.move_to_end(rid)
+        if len(self._records) > self.size:
+            self._records.popitem(last=False)
+
+    def get(self, rid):
+        """
+        :param rid: record id, link or record
+        :return: the cached record, None if it isn't cached or expired
+        """
+        rid = rid_of(rid)
+        record = self._get(rid)
+        if record is None:
+            self.misses += 1
+            return None
+        self._records.move_to_end(rid)
+        self.hits += 1
+        return record
+
+    def _get(self, rid):
+        record, expiry = self._records.get(rid, (None, None))
+        if expiry is not None and expiry <= time.monotonic():
+            del self._records[rid]
+            return None
+        return record
+
+    def discard(self, rid):
+        self._records.pop(rid_of(rid), None)
+
+    def clear(self):
+        self._records.clear()
+
+    def __contains__(self, rid):
+        return self._get(rid_of(rid)) is not None
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in capture of the bytes exchanged with the server.
+
+A socket without capture (the default) pays nothing for it. Setting
+``capture`` on a socket records every request and, once decoded, its whole
+response: the last ones are kept in a bounded ring buffer, and all of them
+are appended to a capture file when a path is given.
+
+Usage::
+
+    >>> from pyorient.capture import WireCapture
+    >>> client = OrientDB("localhost", 2424)
+    >>> client._connection.capture = WireCapture("session.pyorcap", max_bytes=1 << 20)
+
+With the ``DEBUG`` environment variable set, sockets start with a capture
+echoing every frame as an hexdump.
+
+Capture files can be replayed without a server: every request is preceded in
+the file by the state its message decodes the response with, so
+:func:`replay` rebuilds the messages on an :class:`OfflineSocket
+<pyorient.messages.parser.OfflineSocket>` and decodes the recorded responses
+again, e.g. to benchmark the decoders on real payloads::
+
+    >>> for response in replay("session.pyorcap"):
+    ...     print(response.message, response.result())
+
+Capture file format: the :data:`MAGIC` header followed by frames made of a
+:data:`FRAME_HEADER` (direction, timestamp, message name length, data length),
+the message name and the data. A capture file records one connection, the
+responses follow the order of the requests.
+
+Credentials never reach a capture: the user names and passwords of the
+messages and the session token are left out of the recorded state, and
+masked in the recorded bytes. Replay only rebuilds the pyorient messages,
+records and global properties a state is made of, anything else in a capture
+file is refused.
+"""
+from collections import deque, namedtuple
+import functools
+import importlib
+import io
+import re
+import pickle
+import struct
+import time
+import types
+
+from .hexdump import hexdump
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+MAGIC = b"PYORCAP1"
+FRAME_HEADER = struct.Struct("!cdHI")
+
+REQUEST = b">"
+RESPONSE = b"<"
+#: pickled message state, written to capture files only
+STATE = b"="
+
+Frame = namedtuple("Frame", "direction timestamp message data")
+
+_CALLBACKS = (types.FunctionType, types.MethodType, types.BuiltinFunctionType, functools.partial)
+
+#: attributes of the messages holding credentials, never recorded
+_SECRETS = frozenset(['_user', '_pass', '_auth_token'])
+#: modules of the classes a recorded state can be made of
+_REPLAYABLE_MODULE = re.compile(r"pyorient\.(messages\.\w+|otypes|properties)$")
+
+
+def _discard(*args, **kwargs):
+    """Stands for the callbacks of the recorded messages."""
+
+
+class _StatePickler(pickle.Pickler):
+    """Pickles a message leaving out its sockets and callbacks."""
+
+    def __init__(self, file, sockets):
+        super(_StatePickler, self).__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._sockets = sockets
+
+    def persistent_id(self, obj):
+        if isinstance(obj, _CALLBACKS):
+            return "callback"
+        if id(obj) in self._sockets:
+            return "socket"
+        return None
+
+
+class _StateUnpickler(pickle.Unpickler):
+    """Unpickles a message state, rebuilding only pyorient messages, records and global properties."""
+
+    def __init__(self, file, socket=None):
+        super(_StateUnpickler, self).__init__(file)
+        self._socket = socket
+
+    def persistent_load(self, pid):
+        return _discard if pid == "callback" else self._socket
+
+    def find_class(self, module, name):
+        if _REPLAYABLE_MODULE.match(module):
+            cls = super(_StateUnpickler, self).find_class(module, name)
+            if isinstance(cls, type) and issubclass(cls, _replayable()):
+                return cls
+        raise pickle.UnpicklingError("%s.%s can't be replayed" % (module, name))
+
+
+def _replayable():
+    from .messages.database import BaseMessage
+    from .otypes import OrientBinaryObject, OrientCluster, OrientNode, OrientRecord, OrientRecordLink, \
+        OrientVersion
+    from .properties import GlobalProperties
+
+    return (BaseMessage, OrientBinaryObject, OrientCluster, OrientNode, OrientRecord, OrientRecordLink,
+            OrientVersion, GlobalProperties)
+
+
+def _mask(data, secrets):
+    """``data`` with every occurrence of ``secrets`` overwritten, same length."""
+    for secret in secrets:
+        if secret:
+            data = data.replace(secret, b"*" * len(secret))
+    return data
+
+
+def _secrets(message):
+    """Session token, user name and password bytes of ``message``, masked in its request."""
+    secrets = [message._orientSocket.auth_token]
+    for name in ('_user', '_pass'):
+        value = getattr(message, name, None)
+        secrets.append(value.encode('utf-8') if isinstance(value, str) else value)
+    return secrets
+
+
+def _dump_state(message):
+    """Message class and socket state, then the message attributes, credentials left out."""
+    sock = message._orientSocket
+    buff = io.BytesIO()
+    pickle.dump((
+        "%s:%s" % (type(message).__module__, type(message).__qualname__),
+        dict(protocol=sock.protocol, serialization_type=sock.serialization_type,
+             session_id=sock.session_id, db_opened=sock.db_opened, serialize_props=sock._props)
+    ), buff, pickle.HIGHEST_PROTOCOL)
+    state = {key: value for key, value in message.__dict__.items() if key not in _SECRETS}
+    _StatePickler(buff, {id(sock), id(sock.get_connection())}).dump(
+        dict(state, _output_buffer=b'', _input_buffer=b'')
+    )
+    return buff.getvalue()
+
+
+def _load_state(data):
+    """Rebuild a message recorded by :func:`_dump_state` on an :class:`OfflineSocket`.
+
+    :raise: pickle.UnpicklingError if the state holds anything but pyorient messages, records and properties
+    """
+    from .messages.database import BaseMessage
+    from .messages.parser import OfflineSocket
+
+    buff = io.BytesIO(data)
+    path, socket_state = _StateUnpickler(buff).load()
+    module, name = path.split(":")
+    if not module.startswith("pyorient.messages."):
+        raise pickle.UnpicklingError("%s can't be replayed" % path)
+    cls = functools.reduce(getattr, name.split("."), importlib.import_module(module))
+    if not (isinstance(cls, type) and issubclass(cls, BaseMessage)):
+        raise pickle.UnpicklingError("%s can't be replayed" % path)
+
+    message = cls.__new__(cls)
+    message.__dict__.update(_StateUnpickler(buff, OfflineSocket(**socket_state)).load())
+    return message
+
+
+class WireCapture(object):
+    """Records requests and responses of the sockets it is set on.
+
+    :param path: capture file, frames are appended to it
+    :param max_bytes: data kept in memory, oldest frames are dropped first
+    :param echo: print every frame as an hexdump
+    """
+
+    def __init__(self, path=None, max_bytes=1 << 20, echo=False):
+        self.max_bytes = max_bytes
+        self.echo = echo
+        self._frames = deque()
+        self._size = 0
+        self._file = None
+        if path is not None:
+            self._file = open(path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(MAGIC)
+
+    def request(self, message, data):
+        if self._file is not None:
+            try:
+                state = _dump_state(message)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                state = b''  # the exchange is recorded but can't be replayed
+            self._write(STATE, type(message).__name__, state)
+        self._record(REQUEST, message, _mask(bytes(data), _secrets(message)))
+
+    def response(self, message, data):
+        # a token received with the response is the one of the socket by now,
+        # the rest is left as is to be decoded again
+        self._record(RESPONSE, message, _mask(bytes(data), [message._orientSocket.auth_token]))
+        message._input_buffer = data
+
+    def tap(self, message, decoder):
+        """Wrap a response decoder, recording the bytes it consumes.
+
+        :param decoder: generator returned by ``message.decode_response()``
+        """
+        chunks = []
+        try:
+            wanted = next(decoder)
+            while True:
+                try:
+                    data = yield wanted
+                except GeneratorExit:
+                    decoder.close()
+                    raise
+                except BaseException as e:
+                    wanted = decoder.throw(e)
+                    continue
+                chunks.append(data)
+                wanted = decoder.send(data)
+        except StopIteration as e:
+            return e.value
+        finally:
+            self.response(message, b"".join(chunks))
+
+    def frames(self):
+        """
+        :return: list of the :class:`Frame` kept in memory, oldest first
+        """
+        return list(self._frames)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _record(self, direction, message, data):
+        data = bytes(data)
+        name = type(message).__name__
+        frame = Frame(direction, time.time(), name, data[:self.max_bytes])
+
+        self._frames.append(frame)
+        self._size += len(frame.data)
+        while self._size > self.max_bytes:
+            self._size -= len(self._frames.popleft().data)
+
+        if self._file is not None:
+            self._write(direction, name, data, frame.timestamp)
+
+        if self.echo:
+            print("\nRequest :" if direction == REQUEST else "\nResponse:")
+            hexdump(data)
+
+    def _write(self, direction, name, data, timestamp=None):
+        encoded_name = name.encode()
+        self._file.write(FRAME_HEADER.pack(
+            direction, time.time() if timestamp is None else timestamp, len(encoded_name), len(data)))
+        self._file.write(encoded_name)
+        self._file.write(data)
+
+
+def read_frames(path):
+    """Iterate over the frames of a capture file.
+
+    :return: generator of :class:`Frame`
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a pyorient capture file" % path)
+
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            direction, timestamp, name_length, data_length = FRAME_HEADER.unpack(header)
+            name = f.read(name_length).decode()
+            yield Frame(direction, timestamp, name, f.read(data_length))
+
+
+class Exchange(namedtuple("Exchange", "name state request response")):
+    """A request of a capture file with its response.
+
+    :attr:`state` is empty when the message couldn't be recorded for replay.
+    """
+
+    __slots__ = ()
+
+    def message(self):
+        """
+        :return: a new message in the state it was when its request was sent
+        """
+        return _load_state(self.state)
+
+    def decode(self, message=None):
+        """Decode the recorded response again.
+
+        :param message: built by :meth:`message`, a new one by default
+        :return: :class:`Response <pyorient.messages.parser.Response>`
+        """
+        from .messages.parser import ResponseParser
+
+        parser = ResponseParser().expect(message or self.message()).feed(self.response)
+        return parser.pop()
+
+
+def exchanges(path):
+    """Pair the requests of a capture file with their responses.
+
+    :return: list of :class:`Exchange` in request order, requests without a
+        recorded response are left out
+    """
+    requests = deque()
+    result = []
+    state = b''
+    for frame in read_frames(path):
+        if frame.direction == STATE:
+            state = frame.data
+        elif frame.direction == REQUEST:
+            requests.append((frame.message, state, frame.data))
+            state = b''
+        elif requests:
+            result.append(Exchange(*(requests.popleft() + (frame.data,))))
+    return result
+
+
+def replay(path):
+    """Decode the responses of a capture file again, without a server.
+
+    :return: generator of :class:`Response <pyorient.messages.parser.Response>`,
+        one per replayable exchange
+    """
+    for exchange in exchanges(path):
+        if exchange.state:
+            yield exchange.decode()
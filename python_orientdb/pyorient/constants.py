@@ -34,6 +34,7 @@ RECORD = 8
 STRINGS = 9
 CHAR = 10
 LINK = 11
+FIELDS = 12  # Length prefixed group of fields, request only
 
 # Type map
 TYPE_MAP = {
@@ -74,6 +75,7 @@ FIELD_LONG = {"type": LONG, "bytes": 8, "struct": None}
 FIELD_BYTES = {"type": BYTES, "bytes": 4, "struct": None}
 FIELD_STRING = {"type": STRING, "bytes": 4, "struct": None}
 FIELD_STRINGS = {"type": STRINGS, "bytes": 4, "struct": None}
+FIELD_FIELDS = {"type": FIELDS, "bytes": 4, "struct": None}
 FIELD_RECORD = {"type": RECORD, "bytes": None, "struct": [
     FIELD_CHAR,  # record_type
     FIELD_SHORT,  # record_clusterID
@@ -105,6 +107,9 @@ RECORD_CREATE = "RecordCreateMessage"
 RECORD_UPDATE = "RecordUpdateMessage"
 RECORD_DELETE = "RecordDeleteMessage"
 COMMAND = "CommandMessage"
+QUERY = "QueryMessage"
+QUERY_NEXT_PAGE = "QueryNextPageMessage"
+CLOSE_QUERY = "CloseQueryMessage"
 DB_RELOAD = "DbReloadMessage"
 TX_COMMIT = "TxCommitMessage"
 
@@ -127,10 +132,24 @@ RECORD_CREATE_OP = chr(31)
 RECORD_UPDATE_OP = chr(32)
 RECORD_DELETE_OP = chr(33)
 COMMAND_OP = chr(41)
+QUERY_OP = chr(45)
+CLOSE_QUERY_OP = chr(46)
+QUERY_NEXT_PAGE_OP = chr(47)
 TX_COMMIT_OP = chr(60)
 DB_RELOAD_OP = chr(73)
 DB_LIST_OP = chr(74)
 
+# Push requests, sent by the server in frames of their own with the PUSH_DATA status
+PUSH_DATA = 3
+REQUEST_PUSH_RECORD = 79
+REQUEST_PUSH_DISTRIB_CONFIG = 80
+REQUEST_PUSH_LIVE_QUERY = 81
+
+# Record operations of the REQUEST_PUSH_LIVE_QUERY events
+RECORD_OPERATION_UPDATED = 1
+RECORD_OPERATION_DELETED = 2
+RECORD_OPERATION_CREATED = 3
+
 # Database types
 DB_TYPE_DOCUMENT = 'document'
 DB_TYPE_GRAPH = 'graph'
@@ -138,6 +157,7 @@ DB_TYPES = (DB_TYPE_DOCUMENT, DB_TYPE_GRAPH)
 
 # Storage types
 STORAGE_TYPE_PLOCAL = 'plocal'
+STORAGE_TYPE_LOCAL = 'local'
 STORAGE_TYPE_MEMORY = 'memory'
 STORAGE_TYPES = (STORAGE_TYPE_PLOCAL, STORAGE_TYPE_MEMORY)
 
@@ -149,6 +169,19 @@ QUERY_GREMLIN = "com.orientechnologies.orient.graph.gremlin.OCommandGremlin"
 QUERY_SCRIPT = "com.orientechnologies.orient.core.command.script.OCommandScript"
 QUERY_TYPES = (QUERY_SYNC, QUERY_ASYNC, QUERY_CMD, QUERY_GREMLIN, QUERY_SCRIPT)
 
+# Operation types of QUERY_OP, protocol 37+
+QUERY_OPERATION_QUERY = 0  # idempotent
+QUERY_OPERATION_COMMAND = 1
+QUERY_OPERATION_SCRIPT = 2
+QUERY_OPERATIONS = (QUERY_OPERATION_QUERY, QUERY_OPERATION_COMMAND, QUERY_OPERATION_SCRIPT)
+
+# Result types in the result sets of QUERY_OP
+QUERY_RESULT_BLOB = 0
+QUERY_RESULT_VERTEX = 1
+QUERY_RESULT_EDGE = 2
+QUERY_RESULT_ELEMENT = 3
+QUERY_RESULT_PROJECTION = 4
+
 # Record types
 RECORD_TYPE_BYTES = 'b'
 RECORD_TYPE_DOCUMENT = 'd'
@@ -175,6 +208,7 @@ MESSAGES = dict(
     DbReloadMessage="pyorient.messages.database",
     DbSizeMessage="pyorient.messages.database",
     DbListMessage="pyorient.messages.database",
+    PushMessage="pyorient.messages.database",
 
     # Cluster
     DataClusterAddMessage="pyorient.messages.cluster",
@@ -189,7 +223,13 @@ MESSAGES = dict(
 
     CommandMessage="pyorient.messages.commands",
     TxCommitMessage="pyorient.messages.commands",
+
+    QueryMessage="pyorient.messages.query",
+    QueryNextPageMessage="pyorient.messages.query",
+    CloseQueryMessage="pyorient.messages.query",
 )
 
 # OTHER CONFIGURATIONS
 SOCK_CONN_TIMEOUT = 30  # Socket timeout in seconds
+SOCK_RECV_BUFFER_SIZE = 65536  # Bytes kept in the socket receive buffer
+QUERY_PAGE_SIZE = 100  # Records per page of the server side cursors
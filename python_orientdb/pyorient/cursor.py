@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Server side cursors.
+
+With protocol 37+ a query opens a cursor on the server, which keeps the result
+set and sends it one page at a time: large results are pulled page by page
+without running the query again. A cursor is resumable, its :attr:`query_id
+<QueryCursor.query_id>` is enough to fetch the next pages later on the same
+session, see :meth:`OrientDB.resume_query <pyorient.orient.OrientDB.resume_query>`.
+
+Usage::
+
+    >>> cursor = client.query_cursor("select from Person", page_size=500)
+    >>> for record in cursor:
+    ...     print(record.name)
+
+    >>> page = cursor.records           # or page by page
+    >>> while cursor.has_next_page:
+    ...     page = cursor.next_page()
+
+"""
+from .constants import CLOSE_QUERY, QUERY_NEXT_PAGE
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+class QueryCursor(object):
+    """Cursor on the result set of a query, kept by the server.
+
+    :param client: :class:`OrientDB <pyorient.orient.OrientDB>` whose session opened the cursor
+    :param query_id: id of the cursor on the server
+    :param records: the page already fetched
+    :param has_next_page: False once the last page is fetched, the server has then closed the cursor
+    :param page_size: records asked for every next page
+    """
+
+    def __init__(self, client, query_id, records, has_next_page, page_size):
+        self._client = client
+        #: id of the cursor on the server
+        self.query_id = query_id
+        #: records of the last fetched page
+        self.records = records
+        self.has_next_page = has_next_page
+        self.page_size = page_size
+
+    def __repr__(self):
+        return "<%s %s, %d records%s>" % (
+            type(self).__name__, self.query_id, len(self.records), ", more pages" if self.has_next_page else ""
+        )
+
+    def _fetch(self):
+        return self._client.get_message(QUERY_NEXT_PAGE) \
+            .prepare((self.query_id, self.page_size)).send().fetch_response()
+
+    def _set_page(self, page):
+        self.query_id, self.records, self.has_next_page = page
+        return self.records
+
+    def next_page(self):
+        """
+        :return: the records of the next page, empty once the result set is over
+        """
+        if not self.has_next_page:
+            self.records = []
+            return self.records
+        return self._set_page(self._fetch())
+
+    def __iter__(self):
+        """Records of the current page and of the following ones, fetched as they are needed."""
+        records = self.records
+        while True:
+            for record in records:
+                yield record
+            if not self.has_next_page:
+                return
+            records = self.next_page()
+
+    def close(self):
+        """Free the result set on the server, only needed when it is not read to the end."""
+        if self.has_next_page:
+            self.has_next_page = False
+            self._client.get_message(CLOSE_QUERY).prepare((self.query_id,)).send().fetch_response()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncQueryCursor(QueryCursor):
+    """:class:`QueryCursor` of an :class:`AsyncOrientDB <pyorient.async_orient.AsyncOrientDB>`,
+    :meth:`next_page` and :meth:`close` are coroutines and the records are
+    iterated with ``async for``.
+    """
+
+    async def next_page(self):
+        if not self.has_next_page:
+            self.records = []
+            return self.records
+        return self._set_page(await self._client._execute(QUERY_NEXT_PAGE, (self.query_id, self.page_size)))
+
+    def __iter__(self):
+        raise TypeError("use 'async for' to iterate over an AsyncQueryCursor")
+
+    async def __aiter__(self):
+        records = self.records
+        while True:
+            for record in records:
+                yield record
+            if not self.has_next_page:
+                return
+            records = await self.next_page()
+
+    async def close(self):
+        if self.has_next_page:
+            self.has_next_page = False
+            await self._client._execute(CLOSE_QUERY, (self.query_id,))
+
+    def __enter__(self):
+        raise TypeError("use 'async with' with an AsyncQueryCursor")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
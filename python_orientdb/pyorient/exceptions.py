@@ -2,6 +2,9 @@
 
 
 class PyOrientException(Exception):
+    #: raised for an error response of the server, read to its end: the connection can go on
+    from_server = False
+
     def __init__(self, message, errors):
 
         _errorClass = message.split(".")[-1]
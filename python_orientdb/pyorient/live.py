@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Live queries.
+
+``LIVE SELECT`` subscribes the session to the changes of the records a query
+selects: every time one of them is inserted, updated or deleted the server
+pushes a REQUEST_PUSH_LIVE_QUERY event, until ``LIVE UNSUBSCRIBE`` ends the
+subscription.
+
+Pushed events are read along with the responses, so they reach a
+:class:`LiveQuery` whenever the connection is read: with :class:`OrientDB
+<pyorient.orient.OrientDB>` on the next request or on :meth:`OrientDB.poll_live_events
+<pyorient.orient.OrientDB.poll_live_events>`, with :class:`AsyncOrientDB
+<pyorient.async_orient.AsyncOrientDB>` as soon as they arrive while a request
+is awaited or a live query iterated, otherwise on :meth:`AsyncOrientDB.poll_live_events
+<pyorient.async_orient.AsyncOrientDB.poll_live_events>`.
+
+Usage::
+
+    >>> live = client.live_query("LIVE SELECT FROM Person", callback=print)
+    >>> client.poll_live_events(timeout=1)
+    >>> live.unsubscribe()
+
+    >>> live = await async_client.live_query("LIVE SELECT FROM Person", callback=print)
+    >>> await async_client.poll_live_events(timeout=1)
+
+    >>> live = await async_client.live_query("LIVE SELECT FROM Person WHERE age > 18")
+    >>> async for event in live:
+    ...     print(event.operation, event.record)
+
+"""
+import asyncio
+from collections import deque
+
+from .constants import RECORD_OPERATION_CREATED, RECORD_OPERATION_DELETED, RECORD_OPERATION_UPDATED
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+#: names of the record operations of the events
+LIVE_OPERATIONS = {
+    RECORD_OPERATION_CREATED: 'insert',
+    RECORD_OPERATION_UPDATED: 'update',
+    RECORD_OPERATION_DELETED: 'delete',
+}
+
+
+class LiveEvent(object):
+    """Change of a record selected by a live query.
+
+    :param operation: 'insert', 'update' or 'delete'
+    :param token: token of the live query
+    :param record: the record as it is after the change, as it was for a delete
+    """
+
+    __slots__ = ('operation', 'token', 'record')
+
+    def __init__(self, operation, token, record):
+        self.operation = operation
+        self.token = token
+        self.record = record
+
+    def __repr__(self):
+        return "<LiveEvent %s %s of live query %s>" % (
+            self.operation, getattr(self.record, '_rid', None), self.token)
+
+
+class LiveQuery(object):
+    """Subscription to a ``LIVE SELECT``, see :meth:`OrientDB.live_query
+    <pyorient.orient.OrientDB.live_query>`.
+
+    Events go to ``callback`` if there is one; otherwise they are queued for
+    iteration, which blocks (or awaits, with an async client) until the next
+    event and ends once the query is unsubscribed.
+
+    :param client: the client that subscribed
+    :param token: token the server gave to the live query
+    :param query: the ``LIVE SELECT`` statement
+    :param callback: callable receiving every :class:`LiveEvent`
+    """
+
+    def __init__(self, client, token, query, callback=None):
+        self.client = client
+        self.token = token
+        self.query = query
+        self.callback = callback
+        self.subscribed = True
+        self._events = deque()
+        self._waiter = None
+
+    def unsubscribe(self):
+        """Cancel the subscription, a coroutine with an async client."""
+        return self.client.live_unsubscribe(self.token)
+
+    def push(self, event):
+        if self.callback is not None:
+            self.callback(event)
+        else:
+            self._events.append(event)
+        self._wake()
+
+    def end(self):
+        self.subscribed = False
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __iter__(self):
+        while True:
+            while self._events:
+                yield self._events.popleft()
+            if not self.subscribed:
+                return
+            self.client.poll_live_events(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._events:
+            if not self.subscribed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            await self.client._connection.receive(self._waiter)
+        return self._events.popleft()
+
+    def __repr__(self):
+        return "<LiveQuery %s %r%s>" % (self.token, self.query, "" if self.subscribed else " unsubscribed")
+
+
+class LiveQueries(object):
+    """Live queries of a connection by token, the events pushed on it are dispatched to them."""
+
+    def __init__(self):
+        self._queries = {}
+        #: events handed to a live query
+        self.dispatched = 0
+
+    def add(self, live_query):
+        self._queries[live_query.token] = live_query
+
+    def get(self, token):
+        return self._queries.get(token)
+
+    def dispatch(self, event):
+        """Hand ``event`` to its live query, events of unknown queries are dropped."""
+        live_query = self._queries.get(event.token)
+        if live_query is not None:
+            self.dispatched += 1
+            live_query.push(event)
+
+    def end(self, token):
+        """Forget the live query of ``token``, its iteration stops."""
+        live_query = self._queries.pop(token, None)
+        if live_query is not None:
+            live_query.end()
+
+    def clear(self):
+        for token in list(self._queries):
+            self.end(token)
+
+    def __contains__(self, token):
+        return token in self._queries
+
+    def __len__(self):
+        return len(self._queries)
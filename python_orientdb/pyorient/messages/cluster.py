@@ -69,9 +69,9 @@ class DataClusterAddMessage(BaseMessage):
 
         return super(DataClusterAddMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_SHORT)
-        return super(DataClusterAddMessage, self).fetch_response()[0]
+        return (yield from self._fetch_fields())[0]
 
     def set_cluster_name(self, _cluster_name):
         self._cluster_name = _cluster_name
@@ -154,9 +154,9 @@ class DataClusterCountMessage(BaseMessage):
 
         return super(DataClusterCountMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_LONG)
-        return super(DataClusterCountMessage, self).fetch_response()[0]
+        return (yield from self._fetch_fields())[0]
 
     def set_cluster_ids(self, _cluster_ids):
         self._cluster_ids = _cluster_ids
@@ -191,14 +191,20 @@ class DataClusterDataRangeMessage(BaseMessage):
         if isinstance(params, int):
             # mandatory if not passed by method
             self._cluster_id = params
+        elif isinstance(params, tuple) or isinstance(params, list):
+            try:
+                self._cluster_id = params[0]
+            except IndexError:
+                # Use default for non existent indexes
+                pass
 
         self._append((FIELD_SHORT, self._cluster_id))
         return super(DataClusterDataRangeMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_LONG)
         self._append(FIELD_LONG)
-        return super(DataClusterDataRangeMessage, self).fetch_response()
+        return (yield from self._fetch_fields())
 
     def set_cluster_id(self, _cluster_id):
         self._cluster_id = _cluster_id
@@ -233,9 +239,9 @@ class DataClusterDropMessage(BaseMessage):
         self._append((FIELD_SHORT, self._cluster_id))
         return super(DataClusterDropMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_BOOLEAN)
-        return super(DataClusterDropMessage, self).fetch_response()[0]
+        return (yield from self._fetch_fields())[0]
 
     def set_cluster_id(self, _cluster_id):
         self._cluster_id = _cluster_id
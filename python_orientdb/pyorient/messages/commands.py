@@ -1,16 +1,78 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
+
 from .database import BaseMessage
 from .records import RecordUpdateMessage, RecordDeleteMessage, RecordCreateMessage
-from ..exceptions import PyOrientBadMethodCallException
+from ..exceptions import PyOrientBadMethodCallException, PyOrientCommandException
 from ..constants import COMMAND_OP, FIELD_BOOLEAN, FIELD_BYTE, FIELD_CHAR, \
-    FIELD_INT, FIELD_LONG, FIELD_SHORT, FIELD_STRING, QUERY_SYNC, FIELD_BYTES, \
+    FIELD_INT, FIELD_LONG, FIELD_SHORT, FIELD_STRING, FIELD_FIELDS, QUERY_SYNC, FIELD_BYTES, \
     TX_COMMIT_OP, QUERY_GREMLIN, QUERY_ASYNC, QUERY_CMD, QUERY_TYPES, \
     QUERY_SCRIPT
+from ..otypes import OrientRecord
 from ..utils import need_connected, need_db_opened, dlog
+from .encoder import encode_fields
 
 __author__ = 'Ostico <ostico@gmail.com>'
 
 
+class _PreparedPayloads(object):
+    """Encoded payloads of the query templates recently sent, up to ``size``.
+
+    The payload of a command is its type, text, limit and fetch plan followed
+    by the parameters: with parameterized queries the part before the
+    parameters is the same for every execution of a template, and is only
+    encoded the first time.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self._payloads = OrderedDict()
+
+    def get(self, fields):
+        key = tuple(value for _, value in fields)
+        try:
+            self._payloads.move_to_end(key)
+            return self._payloads[key]
+        except KeyError:
+            payload = self._payloads[key] = encode_fields(fields)
+            if len(self._payloads) > self.size:
+                self._payloads.popitem(last=False)
+            return payload
+
+    def clear(self):
+        self._payloads.clear()
+
+    def __len__(self):
+        return len(self._payloads)
+
+
+#: payloads shared by every connection, templates don't depend on the session
+prepared_payloads = _PreparedPayloads()
+
+
+def _escape(value):
+    """Escape the strings of parameters for the CSV serialization, they can't end a string early."""
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('"', '\\"')
+    if isinstance(value, dict):
+        return {key: _escape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_escape(item) for item in value]
+    return value
+
+
+def encode_params(serializer, params):
+    """Serialize the parameters of a query as the server expects them: a
+    document whose "params" field maps the names, or the positions of the
+    positional parameters, to the values.
+
+    :param params: dict of the named parameters or list of the positional ones
+    """
+    if not isinstance(params, dict):
+        params = {str(n): value for n, value in enumerate(params)}
+    return serializer.encode(OrientRecord({'params': _escape(params)}))
+
+
 #
 # COMMAND_OP
 #
@@ -69,6 +131,9 @@ class CommandMessage(BaseMessage):
         self._fetch_plan = '*:0'
         self._command_type = QUERY_SYNC
         self._mod_byte = 's'
+        # receives the records of a synchronous result one by one, see set_record_sink()
+        self._record_sink = None
+        self._query_params = None
 
         self._append((FIELD_BYTE, COMMAND_OP))
 
@@ -119,31 +184,45 @@ class CommandMessage(BaseMessage):
         if self._command_type == QUERY_SCRIPT:
             _payload_definition.insert(1, (FIELD_STRING, 'sql'))
 
-        _payload_definition.append((FIELD_INT, 0))
-
-        payload = b''.join(
-            self._encode_field(x) for x in _payload_definition
-        )
-
         self._append((FIELD_BYTE, self._mod_byte))
-        self._append((FIELD_STRING, payload))
+        if self._query_params is None:
+            _payload_definition.append((FIELD_INT, 0))
+            # the payload is a string holding these fields, encoded in place
+            self._append((FIELD_FIELDS, _payload_definition))
+        else:
+            # the template part comes from the cache, only the parameters are encoded
+            self._append((FIELD_BYTES, prepared_payloads.get(_payload_definition)
+                          + encode_fields(self._params_definition())))
 
         return super(CommandMessage, self).prepare()
 
-    def fetch_response(self):
+    def _params_definition(self):
+        serialized = encode_params(self.get_serializer(), self._query_params)
+
+        if self._command_type == QUERY_CMD or self._command_type == QUERY_SCRIPT:
+            # (simple-parameters:boolean)[(parameters:bytes)](composite-key-parameters:boolean)
+            return [(FIELD_BOOLEAN, True), (FIELD_BYTES, serialized), (FIELD_BOOLEAN, False)]
+        # (parameters:bytes)
+        return [(FIELD_BYTES, serialized)]
+
+    def decode_response(self):
 
         # skip execution in case of transaction
         if self._orientSocket.in_transaction is True:
             return self
 
+        if self._command_type not in (QUERY_SYNC, QUERY_ASYNC):
+            # commands, scripts and gremlin may change any record
+            self._forget_all()
+
         # decode header only
-        super(CommandMessage, self).fetch_response()
+        yield from self._fetch_fields()
 
         if self._command_type == QUERY_ASYNC:
-            self._read_async_records()
+            yield from self._read_async_records()
 
         else:
-            return self._read_sync()
+            return (yield from self._read_sync())
 
     def set_command_type(self, _command_type):
         if _command_type in QUERY_TYPES:
@@ -169,36 +248,61 @@ class CommandMessage(BaseMessage):
         self._limit = _limit
         return self
 
+    def set_query_params(self, _query_params):
+        """Bind values to the parameters of the query, which then stays the
+        same text for every value: the server parses it once and the values
+        never end up in the SQL.
+
+        :param _query_params: dict for the named parameters (``:name``), list
+            for the positional ones (``?``), None for a query without parameters
+        """
+        self._query_params = _query_params
+        return self
+
+    def set_record_sink(self, func):
+        """Hand the records of a synchronous result to ``func`` as soon as
+        each one is decoded, instead of returning them as a list.
+
+        :param func: callable receiving every record, None to collect them again
+        """
+        self._record_sink = func
+        return self
+
+    def _emit(self, res, record):
+        self._hand_out(res.append if self._record_sink is None else self._record_sink, record)
+
     def _read_sync(self):
 
         # type of response
         # decode body char with flag continue ( Header already read )
-        response_type = self._decode_field(FIELD_CHAR)
+        response_type = yield from self._decode_field(FIELD_CHAR)
         if not isinstance(response_type, str):
             response_type = response_type.decode()
         res = []
         if response_type == 'n':
             self._append(FIELD_CHAR)
-            super(CommandMessage, self).fetch_response(True)
+            yield from self._fetch_fields(True)
             # end Line \x00
             return None
         elif response_type == 'r' or response_type == 'w':
-            res = [self._read_record()]
+            record = yield from self._read_record()
             self._append(FIELD_CHAR)
             # end Line \x00
-            _res = super(CommandMessage, self).fetch_response(True)
+            _res = yield from self._fetch_fields(True)
             if response_type == 'w':
-                res = [res[0].oRecordData['result']]
+                self._hand_out(lambda _record: self._emit(res, _record.oRecordData['result']), record)
+            else:
+                self._emit(res, record)
         elif response_type == 'a':
             self._append(FIELD_STRING)
             self._append(FIELD_CHAR)
-            res = [super(CommandMessage, self).fetch_response(True)[0]]
+            self._emit(res, (yield from self._fetch_fields(True))[0])
         elif response_type == 'l':
             self._append(FIELD_INT)
-            list_len = super(CommandMessage, self).fetch_response(True)[0]
+            list_len = (yield from self._fetch_fields(True))[0]
 
             for n in range(0, list_len):
-                res.append(self._read_record())
+                self._emit(res, (yield from self._read_record()))
 
             # async-result-type can be:
             # 0: no records remain to be fetched
@@ -206,16 +310,13 @@ class CommandMessage(BaseMessage):
             # 2: a record is returned as pre-fetched to be loaded in client's
             #       cache only. It's not part of the result set but the client
             #       knows that it's available for later access
-            cached_results = self._read_async_records()
+            cached_results = yield from self._read_async_records()
             # cache = cached_results['cached']
         else:
-            # this should be never happen, used only to debug the protocol
-            msg = b''
-            self._orientSocket._socket.setblocking(0)
-            m = self._orientSocket.read(1)
-            while m != "":
-                msg += m
-                m = self._orientSocket.read(1)
+            # this should be never happen, the rest of the stream can't be decoded
+            raise PyOrientCommandException(
+                "Unknown response type " + repr(response_type), []
+            )
 
         return res
 
@@ -306,10 +407,13 @@ class _TXCommitMessage(BaseMessage):
     def send(self):
         return super(_TXCommitMessage, self).send()
 
-    def fetch_response(self):
+    def decode_response(self):
         # self.dump_streams()
 
-        super(_TXCommitMessage, self).fetch_response()
+        # the operations may change any cached record
+        self._forget_all()
+
+        yield from self._fetch_fields()
 
         result = {
             'created': [],
@@ -317,7 +421,7 @@ class _TXCommitMessage(BaseMessage):
             'changes': []
         }
 
-        items = self._decode_field(FIELD_INT)
+        items = yield from self._decode_field(FIELD_INT)
         for x in range(0, items):
             # (created-record-count:int)
             # [
@@ -328,10 +432,10 @@ class _TXCommitMessage(BaseMessage):
             # ]*
             result['created'].append(
                 {
-                    'client_c_id': self._decode_field(FIELD_SHORT),
-                    'client_c_pos': self._decode_field(FIELD_LONG),
-                    'created_c_id': self._decode_field(FIELD_SHORT),
-                    'created_c_pos': self._decode_field(FIELD_LONG)
+                    'client_c_id': (yield from self._decode_field(FIELD_SHORT)),
+                    'client_c_pos': (yield from self._decode_field(FIELD_LONG)),
+                    'created_c_id': (yield from self._decode_field(FIELD_SHORT)),
+                    'created_c_pos': (yield from self._decode_field(FIELD_LONG))
                 }
             )
 
@@ -347,7 +451,7 @@ class _TXCommitMessage(BaseMessage):
 
             self._operation_records[rid] = record
 
-        items = self._decode_field(FIELD_INT)
+        items = yield from self._decode_field(FIELD_INT)
         for x in range(0, items):
 
             # (updated-record-count:int)
@@ -358,19 +462,17 @@ class _TXCommitMessage(BaseMessage):
             # ]*
             result['updated'].append(
                 {
-                    'updated_c_id': self._decode_field(FIELD_SHORT),
-                    'updated_c_pos': self._decode_field(FIELD_LONG),
-                    'new_version': self._decode_field(FIELD_INT),
+                    'updated_c_id': (yield from self._decode_field(FIELD_SHORT)),
+                    'updated_c_pos': (yield from self._decode_field(FIELD_LONG)),
+                    'new_version': (yield from self._decode_field(FIELD_INT)),
                 }
             )
 
+            rid = "#" + str(result['updated'][-1]['updated_c_id']) + \
+                  ":" + str(result['updated'][-1]['updated_c_pos'])
             try:
-                operation = self._pre_operation_records[
-                    str(result['updated'][-1]['updated_c_pos'])
-                ]
+                operation = self._pre_operation_records[rid]
                 record = getattr(operation, "_record_content")
-                rid = "#" + str(result['updated'][-1]['updated_c_id']) + \
-                      ":" + str(result['updated'][-1]['updated_c_pos'])
                 record.update(
                     __version=result['updated'][-1]['new_version'],
                     __rid=rid
@@ -382,7 +484,7 @@ class _TXCommitMessage(BaseMessage):
                 pass
 
         if self.get_protocol() > 23:
-            items = self._decode_field(FIELD_INT)
+            items = yield from self._decode_field(FIELD_INT)
             for x in range(0, items):
                 # (count-of-collection-changes:int)
                 # [
@@ -394,16 +496,14 @@ class _TXCommitMessage(BaseMessage):
                 # ]*
                 result['updated'].append(
                     {
-                        'uuid_high': self._decode_field(FIELD_LONG),
-                        'uuid_low': self._decode_field(FIELD_LONG),
-                        'file_id': self._decode_field(FIELD_LONG),
-                        'page_index': self._decode_field(FIELD_LONG),
-                        'page_offset': self._decode_field(FIELD_INT),
+                        'uuid_high': (yield from self._decode_field(FIELD_LONG)),
+                        'uuid_low': (yield from self._decode_field(FIELD_LONG)),
+                        'file_id': (yield from self._decode_field(FIELD_LONG)),
+                        'page_index': (yield from self._decode_field(FIELD_LONG)),
+                        'page_offset': (yield from self._decode_field(FIELD_INT)),
                     }
                 )
 
-        self.dump_streams()
-
         return self._operation_records  # [self._operation_records, result]
 
     def attach(self, operation):
@@ -428,8 +528,9 @@ class _TXCommitMessage(BaseMessage):
                     self._operation_stack[-1] + \
                     ((FIELD_BOOLEAN, bool(getattr(operation, "_update_content"))),)
 
+            # updated records are told apart by their whole rid, positions repeat across clusters
             self._pre_operation_records[
-                str(getattr(operation, "_cluster_position"))
+                "#%s:%s" % (int(getattr(operation, "_cluster_id")), int(getattr(operation, "_cluster_position")))
             ] = operation
 
         elif isinstance(operation, RecordDeleteMessage):
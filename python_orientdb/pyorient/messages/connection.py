@@ -32,8 +32,8 @@ class ShutdownMessage(BaseMessage):
         self._append((FIELD_STRINGS, [self._user, self._pass]))
         return super(ShutdownMessage, self).prepare()
 
-    def fetch_response(self):
-        return super(ShutdownMessage, self).fetch_response()
+    def decode_response(self):
+        return (yield from self._fetch_fields())
 
     def set_user(self, _user):
         self._user = _user
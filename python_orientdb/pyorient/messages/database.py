@@ -2,21 +2,25 @@
 __author__ = 'Ostico <ostico@gmail.com>'
 
 import struct
-import sys
 
 from pyorient import FIELD_BYTE, CONNECT_OP, FIELD_STRINGS, NAME, VERSION, FIELD_SHORT, SUPPORTED_PROTOCOL, \
     FIELD_STRING, FIELD_BOOLEAN, FIELD_INT
-from pyorient.exceptions import PyOrientCommandException, PyOrientNullRecordException
+from pyorient.exceptions import PyOrientCommandException, PyOrientNullRecordException, \
+    PyOrientSerializationException
 from pyorient.orient import OrientSocket, OrientSerialization, PyOrientBadMethodCallException
 
 from pyorient.constants import DB_OPEN_OP, DB_TYPE_DOCUMENT, DB_COUNT_RECORDS_OP, \
     FIELD_SHORT, FIELD_STRINGS, FIELD_BYTES, NAME, SUPPORTED_PROTOCOL, VERSION, FIELD_RECORD, FIELD_TYPE_LINK, \
     DB_TYPES, DB_CLOSE_OP, DB_EXIST_OP, STORAGE_TYPE_PLOCAL, STORAGE_TYPE_LOCAL, DB_CREATE_OP, FIELD_INT, \
     FIELD_STRING, FIELD_BYTE, FIELD_BOOLEAN, INT, SHORT, LONG, BOOLEAN, BYTE, BYTES, STRING, STRINGS, \
-    RECORD, LINK, CHAR, DB_DROP_OP, DB_RELOAD_OP, DB_SIZE_OP, DB_LIST_OP, STORAGE_TYPES, FIELD_LONG
+    RECORD, LINK, CHAR, DB_DROP_OP, DB_RELOAD_OP, DB_SIZE_OP, DB_LIST_OP, STORAGE_TYPES, FIELD_LONG, \
+    PUSH_DATA, REQUEST_PUSH_DISTRIB_CONFIG, REQUEST_PUSH_LIVE_QUERY, RECORD_OPERATION_DELETED
 from pyorient.hexdump import hexdump
+from pyorient.live import LIVE_OPERATIONS, LiveEvent
+from pyorient.messages.encoder import encode_fields
 from pyorient.utils import need_connected, need_db_opened, is_debug_active, get_hash
 from pyorient.otypes import OrientRecord, OrientCluster, OrientVersion, OrientRecordLink, OrientNode
+from pyorient.properties import GlobalProperties
 
 
 #
@@ -92,6 +96,11 @@ class BaseMessage(object):
         # callback for push received from the server
         self._push_callback = None
 
+        # (record, content) of the binary records referencing global properties not known yet
+        self._undecoded = []
+        # (function, record) calls waiting for those records to be decoded, in order
+        self._held = []
+
         self._need_token = True
 
         global in_transaction
@@ -170,9 +179,7 @@ class BaseMessage(object):
                 2, (FIELD_STRING, self._auth_token)
             )
 
-        self._output_buffer = b''.join(
-            self._encode_field(x) for x in self._fields_definition
-        )
+        self._output_buffer = encode_fields(self._fields_definition)
         return self
 
     def get_protocol(self):
@@ -186,7 +193,7 @@ class BaseMessage(object):
         We must check for ConnectMessage and DbOpenMessage messages.
         """
 
-        token_refresh = self._decode_field(FIELD_STRING)
+        token_refresh = yield from self._decode_field(FIELD_STRING)
         if token_refresh != b'':
             self._auth_token = token_refresh
             self._update_socket_token()
@@ -195,13 +202,20 @@ class BaseMessage(object):
 
         # read header's information
         # https://orientdb.org/docs/3.2.x/internals/Network-Binary-Protocol.html
-        self._header = [
-            self._decode_field(FIELD_BYTE),  # Success status of the request if succeeded or failed (0=OK, 1=ERROR)
-            self._decode_field(FIELD_INT),  # 4 bytes: Session-Id (Integer)
-        ]
+        status = yield from self._decode_field(FIELD_BYTE)  # Success status of the request if succeeded or failed (0=OK, 1=ERROR)
+        session_id = yield from self._decode_field(FIELD_INT)  # 4 bytes: Session-Id (Integer)
+
+        # push requests of the server come in frames of their own, before the response:
+        # (3:byte)(Integer.MIN_VALUE:int)(push-request:byte)(content:bytes)
+        while status == PUSH_DATA:
+            yield from self._decode_push()
+            status = yield from self._decode_field(FIELD_BYTE)
+            session_id = yield from self._decode_field(FIELD_INT)
+
+        self._header = [status, session_id]
 
         if not isinstance(self, (ConnectMessage, DbOpenMessage)) and self._request_token is True:
-            self._token_refresh_check()
+            yield from self._token_refresh_check()
 
         # decode message errors and raise an exception
         if self._header[0] == 1:
@@ -211,79 +225,104 @@ class BaseMessage(object):
             exception_class = b""
             exception_message = b""
 
-            more = self._decode_field(FIELD_BOOLEAN)
+            more = yield from self._decode_field(FIELD_BOOLEAN)
 
             while more:
                 # read num bytes by the field definition
-                exception_class += self._decode_field(FIELD_STRING)  # (exception-class:string)
-                exception_message += self._decode_field(FIELD_STRING)  # (exception-message:string)
-                more = self._decode_field(FIELD_BOOLEAN)
+                exception_class += yield from self._decode_field(FIELD_STRING)  # (exception-class:string)
+                exception_message += yield from self._decode_field(FIELD_STRING)  # (exception-message:string)
+                more = yield from self._decode_field(FIELD_BOOLEAN)
 
                 if self.get_protocol() > 18:  # > 18 1.6-snapshot
                     # read serialized version of exception thrown on server side
                     # useful only for java clients
-                    serialized_exception = self._decode_field(FIELD_STRING)
+                    serialized_exception = yield from self._decode_field(FIELD_STRING)
                     # trash
                     del serialized_exception
 
-            raise PyOrientCommandException(
+            error = PyOrientCommandException(
                 exception_class.decode('utf8'),
                 [exception_message.decode('utf8')]
             )
+            error.from_server = True
+            raise error
+
+    def _decode_push(self):
+        """
+        Decode a push request, its status and fake session id already read.
+
+        Live query events go to the :class:`LiveQueries <pyorient.live.LiveQueries>`
+        of the socket, every push to the push callback of the message.
+
+        :return: :class:`LiveEvent <pyorient.live.LiveEvent>` for REQUEST_PUSH_LIVE_QUERY,
+            the decoded document for the other push requests
+        """
+        # REQUEST_PUSH_RECORD	        79
+        # REQUEST_PUSH_DISTRIB_CONFIG	80
+        # REQUEST_PUSH_LIVE_QUERY	    81
+        push_request = yield from self._decode_field(FIELD_BYTE)
+        content = yield from self._decode_field(FIELD_STRING)
+
+        if push_request == REQUEST_PUSH_LIVE_QUERY:
+            payload = self._live_event(content)
+            live_queries = getattr(self._orientSocket, 'live_queries', None)
+            if live_queries is not None:
+                if payload.operation == 'unsubscribe':
+                    live_queries.end(payload.token)
+                else:
+                    self._hand_out(lambda _record: live_queries.dispatch(payload), payload.record)
+        else:
+            _, payload = self.get_serializer().decode(content)
+            if push_request == REQUEST_PUSH_DISTRIB_CONFIG:
+                # JSON WITH THE NEW CLUSTER CFG, reset the nodelist
+                self._node_list = [OrientNode(node) for node in payload.get('members', [])]
 
-        elif self._header[0] == 3:
-            # Push notification, Node cluster changed
-            # TODO: UNTESTED CODE!!!
-            # FIELD_BYTE (OChannelBinaryProtocol.PUSH_DATA);  # WRITE 3
-            # FIELD_INT (Integer.MIN_VALUE);  # SESSION ID = 2^-31
-            # 80: \x50 Request Push 1 byte: Push command id
-            push_command_id = self._decode_field(FIELD_BYTE)
-            push_message = self._decode_field(FIELD_STRING)
-            _, payload = self.get_serializer().decode(push_message)
-            if self._push_callback:
-                self._push_callback(push_command_id, payload)
-
-            end_flag = self._decode_field(FIELD_BYTE)
-
-            # this flag can be set more than once
-            while end_flag == 3:
-                self._decode_field(FIELD_INT)  # FAKE SESSION ID = 2^-31
-                op_code = self._decode_field(FIELD_BYTE)  # 80: 0x50 Request Push
-
-                # REQUEST_PUSH_RECORD	        79
-                # REQUEST_PUSH_DISTRIB_CONFIG	80
-                # REQUEST_PUSH_LIVE_QUERY	    81
-                if op_code == 80:
-                    # for node in
-                    payload = self.get_serializer().decode(
-                        self._decode_field(FIELD_STRING)
-                    )  # JSON WITH THE NEW CLUSTER CFG
-
-                    # reset the nodelist
-                    self._node_list = []
-                    for node in payload['members']:
-                        self._node_list.append(OrientNode(node))
-
-                end_flag = self._decode_field(FIELD_BYTE)
-
-            # Try to set the new session id???
-            self._header[1] = self._decode_field(FIELD_INT)  # REAL SESSION ID
-            pass
+        if self._push_callback:
+            self._hand_out(lambda _record: self._push_callback(push_request, payload), None)
+        return payload
+
+    def _live_event(self, content):
+        """
+        Decode the content of a REQUEST_PUSH_LIVE_QUERY:
+            ('r':byte)(operation:byte)(token:int)(record-type:byte)(record-version:int)
+                (cluster-id:short)(cluster-position:long)(record-content:bytes)
+        or, when the server ends a live query:
+            ('u':byte)(token:int)
+        """
+        if content[:1] == b'u':
+            return LiveEvent('unsubscribe', struct.unpack('!i', content[1:5])[0], None)
+
+        operation, token, _, version, cluster_id, position, length = struct.unpack('!bibihqi', content[1:25])
+        record = self._to_record("#%d:%d" % (cluster_id, position), version, content[25:25 + length])
+        event = LiveEvent(LIVE_OPERATIONS.get(operation, operation), token, record)
+
+        cache = getattr(self._orientSocket, 'record_cache', None)
+        if cache is not None:
+            def refresh(_record):
+                # keep the records the session has cached up to date
+                if _record._rid in cache:
+                    if operation == RECORD_OPERATION_DELETED:
+                        cache.discard(_record._rid)
+                    else:
+                        cache.put(_record)
+            self._hand_out(refresh, record)
+
+        return event
 
     def _decode_body(self):
         # read body
         for field in self._fields_definition:
-            self._body.append(self._decode_field(field))
+            self._body.append((yield from self._decode_field(field)))
 
         # clear field stack
         self._reset_fields_definition()
         return self
 
     def _decode_all(self):
-        self._decode_header()
-        self._decode_body()
+        yield from self._decode_header()
+        yield from self._decode_body()
 
-    def fetch_response(self, *_continue):
+    def _fetch_fields(self, *_continue):
         """
         # Decode header and body
         # If flag continue is set( Header already read ) read only body
@@ -292,17 +331,73 @@ class BaseMessage(object):
         """
         if len(_continue) != 0:
             self._body = []
-            self._decode_body()
-            self.dump_streams()
+            yield from self._decode_body()
         # already fetched, get last results as cache info
 
         elif len(self._body) == 0:
-            self._decode_all()
-            self.dump_streams()
+            yield from self._decode_all()
 
         return self._body
 
+    def decode_response(self):
+        """
+        Sans-IO decoder of the response to this message.
+
+        A generator that yields the number of bytes it needs next and expects
+        exactly those bytes to be sent back; its return value is the decoded
+        response. It never touches the socket, so any transport can drive it:
+        :meth:`OrientSocket.drive <pyorient.orient.OrientSocket.drive>`,
+        :class:`ResponseParser <pyorient.messages.parser.ResponseParser>` or a
+        replay file. Subclasses override it to decode their own response.
+        """
+        return (yield from self._fetch_fields())
+
+    def response_decoder(self):
+        """:meth:`decode_response`, recorded by the capture of the socket if it has one."""
+        capture = self._orientSocket.capture
+        if capture is None:
+            return self.decode_response()
+        return capture.tap(self, self.decode_response())
+
+    def fetch_response(self):
+        """Read the response from the socket, blocking, and decode it."""
+        response = self._orientSocket.drive(self.response_decoder())
+        if self._undecoded or self._orientSocket.deferred:
+            # the response is read, the connection is free to refresh the global properties
+            self._orientSocket.decode_deferred([self])
+        return response
+
+    def _hand_out(self, func, record):
+        """Call ``func(record)`` once ``record`` is decoded.
+
+        When a record of the response is left for :meth:`_decode_undecoded`
+        the calls are held from then on, so they keep the order of the records.
+        """
+        if self._undecoded or self._held:
+            self._held.append((func, record))
+        else:
+            func(record)
+
+    def _decode_undecoded(self):
+        """Decode the records left empty by :meth:`_to_record`, once the global properties are refreshed.
+
+        :raise: PyOrientSerializationException if a record still references unknown properties
+        """
+        undecoded, self._undecoded = self._undecoded, []
+        properties = self._orientSocket._props
+        for record, content in undecoded:
+            missing = properties.missing(content)
+            if missing:
+                raise PyOrientSerializationException(
+                    "Record %s references unknown global properties %s" % (record._rid, sorted(missing)), [])
+            record._fill(self._to_record(record._rid, record._version, content, defer=False))
+
+        held, self._held = self._held, []
+        for func, record in held:
+            func(record)
+
     def dump_streams(self):
+        """Hexdump the request and, when the socket has a capture, the last response."""
         if is_debug_active():
             if len(self._output_buffer):
                 print("\nRequest :")
@@ -330,74 +425,22 @@ class BaseMessage(object):
             self._orientSocket.write(self._output_buffer)
             self._reset_fields_definition()
 
-        if is_debug_active():
-            self.dump_streams()
-            # reset output buffer
-            self._output_buffer = b""
+            capture = self._orientSocket.capture
+            if capture is not None:
+                capture.request(self, self._output_buffer)
 
         return self
 
     def close(self):
         self._orientSocket.close()
 
-    @staticmethod
-    def _encode_field(field):
-
-        # tuple with type
-        t, v = field
-        _content = None
-
-        if t['type'] == INT:
-            _content = struct.pack("!i", v)
-
-        elif t['type'] == SHORT:
-            _content = struct.pack("!h", v)
-
-        elif t['type'] == LONG:
-            _content = struct.pack("!q", v)
-
-        elif t['type'] == BOOLEAN:
-            if sys.version_info[0] < 3:
-                _content = chr(1) if v else chr(0)
-            else:
-                _content = bytes([1]) if v else bytes([0])
-
-        elif t['type'] == BYTE:
-            if sys.version_info[0] < 3:
-                _content = v
-            else:
-                _content = bytes([ord(v)])
-
-        elif t['type'] == BYTES:
-            _content = struct.pack("!i", len(v)) + v
-
-        elif t['type'] == STRING:
-
-            if isinstance(v, str):
-                v = v.encode('utf-8')
-
-            _content = struct.pack("!i", len(v)) + v
-
-        elif t['type'] == STRINGS:
-            _content = b''
-            for s in v:
-                if sys.version_info[0] >= 3:
-                    if isinstance(s, str):
-                        s = s.encode('utf-8')
-                else:
-                    if isinstance(s, str):
-                        s = s.encode('utf-8')
-                _content += struct.pack("!i", len(s)) + s
-
-        return _content
-
     def _decode_field(self, _type):
         """Decodes the part of the response as designated by "_type"."""
         _value = b""
         field_type = _type["type"]
         # read buffer length and decode value by field definition
         if _type['bytes'] is not None:
-            _value = self._orientSocket.read(_type['bytes'])
+            _value = yield _type['bytes']
 
         # if it is a string decode first 4 Bytes as INT
         # and try to read the buffer
@@ -408,34 +451,29 @@ class BaseMessage(object):
                 _decoded_string = b''
 
             else:
-                _decoded_string = self._orientSocket.read(_len)
-
-            self._input_buffer += _value
-            self._input_buffer += _decoded_string
+                _decoded_string = yield _len
 
             return _decoded_string
 
         elif field_type == RECORD:
 
             # record_type
-            record_type = self._decode_field(_type['struct'][0])
+            record_type = yield from self._decode_field(_type['struct'][0])
 
-            rid = "#" + str(self._decode_field(_type['struct'][1]))
-            rid += ":" + str(self._decode_field(_type['struct'][2]))
+            rid = "#" + str((yield from self._decode_field(_type['struct'][1])))
+            rid += ":" + str((yield from self._decode_field(_type['struct'][2])))
 
-            version = self._decode_field(_type['struct'][3])
-            content = self._decode_field(_type['struct'][4])
+            version = yield from self._decode_field(_type['struct'][3])
+            content = yield from self._decode_field(_type['struct'][4])
             return {'rid': rid, 'record_type': record_type, 'content': content, 'version': version}
 
         elif field_type == LINK:
 
-            rid = "#" + str(self._decode_field(_type['struct'][0]))
-            rid += ":" + str(self._decode_field(_type['struct'][1]))
+            rid = "#" + str((yield from self._decode_field(_type['struct'][0])))
+            rid += ":" + str((yield from self._decode_field(_type['struct'][1])))
             return rid
 
         else:
-            self._input_buffer += _value
-
             if field_type == BOOLEAN:
                 return bool(ord(_value))
 
@@ -463,33 +501,46 @@ class BaseMessage(object):
         #       cache only. It's not part of the result set but the client
         #       knows that it's available for later access
         """
-        _status = self._decode_field(FIELD_BYTE)  # status
+        _status = yield from self._decode_field(FIELD_BYTE)  # status
 
         while _status != 0:
 
-            try:
+            _record = yield from self._read_record()
 
-                # if a callback for the cache is not set, raise exception
-                if not hasattr(self._callback, '__call__'):
-                    raise AttributeError()
+            if _status == 2:  # cache
+                self._hand_out(self._prefetched, _record)
+                if hasattr(self._callback, '__call__'):
+                    self._hand_out(self._callback, _record)  # save in cache
+            elif hasattr(self._callback, '__call__'):  # async record type
+                self._hand_out(self._callback, _record)  # save in async
+            else:
+                raise PyOrientBadMethodCallException(
+                    str(self._callback) + " is not a callable function", [])
 
-                _record = self._read_record()
+            # read new status and flush the debug buffer
+            _status = yield from self._decode_field(FIELD_BYTE)  # status
 
-                if _status == 1:  # async record type
-                    # async_records.append( _record )  # save in async
-                    self._callback(_record)  # save in async
-                elif _status == 2:  # cache
-                    # cached_records.append( _record )  # save in cache
-                    self._callback(_record)  # save in cache
+    def _prefetched(self, record):
+        """Keep a record pre-fetched by a fetch plan in the record cache of the session."""
+        cache = getattr(self._orientSocket, 'record_cache', None)
+        if cache is not None and isinstance(record, OrientRecord):
+            cache.put(record)
 
-            except AttributeError:
-                # AttributeError: 'RecordLoadMessage' object has
-                # no attribute '_command_type'
-                raise PyOrientBadMethodCallException(
-                    str(self._callback) + " is not a callable function", [])
-            finally:
-                # read new status and flush the debug buffer
-                _status = self._decode_field(FIELD_BYTE)  # status
+    def _forget_all(self):
+        """Empty the record cache of the session, this message may change any record.
+
+        Called once the responses to the previous messages are decoded, the
+        records they hand out can't outlive it.
+        """
+        cache = getattr(self._orientSocket, 'record_cache', None)
+        if cache is not None:
+            cache.clear()
+
+    def _forget(self, cluster_id, cluster_position):
+        """Drop a record changed by this session from its record cache."""
+        cache = getattr(self._orientSocket, 'record_cache', None)
+        if cache is not None:
+            cache.discard("#%s:%s" % (cluster_id, cluster_position))
 
     def _read_record(self):
         """
@@ -508,34 +559,45 @@ class BaseMessage(object):
         :raise: PyOrientNullRecordException
         :return: OrientRecordLink,OrientRecord
         """
-        marker = self._decode_field(FIELD_SHORT)  # marker
+        marker = yield from self._decode_field(FIELD_SHORT)  # marker
 
         if marker == -2:
             raise PyOrientNullRecordException('NULL Record', [])
         elif marker == -3:
-            res = OrientRecordLink(self._decode_field(FIELD_TYPE_LINK))
+            res = OrientRecordLink((yield from self._decode_field(FIELD_TYPE_LINK)))
         else:
             # read record
-            __res = self._decode_field(FIELD_RECORD)
+            __res = yield from self._decode_field(FIELD_RECORD)
+            res = self._to_record(__res['rid'], __res['version'], __res['content'])
 
-            if self._orientSocket.serialization_type == OrientSerialization.Binary:
-                class_name, data = self.get_serializer().decode(__res['content'])
-            else:
-                # bug in orientdb csv serialization in snapshot 2.0
-                class_name, data = self.get_serializer().decode(__res['content'].rstrip())
-
-            res = OrientRecord(
-                dict(
-                    __o_storage=data,
-                    __o_class=data.pop('class', class_name),
-                    __version=__res['version'],
-                    __rid= get_hash(data.pop('rid')) if 'rid' in data else __res['rid']
-                )
-            )
+        return res
 
-        self._input_buffer = b''
+    def _to_record(self, rid, version, content, defer=True):
+        """:return: OrientRecord of a record's serialized content
 
-        return res
+        :param defer: leave a binary record referencing global properties not known yet
+            empty, it is decoded once the response is read, see :mod:`pyorient.properties`;
+            the decoders hand it out with :meth:`_hand_out`
+        """
+        if self._orientSocket.serialization_type == OrientSerialization.Binary:
+            properties = self._orientSocket._props
+            if defer and isinstance(properties, GlobalProperties) and properties.missing(content):
+                record = OrientRecord(dict(__version=version, __rid=rid))
+                self._undecoded.append((record, content))
+                return record
+            class_name, data = self.get_serializer().decode(content)
+        else:
+            # bug in orientdb csv serialization in snapshot 2.0
+            class_name, data = self.get_serializer().decode(content.rstrip())
+
+        return OrientRecord(
+            dict(
+                __o_storage=data,
+                __o_class=data.pop('class', class_name),
+                __version=version,
+                __rid=get_hash(data.pop('rid')) if 'rid' in data else rid
+            )
+        )
 
 
 class DbOpenMessage(BaseMessage):
@@ -586,14 +648,14 @@ class DbOpenMessage(BaseMessage):
 
         return super(DbOpenMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_INT)  # session_id
         if self.get_protocol() > 26:
             self._append(FIELD_STRING)  # token # if FALSE: Placeholder
 
         self._append(FIELD_SHORT)  # cluster_num
 
-        result = super(DbOpenMessage, self).fetch_response()
+        result = yield from self._fetch_fields()
         if self.get_protocol() > 26:
             self._session_id, self._auth_token, cluster_num = result
             if self._auth_token == b'':
@@ -611,22 +673,22 @@ class DbOpenMessage(BaseMessage):
         for x in range(0, cluster_num):
             if self.get_protocol() < 24:
                 cluster = OrientCluster(
-                    self._decode_field(FIELD_STRING),
-                    self._decode_field(FIELD_SHORT),
-                    self._decode_field(FIELD_STRING),
-                    self._decode_field(FIELD_SHORT)
+                    (yield from self._decode_field(FIELD_STRING)),
+                    (yield from self._decode_field(FIELD_SHORT)),
+                    (yield from self._decode_field(FIELD_STRING)),
+                    (yield from self._decode_field(FIELD_SHORT))
                 )
             else:
                 cluster = OrientCluster(
-                    self._decode_field(FIELD_STRING),
-                    self._decode_field(FIELD_SHORT)
+                    (yield from self._decode_field(FIELD_STRING)),
+                    (yield from self._decode_field(FIELD_SHORT))
                 )
             clusters.append(cluster)
 
         self._append(FIELD_STRING)  # orient node list | string ""
         self._append(FIELD_STRING)  # Orient release
 
-        nodes_config, release = super(DbOpenMessage, self).fetch_response(True)
+        nodes_config, release = yield from self._fetch_fields(True)
 
         # parsing server release version
         info = OrientVersion(release)
@@ -640,8 +702,9 @@ class DbOpenMessage(BaseMessage):
             for node_dict in decoded['members']:
                 self._node_list.append(OrientNode(node_dict))
 
-        # set database opened
+        # set database opened, the records cached for the previous one are gone
         self._orientSocket.db_opened = self._db_name
+        self._orientSocket.record_cache.clear()
 
         return info, clusters, self._node_list
         # self._cluster_map = self._orientSocket.cluster_map = \
@@ -696,11 +759,13 @@ class DbCloseMessage(BaseMessage):
     def prepare(self, params=None):
         return super(DbCloseMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         # set database closed
         self._orientSocket.db_opened = None
+        self._orientSocket.record_cache.clear()
         super(DbCloseMessage, self).close()
         return 0
+        yield  # no response to read, but decoders are always generators
 
 
 #
@@ -753,9 +818,9 @@ class DbExistsMessage(BaseMessage):
 
         return super(DbExistsMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_BOOLEAN)
-        return super(DbExistsMessage, self).fetch_response()[0]
+        return (yield from self._fetch_fields())[0]
 
     def set_db_name(self, db_name):
         self._db_name = db_name
@@ -828,8 +893,8 @@ class DbCreateMessage(BaseMessage):
 
         return super(DbCreateMessage, self).prepare()
 
-    def fetch_response(self):
-        super(DbCreateMessage, self).fetch_response()
+    def decode_response(self):
+        yield from self._fetch_fields()
         # set database opened
         self._orientSocket.db_opened = self._db_name
         return
@@ -912,8 +977,8 @@ class DbDropMessage(BaseMessage):
 
         return super(DbDropMessage, self).prepare()
 
-    def fetch_response(self):
-        return super(DbDropMessage, self).fetch_response()
+    def decode_response(self):
+        return (yield from self._fetch_fields())
 
     def set_db_name(self, db_name):
         self._db_name = db_name
@@ -953,9 +1018,9 @@ class DbCountRecordsMessage(BaseMessage):
     def prepare(self, params=None):
         return super(DbCountRecordsMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_LONG)
-        return super(DbCountRecordsMessage, self).fetch_response()[0]
+        return (yield from self._fetch_fields())[0]
 
 
 #
@@ -977,11 +1042,11 @@ class DbReloadMessage(BaseMessage):
     def prepare(self, params=None):
         return super(DbReloadMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
 
         self._append(FIELD_SHORT)  # cluster_num
 
-        cluster_num = super(DbReloadMessage, self).fetch_response()[0]
+        cluster_num = (yield from self._fetch_fields())[0]
 
         clusters = []
 
@@ -989,15 +1054,15 @@ class DbReloadMessage(BaseMessage):
         for x in range(0, cluster_num):
             if self.get_protocol() < 24:
                 cluster = OrientCluster(
-                    self._decode_field(FIELD_STRING),
-                    self._decode_field(FIELD_SHORT),
-                    self._decode_field(FIELD_STRING),
-                    self._decode_field(FIELD_SHORT)
+                    (yield from self._decode_field(FIELD_STRING)),
+                    (yield from self._decode_field(FIELD_SHORT)),
+                    (yield from self._decode_field(FIELD_STRING)),
+                    (yield from self._decode_field(FIELD_SHORT))
                 )
             else:
                 cluster = OrientCluster(
-                    self._decode_field(FIELD_STRING),
-                    self._decode_field(FIELD_SHORT)
+                    (yield from self._decode_field(FIELD_STRING)),
+                    (yield from self._decode_field(FIELD_SHORT))
                 )
             clusters.append(cluster)
 
@@ -1023,9 +1088,9 @@ class DbSizeMessage(BaseMessage):
     def prepare(self, params=None):
         return super(DbSizeMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_LONG)
-        return super(DbSizeMessage, self).fetch_response()[0]
+        return (yield from self._fetch_fields())[0]
 
 
 #
@@ -1047,9 +1112,9 @@ class DbListMessage(BaseMessage):
     def prepare(self, params=None):
         return super(DbListMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_BYTES)
-        __record = super(DbListMessage, self).fetch_response()[0]
+        __record = (yield from self._fetch_fields())[0]
         # bug in orientdb csv serialization in snapshot 2.0,
         # strip trailing spaces
         _, data = self.get_serializer().decode(__record.rstrip())
@@ -1098,12 +1163,12 @@ class ConnectMessage(BaseMessage):
 
         return super(ConnectMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_INT)
         if self.get_protocol() > 26:
             self._append(FIELD_STRING)
 
-        result = super(ConnectMessage, self).fetch_response()
+        result = yield from self._fetch_fields()
 
         # IMPORTANT needed to pass the id to other messages
         self._session_id = result[0]
@@ -1127,4 +1192,25 @@ class ConnectMessage(BaseMessage):
 
     def set_client_id(self, _cid):
         self._client_id = _cid
-        return self
\ No newline at end of file
+        return self
+
+#
+# PUSH
+#
+# A push request the server sent while no response was due, e.g. the event
+# of a live query; there is no request, only the frame to read:
+#
+# Response: (3:byte)(Integer.MIN_VALUE:int)(push-request:byte)(content:bytes)
+#
+class PushMessage(BaseMessage):
+
+    def prepare(self, params=None):
+        raise PyOrientBadMethodCallException("Push requests are only received", [])
+
+    def decode_response(self):
+        status = yield from self._decode_field(FIELD_BYTE)
+        yield from self._decode_field(FIELD_INT)  # FAKE SESSION ID = 2^-31
+        if status != PUSH_DATA:
+            raise PyOrientBadMethodCallException(
+                "Expected a push request, the server sent status %d" % status, [])
+        return (yield from self._decode_push())
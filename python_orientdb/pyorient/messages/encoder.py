@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Request encoding.
+
+The field types of a request (its layout) are compiled once into a function
+packing each run of consecutive fixed size fields, together with the length
+prefix of the string following them, with a single precompiled
+:class:`struct.Struct`; the request is then joined from those few parts and
+the strings. Groups of fields (:data:`FIELD_FIELDS
+<pyorient.constants.FIELD_FIELDS>`) are encoded once and joined in place,
+instead of being joined and then encoded again as a string.
+
+Long layouts are cut in segments of :data:`SEGMENT_SIZE` fields compiled on
+their own: the layout of a transaction commit repeats the one of its
+operations, its segments are the same few whatever the number of
+operations. At most :data:`MAX_ENCODERS` encoders are kept, the oldest
+compiled is dropped first.
+"""
+import struct
+
+from ..constants import BOOLEAN, BYTE, BYTES, FIELDS, INT, LONG, SHORT, STRING, STRINGS
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+_FORMATS = {
+    BOOLEAN: '?',
+    BYTE: 'B',
+    SHORT: 'h',
+    INT: 'i',
+    LONG: 'q',
+}
+
+#: fields encoded by a compiled function at most
+SEGMENT_SIZE = 32
+#: compiled functions kept
+MAX_ENCODERS = 256
+
+_encoders = {}
+
+
+def _strings(values):
+    return b''.join(
+        struct.pack('!i', len(s)) + s
+        for s in (v.encode('utf-8') if isinstance(v, str) else v for v in values)
+    )
+
+
+def compile_layout(types):
+    """Build the encoding function of a layout.
+
+    :param types: type constants of the fields, in order
+    :return: function taking the ``(field definition, value)`` pairs and returning the request bytes
+    """
+    namespace = {'encode_fields': encode_fields, '_strings': _strings}
+    lines = ["    (%s,) = fields" % ", ".join("(_, v%d)" % i for i in range(len(types)))]
+    parts = []
+    fmt, args = '!', []
+
+    def pack():
+        if args:
+            name = 'p%d' % len(namespace)
+            namespace[name] = struct.Struct(fmt).pack
+            parts.append("%s(%s)" % (name, ", ".join(args)))
+
+    for i, t in enumerate(types):
+        v = 'v%d' % i
+        if t in _FORMATS:
+            fmt += _FORMATS[t]
+            args.append('ord(%s)' % v if t == BYTE else v)
+            continue
+
+        if t in (STRING, BYTES):
+            lines.append("    if %s.__class__ is str: %s = %s.encode('utf-8')" % (v, v, v))
+        elif t == FIELDS:
+            lines.append("    %s = encode_fields(%s)" % (v, v))
+        elif t == STRINGS:
+            lines.append("    %s = _strings(%s)" % (v, v))
+        else:
+            raise ValueError("field type %r can't be encoded" % t)
+
+        if t != STRINGS:  # strings lists carry no length
+            fmt += 'i'
+            args.append('len(%s)' % v)
+        pack()
+        parts.append(v)
+        fmt, args = '!', []
+
+    pack()
+    lines.append("    return b''.join((%s,))" % ", ".join(parts))
+    source = "def encode(fields):\n%s\n" % "\n".join(lines)
+    exec(compile(source, "<layout %r>" % (types,), "exec"), namespace)
+    encode = namespace['encode']
+    encode.source = source
+    return encode
+
+
+def encode_fields(fields):
+    """Encode ``(field definition, value)`` pairs with the compiled functions of their layout.
+
+    :return: the request bytes
+    """
+    if len(fields) <= SEGMENT_SIZE:
+        return _encoder([field['type'] for field, _ in fields])(fields)
+
+    segments = []
+    for start in range(0, len(fields), SEGMENT_SIZE):
+        segment = fields[start:start + SEGMENT_SIZE]
+        segments.append(_encoder([field['type'] for field, _ in segment])(segment))
+    return b''.join(segments)
+
+
+def _encoder(types):
+    types = tuple(types)
+    try:
+        return _encoders[types]
+    except KeyError:
+        pass
+    if len(_encoders) >= MAX_ENCODERS:
+        del _encoders[next(iter(_encoders))]
+    encode = _encoders[types] = compile_layout(types)
+    return encode
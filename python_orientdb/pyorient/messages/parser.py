@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Sans-IO decoding of the binary protocol responses.
+
+Every message decodes its response in :meth:`decode_response
+<pyorient.messages.database.BaseMessage.decode_response>`, a generator asking
+for the bytes it needs instead of reading them from a socket.
+:class:`ResponseParser` drives those generators with whatever bytes a
+transport hands to :meth:`ResponseParser.feed`, in chunks of any size, so the
+same decoder serves blocking sockets, asyncio streams and bytes captured on
+disk.
+
+Usage::
+
+    >>> parser = ResponseParser()
+    >>> parser.expect(message)        # once its request has been written
+    >>> parser.feed(data)             # as many times as bytes arrive
+    >>> response = parser.pop()       # None until the response is complete
+    >>> response.result()
+
+"""
+from collections import deque
+
+from ..serializations import OrientSerialization
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+class Response(object):
+    """Outcome of decoding the response to one message."""
+
+    __slots__ = ('message', 'value', 'error')
+
+    def __init__(self, message, value=None, error=None):
+        self.message = message
+        self.value = value
+        self.error = error
+
+    def result(self):
+        """
+        :return: the decoded response
+        :raise: the exception raised while decoding, e.g. the server error
+        """
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class ResponseParser(object):
+    """Incremental decoder of the responses to sent messages.
+
+    Responses are decoded in the order their messages were passed to
+    :meth:`expect`, which is the order the server answers them.
+
+    :param push: factory of the message decoding the bytes received while no
+        response is due, the push requests of the server; its responses are dropped
+    """
+
+    #: consumed bytes are dropped from the buffer once there are more than these
+    compact_after = 65536
+
+    def __init__(self, push=None):
+        self._push = push
+        self._unsolicited = False
+        self._buffer = bytearray()
+        self._pos = 0
+        self._expected = deque()
+        self._responses = deque()
+        self._message = None
+        self._decoder = None
+        self._wanted = 0
+
+    def expect(self, message):
+        """Queue a message whose request has been sent, its response comes next."""
+        self._expected.append(message)
+        self._run()
+        return self
+
+    def feed(self, data):
+        """Add received bytes and decode as far as they go."""
+        self._buffer += data
+        self._run()
+        return self
+
+    def pop(self):
+        """
+        :return: the oldest decoded :class:`Response` or None if none is complete
+        """
+        return self._responses.popleft() if self._responses else None
+
+    @property
+    def pending(self):
+        """Number of messages whose response is not decoded yet."""
+        return len(self._expected) + (self._decoder is not None and not self._unsolicited)
+
+    @property
+    def bytes_wanted(self):
+        """Bytes missing to go on decoding, 0 if nothing is being decoded."""
+        if self._decoder is None:
+            return 0
+        return max(self._wanted - (len(self._buffer) - self._pos), 0)
+
+    def buffered(self):
+        """Bytes received but not decoded yet."""
+        return bytes(self._buffer[self._pos:])
+
+    def reset(self):
+        """Forget buffered bytes and pending messages, e.g. after the connection dropped."""
+        self.__init__(self._push)
+
+    def _run(self):
+        while True:
+            if self._decoder is None:
+                if self._expected:
+                    self._message = self._expected.popleft()
+                elif self._push is not None and self._pos < len(self._buffer):
+                    # nothing is due, the server pushed these bytes
+                    self._message = self._push()
+                    self._unsolicited = True
+                else:
+                    break
+                self._decoder = self._message.response_decoder()
+                self._step(None)
+                continue
+
+            end = self._pos + self._wanted
+            if end > len(self._buffer):
+                break
+
+            data = bytes(memoryview(self._buffer)[self._pos:end])
+            self._pos = end
+            self._step(data)
+
+        if self._pos > self.compact_after or self._pos == len(self._buffer):
+            del self._buffer[:self._pos]
+            self._pos = 0
+
+    def _step(self, data):
+        try:
+            self._wanted = self._decoder.send(data)
+        except StopIteration as e:
+            self._done(Response(self._message, e.value))
+        except Exception as e:
+            self._done(Response(self._message, error=e))
+
+    def _done(self, response):
+        if not self._unsolicited:
+            self._responses.append(response)
+        self._unsolicited = False
+        self._message = self._decoder = None
+        self._wanted = 0
+
+
+class OfflineSocket(object):
+    """Stand-in for :class:`OrientSocket <pyorient.orient.OrientSocket>` to
+    build and decode messages without a connection, e.g. in tests or when
+    decoding captured bytes.
+
+    Written requests are collected in :attr:`written`.
+    """
+
+    def __init__(self, protocol=38, serialization_type=OrientSerialization.CSV,
+                 session_id=-1, auth_token=b'', db_opened=None, serialize_props=None):
+        self.connected = True
+        self.host = ''
+        self.port = 0
+        self.protocol = protocol
+        self.session_id = session_id
+        self.auth_token = auth_token
+        self.db_opened = db_opened
+        self.serialization_type = serialization_type
+        self.in_transaction = False
+        self._props = serialize_props if serialize_props else {}
+        self.capture = None
+        self.written = []
+
+    def get_connection(self):
+        return self
+
+    def write(self, buff):
+        self.written.append(bytes(buff))
+        return len(buff)
+
+    def close(self):
+        self.connected = False
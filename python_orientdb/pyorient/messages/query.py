@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+from .commands import encode_params
+from .database import BaseMessage
+from ..constants import CLOSE_QUERY_OP, FIELD_BOOLEAN, FIELD_BYTE, FIELD_BYTES, FIELD_INT, \
+    FIELD_LONG, FIELD_STRING, QUERY_NEXT_PAGE_OP, QUERY_OP, QUERY_OPERATION_QUERY, QUERY_OPERATIONS, \
+    QUERY_PAGE_SIZE, QUERY_RESULT_PROJECTION
+from ..exceptions import PyOrientBadMethodCallException
+from ..otypes import OrientRecord
+from ..serializations import OrientSerializationResult
+from ..utils import need_db_opened
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+class _ResultSetMessage(BaseMessage):
+    """
+    # Response of QUERY and QUERY_NEXT_PAGE, a page of the result set:
+    #
+    # (query-id:string)(tx-changes:boolean)(has-execution-plan:boolean)[(execution-plan:result)]
+    #   (prefetched-records:int)(records:int)[(record:result)]*(has-next-page:boolean)
+    #   (stats:int)[(key:string)(value:long)]*(reload-metadata:boolean)
+    #
+    # result: (result-type:byte)(record) for the records and
+    #   (4:byte)(projection:bytes) for the projections,
+    #   see OrientSerializationResult
+    """
+
+    _result_serializer = OrientSerializationResult()
+
+    def __init__(self, _orient_socket):
+        super(_ResultSetMessage, self).__init__(_orient_socket)
+        self._page_size = QUERY_PAGE_SIZE
+
+    def _check_protocol(self):
+        if self.get_protocol() < 37:
+            raise PyOrientBadMethodCallException(
+                "Server side cursors need protocol 37, the server speaks %d" % self.get_protocol(), []
+            )
+
+    def set_page_size(self, _page_size):
+        self._page_size = _page_size
+        return self
+
+    def decode_response(self):
+        """
+        :return: (query id, records of the page, True if there are more pages)
+        """
+        # header only
+        yield from self._fetch_fields()
+
+        query_id = (yield from self._decode_field(FIELD_STRING)).decode()
+        yield from self._decode_field(FIELD_BOOLEAN)  # tx changes
+        if (yield from self._decode_field(FIELD_BOOLEAN)):
+            yield from self._read_result()  # execution plan
+
+        for n in range((yield from self._decode_field(FIELD_INT))):
+            yield from self._read_result()  # prefetched, not sent by the server yet
+
+        records = []
+        for n in range((yield from self._decode_field(FIELD_INT))):
+            records.append((yield from self._read_result()))
+
+        has_next_page = yield from self._decode_field(FIELD_BOOLEAN)
+
+        for n in range((yield from self._decode_field(FIELD_INT))):
+            yield from self._decode_field(FIELD_STRING)
+            yield from self._decode_field(FIELD_LONG)
+
+        yield from self._decode_field(FIELD_BOOLEAN)  # reload metadata
+        return query_id, records, has_next_page
+
+    def _read_result(self):
+        result_type = yield from self._decode_field(FIELD_BYTE)
+        if result_type == QUERY_RESULT_PROJECTION:
+            content = yield from self._decode_field(FIELD_BYTES)
+            return OrientRecord({'__o_storage': self._result_serializer.decode(content)})
+        return (yield from self._read_record())
+
+
+#
+# QUERY
+#
+# Runs a query, or a command, and opens a cursor on its result set,
+#   whose first page is sent back. Since protocol 37.
+#
+# Request: (language:string)(query:string)(operation-type:byte)(page-size:int)
+#   (fetch-plan:string)(parameters:bytes)(named-parameters:boolean)
+# Response: the first page of the result set, see _ResultSetMessage
+#
+# Where:
+# operation-type is 0 for a query (idempotent), 1 for a command and 2 for a script
+# parameters is a document serialized with the serialization of the session,
+#   the "params" field holding the parameters of the query
+#
+class QueryMessage(_ResultSetMessage):
+
+    def __init__(self, _orient_socket):
+        super(QueryMessage, self).__init__(_orient_socket)
+
+        self._query = ''
+        self._language = 'sql'
+        self._operation = QUERY_OPERATION_QUERY
+        self._params = {}
+
+        self._append((FIELD_BYTE, QUERY_OP))
+
+    @need_db_opened
+    def prepare(self, params=None):
+        try:
+            self._query = params[0]
+            self.set_page_size(params[1])
+            self.set_operation(params[2])
+            self._params = params[3]
+        except (IndexError, TypeError):
+            # Use default for non existent indexes
+            pass
+
+        self._check_protocol()
+
+        self._append((FIELD_STRING, self._language))
+        self._append((FIELD_STRING, self._query))
+        self._append((FIELD_BYTE, chr(self._operation)))
+        self._append((FIELD_INT, self._page_size))
+        self._append((FIELD_STRING, ''))  # fetch plan, not used by the server yet
+        self._append((FIELD_BYTES, encode_params(self.get_serializer(), self._params)))
+        self._append((FIELD_BOOLEAN, isinstance(self._params, dict)))  # named parameters
+
+        return super(QueryMessage, self).prepare()
+
+    def decode_response(self):
+        if self._operation != QUERY_OPERATION_QUERY:
+            # commands and scripts may change any record
+            self._forget_all()
+        return (yield from super(QueryMessage, self).decode_response())
+
+    def set_query(self, _query):
+        self._query = _query
+        return self
+
+    def set_operation(self, _operation):
+        if _operation not in QUERY_OPERATIONS:
+            raise PyOrientBadMethodCallException(
+                str(_operation) + ' is not a valid query operation', []
+            )
+        self._operation = _operation
+        return self
+
+
+#
+# QUERY NEXT PAGE
+#
+# Fetches the next page of the result set of a cursor opened by QUERY. Since protocol 37.
+#
+# Request: (query-id:string)(page-size:int)
+# Response: the page, see _ResultSetMessage
+#
+class QueryNextPageMessage(_ResultSetMessage):
+
+    def __init__(self, _orient_socket):
+        super(QueryNextPageMessage, self).__init__(_orient_socket)
+
+        self._query_id = ''
+
+        self._append((FIELD_BYTE, QUERY_NEXT_PAGE_OP))
+
+    @need_db_opened
+    def prepare(self, params=None):
+        try:
+            self._query_id = params[0]
+            self.set_page_size(params[1])
+        except (IndexError, TypeError):
+            # Use default for non existent indexes
+            pass
+
+        self._check_protocol()
+
+        self._append((FIELD_STRING, self._query_id))
+        self._append((FIELD_INT, self._page_size))
+
+        return super(QueryNextPageMessage, self).prepare()
+
+
+#
+# CLOSE QUERY
+#
+# Closes a cursor opened by QUERY before its last page is fetched. Since protocol 37.
+#
+# Request: (query-id:string)
+# Response: empty
+#
+class CloseQueryMessage(BaseMessage):
+
+    def __init__(self, _orient_socket):
+        super(CloseQueryMessage, self).__init__(_orient_socket)
+
+        self._query_id = ''
+
+        self._append((FIELD_BYTE, CLOSE_QUERY_OP))
+
+    @need_db_opened
+    def prepare(self, params=None):
+        try:
+            self._query_id = params[0]
+        except (IndexError, TypeError):
+            # Use default for non existent indexes
+            pass
+
+        self._append((FIELD_STRING, self._query_id))
+
+        return super(CloseQueryMessage, self).prepare()
+
+    def decode_response(self):
+        yield from self._fetch_fields()
+        return None
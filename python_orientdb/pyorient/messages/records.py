@@ -85,7 +85,7 @@ class RecordCreateMessage(BaseMessage):
 
         return super(RecordCreateMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
 
         # skip execution in case of transaction
         if self._orientSocket.in_transaction is True:
@@ -96,7 +96,7 @@ class RecordCreateMessage(BaseMessage):
 
         self._append(FIELD_LONG)  # cluster-position
         self._append(FIELD_INT)  # record-version
-        result = super(RecordCreateMessage, self).fetch_response()
+        result = yield from self._fetch_fields()
 
         # There are some strange behaviours with protocols between 19 and 23
         # the INT ( count-of-collection-changes ) in documentation
@@ -109,7 +109,7 @@ class RecordCreateMessage(BaseMessage):
         _changes = []
         if self.get_protocol() > 21:
             try:
-                chng = self._decode_field(FIELD_INT)
+                chng = yield from self._decode_field(FIELD_INT)
                 """ count-of-collection-changes """
             except (PyOrientConnectionException, TypeError):
                 pass
@@ -119,11 +119,11 @@ class RecordCreateMessage(BaseMessage):
 
                     for x in range(0, chng):
                         change = [
-                            self._decode_field(FIELD_LONG),  # (uuid-most-sig-bits:long)
-                            self._decode_field(FIELD_LONG),  # (uuid-least-sig-bits:long)
-                            self._decode_field(FIELD_LONG),  # (updated-file-id:long)
-                            self._decode_field(FIELD_LONG),  # (updated-page-index:long)
-                            self._decode_field(FIELD_INT)  # (updated-page-offset:int)
+                            (yield from self._decode_field(FIELD_LONG)),  # (uuid-most-sig-bits:long)
+                            (yield from self._decode_field(FIELD_LONG)),  # (uuid-least-sig-bits:long)
+                            (yield from self._decode_field(FIELD_LONG)),  # (updated-file-id:long)
+                            (yield from self._decode_field(FIELD_LONG)),  # (updated-page-index:long)
+                            (yield from self._decode_field(FIELD_INT))  # (updated-page-offset:int)
                         ]
                         _changes.append(change)
 
@@ -228,14 +228,16 @@ class RecordDeleteMessage(BaseMessage):
 
         return super(RecordDeleteMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
 
         # skip execution in case of transaction
         if self._orientSocket.in_transaction is True:
             return self
 
         self._append(FIELD_BOOLEAN)  # payload-status
-        return super(RecordDeleteMessage, self).fetch_response()[0]
+        deleted = (yield from self._fetch_fields())[0]
+        self._forget(self._cluster_id, self._cluster_position)
+        return deleted
 
     def set_record_version(self, _record_version):
         self._record_version = _record_version
@@ -330,9 +332,9 @@ class RecordLoadMessage(BaseMessage):
 
         return super(RecordLoadMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
         self._append(FIELD_BYTE)
-        _status = super(RecordLoadMessage, self).fetch_response()[0]
+        _status = (yield from self._fetch_fields())[0]
 
         _record = OrientRecord()
         if _status != 0:
@@ -348,11 +350,11 @@ class RecordLoadMessage(BaseMessage):
                 self._append(FIELD_BYTE)  # record type
                 rec_position = 0
 
-            __record = super(RecordLoadMessage, self).fetch_response(True)
+            __record = yield from self._fetch_fields(True)
             # bug in orientdb csv serialization in snapshot 2.0,
             # strip trailing spaces
             class_name, data = self.get_serializer().decode(__record[rec_position].rstrip())
-            self._read_async_records()  # get cache
+            yield from self._read_async_records()  # get cache
 
             _record = OrientRecord(
                 dict(
@@ -493,14 +495,15 @@ class RecordUpdateMessage(BaseMessage):
 
         return super(RecordUpdateMessage, self).prepare()
 
-    def fetch_response(self):
+    def decode_response(self):
 
         # skip execution in case of transaction
         if self._orientSocket.in_transaction is True:
             return self
 
         self._append(FIELD_INT)  # record-version
-        result = super(RecordUpdateMessage, self).fetch_response()
+        result = yield from self._fetch_fields()
+        self._forget(self._cluster_id, self._cluster_position)
 
         # There are some strange behaviours with protocols between 19 and 23
         # the INT ( count-of-collection-changes ) in documentation
@@ -513,7 +516,7 @@ class RecordUpdateMessage(BaseMessage):
         _changes = []
         if self.get_protocol() > 21:
             try:
-                chng = self._decode_field(FIELD_INT)
+                chng = yield from self._decode_field(FIELD_INT)
                 """ count-of-collection-changes """
             except (PyOrientConnectionException, TypeError):
                 pass
@@ -523,11 +526,11 @@ class RecordUpdateMessage(BaseMessage):
 
                     for x in range(0, chng):
                         change = [
-                            self._decode_field(FIELD_LONG),  # (uuid-most-sig-bits:long)
-                            self._decode_field(FIELD_LONG),  # (uuid-least-sig-bits:long)
-                            self._decode_field(FIELD_LONG),  # (updated-file-id:long)
-                            self._decode_field(FIELD_LONG),  # (updated-page-index:long)
-                            self._decode_field(FIELD_INT)  # (updated-page-offset:int)
+                            (yield from self._decode_field(FIELD_LONG)),  # (uuid-most-sig-bits:long)
+                            (yield from self._decode_field(FIELD_LONG)),  # (uuid-least-sig-bits:long)
+                            (yield from self._decode_field(FIELD_LONG)),  # (updated-file-id:long)
+                            (yield from self._decode_field(FIELD_LONG)),  # (updated-page-index:long)
+                            (yield from self._decode_field(FIELD_INT))  # (updated-page-offset:int)
                         ]
                         _changes.append(change)
 
@@ -3,6 +3,7 @@
 @author: Ostico <ostico@gmail.com>
 """
 from __future__ import print_function
+from collections import deque
 from typing import Union
 
 __author__ = 'Ostico <ostico@gmail.com>'
@@ -14,41 +15,27 @@ import ssl
 
 from .exceptions import PyOrientBadMethodCallException, \
     PyOrientConnectionException, PyOrientWrongProtocolVersionException, \
-    PyOrientConnectionPoolException
+    PyOrientConnectionPoolException, PyOrientException
 
 from .constants import FIELD_SHORT, \
     QUERY_ASYNC, QUERY_CMD, QUERY_GREMLIN, QUERY_SYNC, QUERY_SCRIPT, \
     SUPPORTED_PROTOCOL, DB_TYPE_DOCUMENT, \
-    STORAGE_TYPE_PLOCAL, SOCK_CONN_TIMEOUT, ERROR_ON_NEWER_PROTOCOL
+    STORAGE_TYPE_PLOCAL, SOCK_CONN_TIMEOUT, ERROR_ON_NEWER_PROTOCOL, SOCK_RECV_BUFFER_SIZE, \
+    QUERY_OPERATION_QUERY, QUERY_PAGE_SIZE, REQUEST_PUSH_DISTRIB_CONFIG
 
 from .serializations import OrientSerialization
 
-from .utils import dlog
-
-type_map = {'BOOLEAN': 0,
-            'INTEGER': 1,
-            'SHORT': 2,
-            'LONG': 3,
-            'FLOAT': 4,
-            'DOUBLE': 5,
-            'DATETIME': 6,
-            'STRING': 7,
-            'BINARY': 8,
-            'EMBEDDED': 9,
-            'EMBEDDEDLIST': 10,
-            'EMBEDDEDSET': 11,
-            'EMBEDDEDMAP': 12,
-            'LINK': 13,
-            'LINKLIST': 14,
-            'LINKSET': 15,
-            'LINKMAP': 16,
-            'BYTE': 17,
-            'TRANSIENT': 18,
-            'DATE': 19,
-            'CUSTOM': 20,
-            'DECIMAL': 21,
-            'LINKBAG': 22,
-            'ANY': 23}
+from .cache import RecordCache, rid_of
+from .live import LiveQuery, LiveQueries
+from .unacked import UnackedWrites
+from .properties import GlobalProperties, type_map
+from .capture import WireCapture
+from .cursor import QueryCursor
+from .utils import dlog, is_debug_active
+
+
+def _skip(record):
+    pass
 
 
 class OrientSocket(object):
@@ -78,6 +65,22 @@ class OrientSocket(object):
         self.serialization_type = serialization_type
         self.in_transaction = False
         self._props = serialize_props if serialize_props else {}
+        # opt-in WireCapture of the traffic, see pyorient.capture
+        self.capture = WireCapture(echo=True) if is_debug_active() else None
+        # records pre-fetched by fetch plans, see pyorient.cache
+        self.record_cache = RecordCache()
+        # subscriptions of the session, see pyorient.live
+        self.live_queries = LiveQueries()
+        # (message, callback) of the writes sent without waiting, see pyorient.unacked
+        self.unacked = deque()
+        # messages read by settle() holding records to decode, see decode_deferred()
+        self.deferred = []
+
+        # receive buffer, bytes between _recv_start and _recv_end are received but not read yet
+        self._recv_buffer = bytearray(SOCK_RECV_BUFFER_SIZE)
+        self._recv_view = memoryview(self._recv_buffer)
+        self._recv_start = 0
+        self._recv_end = 0
 
     def get_connection(self):
         if not self.connected:
@@ -104,7 +107,7 @@ class OrientSocket(object):
                     "Server sent empty string", []
                 )
 
-            self.protocol = struct.unpackssl_context('!h', _value)[0]
+            self.protocol = struct.unpack('!h', _value)[0]
             # Raise exception on higher protocol version than supported, if enabled
             if self.protocol > SUPPORTED_PROTOCOL and ERROR_ON_NEWER_PROTOCOL:
                 raise PyOrientWrongProtocolVersionException("Protocol version " + str(self.protocol) + " is not "
@@ -124,6 +127,19 @@ class OrientSocket(object):
         self.session_id = -1
         self._socket.close()
         self.connected = False
+        self._recv_start = self._recv_end = 0
+        self.live_queries.clear()
+        self._fail_unacked(PyOrientConnectionException("Connection closed", []))
+
+    def pending(self, timeout=0):
+        """
+        :param timeout: seconds to wait for bytes, None waits until some arrive
+        :return: True if received bytes are waiting to be read
+        """
+        if self._recv_end > self._recv_start:
+            return True
+        ready_to_read, _, _ = select.select([self._socket], [], [], timeout)
+        return len(ready_to_read) > 0
 
     def write(self, buff):
         # This is a trick to detect server disconnection
@@ -152,12 +168,162 @@ class OrientSocket(object):
     #   any data available, up to the requested amount, rather than waiting
     #   for receipt of the full amount requested.
     #
-    # If you need to read a given number of bytes, you need to call recv
-    #   in a loop and concatenate the returned packets until
-    #   you have read enough.
+    # Fields are tiny (a byte, an int...), so instead of one select + recv per
+    #   field, recv_into fills a reusable buffer with whatever the kernel has
+    #   and the following reads are served from memory.
     def read(self, _len_to_read):
+        start = self._recv_start
+        end = start + _len_to_read
+        if end <= self._recv_end:
+            self._recv_start = end
+            return bytes(self._recv_view[start:end])
+
+        return self._read_slow(_len_to_read)
+
+    def _read_slow(self, _len_to_read):
+        buffered = self._recv_end - self._recv_start
+
+        if _len_to_read > len(self._recv_buffer):
+            # bigger than the buffer: hand over what is buffered
+            # and receive the rest straight into the result
+            buf = bytearray(_len_to_read)
+            view = memoryview(buf)
+            view[:buffered] = self._recv_view[self._recv_start:self._recv_end]
+            self._recv_start = self._recv_end = 0
+            self._recv_into(view, buffered, _len_to_read)
+            return bytes(buf)
+
+        # move the pending bytes to the front and fill the rest of the buffer
+        if self._recv_start:
+            self._recv_view[:buffered] = self._recv_view[self._recv_start:self._recv_end]
+            self._recv_start, self._recv_end = 0, buffered
+
+        self._recv_end = self._recv_into(self._recv_view, buffered, _len_to_read, len(self._recv_buffer))
+        self._recv_start = _len_to_read
+        return bytes(self._recv_view[:_len_to_read])
+
+    def settle(self, count=None):
+        """Read the acknowledgements of the writes sent without waiting, oldest first.
+
+        Their responses come before the ones of any later request, so they are
+        read before :meth:`drive` decodes another response.
+
+        :param count: acknowledgements to read, all of them by default
+        """
+        while self.unacked and count != 0:
+            message, callback = self.unacked.popleft()
+            try:
+                self._drive(message.response_decoder())
+            except PyOrientConnectionException as e:
+                callback(e)
+                self._fail_unacked(e)
+                return
+            except PyOrientException as e:
+                callback(e)
+            else:
+                callback(None)
+            if message._undecoded:
+                self.deferred.append(message)
+            if count is not None:
+                count -= 1
+
+    def _fail_unacked(self, error):
+        unacked, self.unacked = self.unacked, deque()
+        for _, callback in unacked:
+            callback(error)
+
+    def decode_deferred(self, messages=()):
+        """Decode the records left for later by ``messages`` and by the
+        acknowledgements :meth:`settle` read: they reference global properties
+        not known yet, refreshed first, see :mod:`pyorient.properties`.
+
+        The refresh is a request of its own, call it once every response sent is read.
+
+        :param messages: messages whose response is read
+        """
+        from .messages.commands import CommandMessage
+
+        messages = [message for message in messages if message._undecoded] + self.deferred
+        self.deferred = []
+        if messages:
+            properties = self._props
+            properties.merge(CommandMessage(self).prepare((QUERY_CMD, properties.query())).send().fetch_response())
+        for message in messages:
+            message._decode_undecoded()
+
+    def drive(self, decoder, wanted=None):
+        """Run a sans-IO response decoder on this socket, blocking until it is done.
+
+        :param decoder: generator returned by :meth:`BaseMessage.decode_response
+            <pyorient.messages.database.BaseMessage.decode_response>`
+        :param wanted: bytes asked by the decoder if it is already started
+        :return: the decoded response
+        """
+        if wanted is None and self.unacked:
+            self.settle()
+        return self._drive(decoder, wanted)
+
+    def _drive(self, decoder, wanted=None):
+        try:
+            if wanted is None:
+                wanted = next(decoder)
+            while True:
+                try:
+                    data = self.read(wanted)
+                except PyOrientConnectionException as e:
+                    # let the message decide, some fields are optional on old protocols
+                    wanted = decoder.throw(e)
+                else:
+                    wanted = decoder.send(data)
+        except StopIteration as e:
+            return e.value
+
+    def stream(self, message):
+        """Run the decoder of a sent :class:`CommandMessage
+        <pyorient.messages.commands.CommandMessage>`, yielding every record
+        as soon as it is decoded; the result is never held in memory.
 
-        while True:
+        When the consumer stops early the rest of the response is read and
+        dropped, so the next request finds the connection at a message boundary.
+
+        :param message: the sent message
+        """
+        self.settle()
+        records = deque()
+        message.set_record_sink(records.append)
+        decoder = message.response_decoder()
+        try:
+            wanted = next(decoder)
+            while True:
+                while records:
+                    yield records.popleft()
+                try:
+                    data = self.read(wanted)
+                except PyOrientConnectionException as e:
+                    wanted = decoder.throw(e)
+                else:
+                    wanted = decoder.send(data)
+        except StopIteration:
+            pass
+        except GeneratorExit:
+            if self.connected:
+                message.set_record_sink(_skip)
+                self.drive(decoder, wanted)
+            raise
+
+        # the records left for later come once the response is read
+        self.decode_deferred([message])
+        while records:
+            yield records.popleft()
+
+    def _recv_into(self, view, offset, at_least, at_most=None):
+        """Receive into ``view`` from ``offset`` until ``at_least`` bytes are there.
+
+        :return: the number of bytes in ``view``, up to ``at_most``
+        """
+        at_most = at_least if at_most is None else at_most
+
+        while offset < at_least:
 
             # This is a trick to detect server disconnection
             # or broken line issues because of
@@ -170,28 +336,22 @@ class OrientSocket(object):
                 self._socket.close()
                 raise e
 
-            if len(ready_to_read) > 0:
-
-                buf = bytearray(_len_to_read)
-                view = memoryview(buf)
-
-                while _len_to_read:
-                    n_bytes = self._socket.recv_into(view, _len_to_read)
+            if len(in_error) > 0:
+                self._socket.close()
+                raise PyOrientConnectionException("Socket error", [])
 
-                    if not n_bytes:
-                        self._socket.close()
-                        # TODO Implement re-connection to another listener
+            if len(ready_to_read) > 0:
+                n_bytes = self._socket.recv_into(view[offset:at_most], at_most - offset)
 
-                        raise PyOrientConnectionException("Server seems to have went down", [])
+                if not n_bytes:
+                    self._socket.close()
+                    # TODO Implement re-connection to another listener
 
-                    view = view[n_bytes:]  # slicing views is cheap
-                    _len_to_read -= n_bytes
+                    raise PyOrientConnectionException("Server seems to have went down", [])
 
-                return bytes(buf)
+                offset += n_bytes
 
-            if len(in_error) > 0:
-                self._socket.close()
-                raise PyOrientConnectionException("Socket error", [])
+        return offset
 
 
 class OrientDB(object):
@@ -227,6 +387,7 @@ class OrientDB(object):
         DbReloadMessage="pyorient.messages.database",
         DbSizeMessage="pyorient.messages.database",
         DbListMessage="pyorient.messages.database",
+        PushMessage="pyorient.messages.database",
 
         # Cluster
         DataClusterAddMessage="pyorient.messages.cluster",
@@ -241,6 +402,10 @@ class OrientDB(object):
 
         CommandMessage="pyorient.messages.commands",
         TxCommitMessage="pyorient.messages.commands",
+
+        QueryMessage="pyorient.messages.query",
+        QueryNextPageMessage="pyorient.messages.query",
+        CloseQueryMessage="pyorient.messages.query",
     )
 
         
@@ -443,7 +608,7 @@ class OrientDB(object):
         self.nodes = nodes
 
         # store property id->property name, type map for binary serialization
-
+        self._share_properties(db_name)
         self.update_properties()
 
         return self.clusters
@@ -459,17 +624,29 @@ class OrientDB(object):
         self.update_properties()
         return self.clusters
 
+    def _share_properties(self, db_name):
+        """Use the global properties shared by the clients of the database, see :mod:`pyorient.properties`."""
+        if self._serialization_type == OrientSerialization.Binary:
+            properties = GlobalProperties.shared(self._connection.host, self._connection.port, db_name)
+            # the ones given with serialize_props too
+            for key, value in self._connection._props.items():
+                properties.setdefault(key, value)
+            self._connection._props = properties
+
     def update_properties(self):
         """
         This method fetches the global Properties from the server. The properties are used
-        for deserializing based on property index if using binary serialization. This method
-        should be called after any manual command that may result in modifications to the
-        properties table, for example, "Create property ... " or "Create class .." followed
-        by "Create vertex set ... "
-        """
-        if self._serialization_type==OrientSerialization.Binary:
-            self._connection._props.update({x['id']:[x['name'], type_map[x['type']]] for x in
-                        self.command("select from #0:1")[0].oRecordData['globalProperties']})
+        for deserializing based on property index if using binary serialization.
+
+        Only the properties created since the last call are fetched. It runs on
+        db_open, db_reload and whenever a record references a property not known
+        yet, calling it by hand after a schema change is not needed anymore.
+        """
+        if self._serialization_type == OrientSerialization.Binary:
+            properties = self._connection._props
+            if not isinstance(properties, GlobalProperties):
+                properties = self._connection._props = GlobalProperties(properties)
+            properties.merge(self.command(properties.query()))
         
     def shutdown(self, *args):
         return self.get_message("ShutdownMessage") \
@@ -481,21 +658,155 @@ class OrientDB(object):
         return self.get_message("CommandMessage") \
             .prepare((QUERY_GREMLIN,) + args).send().fetch_response()
 
-    def command(self, *args):
-        return self.get_message("CommandMessage").prepare((QUERY_CMD,) + args).send().fetch_response()
+    def command(self, *args, params=None):
+        """Run a non idempotent command, like INSERT or UPDATE.
 
-    def batch(self, *args):
-        return self.get_message("CommandMessage") \
+        :param params: values of the parameters of the command, a dict for
+            the named ones (``:name``) or a list for the positional ones (``?``)
+
+        Usage::
+
+            >>> client.command("update Person set age = :age where name = :name",
+            ...                params={'age': 31, 'name': 'Ann'})
+
+        """
+        return self.get_message("CommandMessage").set_query_params(params) \
+            .prepare((QUERY_CMD,) + args).send().fetch_response()
+
+    def batch(self, *args, params=None):
+        return self.get_message("CommandMessage").set_query_params(params) \
             .prepare((QUERY_SCRIPT,) + args).send().fetch_response()
 
-    def query(self, *args):
-        return self.get_message("CommandMessage") \
+    def query(self, *args, params=None):
+        """Run an idempotent query.
+
+        The values in ``params`` are sent apart from the query, whose text
+        stays the same for every value: the server parses it only once, and
+        the values can't change the statement whatever they hold.
+
+        :param params: values of the parameters of the query, a dict for
+            the named ones (``:name``) or a list for the positional ones (``?``)
+
+        Usage::
+
+            >>> client.query("select from Person where name = :name", 10, params={'name': name})
+
+        """
+        return self.get_message("CommandMessage").set_query_params(params) \
             .prepare((QUERY_SYNC,) + args).send().fetch_response()
 
-    def query_async(self, *args):
-        return self.get_message("CommandMessage") \
+    def query_async(self, *args, params=None):
+        return self.get_message("CommandMessage").set_query_params(params) \
             .prepare((QUERY_ASYNC,) + args).send().fetch_response()
 
+    def query_stream(self, query, limit=-1, fetch_plan='*:0', params=None):
+        """Iterate over the records of a query as they are decoded off the socket.
+
+        Memory stays flat whatever the size of the result and the first record
+        is available as soon as it is received. The query is sent on the first
+        iteration; the connection can't be used for other requests until the
+        iterator is exhausted or closed.
+
+        :param query: the query, like :meth:`query`
+        :param limit: maximum number of records, -1 for all of them
+        :param fetch_plan: fetch plan of the query
+        :param params: values of the parameters of the query, see :meth:`query`
+        :return: generator of :class:`OrientRecord <pyorient.otypes.OrientRecord>`
+
+        Usage::
+
+            >>> for record in client.query_stream("select from Person"):
+            ...     print(record.name)
+
+        """
+        message = self.get_message("CommandMessage").set_query_params(params) \
+            .prepare((QUERY_SYNC, query, limit, fetch_plan)).send()
+        yield from self._connection.stream(message)
+
+    iter_query = query_stream
+
+    def query_cursor(self, query, page_size=QUERY_PAGE_SIZE, params=None, operation=QUERY_OPERATION_QUERY):
+        """Run a query keeping its result set on the server, which sends it page by page.
+
+        Needs protocol 37+.
+
+        :param query: the query
+        :param page_size: records per page
+        :param params: values of the parameters of the query, a dict for the named ones or a list for the positional ones
+        :param operation: QUERY_OPERATION_QUERY, QUERY_OPERATION_COMMAND or QUERY_OPERATION_SCRIPT
+        :return: :class:`QueryCursor <pyorient.cursor.QueryCursor>` holding the first page
+
+        Usage::
+
+            >>> cursor = client.query_cursor("select from Person", 500)
+            >>> first_page = cursor.records
+            >>> second_page = cursor.next_page()
+
+        """
+        page = self.get_message("QueryMessage") \
+            .prepare((query, page_size, operation, params or {})).send().fetch_response()
+        return QueryCursor(self, *page, page_size=page_size)
+
+    def resume_query(self, query_id, page_size=QUERY_PAGE_SIZE):
+        """Cursor fetching the next pages of a result set opened by :meth:`query_cursor` on this session.
+
+        :param query_id: :attr:`QueryCursor.query_id <pyorient.cursor.QueryCursor.query_id>`
+        :return: :class:`QueryCursor <pyorient.cursor.QueryCursor>`, with no records until the next page is fetched
+        """
+        return QueryCursor(self, query_id, [], True, page_size)
+
+    def close_query(self, query_id):
+        """Free the result set of a cursor on the server."""
+        return self.get_message("CloseQueryMessage") \
+            .prepare((query_id,)).send().fetch_response()
+
+    def live_query(self, query, callback=None, params=None):
+        """Subscribe to the changes of the records selected by a ``LIVE SELECT``.
+
+        The events are pushed by the server and read along with the responses
+        of the next requests, or by :meth:`poll_live_events` while the client is idle.
+
+        :param query: the ``LIVE SELECT`` statement
+        :param callback: callable receiving every :class:`LiveEvent <pyorient.live.LiveEvent>`,
+            without one the events are queued for iteration over the live query
+        :param params: values of the parameters of the query, see :meth:`query`
+        :return: :class:`LiveQuery <pyorient.live.LiveQuery>`
+
+        Usage::
+
+            >>> live = client.live_query("LIVE SELECT FROM Person", callback=print)
+            >>> client.poll_live_events(timeout=5)
+            >>> live.unsubscribe()
+
+        """
+        return self._subscribe(query, self.command(query, params=params), callback)
+
+    def live_unsubscribe(self, token):
+        """End the live query of ``token``, the server stops pushing its events."""
+        result = self.command("LIVE UNSUBSCRIBE %d" % token)
+        self._connection.live_queries.end(token)
+        return result
+
+    def poll_live_events(self, timeout=0):
+        """Read the push requests the server sent while the client was idle,
+        dispatching the live query events to their subscriptions.
+
+        :param timeout: seconds to wait for the first one, None waits until one arrives
+        :return: number of push requests read
+        """
+        self._connection.settle()
+        received = 0
+        while self._connection.pending(timeout):
+            self.get_message("PushMessage").fetch_response()
+            received += 1
+            timeout = 0
+        return received
+
+    def _subscribe(self, query, result, callback):
+        live_query = LiveQuery(self, result[0].oRecordData['token'], query, callback)
+        self._connection.live_queries.add(live_query)
+        return live_query
+
     def data_cluster_add(self, *args):
         return self.get_message("DataClusterAddMessage") \
             .prepare(args).send().fetch_response()
@@ -533,16 +844,96 @@ class OrientDB(object):
             .prepare(args).send().fetch_response()
 
     def record_load(self, *args):
+        """Load a record by its record id.
+
+        A record pre-fetched by a fetch plan of this session comes from the
+        :attr:`record cache <OrientSocket.record_cache>` with no request;
+        with a fetch plan or a callback the record is always loaded.
+        """
+        record = self._cached_record(args)
+        if record is not None:
+            return record
         return self.get_message("RecordLoadMessage") \
             .prepare(args).send().fetch_response()
 
+    def _cached_record(self, args):
+        if not args or len(args) > 2 or (len(args) == 2 and args[1] not in ('', '*:0')):
+            return None
+        return self._connection.record_cache.get(args[0])
+
+    def record_load_many(self, rids, fetch_plan='*:0'):
+        """Load records by their record ids in a single round trip.
+
+        Records pre-fetched by this session come from the :attr:`record cache
+        <OrientSocket.record_cache>` when no fetch plan is asked, the others
+        are loaded by one pipeline of RECORD_LOAD requests, every record id
+        once however many times it is asked.
+
+        :param rids: record ids or :class:`OrientRecordLink <pyorient.otypes.OrientRecordLink>`
+        :param fetch_plan: fetch plan of every load, the records it fetches go to the record cache
+        :return: list of :class:`OrientRecord <pyorient.otypes.OrientRecord>` in the order of rids,
+            None for the record ids of no record
+        """
+        rids = list(rids)
+        records, missing = self._split_cached(rids, fetch_plan)
+        if missing:
+            pipeline = self.pipeline()
+            for rid in missing:
+                pipeline.record_load(rid, fetch_plan)
+            self._fill(rids, records, missing, pipeline.execute())
+        return records
+
+    def load_links(self, links):
+        """Records of links, see :meth:`record_load_many`.
+
+        :param links: :class:`OrientRecordLink <pyorient.otypes.OrientRecordLink>` or record ids
+        :return: list of :class:`OrientRecord <pyorient.otypes.OrientRecord>`, in the order of links
+        """
+        return self.record_load_many(links)
+
+    def _split_cached(self, rids, fetch_plan='*:0'):
+        if fetch_plan in ('', '*:0'):
+            cache = self._connection.record_cache
+            records = [cache.get(rid) for rid in rids]
+        else:
+            records = [None] * len(rids)
+        missing = list(dict.fromkeys(rid_of(rid) for rid, record in zip(rids, records) if record is None))
+        return records, missing
+
+    @staticmethod
+    def _fill(rids, records, missing, loaded):
+        # a record id of no record is loaded as an empty record
+        loaded = {rid: None if record._rid is None else record for rid, record in zip(missing, loaded)}
+        for n, rid in enumerate(rids):
+            if records[n] is None:
+                records[n] = loaded[rid_of(rid)]
+
     def record_update(self, *args):
         return self.get_message("RecordUpdateMessage") \
             .prepare(args).send().fetch_response()
 
+    def unacked_writes(self, max_pending=1000):
+        """Record writes sent in asynchronous mode, without waiting for the server.
+
+        :param max_pending: writes left without acknowledgement
+        :return: :class:`UnackedWrites <pyorient.unacked.UnackedWrites>`, see :meth:`UnackedWrites.flush
+            <pyorient.unacked.UnackedWrites.flush>`
+        """
+        return UnackedWrites(self, max_pending)
+
     def tx_commit(self):
         return self.get_message("TxCommitMessage")
 
+    def pipeline(self, raise_on_error=True):
+        """
+        Queue commands to send them in a single write and read the responses afterwards
+
+        :param raise_on_error: raise the first error once every response has been read
+        :return: :class:`Pipeline <pyorient.pipeline.Pipeline>`
+        """
+        from .pipeline import Pipeline
+        return Pipeline(self, raise_on_error)
+
     def get_message(self, command=None):
         try:
             if command is not None and self._Messages[command]:
@@ -574,7 +965,9 @@ class OrientDB(object):
         # REQUEST_PUSH_RECORD	        79
         # REQUEST_PUSH_DISTRIB_CONFIG	80
         # REQUEST_PUSH_LIVE_QUERY	    81
+        # Live query events are already dispatched to the subscriptions of the
+        # socket by the message that read them, payload is the LiveEvent.
         # TODO: this logic must stay within Messages class here I just want to receive
         # an object of something, like a new array of cluster.
-        if command_id == 80:
+        if command_id == REQUEST_PUSH_DISTRIB_CONFIG:
             pass
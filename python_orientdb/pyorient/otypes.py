@@ -97,6 +97,12 @@ class OrientRecord(object):
     def _class(self):
         return self.__o_class
 
+    def _fill(self, record):
+        """Take the class and fields of ``record``, this one was decoded later."""
+        self.__o_class = record.__o_class
+        self.__o_storage = record.__o_storage
+        self.__rid = record.__rid
+
     def update(self, **kwargs):
         self.__rid = kwargs.get('__rid', None)
         self.__version = kwargs.get('__version', None)
@@ -118,6 +124,11 @@ class OrientRecord(object):
             raise AttributeError("'OrientRecord' object has no attribute "
                                  "'" + item + "'")
 
+    def __setstate__(self, state):
+        # unpickling looks __setstate__ up before __o_storage exists,
+        # __getattr__ would recurse
+        self.__dict__.update(state)
+
     def __bool__(self):
         return True if self.__rid or len(self.__o_storage) else False
     __nonzero__ = __bool__
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Request pipelining.
+
+The server answers the requests of a connection in the order they were sent,
+so several requests can be written back to back and their responses read
+afterwards: N commands cost one round trip instead of N.
+
+Usage::
+
+    >>> pipe = client.pipeline()
+    >>> pipe.command("UPDATE #12:0 SET name = 'Jane'").record_load("#12:0")
+    >>> updated, record = pipe.execute()  # await pipe.execute() with AsyncOrientDB
+
+"""
+from .async_orient import AsyncOrientDB
+from .constants import QUERY_CMD, QUERY_GREMLIN, QUERY_SCRIPT, QUERY_SYNC
+from .exceptions import PyOrientBadMethodCallException, PyOrientConnectionException, \
+    PyOrientException
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+class Pipeline(object):
+    """Commands queued on a client and sent in a single write.
+
+    Only commands answered by a plain response can be queued; the ones
+    changing the session (connect, db_open, db_close...) can't.
+
+    :param client: :class:`OrientDB <pyorient.orient.OrientDB>` or :class:`AsyncOrientDB`
+    :param raise_on_error: raise the first error once every response has been read,
+        otherwise errors are returned in place of the results
+    """
+
+    def __init__(self, client, raise_on_error=True):
+        self._client = client
+        self._raise_on_error = raise_on_error
+        self._commands = []
+
+    def __len__(self):
+        return len(self._commands)
+
+    def _queue(self, message, params, query_params=None):
+        self._commands.append((message, params, query_params))
+        return self
+
+    def query(self, *args, params=None):
+        return self._queue("CommandMessage", (QUERY_SYNC,) + args, params)
+
+    def command(self, *args, params=None):
+        return self._queue("CommandMessage", (QUERY_CMD,) + args, params)
+
+    def batch(self, *args, params=None):
+        return self._queue("CommandMessage", (QUERY_SCRIPT,) + args, params)
+
+    def gremlin(self, *args):
+        return self._queue("CommandMessage", (QUERY_GREMLIN,) + args)
+
+    def record_create(self, *args):
+        return self._queue("RecordCreateMessage", args)
+
+    def record_delete(self, *args):
+        return self._queue("RecordDeleteMessage", args)
+
+    def record_load(self, *args):
+        return self._queue("RecordLoadMessage", args)
+
+    def record_update(self, *args):
+        return self._queue("RecordUpdateMessage", args)
+
+    def data_cluster_count(self, *args):
+        return self._queue("DataClusterCountMessage", args)
+
+    def data_cluster_data_range(self, *args):
+        return self._queue("DataClusterDataRangeMessage", args)
+
+    def db_count_records(self):
+        return self._queue("DbCountRecordsMessage", ())
+
+    def db_size(self):
+        return self._queue("DbSizeMessage", ())
+
+    def execute(self):
+        """Send the queued commands and read their responses.
+
+        :return: list of results in the order the commands were queued,
+            a coroutine returning it with :class:`AsyncOrientDB`
+        """
+        commands, self._commands = self._commands, []
+        if isinstance(self._client, AsyncOrientDB):
+            return self._execute_async(commands)
+
+        connection = self._client._connection
+        messages = self._write(connection, commands)
+        results = []
+        for message in messages:
+            try:
+                results.append(connection.drive(message.response_decoder()))
+            except PyOrientConnectionException:
+                raise
+            except PyOrientException as e:
+                # the error response has been read whole, the next ones are still aligned
+                results.append(e)
+
+        # every response is read: the global properties can be refreshed on the connection
+        connection.decode_deferred(messages)
+        return self._results(results)
+
+    async def _execute_async(self, commands):
+        client = self._client
+        async with client._lock:
+            if not client._connection.connected:
+                await client._connection.connect()
+            connection = client._connection
+            messages = self._write(connection, commands)
+            futures = [connection.expect(message) for message in messages]
+
+        await connection.drain()
+        results = []
+        for future in futures:
+            try:
+                results.append(await connection.wait(future))
+            except PyOrientConnectionException:
+                raise
+            except PyOrientException as e:
+                results.append(e)
+
+        return self._results(results)
+
+    def _write(self, connection, commands):
+        if connection.in_transaction:
+            raise PyOrientBadMethodCallException(
+                "Commands can't be pipelined inside a transaction", [])
+
+        messages = []
+        for name, params, query_params in commands:
+            message = self._client.get_message(name)
+            if query_params is not None:
+                message.set_query_params(query_params)
+            messages.append(message.prepare(params))
+        connection.write(b"".join(message._output_buffer for message in messages))
+        for message in messages:
+            message._reset_fields_definition()
+            if connection.capture is not None:
+                connection.capture.request(message, message._output_buffer)
+        return messages
+
+    def _results(self, results):
+        if self._raise_on_error:
+            for result in results:
+                if isinstance(result, PyOrientException):
+                    raise result
+        return results
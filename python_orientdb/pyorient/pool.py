@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Connection pooling for :class:`AsyncOrientDB <pyorient.async_orient.AsyncOrientDB>`.
+
+A pool holds opened connections to one database as one user and lends them
+out one coroutine at a time, so concurrent requests never share a socket.
+
+Usage::
+
+    >>> from pyorient.pool import OrientConnectionPool
+    >>> pool = OrientConnectionPool("localhost", 2424, "MyDatabase", "admin", "admin", max_size=8)
+    >>> async with pool.connection() as client:
+    ...     await client.query("select from V")
+
+"""
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+
+from .async_orient import AsyncOrientDB
+from .exceptions import PyOrientConnectionException, PyOrientConnectionPoolException, PyOrientException
+from .serializations import OrientSerialization
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+class OrientConnectionPool(object):
+    """Pool of :class:`AsyncOrientDB` connections sharing host, port, database and user.
+
+    :param host: hostname of the server to connect
+    :param port: integer port of the server
+    :param db_name: database opened on every connection, None to only connect to the server
+    :param user: database (or server) user
+    :param password: password of the user
+    :param min_size: connections kept open even when idle
+    :param max_size: maximum connections open at once
+    :param timeout: seconds :meth:`acquire` waits for a free connection
+    :param max_idle: seconds after which an idle connection above ``min_size`` is closed
+    :param ping_after: seconds of idleness after which a connection is pinged before being lent
+    :param client_factory: coroutine function returning an opened client, defaults to opening an
+        :class:`AsyncOrientDB` with the pool parameters
+    """
+
+    def __init__(self, host, port, db_name, user, password,
+                 min_size=1, max_size=10, timeout=30, max_idle=300, ping_after=30,
+                 serialization_type=OrientSerialization.CSV, client_factory=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("pool size must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.host = host
+        self.port = port
+        self.db_name = db_name
+        self.user = user
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+
+        self._password = password
+        self._serialization_type = serialization_type
+        self._client_factory = client_factory or self._open_client
+
+        # idle connections as (client, released_at), the right end is the most recently used
+        self._idle = deque()
+        self._in_use = set()
+        self._size = 0
+        self._closed = False
+        self._condition = asyncio.Condition()
+
+        self._created = 0
+        self._discarded = 0
+        self._evicted = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._failed_checks = 0
+        self._waiting = 0
+        self._wait_time = 0.0
+
+    async def _open_client(self):
+        client = AsyncOrientDB(self.host, self.port, self._serialization_type)
+        if self.db_name:
+            await client.db_open(self.db_name, self.user, self._password)
+        else:
+            await client.connect(self.user, self._password)
+        return client
+
+    async def open(self):
+        """Open connections up to ``min_size``."""
+        async with self._condition:
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+
+        for _ in range(missing):
+            try:
+                client = await self._create()
+            except Exception:
+                async with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            async with self._condition:
+                self._idle.append((client, time.monotonic()))
+                self._condition.notify()
+        return self
+
+    async def _create(self):
+        client = await self._client_factory()
+        self._created += 1
+        return client
+
+    async def acquire(self):
+        """Borrow a connection, waiting up to ``timeout`` seconds for one to be free.
+
+        :raise: PyOrientConnectionPoolException if the pool is closed or the wait timed out
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        while True:
+            async with self._condition:
+                client = None
+                while client is None:
+                    if self._closed:
+                        raise PyOrientConnectionPoolException("Connection pool is closed", [])
+
+                    self._evict_idle()
+                    if self._idle:
+                        client, released_at = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        released_at = None
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise PyOrientConnectionPoolException(
+                                "Timed out after %ss waiting for a connection to %s:%s/%s"
+                                % (self.timeout, self.host, self.port, self.db_name), [])
+                        self._waiting += 1
+                        try:
+                            await asyncio.wait_for(self._condition.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            pass
+                        finally:
+                            self._waiting -= 1
+
+            if client is None:
+                try:
+                    client = await self._create()
+                except Exception:
+                    async with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not await self._check(client, released_at):
+                self._failed_checks += 1
+                await self._discard(client)
+                continue
+
+            self._in_use.add(client)
+            self._acquired += 1
+            self._wait_time += time.monotonic() - started
+            return client
+
+    async def release(self, client, discard=False):
+        """Give back a connection obtained from :meth:`acquire`.
+
+        :param discard: close the connection instead of keeping it, e.g. after a socket error
+        """
+        self._in_use.discard(client)
+        if discard or self._closed or not self._is_alive(client):
+            await self._discard(client)
+            return
+
+        async with self._condition:
+            self._idle.append((client, time.monotonic()))
+            self._evict_idle()
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection for the duration of an ``async with`` block.
+
+        The connection is returned when the block ends normally or on an error reported by
+        the server, whose response is read entirely. It is discarded on any other failure:
+        a cancelled or timed out request, a connection or decode error may leave part of a
+        response on the socket, to be read by the next borrower.
+        """
+        client = await self.acquire()
+        try:
+            yield client
+        except PyOrientException as e:
+            await self.release(client, discard=not e.from_server)
+            raise
+        except BaseException:
+            await self.release(client, discard=True)
+            raise
+        else:
+            await self.release(client)
+
+    async def close(self):
+        """Close idle connections, the borrowed ones are closed as they are released."""
+        async with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for client, _ in idle:
+            self._close_client(client)
+
+    def stats(self):
+        """
+        :return: dict of counters, ``size`` counts open connections plus the ones being opened
+        """
+        return {
+            'size': self._size,
+            'idle': len(self._idle),
+            'in_use': len(self._in_use),
+            'waiting': self._waiting,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'created': self._created,
+            'discarded': self._discarded,
+            'evicted': self._evicted,
+            'acquired': self._acquired,
+            'timeouts': self._timeouts,
+            'failed_checks': self._failed_checks,
+            'avg_wait': self._wait_time / self._acquired if self._acquired else 0.0,
+        }
+
+    def _evict_idle(self):
+        """Close connections idle for more than ``max_idle``, oldest first, keeping ``min_size``."""
+        limit = time.monotonic() - self.max_idle
+        while self._idle and self._size > self.min_size and self._idle[0][1] < limit:
+            client, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            self._close_client(client)
+
+    async def _check(self, client, released_at):
+        """Liveness check, pinging the server when the connection has been idle for a while."""
+        if not self._is_alive(client):
+            return False
+        if time.monotonic() - released_at < self.ping_after:
+            return True
+        try:
+            await client.db_size() if self.db_name else await client.db_list()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _is_alive(client):
+        connection = client._connection
+        if not connection.connected:
+            return False
+        reader = getattr(connection, '_reader', None)
+        return reader is None or not reader.at_eof()
+
+    async def _discard(self, client):
+        self._close_client(client)
+        async with self._condition:
+            self._size -= 1
+            self._discarded += 1
+            self._condition.notify()
+
+    @staticmethod
+    def _close_client(client):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+class OrientPoolRegistry(object):
+    """Registry handing out one :class:`OrientConnectionPool` per host, port, database and credentials.
+
+    :param pool_options: keyword arguments passed to every new pool (sizes, timeouts...)
+    """
+
+    def __init__(self, **pool_options):
+        self._pool_options = pool_options
+        self._pools = {}
+        # passwords are told apart by a keyed digest, never kept as keys
+        self._digest_key = os.urandom(32)
+
+    def get(self, host, port, db_name, user, password):
+        """Pool for these credentials, shared only by the callers giving the same password.
+
+        Another password gets a pool of its own, whose connections fail to
+        open when it is wrong: a failed login never touches the pool of
+        somebody else. The pools of the user left without connections, like
+        the ones of wrong passwords, are forgotten when a new one is made.
+        """
+        key = (host, int(port), db_name, user, self._digest(password))
+        pool = self._pools.get(key)
+        if pool is None or pool._closed:
+            for other_key, other in list(self._pools.items()):
+                if other_key[:4] == key[:4] and (other._closed or other._size == 0):
+                    del self._pools[other_key]
+            pool = self._pools[key] = OrientConnectionPool(
+                host, int(port), db_name, user, password, **self._pool_options
+            )
+        return pool
+
+    def _digest(self, password):
+        return hmac.new(self._digest_key, str(password).encode('utf-8'), hashlib.sha256).digest()
+
+    def stats(self):
+        stats = {}
+        for key, pool in self._pools.items():
+            name = "%s:%s/%s@%s" % key[:4]
+            if name in stats:
+                # the user has pools for several passwords
+                name += " #%d" % sum(1 for other in stats if other.startswith(name))
+            stats[name] = pool.stats()
+        return stats
+
+    async def close(self):
+        pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            await pool.close()
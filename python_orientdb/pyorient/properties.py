@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Global properties of the records serialized with :attr:`OrientSerialization.Binary
+<pyorient.serializations.OrientSerialization.Binary>`.
+
+A binary record names a field of its class schema by the id of a global
+property instead of its name; the ids are listed by ``globalProperties`` in
+the schema record ``#0:1``. The list only grows and an id is never reused, so
+the table is kept up to date by fetching the ids beyond the highest one known.
+
+The connections to the same database share one :class:`GlobalProperties`,
+refreshed on ``db_open``, ``db_reload`` and whenever a response holds a
+record referencing an id not known yet: such records are decoded once the
+responses pending on the connection are read and the table refreshed, the
+results, callbacks and live query events handing them out wait until then.
+"""
+import threading
+import weakref
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+type_map = {'BOOLEAN': 0,
+            'INTEGER': 1,
+            'SHORT': 2,
+            'LONG': 3,
+            'FLOAT': 4,
+            'DOUBLE': 5,
+            'DATETIME': 6,
+            'STRING': 7,
+            'BINARY': 8,
+            'EMBEDDED': 9,
+            'EMBEDDEDLIST': 10,
+            'EMBEDDEDSET': 11,
+            'EMBEDDEDMAP': 12,
+            'LINK': 13,
+            'LINKLIST': 14,
+            'LINKSET': 15,
+            'LINKMAP': 16,
+            'BYTE': 17,
+            'TRANSIENT': 18,
+            'DATE': 19,
+            'CUSTOM': 20,
+            'DECIMAL': 21,
+            'LINKBAG': 22,
+            'ANY': 23}
+
+
+def _varint(content, pos):
+    """Decode the zigzag varint at ``pos``.
+
+    :return: (value, position after it)
+    """
+    value = shift = 0
+    while True:
+        byte = content[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return (value >> 1) ^ -(value & 1), pos
+        shift += 7
+
+
+def property_ids(content):
+    """Ids of the global properties in the header of a binary record.
+
+    Only the header of the record itself is read, not the ones of its embedded documents.
+
+    :param content: bytes of the record, as serialized by OrientDB
+    :return: set of ids
+    """
+    ids = set()
+    try:
+        length, pos = _varint(content, 1)  # serializer version, class name
+        pos += length
+        while True:
+            length, pos = _varint(content, pos)
+            if length == 0:
+                return ids
+            if length > 0:
+                pos += length + 5  # field name, data pointer and type
+            else:
+                ids.add(-length - 1)
+                pos += 4  # data pointer
+    except IndexError:
+        return ids
+
+
+class GlobalProperties(dict):
+    """Global properties of a database, ``{id: [name, type]}`` as the binary deserializer takes them.
+
+    :meth:`shared` returns the table of a database, shared by the clients connected to it.
+    """
+
+    _shared = weakref.WeakValueDictionary()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super(GlobalProperties, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        #: refreshes and properties fetched
+        self.refreshes = 0
+        self.fetched = 0
+
+    @classmethod
+    def shared(cls, host, port, db_name):
+        """Table of the database ``db_name`` on ``host:port``, kept as long as a client uses it."""
+        with cls._shared_lock:
+            properties = cls._shared.get((host, port, db_name))
+            if properties is None:
+                properties = cls._shared[(host, port, db_name)] = cls()
+            return properties
+
+    @property
+    def max_id(self):
+        """Highest id known, -1 for an empty table."""
+        return max((key for key in self if isinstance(key, int)), default=-1)
+
+    def query(self):
+        """SQL selecting the global properties not known yet, to be sent without a limit."""
+        return "SELECT FROM (SELECT expand(globalProperties) FROM #0:1) WHERE id > %d ORDER BY id" % self.max_id
+
+    def merge(self, rows):
+        """Add the properties selected by :meth:`query`.
+
+        :param rows: records (or dicts) with the id, name and type of a property
+        :return: number of properties added
+        """
+        added = 0
+        with self._lock:
+            for row in rows:
+                data = getattr(row, 'oRecordData', row)
+                if data['id'] not in self:
+                    added += 1
+                self[data['id']] = [data['name'], type_map[data['type']]]
+            self.refreshes += 1
+            self.fetched += added
+        return added
+
+    def missing(self, content):
+        """Ids of the global properties in the header of a binary record that are not known.
+
+        :param content: bytes of the record
+        :return: set of ids
+        """
+        return property_ids(content) - self.keys()
+
+    def __getstate__(self):
+        # pickled with the state of the sockets, see pyorient.capture
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<GlobalProperties %d, %d refreshes>" % (len(self), self.refreshes)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Class scans split by cluster and record id range, run concurrently.
+
+The records of a class are spread over its clusters (and the clusters of its
+subclasses). :class:`ParallelScan` asks DATA_CLUSTER_DATA_RANGE and
+DATA_CLUSTER_COUNT for the positions and size of every cluster, cuts each
+cluster in ranges of about ``partition_size`` records and runs one query per
+range, each on its own connection of an :class:`OrientConnectionPool
+<pyorient.pool.OrientConnectionPool>`:
+
+    SELECT FROM cluster:person_1 WHERE @rid >= #13:0 AND @rid <= #13:9999
+
+:meth:`ParallelScan.stream` yields the records in cluster and position order,
+running the next partitions ahead; :meth:`ParallelScan.unordered` yields the
+records of each partition as soon as it is read.
+
+Usage::
+
+    >>> from pyorient.scan import ParallelScan
+    >>> scan = ParallelScan(pool, "Person", where="age > :age", params={"age": 18})
+    >>> async for record in scan.stream():
+    ...     export(record)
+
+"""
+from collections import deque, namedtuple
+from itertools import islice
+import asyncio
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+#: positions first to last (included) of one cluster
+ScanPartition = namedtuple("ScanPartition", "cluster_id cluster_name first last")
+
+
+class ParallelScan(object):
+    """Scan of the records of a class over several pooled connections.
+
+    :param pool: :class:`OrientConnectionPool <pyorient.pool.OrientConnectionPool>` lending the connections
+    :param class_name: class to scan
+    :param where: optional condition of the records, SQL pasted in every query as it is:
+        never build it from untrusted input, pass the values in ``params`` (``"age > :age"``)
+    :param params: values of the parameters of the condition, e.g. ``{"age": 18}``
+    :param polymorphic: scan the clusters of the subclasses too
+    :param partition_size: records read by one query, about
+    :param concurrency: partitions read at once, defaults to the ``max_size`` of the pool
+    """
+
+    def __init__(self, pool, class_name, where=None, params=None, polymorphic=True,
+                 partition_size=10000, concurrency=None):
+        if partition_size < 1:
+            raise ValueError("partition_size must be positive")
+        self.pool = pool
+        self.class_name = class_name
+        self.where = where
+        self.params = params
+        self.polymorphic = polymorphic
+        self.partition_size = partition_size
+        self.concurrency = concurrency or pool.max_size
+
+    async def partitions(self):
+        """Split the clusters of the class in record id ranges.
+
+        :return: list of :class:`ScanPartition`, in cluster and position order
+        """
+        async with self.pool.connection() as client:
+            schema = await client.query("select from metadata:schema")
+            cluster_ids = self._cluster_ids(schema[0].oRecordData['classes'])
+            if any(cluster_id not in client._cluster_reverse_map for cluster_id in cluster_ids):
+                # clusters added since the connection was opened
+                await client.db_reload()
+
+            partitions = []
+            for cluster_id in cluster_ids:
+                first, last = await client.data_cluster_data_range(cluster_id)
+                if first < 0:
+                    continue
+                count = await client.data_cluster_count([cluster_id])
+                name = client.get_class_name(cluster_id)
+                if isinstance(name, bytes):
+                    name = name.decode('utf-8')
+                partitions.extend(self._split(cluster_id, name, first, last, count))
+        return partitions
+
+    def _cluster_ids(self, classes):
+        by_name = dict((schema_class['name'].lower(), schema_class) for schema_class in classes)
+        if self.class_name.lower() not in by_name:
+            raise ValueError("Class %s does not exist" % self.class_name)
+
+        names = [self.class_name.lower()]
+        if self.polymorphic:
+            for schema_class in classes:
+                if self._extends(schema_class, by_name) and schema_class['name'].lower() not in names:
+                    names.append(schema_class['name'].lower())
+
+        cluster_ids = []
+        for name in names:
+            cluster_ids.extend(cluster_id for cluster_id in by_name[name].get('clusterIds') or ()
+                               if cluster_id >= 0 and cluster_id not in cluster_ids)
+        return sorted(cluster_ids)
+
+    def _extends(self, schema_class, by_name):
+        seen = set()
+        parents = self._super_classes(schema_class)
+        while parents:
+            name = parents.pop().lower()
+            if name == self.class_name.lower():
+                return True
+            if name not in seen and name in by_name:
+                seen.add(name)
+                parents.extend(self._super_classes(by_name[name]))
+        return False
+
+    @staticmethod
+    def _super_classes(schema_class):
+        parents = list(schema_class.get('superClasses') or ())
+        if schema_class.get('superClass') and schema_class['superClass'] not in parents:
+            parents.append(schema_class['superClass'])
+        return parents
+
+    def _split(self, cluster_id, name, first, last, count):
+        # positions are spread evenly enough between the first and the last one
+        parts = max(1, min(-(-count // self.partition_size), last - first + 1))
+        step = -(-(last - first + 1) // parts)
+        return [ScanPartition(cluster_id, name, start, min(start + step - 1, last))
+                for start in range(first, last + 1, step)]
+
+    def query(self, partition):
+        """SQL reading one partition."""
+        sql = "SELECT FROM cluster:%s WHERE @rid >= #%d:%d AND @rid <= #%d:%d" % (
+            partition.cluster_name, partition.cluster_id, partition.first, partition.cluster_id, partition.last)
+        if self.where:
+            sql += " AND (%s)" % self.where
+        return sql
+
+    async def scan(self, partition):
+        """Read the records of one partition on a connection of the pool."""
+        async with self.pool.connection() as client:
+            return await client.query(self.query(partition), -1, params=self.params)
+
+    async def stream(self):
+        """Yield the records in cluster and position order.
+
+        Up to ``concurrency`` partitions are read ahead of the one being yielded;
+        close the generator (``contextlib.aclosing``) to stop them when leaving early.
+        """
+        partitions = iter(await self.partitions())
+        running = deque(asyncio.ensure_future(self.scan(partition))
+                        for partition in islice(partitions, self.concurrency))
+        try:
+            while running:
+                records = await running.popleft()
+                running.extend(asyncio.ensure_future(self.scan(partition)) for partition in islice(partitions, 1))
+                for record in records:
+                    yield record
+        finally:
+            await self._cancel(running)
+
+    async def unordered(self):
+        """Yield the records of the partitions in the order they are read, the fast path."""
+        partitions = iter(await self.partitions())
+        running = set(asyncio.ensure_future(self.scan(partition))
+                      for partition in islice(partitions, self.concurrency))
+        try:
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                running.update(asyncio.ensure_future(self.scan(partition))
+                               for partition in islice(partitions, len(done)))
+                for task in done:
+                    for record in task.result():
+                        yield record
+        finally:
+            await self._cancel(running)
+
+    def __aiter__(self):
+        return self.stream()
+
+    @staticmethod
+    async def _cancel(tasks):
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __repr__(self):
+        return "<ParallelScan %s, %d at once>" % (self.class_name, self.concurrency)
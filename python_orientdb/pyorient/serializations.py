@@ -1,4 +1,5 @@
 import re
+import struct
 import sys
 import time
 import calendar
@@ -50,7 +51,7 @@ numRegex = re.compile('-?[0-9]+(\.[0-9]+)?(E-?[0-9]+)?')
 #     [0-9]+         one or more digits
 
 # RID in the form of number:number
-ridRegex = re.compile('-?[0-9]+:[0-9]+')
+ridRegex = re.compile('-?[0-9]+:-?[0-9]+')
 # -?                optional minus sign
 # [0-9]+            one or more digits
 # :                 colon
@@ -183,6 +184,9 @@ class OrientSerializationCSV(object):
 
         if isinstance(value, str):
             ret = '"' + value + '"'
+        elif isinstance(value, bool):
+            # before int, bool is a subclass of it
+            ret = 'true' if value else 'false'
         elif isinstance(value, float):
             with localcontext() as ctx:
                 ctx.prec = 20  # floats are max 80-bits wide = 20 significant digits
@@ -602,6 +606,234 @@ class CSVRidBagDecoder(object):
             rid_idx += 1
             yield OrientRecordLink(str(cid) + ':' + str(cpos))
 
+class OrientSerializationResult(object):
+    """
+    Serialization of the projections in the result sets of the protocol 37+
+    query operations: a document whose values are written with varints, each
+    one after the byte of its type.
+
+        (fields:varint)[(name:string)(type:byte)(value)]*(metadata:varint)[(name:string)(type:byte)(value)]*
+
+    Decoded into a dict of the fields, metadata are dropped.
+    """
+    BOOLEAN, INTEGER, SHORT, LONG, FLOAT, DOUBLE, DATETIME, STRING, BINARY, EMBEDDED, EMBEDDEDLIST, \
+        EMBEDDEDSET, EMBEDDEDMAP, LINK, LINKLIST, LINKSET, LINKMAP, BYTE = range(18)
+    DATE = 19
+    DECIMAL = 21
+
+    _MILLIS_PER_DAY = 86400000
+
+    def decode(self, content):
+        value, offset = self._read_result(memoryview(content), 0)
+        return value
+
+    def encode(self, fields):
+        out = bytearray()
+        self._write_result(out, fields)
+        return bytes(out)
+
+    #
+    # DECODING STUFF
+    #
+
+    @staticmethod
+    def _read_varint(content, offset):
+        value = shift = 0
+        while True:
+            byte = content[offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                # zigzag
+                return (value >> 1) ^ -(value & 1), offset
+            shift += 7
+
+    def _read_bytes(self, content, offset):
+        length, offset = self._read_varint(content, offset)
+        return bytes(content[offset:offset + length]), offset + length
+
+    def _read_string(self, content, offset):
+        value, offset = self._read_bytes(content, offset)
+        return value.decode('utf-8'), offset
+
+    def _read_link(self, content, offset):
+        cluster_id, offset = self._read_varint(content, offset)
+        position, offset = self._read_varint(content, offset)
+        return OrientRecordLink("%d:%d" % (cluster_id, position)), offset
+
+    def _read_fields(self, content, offset):
+        fields = {}
+        size, offset = self._read_varint(content, offset)
+        for _ in range(size):
+            name, offset = self._read_string(content, offset)
+            fields[name], offset = self._read_typed(content, offset)
+        return fields, offset
+
+    def _read_result(self, content, offset):
+        fields, offset = self._read_fields(content, offset)
+        metadata, offset = self._read_fields(content, offset)
+        return fields, offset
+
+    def _read_typed(self, content, offset):
+        value_type = struct.unpack_from('b', content, offset)[0]
+        if value_type == -1:
+            return None, offset + 1
+        return self._read_value(content, offset + 1, value_type)
+
+    def _read_value(self, content, offset, value_type):
+        if value_type in (self.INTEGER, self.SHORT, self.LONG):
+            return self._read_varint(content, offset)
+        elif value_type == self.STRING:
+            return self._read_string(content, offset)
+        elif value_type == self.DOUBLE:
+            return struct.unpack_from('!d', content, offset)[0], offset + 8
+        elif value_type == self.FLOAT:
+            return struct.unpack_from('!f', content, offset)[0], offset + 4
+        elif value_type == self.BOOLEAN:
+            return content[offset] != 0, offset + 1
+        elif value_type == self.BYTE:
+            return struct.unpack_from('b', content, offset)[0], offset + 1
+        elif value_type == self.DATETIME:
+            millis, offset = self._read_varint(content, offset)
+            return datetime.utcfromtimestamp(millis / 1000.0), offset
+        elif value_type == self.DATE:
+            days, offset = self._read_varint(content, offset)
+            return datetime.utcfromtimestamp(days * self._MILLIS_PER_DAY / 1000.0).date(), offset
+        elif value_type == self.BINARY:
+            return self._read_bytes(content, offset)
+        elif value_type == self.DECIMAL:
+            scale, length = struct.unpack_from('!ii', content, offset)
+            offset += 8
+            unscaled = int.from_bytes(content[offset:offset + length], 'big', signed=True)
+            return Decimal(unscaled).scaleb(-scale), offset + length
+        elif value_type == self.EMBEDDED:
+            return self._read_result(content, offset)
+        elif value_type in (self.EMBEDDEDLIST, self.EMBEDDEDSET):
+            size, offset = self._read_varint(content, offset)
+            items = []
+            for _ in range(size):
+                item, offset = self._read_typed(content, offset)
+                items.append(item)
+            return items, offset
+        elif value_type == self.EMBEDDEDMAP:
+            size, offset = self._read_varint(content, offset)
+            items = {}
+            for _ in range(size):
+                offset += 1  # key type, always a string
+                key, offset = self._read_string(content, offset)
+                items[key], offset = self._read_typed(content, offset)
+            return items, offset
+        elif value_type == self.LINK:
+            return self._read_link(content, offset)
+        elif value_type in (self.LINKLIST, self.LINKSET):
+            size, offset = self._read_varint(content, offset)
+            links = []
+            for _ in range(size):
+                link, offset = self._read_link(content, offset)
+                links.append(link)
+            return links, offset
+        elif value_type == self.LINKMAP:
+            size, offset = self._read_varint(content, offset)
+            links = {}
+            for _ in range(size):
+                offset += 1  # key type, always a string
+                key, offset = self._read_string(content, offset)
+                links[key], offset = self._read_link(content, offset)
+            return links, offset
+
+        raise PyOrientBadMethodCallException(
+            "Type %d can't be decoded in a result set" % value_type, []
+        )
+
+    #
+    # ENCODING STUFF
+    #
+
+    @staticmethod
+    def _write_varint(out, value):
+        value = (value << 1) ^ (value >> 63)
+        while value > 0x7f:
+            out.append((value & 0x7f) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def _write_bytes(self, out, value):
+        self._write_varint(out, len(value))
+        out += value
+
+    def _write_link(self, out, link):
+        cluster_id, position = link.get().split(':')
+        self._write_varint(out, int(cluster_id))
+        self._write_varint(out, int(position))
+
+    def _write_result(self, out, fields):
+        self._write_varint(out, len(fields))
+        for name, value in fields.items():
+            self._write_bytes(out, name.encode('utf-8'))
+            self._write_typed(out, value)
+        self._write_varint(out, 0)  # metadata
+
+    def _write_typed(self, out, value):
+        if value is None:
+            out.append(0xff)
+        elif isinstance(value, bool):
+            # before int, bool is a subclass of it
+            out += bytes((self.BOOLEAN, value))
+        elif isinstance(value, int):
+            out.append(self.INTEGER if -2147483648 <= value <= 2147483647 else self.LONG)
+            self._write_varint(out, value)
+        elif isinstance(value, float):
+            out.append(self.DOUBLE)
+            out += struct.pack('!d', value)
+        elif isinstance(value, str):
+            out.append(self.STRING)
+            self._write_bytes(out, value.encode('utf-8'))
+        elif isinstance(value, bytes):
+            out.append(self.BINARY)
+            self._write_bytes(out, value)
+        elif isinstance(value, datetime):
+            out.append(self.DATETIME)
+            self._write_varint(out, calendar.timegm(value.utctimetuple()) * 1000 + value.microsecond // 1000)
+        elif isinstance(value, date):
+            out.append(self.DATE)
+            self._write_varint(out, calendar.timegm(value.timetuple()) * 1000 // self._MILLIS_PER_DAY)
+        elif isinstance(value, Decimal):
+            sign, digits, exponent = value.as_tuple()
+            unscaled = int(''.join(map(str, digits)) or '0') * (-1 if sign else 1)
+            raw = unscaled.to_bytes(unscaled.bit_length() // 8 + 1, 'big', signed=True)
+            out.append(self.DECIMAL)
+            out += struct.pack('!ii', -exponent, len(raw)) + raw
+        elif isinstance(value, OrientRecordLink):
+            out.append(self.LINK)
+            self._write_link(out, value)
+        elif isinstance(value, (list, tuple, set)):
+            links = bool(value) and all(isinstance(item, OrientRecordLink) for item in value)
+            if links:
+                out.append(self.LINKSET if isinstance(value, set) else self.LINKLIST)
+            else:
+                out.append(self.EMBEDDEDSET if isinstance(value, set) else self.EMBEDDEDLIST)
+            self._write_varint(out, len(value))
+            for item in value:
+                if links:
+                    self._write_link(out, item)
+                else:
+                    self._write_typed(out, item)
+        elif isinstance(value, dict):
+            out.append(self.EMBEDDEDMAP)
+            self._write_varint(out, len(value))
+            for key, item in value.items():
+                out.append(self.STRING)
+                self._write_bytes(out, str(key).encode('utf-8'))
+                self._write_typed(out, item)
+        elif isinstance(value, OrientRecord):
+            out.append(self.EMBEDDED)
+            self._write_result(out, value.oRecordData)
+        else:
+            raise PyOrientBadMethodCallException(
+                "%s can't be encoded in a result set" % type(value).__name__, []
+            )
+
+
 class OrientSerialization(dict):
     """
     Enum representing the available serialization
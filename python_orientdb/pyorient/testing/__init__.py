@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+In-process stand-in for an OrientDB server, to test and load test the driver
+and the code built on it without an OrientDB instance.
+
+Usage::
+
+    >>> from pyorient.testing import FakeOrientServer
+    >>> with FakeOrientServer(latency=0.001) as server:
+    ...     client = pyorient.OrientDB("127.0.0.1", server.port)
+    ...     client.db_open("demo", "root", "root")
+    ...     client.command("create class Person extends V")
+
+or from a shell, to point an application at it::
+
+    python -m pyorient.testing --port 2424 --latency 0.001 --database demo
+"""
+from .server import FakeOrientServer
+from .store import Database, Record, SchemaClass, ServerError
+
+__author__ = 'Ostico <ostico@gmail.com>'
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import argparse
+
+from .server import FakeOrientServer
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pyorient.testing",
+                                     description="Fake OrientDB server speaking the binary protocol 38")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2424)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds waited before every response")
+    parser.add_argument("--database", action="append", help="database to create, can be repeated (demo)")
+    args = parser.parse_args()
+
+    server = FakeOrientServer(args.host, args.port, args.latency, args.database or ["demo"])
+    print("fake OrientDB listening on %s:%d" % server.address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,735 @@
+# -*- coding: utf-8 -*-
+"""
+A stand-in OrientDB server speaking the binary protocol 38 over TCP.
+
+It serves the operations pyorient sends: connect, database open, close,
+create, exists, drop, list, size, count and reload, commands (sync and async
+queries, SQL commands and scripts, see :mod:`pyorient.testing.sql`), the
+paginated queries of protocol 37, record create, load, update and delete,
+transaction commit and the data cluster operations. Records are serialized as CSV.
+
+Live queries push their events (REQUEST_PUSH_LIVE_QUERY) on the connection
+that subscribed, before the next response or while it is idle.
+"""
+import itertools
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from ..constants import COMMAND_OP, CONNECT_OP, DATA_CLUSTER_ADD_OP, \
+    DATA_CLUSTER_COUNT_OP, DATA_CLUSTER_DATA_RANGE_OP, DATA_CLUSTER_DROP_OP, DB_CLOSE_OP, DB_COUNT_RECORDS_OP, \
+    DB_CREATE_OP, DB_DROP_OP, DB_EXIST_OP, DB_LIST_OP, DB_OPEN_OP, DB_RELOAD_OP, DB_SIZE_OP, FIELD_BOOLEAN, \
+    FIELD_BYTE, FIELD_BYTES, FIELD_INT, FIELD_LONG, FIELD_SHORT, FIELD_STRING, QUERY_ASYNC, QUERY_CMD, \
+    QUERY_GREMLIN, QUERY_SCRIPT, QUERY_SYNC, RECORD_CREATE_OP, RECORD_DELETE_OP, RECORD_LOAD_OP, RECORD_UPDATE_OP, \
+    SHUTDOWN_OP, SUPPORTED_PROTOCOL, TX_COMMIT_OP, QUERY_OP, QUERY_NEXT_PAGE_OP, CLOSE_QUERY_OP, \
+    QUERY_OPERATION_SCRIPT, QUERY_RESULT_ELEMENT, QUERY_RESULT_PROJECTION, PUSH_DATA, REQUEST_PUSH_LIVE_QUERY
+from ..live import LIVE_OPERATIONS
+from ..messages.encoder import encode_fields
+from ..otypes import OrientRecord, OrientRecordLink
+from ..serializations import OrientSerialization, OrientSerializationCSV, OrientSerializationResult
+from .sql import LiveSelect, LiveUnsubscribe, execute, execute_script, storable
+from .store import COMMAND_EXCEPTION, DATABASE_EXCEPTION, STORAGE_EXCEPTION, Database, Record, ServerError
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+_HEADER_WITHOUT_TOKEN = (ord(CONNECT_OP), ord(DB_OPEN_OP))
+
+_RECORD_OPERATIONS = {name: operation for operation, name in LIVE_OPERATIONS.items()}
+
+
+class _Reader(object):
+    """Reads the fields of a request."""
+
+    def __init__(self, read):
+        self._read = read
+
+    def read(self, n):
+        data = self._read(n)
+        if len(data) < n:
+            raise EOFError()
+        return data
+
+    def byte(self):
+        return self.read(1)[0]
+
+    def boolean(self):
+        return self.read(1) != b'\x00'
+
+    def short(self):
+        return struct.unpack('!h', self.read(2))[0]
+
+    def int(self):
+        return struct.unpack('!i', self.read(4))[0]
+
+    def long(self):
+        return struct.unpack('!q', self.read(8))[0]
+
+    def bytes(self):
+        length = self.int()
+        return self.read(length) if length > 0 else None if length < 0 else b''
+
+    def string(self):
+        value = self.bytes()
+        return None if value is None else value.decode('utf-8')
+
+
+class _BytesReader(_Reader):
+    """Reads the fields packed in a string, the payload of commands."""
+
+    def __init__(self, data):
+        self._data = data
+        self._pos = 0
+        super(_BytesReader, self).__init__(self._next)
+
+    def _next(self, n):
+        data = self._data[self._pos:self._pos + n]
+        self._pos += n
+        return data
+
+
+def _decode_record(content):
+    class_name, fields = OrientSerialization.get_impl(OrientSerialization.CSV).decode(content)
+    return class_name, dict(fields)
+
+
+def _resolve_temporary(value, created):
+    """Point the links to records created by a transaction, by their temporary rid, to the created records."""
+    if isinstance(value, OrientRecordLink):
+        rid = created.get(value.get_hash())
+        return value if rid is None else OrientRecordLink(rid[1:])
+    if isinstance(value, list):
+        return [_resolve_temporary(item, created) for item in value]
+    if isinstance(value, dict):
+        return {key: _resolve_temporary(item, created) for key, item in value.items()}
+    return value
+
+
+def _decode_params(content):
+    """Values of the parameters of a query, sent in the "params" field of a document."""
+    if not content:
+        return None
+    return _decode_record(content)[1].get('params')
+
+
+def _fetch_depth(fetch_plan):
+    """Depth of the links to pre-fetch, from the "*:depth" entry of a fetch plan, -1 for no limit."""
+    for entry in (fetch_plan or '').split():
+        field, _, depth = entry.rpartition(':')
+        if field == '*':
+            return int(depth)
+    return 0
+
+
+def _prefetch(db, records, fetch_plan):
+    """Records linked by records, up to the depth of the fetch plan, sent along to the client cache."""
+    depth = _fetch_depth(fetch_plan)
+    seen = set(record.rid for record in records if isinstance(record, Record))
+    level = [record for record in records if isinstance(record, Record)]
+    prefetched = []
+    while level and depth != 0:
+        linked = []
+        for record in level:
+            for value in record.fields.values():
+                for link in value if isinstance(value, list) else [value]:
+                    if isinstance(link, OrientRecordLink) and link.get_hash() not in seen:
+                        seen.add(link.get_hash())
+                        target = db.load(link.get_hash())
+                        if target is not None:
+                            linked.append(target)
+        prefetched += linked
+        level = linked
+        depth -= 1
+    return prefetched
+
+
+def _prefetched_fields(db, records, fetch_plan):
+    fields = []
+    for record in _prefetch(db, records, fetch_plan):
+        fields += [(FIELD_BYTE, chr(2))] + _record_fields(record)
+    return fields
+
+
+def _encode_record(record):
+    return OrientSerializationCSV().encode(OrientRecord({'@' + (record.class_name or ''): record.fields}))
+
+
+def _record_fields(record):
+    """(0:short)(record-type:byte)(cluster-id:short)(cluster-position:long)(record-version:int)(record-content:bytes)"""
+    return [(FIELD_SHORT, 0), (FIELD_BYTE, 'd'), (FIELD_SHORT, record.cluster_id),
+            (FIELD_LONG, record.position), (FIELD_INT, record.version), (FIELD_STRING, _encode_record(record))]
+
+
+def _result_fields(record):
+    """Records are sent as elements, the rows made by projections as projections."""
+    if record.cluster_id == -2:
+        return [(FIELD_BYTE, chr(QUERY_RESULT_PROJECTION)),
+                (FIELD_BYTES, OrientSerializationResult().encode(record.fields))]
+    return [(FIELD_BYTE, chr(QUERY_RESULT_ELEMENT))] + _record_fields(record)
+
+
+def _push_frame(content):
+    """(3:byte)(Integer.MIN_VALUE:int)(REQUEST_PUSH_LIVE_QUERY:byte)(content:bytes)"""
+    return encode_fields([(FIELD_BYTE, chr(PUSH_DATA)), (FIELD_INT, -2 ** 31),
+                          (FIELD_BYTE, chr(REQUEST_PUSH_LIVE_QUERY)), (FIELD_BYTES, content)])
+
+
+class _LiveQuery(object):
+    """A LIVE SELECT of a connection, pushes to it the changes of the records it selects."""
+
+    def __init__(self, token, db, select, push):
+        self.token = token
+        self.db = db
+        self.select = select
+        self.push = push
+
+    def __call__(self, operation, record):
+        cls = self.db.classes.get((record.class_name or '').lower())
+        if cls is None or not cls.is_a(self.select.class_name):
+            return
+        if self.select.condition is not None and not self.select.condition(record):
+            return
+        self.push(_push_frame(encode_fields([
+            (FIELD_BYTE, 'r'), (FIELD_BYTE, chr(_RECORD_OPERATIONS[operation])), (FIELD_INT, self.token),
+            (FIELD_BYTE, 'd'), (FIELD_INT, record.version), (FIELD_SHORT, record.cluster_id),
+            (FIELD_LONG, record.position), (FIELD_STRING, _encode_record(record))
+        ])))
+
+    def end(self):
+        """('u':byte)(token:int)"""
+        self.push(_push_frame(encode_fields([(FIELD_BYTE, 'u'), (FIELD_INT, self.token)])))
+
+
+class FakeOrientServer(object):
+    """In-process OrientDB stand-in backed by in-memory databases.
+
+    Usage::
+
+        >>> with FakeOrientServer(latency=0.001) as server:
+        ...     client = pyorient.OrientDB("127.0.0.1", server.port)
+        ...     client.db_open("demo", "root", "root")
+
+    Any user and password are accepted.
+
+    :param port: 0 picks a free port
+    :param latency: seconds waited before sending every response
+    :param databases: names of the databases created empty
+    """
+
+    protocol = SUPPORTED_PROTOCOL
+    release = "3.2.0 (fake)"
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, databases=("demo",)):
+        self.latency = latency
+        self.databases = {name: Database(name) for name in databases}
+        """:type : dict of [str, Database]"""
+        self._sessions = {}
+        self._session_ids = itertools.count(1)
+        # (session id, query id) -> records of the result set not sent yet
+        self._cursors = {}
+        self._query_ids = itertools.count(1)
+        # live query token -> _LiveQuery
+        self._live_queries = {}
+        self._live_tokens = itertools.count(1)
+        # the connection handled by the current thread, where live queries push
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self._server = _TCPServer((host, port), _Handler)
+        self._server.fake = self
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        """Serve from a daemon thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05, ), name="fake-orientdb",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # requests
+
+    def respond(self, op, reader, push=None):
+        """Read a request and execute it.
+
+        :param op: operation byte, already read
+        :param push: writes a push request on the connection, for its live queries
+        :return: the response, None to close the connection
+        """
+        self._local.push = push
+        session_id = reader.int()
+        if op not in _HEADER_WITHOUT_TOKEN:
+            reader.bytes()  # token, sessions are told apart by their id
+
+        try:
+            handler = self._handlers[op]
+        except KeyError:
+            # the request can't be skipped without knowing its fields
+            return None
+
+        try:
+            session_id, body = handler(self, session_id, reader)
+        except ServerError as e:
+            return self._header(op, session_id, 1) + encode_fields([
+                (FIELD_BOOLEAN, True), (FIELD_STRING, e.exception_class), (FIELD_STRING, e.message),
+                (FIELD_BOOLEAN, False), (FIELD_STRING, b'')
+            ])
+        if body is None:
+            return None
+        return self._header(op, session_id, 0) + body
+
+    @staticmethod
+    def _header(op, session_id, status):
+        fields = [(FIELD_BYTE, chr(status)), (FIELD_INT, session_id)]
+        if op not in _HEADER_WITHOUT_TOKEN:
+            fields.append((FIELD_STRING, b''))  # no token refresh
+        return encode_fields(fields)
+
+    def _new_session(self, db):
+        with self._lock:
+            session_id = next(self._session_ids)
+            self._sessions[session_id] = db
+        return session_id, b'fake-token-%d' % session_id
+
+    def _database(self, session_id):
+        db = self._sessions.get(session_id)
+        if db is None:
+            raise ServerError(DATABASE_EXCEPTION, "Database is not opened in session %d" % session_id)
+        if db.name not in self.databases:
+            raise ServerError(STORAGE_EXCEPTION, "Database '%s' was dropped" % db.name)
+        return db
+
+    @staticmethod
+    def _handshake(reader, open_database):
+        reader.bytes(), reader.bytes()  # driver name and version
+        reader.short()  # protocol
+        reader.string()  # client id
+        serialization = reader.string()
+        reader.boolean()  # token
+        reader.boolean(), reader.boolean()  # support push, collect stats
+        db_name = reader.string() if open_database else None
+        reader.string(), reader.string()  # user, password
+        if serialization != OrientSerialization.CSV:
+            raise ServerError(COMMAND_EXCEPTION, "Serialization %s is not supported" % serialization)
+        return db_name
+
+    def _connect(self, session_id, reader):
+        self._handshake(reader, False)
+        session_id, token = self._new_session(None)
+        return session_id, encode_fields([(FIELD_INT, session_id), (FIELD_STRING, token)])
+
+    def _db_open(self, session_id, reader):
+        db_name = self._handshake(reader, True)
+        try:
+            db = self.databases[db_name]
+        except KeyError:
+            raise ServerError(STORAGE_EXCEPTION, "Cannot open database '%s'" % db_name)
+        session_id, token = self._new_session(db)
+        fields = [(FIELD_INT, session_id), (FIELD_STRING, token), (FIELD_SHORT, len(db.clusters))]
+        for cluster_id, name in sorted(db.clusters.items()):
+            fields += [(FIELD_STRING, name), (FIELD_SHORT, cluster_id)]
+        fields += [(FIELD_STRING, b''), (FIELD_STRING, self.release)]
+        return session_id, encode_fields(fields)
+
+    def _db_close(self, session_id, reader):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            for key in [key for key in self._cursors if key[0] == session_id]:
+                del self._cursors[key]
+        return session_id, None
+
+    def _db_exist(self, session_id, reader):
+        db_name, _ = reader.string(), reader.string()
+        return session_id, encode_fields([(FIELD_BOOLEAN, db_name in self.databases)])
+
+    def _db_create(self, session_id, reader):
+        db_name, db_type, storage_type = reader.string(), reader.string(), reader.string()
+        reader.bytes()  # backup path
+        with self._lock:
+            if db_name in self.databases:
+                raise ServerError(DATABASE_EXCEPTION, "Database named '%s' already exists" % db_name)
+            self.databases[db_name] = Database(db_name, storage_type, db_type)
+        return session_id, b''
+
+    def _db_drop(self, session_id, reader):
+        db_name, _ = reader.string(), reader.string()
+        with self._lock:
+            if self.databases.pop(db_name, None) is None:
+                raise ServerError(STORAGE_EXCEPTION, "Database with name '%s' does not exist" % db_name)
+        return session_id, b''
+
+    def _db_list(self, session_id, reader):
+        databases = {name: "%s:%s" % (db.storage_type, name) for name, db in self.databases.items()}
+        return session_id, encode_fields([(FIELD_STRING, _encode_record(Record(-2, 0, None, {'databases': databases})))])
+
+    def _db_size(self, session_id, reader):
+        db = self._database(session_id)
+        with db.lock:
+            return session_id, encode_fields([(FIELD_LONG, db.size())])
+
+    def _db_count_records(self, session_id, reader):
+        db = self._database(session_id)
+        with db.lock:
+            return session_id, encode_fields([(FIELD_LONG, db.count(list(db.clusters)))])
+
+    def _db_reload(self, session_id, reader):
+        db = self._database(session_id)
+        with db.lock:
+            fields = [(FIELD_SHORT, len(db.clusters))]
+            for cluster_id, name in sorted(db.clusters.items()):
+                fields += [(FIELD_STRING, name), (FIELD_SHORT, cluster_id)]
+        return session_id, encode_fields(fields)
+
+    def _shutdown(self, session_id, reader):
+        reader.bytes(), reader.bytes()  # user, password
+        return session_id, b''
+
+    def _data_cluster_add(self, session_id, reader):
+        name, cluster_id = reader.string(), reader.short()
+        db = self._database(session_id)
+        with db.lock:
+            return session_id, encode_fields([(FIELD_SHORT, db.add_cluster(name, cluster_id))])
+
+    def _data_cluster_drop(self, session_id, reader):
+        cluster_id = reader.short()
+        db = self._database(session_id)
+        with db.lock:
+            return session_id, encode_fields([(FIELD_BOOLEAN, db.drop_cluster(cluster_id))])
+
+    def _data_cluster_count(self, session_id, reader):
+        cluster_ids = [reader.short() for _ in range(reader.short())]
+        reader.boolean()  # tombstones
+        db = self._database(session_id)
+        with db.lock:
+            return session_id, encode_fields([(FIELD_LONG, db.count(cluster_ids))])
+
+    def _data_cluster_data_range(self, session_id, reader):
+        cluster_id = reader.short()
+        db = self._database(session_id)
+        with db.lock:
+            begin, end = db.data_range(cluster_id)
+        return session_id, encode_fields([(FIELD_LONG, begin), (FIELD_LONG, end)])
+
+    def _record_create(self, session_id, reader):
+        cluster_id, content = reader.short(), reader.bytes()
+        reader.byte(), reader.boolean()  # record type, mode
+        db = self._database(session_id)
+        with db.lock:
+            record = db.create(*_decode_record(content), cluster_id=cluster_id)
+            return session_id, encode_fields([
+                (FIELD_SHORT, record.cluster_id), (FIELD_LONG, record.position), (FIELD_INT, record.version),
+                (FIELD_INT, 0)  # collection changes
+            ])
+
+    def _record_load(self, session_id, reader):
+        cluster_id, position = reader.short(), reader.long()
+        fetch_plan = reader.string()
+        reader.byte(), reader.byte()  # ignore cache, load tombstones
+        db = self._database(session_id)
+        with db.lock:
+            record = db.load("#%d:%d" % (cluster_id, position))
+            if record is None:
+                return session_id, encode_fields([(FIELD_BYTE, chr(0))])
+            return session_id, encode_fields([
+                (FIELD_BYTE, chr(1)), (FIELD_BYTE, 'd'), (FIELD_INT, record.version),
+                (FIELD_STRING, _encode_record(record))
+            ] + _prefetched_fields(db, [record], fetch_plan) + [(FIELD_BYTE, chr(0))])
+
+    def _record_update(self, session_id, reader):
+        cluster_id, position = reader.short(), reader.long()
+        reader.boolean()  # update content
+        content = reader.bytes()
+        reader.int(), reader.byte(), reader.boolean()  # version, record type, mode
+        db = self._database(session_id)
+        with db.lock:
+            record = db.get("#%d:%d" % (cluster_id, position))
+            class_name, fields = _decode_record(content)
+            db.update(record, fields, replace=True)
+            return session_id, encode_fields([(FIELD_INT, record.version), (FIELD_INT, 0)])
+
+    def _record_delete(self, session_id, reader):
+        cluster_id, position = reader.short(), reader.long()
+        reader.int(), reader.boolean()  # version, mode
+        db = self._database(session_id)
+        with db.lock:
+            return session_id, encode_fields([(FIELD_BOOLEAN, db.delete("#%d:%d" % (cluster_id, position)))])
+
+    def _command(self, session_id, reader):
+        mode = chr(reader.byte())
+        payload = _BytesReader(reader.bytes())
+        command_type = payload.string()
+        language = payload.string() if command_type == QUERY_SCRIPT else None
+        text = payload.string()
+        if command_type in (QUERY_SYNC, QUERY_ASYNC, QUERY_GREMLIN):
+            limit = payload.int()
+            fetch_plan = payload.string()
+            params = _decode_params(payload.bytes())
+        else:
+            limit, fetch_plan = -1, ''
+            # (simple-parameters:boolean)[(parameters:bytes)](composite-key-parameters:boolean)
+            params = _decode_params(payload.bytes()) if payload.boolean() else None
+        db = self._database(session_id)
+
+        if command_type == QUERY_GREMLIN or (language or 'sql').lower() != 'sql':
+            raise ServerError(COMMAND_EXCEPTION, "Only SQL is supported")
+        with db.lock:
+            if command_type == QUERY_SCRIPT:
+                result = execute_script(db, text, params)
+            else:
+                result = execute(db, text, limit=limit if command_type != QUERY_CMD else -1, params=params)
+
+            if isinstance(result, LiveSelect):
+                result = [self._subscribe(db, result)]
+            elif isinstance(result, LiveUnsubscribe):
+                result = [self._unsubscribe(result.token)]
+
+            if mode == 'a':
+                fields = []
+                for record in result if isinstance(result, list) else []:
+                    fields += [(FIELD_BYTE, chr(1))] + _record_fields(record)
+                fields += _prefetched_fields(db, result if isinstance(result, list) else [], fetch_plan)
+                return session_id, encode_fields(fields + [(FIELD_BYTE, chr(0))])
+
+            if result is None:
+                return session_id, encode_fields([(FIELD_BYTE, 'n'), (FIELD_BYTE, chr(0))])
+            if isinstance(result, list) and not all(isinstance(item, Record) for item in result):
+                # collections of anything but records go wrapped in the "result" field of a document
+                wrapper = Record(-1, -1, None, {'result': storable(result)}, 0)
+                return session_id, encode_fields([(FIELD_BYTE, 'w')] + _record_fields(wrapper) + [(FIELD_BYTE, chr(0))])
+            if not isinstance(result, list):
+                value = str(result).lower() if isinstance(result, bool) else str(result)
+                return session_id, encode_fields([(FIELD_BYTE, 'a'), (FIELD_STRING, value), (FIELD_BYTE, chr(0))])
+            fields = [(FIELD_BYTE, 'l'), (FIELD_INT, len(result))]
+            for record in result:
+                fields += _record_fields(record)
+            fields += _prefetched_fields(db, result, fetch_plan)
+            return session_id, encode_fields(fields + [(FIELD_BYTE, chr(0))])
+
+    def _subscribe(self, db, select):
+        if self._local.push is None:
+            raise ServerError(COMMAND_EXCEPTION, "Live queries need a connection to push to")
+        with self._lock:
+            live_query = _LiveQuery(next(self._live_tokens), db, select, self._local.push)
+            self._live_queries[live_query.token] = live_query
+        db.listeners.append(live_query)
+        return Record(-1, -1, None, {'token': live_query.token}, 0)
+
+    def _unsubscribe(self, token):
+        with self._lock:
+            live_query = self._live_queries.pop(token, None)
+        if live_query is None:
+            raise ServerError(COMMAND_EXCEPTION, "Live query %s was not found" % token)
+        with live_query.db.lock:
+            live_query.db.listeners.remove(live_query)
+        live_query.end()
+        return Record(-1, -1, None, {'unsubscribed': token}, 0)
+
+    def drop_live_queries(self, push):
+        """Forget the live queries pushing with ``push``, its connection is closed."""
+        with self._lock:
+            tokens = [token for token, live_query in self._live_queries.items() if live_query.push == push]
+            dropped = [self._live_queries.pop(token) for token in tokens]
+        for live_query in dropped:
+            with live_query.db.lock:
+                live_query.db.listeners.remove(live_query)
+
+    def _query(self, session_id, reader):
+        language, text = reader.string(), reader.string()
+        operation, page_size = reader.byte(), reader.int()
+        reader.string()  # fetch plan
+        params = _decode_params(reader.bytes())
+        reader.boolean()  # named parameters
+        db = self._database(session_id)
+
+        if language.lower() != 'sql':
+            raise ServerError(COMMAND_EXCEPTION, "Only SQL is supported")
+        with db.lock:
+            if operation == QUERY_OPERATION_SCRIPT:
+                result = execute_script(db, text, params)
+            else:
+                result = execute(db, text, params=params)
+
+        if result is None:
+            result = []
+        elif not isinstance(result, list):
+            result = [Record(-2, 0, None, {'result': result}, 0)]
+        with self._lock:
+            query_id = "fake-query-%d" % next(self._query_ids)
+            self._cursors[session_id, query_id] = result
+        return session_id, self._page(session_id, query_id, page_size)
+
+    def _query_next_page(self, session_id, reader):
+        query_id, page_size = reader.string(), reader.int()
+        self._database(session_id)
+        return session_id, self._page(session_id, query_id, page_size)
+
+    def _close_query(self, session_id, reader):
+        query_id = reader.string()
+        with self._lock:
+            self._cursors.pop((session_id, query_id), None)
+        return session_id, b''
+
+    def _page(self, session_id, query_id, page_size):
+        """Next page of a result set, the cursor is closed after the last one."""
+        with self._lock:
+            try:
+                records = self._cursors.pop((session_id, query_id))
+            except KeyError:
+                raise ServerError(COMMAND_EXCEPTION, "Query %s was not found or is already closed" % query_id)
+            has_next_page = 0 < page_size < len(records)
+            if has_next_page:
+                records, self._cursors[session_id, query_id] = records[:page_size], records[page_size:]
+
+        fields = [(FIELD_STRING, query_id), (FIELD_BOOLEAN, False),  # tx changes
+                  (FIELD_BOOLEAN, False),  # execution plan
+                  (FIELD_INT, 0), (FIELD_INT, len(records))]  # prefetched records, records
+        for record in records:
+            fields += _result_fields(record)
+        fields += [(FIELD_BOOLEAN, has_next_page),
+                   (FIELD_INT, 0),  # stats
+                   (FIELD_BOOLEAN, False)]  # reload metadata
+        return encode_fields(fields)
+
+    def _tx_commit(self, session_id, reader):
+        reader.int(), reader.boolean()  # transaction id, using log
+        operations = []
+        while reader.byte() == 1:
+            operation, cluster_id, position = reader.byte(), reader.short(), reader.long()
+            reader.byte()  # record type
+            if operation == 3:
+                operations.append((operation, cluster_id, position, reader.bytes()))
+            elif operation == 1:
+                reader.int()  # version
+                operations.append((operation, cluster_id, position, reader.bytes()))
+                reader.boolean()  # content changed
+            else:
+                reader.int()  # version
+                operations.append((operation, cluster_id, position, None))
+        reader.bytes()
+
+        db = self._database(session_id)
+        created, updated = [], []
+        # temporary rid of the created records -> rid they got
+        temporary = {}
+        written = []
+        with db.lock:
+            for operation, cluster_id, position, _ in operations:
+                if operation != 3:
+                    db.get("#%d:%d" % (cluster_id, position))
+
+            for operation, cluster_id, position, content in operations:
+                if operation == 3:
+                    record = db.create(*_decode_record(content), cluster_id=cluster_id)
+                    temporary["#%d:%d" % (cluster_id, position)] = record.rid
+                    created += [(FIELD_SHORT, cluster_id), (FIELD_LONG, position),
+                                (FIELD_SHORT, record.cluster_id), (FIELD_LONG, record.position)]
+                    written.append(record)
+                elif operation == 1:
+                    record = db.update(db.get("#%d:%d" % (cluster_id, position)), _decode_record(content)[1], True)
+                    updated += [(FIELD_SHORT, cluster_id), (FIELD_LONG, position), (FIELD_INT, record.version)]
+                    written.append(record)
+                else:
+                    db.delete("#%d:%d" % (cluster_id, position))
+
+            for record in written:
+                record.fields = _resolve_temporary(record.fields, temporary)
+
+        return session_id, encode_fields(
+            [(FIELD_INT, len(created) // 4)] + created + [(FIELD_INT, len(updated) // 3)] + updated
+            + [(FIELD_INT, 0)]  # collection changes
+        )
+
+    _handlers = {
+        ord(CONNECT_OP): _connect,
+        ord(DB_OPEN_OP): _db_open,
+        ord(DB_CLOSE_OP): _db_close,
+        ord(DB_EXIST_OP): _db_exist,
+        ord(DB_CREATE_OP): _db_create,
+        ord(DB_DROP_OP): _db_drop,
+        ord(DB_LIST_OP): _db_list,
+        ord(DB_SIZE_OP): _db_size,
+        ord(DB_COUNT_RECORDS_OP): _db_count_records,
+        ord(DB_RELOAD_OP): _db_reload,
+        ord(SHUTDOWN_OP): _shutdown,
+        ord(DATA_CLUSTER_ADD_OP): _data_cluster_add,
+        ord(DATA_CLUSTER_DROP_OP): _data_cluster_drop,
+        ord(DATA_CLUSTER_COUNT_OP): _data_cluster_count,
+        ord(DATA_CLUSTER_DATA_RANGE_OP): _data_cluster_data_range,
+        ord(RECORD_CREATE_OP): _record_create,
+        ord(RECORD_LOAD_OP): _record_load,
+        ord(RECORD_UPDATE_OP): _record_update,
+        ord(RECORD_DELETE_OP): _record_delete,
+        ord(COMMAND_OP): _command,
+        ord(TX_COMMIT_OP): _tx_commit,
+        ord(QUERY_OP): _query,
+        ord(QUERY_NEXT_PAGE_OP): _query_next_page,
+        ord(CLOSE_QUERY_OP): _close_query,
+    }
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One client connection, requests are answered in order."""
+
+    def setup(self):
+        super(_Handler, self).setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        server = self.server.fake
+        self._write_lock = threading.Lock()
+        self.wfile.write(struct.pack('!h', server.protocol))
+        reader = _Reader(self.rfile.read)
+        try:
+            while True:
+                op = self.rfile.read(1)
+                if not op:
+                    return
+                try:
+                    response = server.respond(op[0], reader, self.push)
+                except EOFError:
+                    return
+                if response is None:
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                with self._write_lock:
+                    self.wfile.write(response)
+        finally:
+            server.drop_live_queries(self.push)
+
+    def push(self, data):
+        """Write a push request, live queries push from the threads changing their records."""
+        with self._write_lock:
+            try:
+                self.wfile.write(data)
+            except (OSError, ValueError):
+                pass
@@ -0,0 +1,825 @@
+# -*- coding: utf-8 -*-
+"""
+The subset of OrientDB SQL the fake server understands.
+
+Statements: SELECT (from classes, clusters, record ids, ``metadata:schema``,
+variables and subqueries, with WHERE, ORDER BY, SKIP and LIMIT), INSERT, CREATE
+CLASS/PROPERTY/VERTEX/EDGE, ALTER CLASS ADDCLUSTER, ALTER PROPERTY, DROP CLASS, UPDATE, DELETE and
+single hop MATCH patterns, LIVE SELECT (from a class, with WHERE) and LIVE
+UNSUBSCRIBE. Scripts run their statements in order with LET and
+RETURN; BEGIN and COMMIT are accepted and ignored.
+
+:func:`execute` returns a list of records, a scalar or None, the three kinds
+of responses a command can have; live queries return a :class:`LiveSelect` or
+a :class:`LiveUnsubscribe` for the server to act on.
+"""
+import json
+import re
+from collections import namedtuple
+
+from ..otypes import OrientRecordLink
+from .store import COMMAND_EXCEPTION, PARSING_EXCEPTION, SCHEMA_EXCEPTION, Record, ServerError
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+_TOKENS = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<rid>\#-?\d+:-?\d+)
+      | (?P<number>\d+(?:\.\d+)?(?![\w:]))
+      | (?P<var>\$\w+)
+      | (?P<param>(?<=[\s(,=<>\[]):[A-Za-z_]\w*|\?)
+      | (?P<name>@?[A-Za-z_]\w*|`[^`]*`)
+      | (?P<op><=|>=|<>|!=|=|<|>)
+      | (?P<punct>[(),\[\]{}:.*\-+;])
+    )""", re.X)
+
+_STRING_ESCAPE = re.compile(r"\\(.)")
+
+Token = namedtuple("Token", "kind value start end")
+
+#: subscription asked by LIVE SELECT, condition is None or a predicate of the records
+LiveSelect = namedtuple("LiveSelect", "class_name condition")
+LiveUnsubscribe = namedtuple("LiveUnsubscribe", "token")
+
+_END = Token("end", None, -1, -1)
+_RID = re.compile(r"^#-?\d+:\d+$")
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    positional = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKENS.match(text, pos)
+        if match is None:
+            raise ServerError(PARSING_EXCEPTION, "Error parsing query: unexpected %r at %d" % (text[pos], pos))
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = _STRING_ESCAPE.sub(r"\1", value[1:-1])
+        elif kind == 'number':
+            value = float(value) if '.' in value else int(value)
+        elif kind == 'name' and value.startswith('`'):
+            value = value[1:-1]
+        elif kind == 'param':
+            # named parameters by name, positional ones by their position
+            if value == '?':
+                value, positional = str(positional), positional + 1
+            else:
+                value = value[1:]
+        tokens.append(Token(kind, value, match.start(kind), match.end()))
+        pos = match.end()
+    return tokens
+
+
+def split_script(text):
+    """Split a script in statements, on ``;`` and new lines outside of strings and braces."""
+    statements, current, depth, quote = [], [], 0, None
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char in ';\n' and depth == 0:
+            statements.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    statements.append(''.join(current))
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def _link(rid):
+    return OrientRecordLink(rid.lstrip('#'))
+
+
+def _plain(value):
+    """Comparable form of a value, links compare by record id."""
+    if isinstance(value, OrientRecordLink):
+        return value.get_hash()
+    if isinstance(value, Record):
+        return value.rid
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def storable(value):
+    """Records are stored as links to them, projections (no record id) are embedded."""
+    if isinstance(value, Record):
+        if value.cluster_id < 0:
+            return dict(value.fields)
+        return _link(value.rid)
+    if isinstance(value, list):
+        return [storable(v) for v in value]
+    return value
+
+
+def _ordered(value):
+    """Sortable form of a value, record ids order by cluster then position."""
+    value = _plain(value)
+    if isinstance(value, str) and _RID.match(value):
+        cluster_id, position = value[1:].split(':')
+        return int(cluster_id), int(position)
+    return value
+
+
+def _field(row, name):
+    if row is None:
+        return None
+    lowered = name.lower()
+    if lowered == '@rid':
+        return row.rid
+    if lowered == '@class':
+        return row.class_name
+    if lowered == '@version':
+        return row.version
+    return row.fields.get(name)
+
+
+def _compare(op, left, right):
+    left, right = _plain(left), _plain(right)
+    try:
+        if op == '=':
+            return left == right
+        if op in ('<>', '!='):
+            return left != right
+        left, right = _ordered(left), _ordered(right)
+        if left is None or right is None:
+            return False
+        if op == '<':
+            return left < right
+        if op == '>':
+            return left > right
+        if op == '<=':
+            return left <= right
+        if op == '>=':
+            return left >= right
+    except TypeError:
+        return False
+    raise ServerError(PARSING_EXCEPTION, "Unknown operator %s" % op)
+
+
+def _like(value, pattern):
+    if not isinstance(value, str):
+        return False
+    regex = ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern)
+    return re.match(regex + '$', value, re.S | re.I) is not None
+
+
+class _Statement(object):
+    """Parser of one statement, executing it as it goes."""
+
+    def __init__(self, db, text, variables, limit=-1, params=None):
+        self.db = db
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.variables = variables
+        self.limit = limit
+        self.params = {} if params is None else params
+
+    # tokens
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else _END
+
+    def next(self):
+        token = self.peek()
+        if token is _END:
+            raise ServerError(PARSING_EXCEPTION, "Error parsing query: unexpected end of %r" % self.text)
+        self.pos += 1
+        return token
+
+    def at(self, *words, offset=0):
+        token = self.peek(offset)
+        if token.kind == 'name':
+            return token.value.upper() in words
+        return token.kind in ('punct', 'op') and token.value in words
+
+    def accept(self, *words):
+        if self.at(*words):
+            return self.next()
+        return None
+
+    def expect(self, *words):
+        token = self.accept(*words)
+        if token is None:
+            raise ServerError(PARSING_EXCEPTION, "Error parsing query: expected %s in %r, found %r" % (
+                "/".join(words), self.text, self.peek().value))
+        return token
+
+    def name(self):
+        token = self.next()
+        if token.kind != 'name':
+            raise ServerError(PARSING_EXCEPTION, "Error parsing query: expected a name in %r, found %r" % (
+                self.text, token.value))
+        return token.value
+
+    def json(self):
+        """Parse the json object starting at the current token."""
+        start = self.expect('{').start
+        depth = 1
+        while depth:
+            token = self.next()
+            if token.kind == 'punct':
+                depth += {'{': 1, '}': -1}.get(token.value, 0)
+        try:
+            return json.loads(self.text[start:self.tokens[self.pos - 1].end])
+        except ValueError as e:
+            raise ServerError(PARSING_EXCEPTION, "Error parsing json: %s" % e)
+
+    def done(self):
+        if self.peek() is not _END:
+            raise ServerError(PARSING_EXCEPTION, "Error parsing query: unexpected %r in %r" % (
+                self.peek().value, self.text))
+
+    # values and conditions, compiled to functions of the current row
+
+    def literal(self):
+        token = self.peek()
+        if token.kind in ('string', 'number'):
+            self.next()
+            return token.value
+        if token.value == '-' and self.peek(1).kind == 'number':
+            self.next()
+            return -self.next().value
+        if token.kind == 'rid':
+            self.next()
+            return _link(token.value)
+        if self.accept('TRUE'):
+            return True
+        if self.accept('FALSE'):
+            return False
+        if self.accept('NULL'):
+            return None
+        if token.value == '[':
+            self.next()
+            values = []
+            while not self.accept(']'):
+                values.append(self.literal())
+                self.accept(',')
+            return values
+        if token.value == '{':
+            return self.json()
+        if token.kind == 'var':
+            self.next()
+            return self.variable(token.value)
+        if token.kind == 'param':
+            self.next()
+            if token.value not in self.params:
+                raise ServerError(COMMAND_EXCEPTION, "Parameter %r not bound in %r" % (token.value, self.text))
+            return self.params[token.value]
+        raise ServerError(PARSING_EXCEPTION, "Error parsing query: expected a value in %r, found %r" % (
+            self.text, token.value))
+
+    def operand(self):
+        token = self.peek()
+        if token.kind == 'name' and token.value.upper() not in ('TRUE', 'FALSE', 'NULL'):
+            name = self.next().value
+            return lambda row: _field(row, name)
+        value = self.literal()
+        return lambda row: value
+
+    def value(self):
+        """operand ((+|-) operand)*"""
+        result = self.operand()
+        while self.at('+', '-'):
+            sign = 1 if self.next().value == '+' else -1
+            left, right = result, self.operand()
+            result = (lambda l, r, s: lambda row: (l(row) or 0) + s * (r(row) or 0))(left, right, sign)
+        return result
+
+    def condition(self):
+        """or_condition"""
+        terms = [self.and_condition()]
+        while self.accept('OR'):
+            terms.append(self.and_condition())
+        return terms[0] if len(terms) == 1 else lambda row: any(term(row) for term in terms)
+
+    def and_condition(self):
+        terms = [self.not_condition()]
+        while self.accept('AND'):
+            terms.append(self.not_condition())
+        return terms[0] if len(terms) == 1 else lambda row: all(term(row) for term in terms)
+
+    def not_condition(self):
+        if self.accept('NOT'):
+            term = self.not_condition()
+            return lambda row: not term(row)
+        if self.accept('('):
+            term = self.condition()
+            self.expect(')')
+            return term
+        return self.comparison()
+
+    def comparison(self):
+        left = self.value()
+        if self.accept('IS'):
+            negate = bool(self.accept('NOT'))
+            self.expect('NULL')
+            return lambda row: (left(row) is None) != negate
+        if self.accept('LIKE'):
+            pattern = self.literal()
+            return lambda row: _like(left(row), pattern)
+        if self.accept('IN'):
+            values = self.literal()
+            return lambda row: _plain(left(row)) in _plain(values)
+        if self.accept('CONTAINS'):
+            right = self.value()
+            return lambda row: _plain(right(row)) in (_plain(left(row)) or [])
+        op = self.next()
+        if op.kind != 'op':
+            raise ServerError(PARSING_EXCEPTION, "Error parsing query: expected an operator in %r, found %r" % (
+                self.text, op.value))
+        right = self.value()
+        return lambda row: _compare(op.value, left(row), right(row))
+
+    def where(self):
+        if self.accept('WHERE'):
+            return self.condition()
+        return None
+
+    def assignments(self):
+        """SET a = 1, b = b + 1 | CONTENT {} | MERGE {}
+
+        :return: (function of the row returning the new fields, replace the fields)
+        """
+        if self.accept('CONTENT'):
+            content = self.json()
+            return (lambda row: dict(content)), True
+        if self.accept('MERGE'):
+            content = self.json()
+            return (lambda row: dict(content)), False
+        if self.accept('INCREMENT'):
+            increments = []
+            while True:
+                name = self.name()
+                amount = self.literal() if self.accept('=') else 1
+                increments.append((name, amount))
+                if not self.accept(','):
+                    break
+            return (lambda row: {n: (row.fields.get(n) or 0) + a for n, a in increments}), False
+        self.expect('SET')
+        values = []
+        while True:
+            name = self.name()
+            self.expect('=')
+            values.append((name, self.value()))
+            if not self.accept(','):
+                break
+        return (lambda row: {n: storable(v(row)) for n, v in values}), False
+
+    def variable(self, name):
+        try:
+            return self.variables[name.lstrip('$')]
+        except KeyError:
+            raise ServerError(COMMAND_EXCEPTION, "Variable %s is not defined" % name)
+
+    # targets
+
+    def target(self):
+        """
+        :return: list of the rows of a class, record ids, a variable, the schema or a subquery
+        """
+        token = self.peek()
+        if token.kind == 'rid':
+            self.next()
+            return [self.db.get(token.value)]
+        if token.kind == 'var':
+            self.next()
+            return self.records(self.variable(token.value))
+        if token.value == '[':
+            self.next()
+            rows = []
+            while not self.accept(']'):
+                rows.extend(self.target())
+                self.accept(',')
+            return rows
+        if token.value == '(':
+            self.next()
+            self.expect('SELECT')
+            rows = self._select()
+            self.expect(')')
+            return rows
+        name = self.name()
+        if self.accept(':'):
+            kind, name = name.lower(), self.name()
+            if kind == 'metadata' and name.lower() == 'schema':
+                return [Record(-2, 0, None, self.db.schema(), self.db.schema_version)]
+            if kind == 'cluster':
+                cluster_id = self.db.cluster_id(name)
+                return list(self.db.records[cluster_id].values())
+            raise ServerError(PARSING_EXCEPTION, "Unknown target %s:%s" % (kind, name))
+        return list(self.db.scan(name))
+
+    def records(self, value):
+        """Records of a variable or a value holding links."""
+        if isinstance(value, Record):
+            return [value]
+        if isinstance(value, OrientRecordLink):
+            return [self.db.get(value.get_hash())]
+        if isinstance(value, list):
+            rows = []
+            for v in value:
+                rows.extend(self.records(v))
+            return rows
+        if isinstance(value, str) and value.startswith('#'):
+            return [self.db.get(value)]
+        raise ServerError(COMMAND_EXCEPTION, "%r is not a record" % (value, ))
+
+    # statements
+
+    def execute(self):
+        keyword = self.name().upper()
+        try:
+            statement = getattr(self, '_' + keyword.lower())
+        except AttributeError:
+            raise ServerError(PARSING_EXCEPTION, "Error parsing query: %s is not supported" % keyword)
+        result = statement()
+        self.done()
+        return result
+
+    def _select(self):
+        projections = []
+        if not self.at('FROM'):
+            while True:
+                if self.accept('*'):
+                    projections.append(('*', None, None))
+                else:
+                    name = self.name()
+                    function = None
+                    if self.accept('('):
+                        function = name.lower()
+                        name = '*' if self.accept('*') else self.name()
+                        self.expect(')')
+                    alias = self.name() if self.accept('AS') else None
+                    projections.append((function, name, alias))
+                if not self.accept(','):
+                    break
+        self.expect('FROM')
+        rows = self.target()
+
+        condition = self.where()
+        if condition is not None:
+            rows = [row for row in rows if condition(row)]
+
+        if self.accept('ORDER'):
+            self.expect('BY')
+            orders = []
+            while True:
+                name = self.name()
+                descending = bool(self.accept('DESC'))
+                if not descending:
+                    self.accept('ASC')
+                orders.append((name, descending))
+                if not self.accept(','):
+                    break
+            for name, descending in reversed(orders):
+                rows.sort(key=lambda row: (_field(row, name) is None, _ordered(_field(row, name))),
+                          reverse=descending)
+
+        rows = self.project(rows, projections)
+
+        skip = self.literal() if self.accept('SKIP', 'OFFSET') else 0
+        limit = self.literal() if self.accept('LIMIT') else self.limit
+        rows = rows[skip:]
+        if limit is not None and limit >= 0:
+            rows = rows[:limit]
+        return rows
+
+    def project(self, rows, projections):
+        if not projections or projections == [('*', None, None)]:
+            return rows
+
+        if projections[0][0] == 'count':
+            return [Record(-2, 0, None, {projections[0][2] or 'count': len(rows)}, 0)]
+
+        if projections[0][0] == 'expand':
+            name = projections[0][1]
+            expanded = []
+            for row in rows:
+                value = _field(row, name)
+                for item in value if isinstance(value, list) else [value]:
+                    if isinstance(item, dict):
+                        expanded.append(Record(-2, len(expanded), None, item, 0))
+                    elif item is not None:
+                        expanded.extend(self.records(item))
+            return expanded
+
+        projected = []
+        for i, row in enumerate(rows):
+            fields = {}
+            for function, name, alias in projections:
+                if function == '*':
+                    fields.update(row.fields)
+                    continue
+                value = _field(row, name)
+                if name.lower() == '@rid':
+                    value = _link(value)
+                fields[alias or name.lstrip('@')] = value
+            projected.append(Record(-2, i, None, fields, 0))
+        return projected
+
+    def _insert(self):
+        self.expect('INTO')
+        class_name = self.name()
+        if self.accept('('):
+            names = []
+            while not self.accept(')'):
+                names.append(self.name())
+                self.accept(',')
+            self.expect('VALUES')
+            rows = []
+            while True:
+                self.expect('(')
+                values = []
+                while not self.accept(')'):
+                    values.append(self.literal())
+                    self.accept(',')
+                rows.append(dict(zip(names, storable(values))))
+                if not self.accept(','):
+                    break
+        else:
+            fields, _ = self.assignments()
+            rows = [fields(None)]
+        return [self.db.create(class_name, row) for row in rows]
+
+    def _create(self):
+        kind = self.name().upper()
+        if kind == 'CLASS':
+            name = self.name()
+            super_class = self.name() if self.accept('EXTENDS') else None
+            clusters = self.literal() if self.accept('CLUSTERS') else 1
+            abstract = bool(self.accept('ABSTRACT'))
+            return self.db.create_class(name, super_class, abstract, clusters).cluster_id
+        if kind == 'PROPERTY':
+            cls, name = self.property()
+            property_type = self.name().upper()
+            while self.peek() is not _END:  # linked class, constraints...
+                self.next()
+            cls.properties[name] = {'name': name, 'type': property_type, 'mandatory': False,
+                                    'notNull': False, 'readonly': False}
+            self.db.schema_version += 1
+            return len(cls.properties)
+        if kind == 'VERTEX':
+            class_name = self.name() if self.peek().kind == 'name' and not self.at('SET', 'CONTENT') else 'V'
+            if not self.db.get_class(class_name).is_a('V'):
+                raise ServerError(COMMAND_EXCEPTION, "Class '%s' is not a vertex class" % class_name)
+            fields = self.assignments()[0](None) if self.peek() is not _END else {}
+            return [self.db.create(class_name, fields)]
+        if kind == 'EDGE':
+            class_name = self.name() if not self.at('FROM') else 'E'
+            if not self.db.get_class(class_name).is_a('E'):
+                raise ServerError(COMMAND_EXCEPTION, "Class '%s' is not an edge class" % class_name)
+            self.expect('FROM')
+            sources = self.target()
+            self.expect('TO')
+            destinations = self.target()
+            fields = self.assignments()[0](None) if self.peek() is not _END else {}
+            return [self.connect(class_name, source, destination, fields)
+                    for source in sources for destination in destinations]
+        raise ServerError(PARSING_EXCEPTION, "Error parsing query: CREATE %s is not supported" % kind)
+
+    def property(self):
+        cls = self.db.get_class(self.name())
+        self.expect('.')
+        return cls, self.name()
+
+    def connect(self, class_name, source, destination, fields):
+        edge = self.db.create(class_name, dict(fields, out=_link(source.rid), **{'in': _link(destination.rid)}))
+        for vertex, direction in ((source, 'out_'), (destination, 'in_')):
+            links = vertex.fields.setdefault(direction + edge.class_name, [])
+            links.append(_link(edge.rid))
+            vertex.version += 1
+        return edge
+
+    def _alter(self):
+        if self.accept('CLASS'):
+            cls = self.db.get_class(self.name())
+            self.expect('ADDCLUSTER')
+            cls.cluster_ids.append(self.db.add_cluster(self.name()))
+            self.db.schema_version += 1
+            return None
+        self.expect('PROPERTY')
+        cls, name = self.property()
+        try:
+            prop = cls.properties[name]
+        except KeyError:
+            raise ServerError(SCHEMA_EXCEPTION, "Property '%s.%s' not found" % (cls.name, name))
+        attribute = self.name()
+        value = self.literal() if self.peek().kind != 'name' else self.name()
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            value = value.lower() == 'true'
+        attribute = {'notnull': 'notNull'}.get(attribute.lower(), attribute.lower())
+        prop[attribute] = value
+        self.db.schema_version += 1
+        return None
+
+    def _drop(self):
+        kind = self.name().upper()
+        if kind == 'CLASS':
+            cls = self.db.get_class(self.name())
+            self.accept('UNSAFE')
+            if any(c.super_class is cls for c in self.db.classes.values()):
+                raise ServerError(SCHEMA_EXCEPTION, "Class '%s' has subclasses" % cls.name)
+            del self.db.classes[cls.name.lower()]
+            for cluster_id in cls.cluster_ids:
+                self.db.drop_cluster(cluster_id)
+            self.db.schema_version += 1
+            return True
+        if kind == 'PROPERTY':
+            cls, name = self.property()
+            self.db.schema_version += 1
+            return cls.properties.pop(name, None) is not None
+        raise ServerError(PARSING_EXCEPTION, "Error parsing query: DROP %s is not supported" % kind)
+
+    def _update(self):
+        rows = self.target()
+        fields, replace = self.assignments()
+        upsert = bool(self.accept('UPSERT'))
+        returned = None
+        if self.accept('RETURN'):
+            returned = self.name().upper()
+            if self.peek().kind == 'var' or self.at('@THIS'):
+                self.next()
+        condition = self.where()
+        limit = self.literal() if self.accept('LIMIT') else -1
+        if condition is not None:
+            rows = [row for row in rows if condition(row)]
+        if limit >= 0:
+            rows = rows[:limit]
+        for row in rows:
+            self.db.update(row, fields(row), replace)
+        if upsert and not rows:
+            raise ServerError(COMMAND_EXCEPTION, "UPSERT is not supported")
+        return rows if returned == 'AFTER' else len(rows)
+
+    def _delete(self):
+        kind = (self.accept('VERTEX', 'EDGE', 'FROM') or Token('name', '', 0, 0)).value.upper()
+        rows = self.target()
+        condition = self.where()
+        limit = self.literal() if self.accept('LIMIT') else -1
+        if condition is not None:
+            rows = [row for row in rows if condition(row)]
+        if limit >= 0:
+            rows = rows[:limit]
+
+        deleted = 0
+        for row in rows:
+            cls = self.db.classes.get((row.class_name or '').lower())
+            if cls is not None and cls.is_a('V') and kind != 'FROM':
+                for name, links in list(row.fields.items()):
+                    if name.startswith(('out_', 'in_')) and isinstance(links, list):
+                        for link in links:
+                            self.disconnect(self.db.load(link))
+            elif cls is not None and cls.is_a('E'):
+                self.disconnect(row)
+                continue
+            deleted += self.db.delete(row.rid)
+        return deleted
+
+    def disconnect(self, edge):
+        """Delete an edge and its links from its vertices."""
+        if edge is None or not self.db.delete(edge.rid):
+            return
+        for direction, prefix in (('out', 'out_'), ('in', 'in_')):
+            vertex = self.db.load(edge.fields.get(direction)) if edge.fields.get(direction) else None
+            if vertex is not None:
+                links = vertex.fields.get(prefix + edge.class_name, [])
+                vertex.fields[prefix + edge.class_name] = [l for l in links if _plain(l) != edge.rid]
+                vertex.version += 1
+
+    def _match(self):
+        first = self.match_node()
+        edge = None
+        if self.at('-', '<'):
+            incoming = bool(self.accept('<'))
+            self.expect('-')
+            edge_class = self.name()
+            self.expect('-')
+            outgoing = bool(self.accept('>'))
+            edge = (edge_class, 'in' if incoming else 'out' if outgoing else 'both')
+            second = self.match_node()
+        self.expect('RETURN')
+        returned = []
+        while True:
+            token = self.next()
+            returned.append(token.value)
+            if not self.accept(','):
+                break
+
+        if edge is None:
+            matches = [{first[0]: row} for row in self.db.scan(first[1]) if first[2](row)]
+        else:
+            matches = []
+            edge_class, direction = edge
+            for row in self.db.scan(edge_class):
+                ends = (self.db.load(row.fields.get('out')), self.db.load(row.fields.get('in')))
+                pairs = [ends] if direction == 'out' else [ends[::-1]] if direction == 'in' else [ends, ends[::-1]]
+                for a, b in pairs:
+                    if a is not None and b is not None and self.match(first, a) and self.match(second, b):
+                        matches.append({first[0]: a, second[0]: b})
+
+        if returned[0] in ('$pathelements', '$elements'):
+            seen, rows = set(), []
+            for match in matches:
+                for row in match.values():
+                    if row.rid not in seen:
+                        seen.add(row.rid)
+                        rows.append(row)
+            return rows
+        if returned[0] == '$matches':
+            returned = list(matches[0]) if matches else []
+        return [Record(-2, i, None, {alias: _link(match[alias].rid) for alias in returned if alias in match}, 0)
+                for i, match in enumerate(matches)]
+
+    def match_node(self):
+        """{class: X, as: x, where: (condition)}
+
+        :return: (alias, class name, condition)
+        """
+        self.expect('{')
+        alias, class_name, condition = None, 'V', (lambda row: True)
+        while not self.accept('}'):
+            key = self.name().lower()
+            self.expect(':')
+            if key == 'class':
+                class_name = self.name()
+            elif key == 'as':
+                alias = self.name()
+            elif key == 'where':
+                self.expect('(')
+                condition = self.condition() if not self.at(')') else condition
+                self.expect(')')
+            else:
+                raise ServerError(PARSING_EXCEPTION, "Error parsing query: MATCH %s is not supported" % key)
+            self.accept(',')
+        return alias or '$a%d' % self.pos, class_name, condition
+
+    def match(self, node, row):
+        cls = self.db.classes.get((row.class_name or '').lower())
+        return cls is not None and cls.is_a(node[1]) and node[2](row)
+
+    # script statements
+
+    def _live(self):
+        if self.accept('UNSUBSCRIBE'):
+            return LiveUnsubscribe(self.literal())
+        self.expect('SELECT')
+        self.expect('FROM')
+        class_name = self.db.get_class(self.name()).name
+        return LiveSelect(class_name, self.where())
+
+    def _let(self):
+        name = self.name() if self.peek().kind == 'name' else self.next().value.lstrip('$')
+        self.expect('=')
+        start = self.peek().start
+        self.pos = len(self.tokens)
+        self.variables[name] = execute(self.db, self.text[start:], self.variables, params=self.params)
+        return self.variables[name]
+
+    def _return(self):
+        return self.literal()
+
+    def _begin(self):
+        return None
+
+    def _commit(self):
+        while self.peek() is not _END:  # RETRY n
+            self.next()
+        return None
+
+    _rollback = _begin
+
+
+def execute(db, text, variables=None, limit=-1, params=None):
+    """Execute a statement.
+
+    :param limit: applied when the statement has no LIMIT, -1 for no limit
+    :param params: values of the parameters, by name or by position (as a string)
+    :return: list of :class:`Record`, a scalar or None
+    """
+    return _Statement(db, text, {} if variables is None else variables, limit, params).execute()
+
+
+def execute_script(db, text, params=None):
+    """Execute the statements of a script in order.
+
+    :return: result of RETURN, or of the last statement
+    """
+    variables = {}
+    result = None
+    for statement in split_script(text):
+        result = execute(db, statement, variables, params=params)
+        if statement[:6].upper() == 'RETURN':
+            break
+    return result
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory databases of the fake server: clusters of records and a schema of
+classes, each class with its own clusters like in OrientDB.
+"""
+import threading
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+SCHEMA_EXCEPTION = "com.orientechnologies.orient.core.exception.OSchemaException"
+RECORD_NOT_FOUND_EXCEPTION = "com.orientechnologies.orient.core.exception.ORecordNotFoundException"
+DATABASE_EXCEPTION = "com.orientechnologies.orient.core.exception.ODatabaseException"
+STORAGE_EXCEPTION = "com.orientechnologies.orient.core.exception.OStorageException"
+PARSING_EXCEPTION = "com.orientechnologies.orient.core.sql.OCommandSQLParsingException"
+COMMAND_EXCEPTION = "com.orientechnologies.orient.core.exception.OCommandExecutionException"
+
+
+class ServerError(Exception):
+    """Error sent back to the client as an OrientDB exception.
+
+    :param exception_class: java class of the exception, the client maps it to its own exceptions
+    """
+
+    def __init__(self, exception_class, message):
+        super(ServerError, self).__init__(message)
+        self.exception_class = exception_class
+        self.message = message
+
+
+class Record(object):
+    __slots__ = ('cluster_id', 'position', 'class_name', 'fields', 'version')
+
+    def __init__(self, cluster_id, position, class_name, fields, version=1):
+        self.cluster_id = cluster_id
+        self.position = position
+        self.class_name = class_name
+        self.fields = fields
+        self.version = version
+
+    @property
+    def rid(self):
+        return "#%d:%d" % (self.cluster_id, self.position)
+
+
+class SchemaClass(object):
+
+    def __init__(self, name, super_class=None, abstract=False, cluster_ids=()):
+        self.name = name
+        self.super_class = super_class
+        self.abstract = abstract
+        self.cluster_ids = list(cluster_ids)
+        self.properties = {}
+        self._created = 0
+
+    @property
+    def cluster_id(self):
+        """default cluster, -1 for abstract classes"""
+        return self.cluster_ids[0] if self.cluster_ids else -1
+
+    def next_cluster_id(self):
+        """cluster of the next record created, the clusters take turns (round-robin selection)"""
+        cluster_id = self.cluster_ids[self._created % len(self.cluster_ids)]
+        self._created += 1
+        return cluster_id
+
+    def is_a(self, name):
+        """
+        :return: True if the class is `name` or one of its subclasses
+        """
+        cls = self
+        while cls is not None:
+            if cls.name.lower() == name.lower():
+                return True
+            cls = cls.super_class
+        return False
+
+    def as_document(self):
+        return {
+            'name': self.name,
+            'superClass': self.super_class.name if self.super_class else None,
+            'abstract': self.abstract,
+            'clusterIds': list(self.cluster_ids),
+            'defaultClusterId': self.cluster_id,
+            'properties': [dict(p) for p in self.properties.values()],
+        }
+
+
+class Database(object):
+    """A database: its clusters, records and schema.
+
+    Operations are atomic, every connection executes them holding :attr:`lock`.
+    """
+
+    def __init__(self, name, storage_type='memory', db_type='graph'):
+        self.name = name
+        self.storage_type = storage_type
+        self.db_type = db_type
+        self.lock = threading.RLock()
+        self.clusters = {}
+        """:type : dict of [int, str] cluster names by id"""
+        self.records = {}
+        """:type : dict of [int, dict of [int, Record]]"""
+        self.classes = {}
+        #: version of the schema record, every class or property change increments it
+        self.schema_version = 0
+        self._next_positions = {}
+        # callables receiving ('insert' | 'update' | 'delete', record) after every change
+        self.listeners = []
+
+        for name in ('internal', 'index', 'manindex', 'default'):
+            self.add_cluster(name)
+        self.create_class('V')
+        self.create_class('E')
+
+    # clusters
+
+    def add_cluster(self, name, cluster_id=-1):
+        if cluster_id < 0:
+            cluster_id = max(self.clusters, default=-1) + 1
+        elif cluster_id in self.clusters:
+            raise ServerError(DATABASE_EXCEPTION, "Cluster with id %d already exists" % cluster_id)
+        self.clusters[cluster_id] = name.lower()
+        self.records[cluster_id] = {}
+        self._next_positions[cluster_id] = 0
+        return cluster_id
+
+    def drop_cluster(self, cluster_id):
+        if cluster_id not in self.clusters:
+            return False
+        del self.clusters[cluster_id], self.records[cluster_id], self._next_positions[cluster_id]
+        return True
+
+    def cluster_id(self, name):
+        for cluster_id, cluster_name in self.clusters.items():
+            if cluster_name == name.lower():
+                return cluster_id
+        raise ServerError(DATABASE_EXCEPTION, "Cluster '%s' was not found" % name)
+
+    def count(self, cluster_ids):
+        return sum(len(self.records.get(cluster_id, ())) for cluster_id in cluster_ids)
+
+    def data_range(self, cluster_id):
+        positions = self.records.get(cluster_id)
+        if not positions:
+            return -1, -1
+        return min(positions), max(positions)
+
+    def size(self):
+        return sum(
+            len(repr(record.fields)) for cluster in self.records.values() for record in cluster.values()
+        )
+
+    # schema
+
+    def create_class(self, name, super_class=None, abstract=False, clusters=1):
+        """
+        :param clusters: clusters of the class, named like OrientDB does: person, person_1, person_2...
+        """
+        if name.lower() in self.classes:
+            raise ServerError(SCHEMA_EXCEPTION, "Class '%s' already exists in current database" % name)
+        parent = self.get_class(super_class) if super_class else None
+        cluster_ids = [] if abstract else [
+            self.add_cluster(name if n == 0 else "%s_%d" % (name, n)) for n in range(clusters)
+        ]
+        cls = self.classes[name.lower()] = SchemaClass(name, parent, abstract, cluster_ids)
+        self.schema_version += 1
+        return cls
+
+    def get_class(self, name, create=False):
+        try:
+            return self.classes[name.lower()]
+        except KeyError:
+            if create:
+                return self.create_class(name)
+            raise ServerError(SCHEMA_EXCEPTION, "Class '%s' was not found in current database" % name)
+
+    def class_of_cluster(self, cluster_id):
+        for cls in self.classes.values():
+            if cluster_id in cls.cluster_ids:
+                return cls
+        return None
+
+    # records
+
+    def create(self, class_name, fields, cluster_id=-1):
+        if cluster_id < 0:
+            if not class_name:
+                cluster_id = self.cluster_id('default')
+            else:
+                cls = self.get_class(class_name, create=True)
+                if cls.abstract:
+                    raise ServerError(SCHEMA_EXCEPTION, "Class '%s' is abstract" % cls.name)
+                cluster_id, class_name = cls.next_cluster_id(), cls.name
+        elif cluster_id not in self.clusters:
+            raise ServerError(DATABASE_EXCEPTION, "Cluster with id %d does not exist" % cluster_id)
+        elif not class_name:
+            cls = self.class_of_cluster(cluster_id)
+            class_name = cls.name if cls else None
+
+        position = self._next_positions[cluster_id]
+        self._next_positions[cluster_id] = position + 1
+        record = self.records[cluster_id][position] = Record(cluster_id, position, class_name, dict(fields))
+        self._changed('insert', record)
+        return record
+
+    def load(self, rid):
+        cluster_id, position = parse_rid(rid)
+        return self.records.get(cluster_id, {}).get(position)
+
+    def get(self, rid):
+        record = self.load(rid)
+        if record is None:
+            raise ServerError(RECORD_NOT_FOUND_EXCEPTION, "The record with id '%s' was not found" % rid)
+        return record
+
+    def update(self, record, fields, replace=False):
+        if replace:
+            record.fields = dict(fields)
+        else:
+            record.fields.update(fields)
+        record.version += 1
+        self._changed('update', record)
+        return record
+
+    def delete(self, rid):
+        cluster_id, position = parse_rid(rid)
+        record = self.records.get(cluster_id, {}).pop(position, None)
+        if record is None:
+            return False
+        self._changed('delete', record)
+        return True
+
+    def scan(self, class_name):
+        """
+        :return: records of the class and of its subclasses
+        """
+        target = self.get_class(class_name)
+        for cls in list(self.classes.values()):
+            if cls.is_a(target.name):
+                for cluster_id in cls.cluster_ids:
+                    for record in list(self.records.get(cluster_id, {}).values()):
+                        yield record
+
+    def _changed(self, operation, record):
+        for listener in list(self.listeners):
+            listener(operation, record)
+
+    def schema(self):
+        return {'classes': [cls.as_document() for cls in self.classes.values()]}
+
+
+def parse_rid(rid):
+    """
+    :param rid: '#12:0', '12:0' or a link
+    :return: (cluster id, position)
+    """
+    if hasattr(rid, 'get_hash'):
+        rid = rid.get_hash()
+    cluster_id, position = str(rid).lstrip('#').split(':')
+    return int(cluster_id), int(position)
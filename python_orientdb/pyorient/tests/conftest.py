@@ -0,0 +1,24 @@
+import socket
+
+import pytest
+
+from pyorient.orient import OrientSocket
+from pyorient.testing import FakeOrientServer
+
+
+@pytest.fixture()
+def socket_pair():
+    server, client = socket.socketpair()
+    orient_socket = OrientSocket("localhost", 2424)
+    orient_socket._socket.close()
+    orient_socket._socket = client
+    orient_socket.connected = True
+    yield server, orient_socket
+    server.close()
+    client.close()
+
+
+@pytest.fixture()
+def fake_server():
+    with FakeOrientServer() as server:
+        yield server
@@ -0,0 +1,94 @@
+import asyncio
+import struct
+
+import pytest
+
+from pyorient import AsyncOrientDB
+from pyorient.exceptions import PyOrientCommandException
+
+
+def _int(v):
+    return struct.pack("!i", v)
+
+
+def _string(v):
+    return _int(len(v)) + v
+
+
+def _header(session_id=7, token=True):
+    return b"\x00" + _int(session_id) + (_string(b"") if token else b"")
+
+
+CONNECT_RESPONSE = _header(token=False) + _int(7) + _string(b"tok")
+DB_OPEN_RESPONSE = _header(token=False) + _int(7) + _string(b"tok") + struct.pack("!h", 1) \
+                   + _string(b"person") + struct.pack("!h", 12) + _string(b"") + _string(b"3.2.20")
+QUERY_RESPONSE = _header() + b"l" + _int(2) + b"".join(
+    struct.pack("!h", 0) + b"d" + struct.pack("!hqi", 12, n, 1) + _string(b'Person@name:"p%d"' % n)
+    for n in range(2)
+) + b"\x00"
+ERROR_RESPONSE = b"\x01" + _int(7) + _string(b"") + b"\x01" \
+                 + _string(b"com.orientechnologies.orient.core.exception.OCommandExecutionException") \
+                 + _string(b"boom") + b"\x00" + _string(b"")
+
+
+async def _scripted_server(responses, chunk_size, received=None):
+    """answer each read with the next scripted response, `chunk_size` bytes at a time"""
+    responses = list(responses)
+    received = [] if received is None else received
+
+    async def handle(reader, writer):
+        writer.write(struct.pack("!h", 38))
+        while responses:
+            data = await reader.read(65536)
+            if not data:
+                break
+            received.append(data)
+            response = responses.pop(0)
+            for i in range(0, len(response), chunk_size):
+                writer.write(response[i:i + chunk_size])
+                await writer.drain()
+                await asyncio.sleep(0)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.asyncio
+class TestAsyncOrientDB:
+    @pytest.mark.parametrize("chunk_size", [1, 3, 65536])
+    async def test_open_and_query(self, chunk_size):
+        server, port = await _scripted_server([DB_OPEN_RESPONSE, QUERY_RESPONSE], chunk_size)
+        client = AsyncOrientDB("127.0.0.1", port)
+
+        clusters = await client.db_open("demo", "admin", "admin")
+        records = await client.query("select from Person")
+
+        assert [(c.name, c.id) for c in clusters] == [(b"person", 12)]
+        assert client.get_class_position(b"person") == 12
+        assert [(r._rid, r._class, r.name) for r in records] == [("#12:0", "Person", "p0"), ("#12:1", "Person", "p1")]
+        client.close()
+        server.close()
+
+    async def test_server_error_is_raised_and_consumed(self):
+        server, port = await _scripted_server([CONNECT_RESPONSE, ERROR_RESPONSE, DB_OPEN_RESPONSE], 2)
+        client = AsyncOrientDB("127.0.0.1", port)
+
+        assert await client.connect("root", "root") == 7
+        with pytest.raises(PyOrientCommandException):
+            await client.db_exists("demo")
+        assert await client.db_open("demo", "admin", "admin")
+        client.close()
+        server.close()
+
+    async def test_concurrent_calls_share_one_socket(self):
+        # the queries are pipelined: the server may get them in a single read
+        server, port = await _scripted_server([DB_OPEN_RESPONSE, QUERY_RESPONSE * 5], 5)
+        client = AsyncOrientDB("127.0.0.1", port)
+        await client.db_open("demo", "admin", "admin")
+
+        results = await asyncio.gather(*(client.query("select from Person") for _ in range(5)))
+
+        assert all(len(r) == 2 for r in results)
+        client.close()
+        server.close()
@@ -0,0 +1,202 @@
+import os
+import pickle
+import struct
+import threading
+
+import pytest
+
+from pyorient.capture import REQUEST, RESPONSE, STATE, WireCapture, exchanges, read_frames, replay
+from pyorient.constants import QUERY_ASYNC, QUERY_SYNC
+from pyorient.messages.commands import CommandMessage, _TXCommitMessage
+from pyorient.messages.database import DbOpenMessage, DbSizeMessage
+from pyorient.messages.parser import OfflineSocket, ResponseParser
+from pyorient.messages.records import RecordCreateMessage
+from pyorient.properties import GlobalProperties
+from pyorient.serializations import OrientSerialization
+
+from .test_async_orient import QUERY_RESPONSE, _header
+from .test_properties import binary, record, records_response
+from .test_parser import DB_SIZE_RESPONSE
+
+
+def _socket(capture=None):
+    sock = OfflineSocket(session_id=7, db_opened="demo")
+    sock.capture = capture
+    return sock
+
+
+class TestWireCapture:
+    def test_no_capture_keeps_no_response_bytes(self):
+        message = DbSizeMessage(_socket()).prepare(()).send()
+
+        parser = ResponseParser().expect(message).feed(DB_SIZE_RESPONSE)
+
+        assert parser.pop().result() == 4096
+        assert message._input_buffer == b""
+
+    def test_request_and_whole_response_are_recorded(self):
+        capture = WireCapture()
+        sock = _socket(capture)
+        message = DbSizeMessage(sock).prepare(()).send()
+
+        parser = ResponseParser().expect(message)
+        for byte in DB_SIZE_RESPONSE:
+            parser.feed(bytes([byte]))
+
+        assert parser.pop().result() == 4096
+        assert [(f.direction, f.message, f.data) for f in capture.frames()] == [
+            (REQUEST, "DbSizeMessage", sock.written[0]),
+            (RESPONSE, "DbSizeMessage", DB_SIZE_RESPONSE),
+        ]
+        assert message._input_buffer == DB_SIZE_RESPONSE
+
+    def test_drive_is_recorded(self, socket_pair):
+        server, orient_socket = socket_pair
+        orient_socket.db_opened = "demo"
+        orient_socket.capture = WireCapture()
+        server.sendall(DB_SIZE_RESPONSE)
+
+        message = DbSizeMessage(orient_socket).prepare(()).send()
+
+        assert message.fetch_response() == 4096
+        assert [f.direction for f in orient_socket.capture.frames()] == [REQUEST, RESPONSE]
+        assert orient_socket.capture.frames()[1].data == DB_SIZE_RESPONSE
+
+    def test_memory_is_bounded(self):
+        capture = WireCapture(max_bytes=10)
+        message = DbSizeMessage(_socket())
+
+        for n in range(5):
+            capture.request(message, bytes([n]) * 4)
+        capture.request(message, b"x" * 30)
+
+        assert [f.data for f in capture.frames()] == [b"x" * 10]
+
+        capture.request(message, b"y" * 4)
+        assert [f.data for f in capture.frames()] == [b"y" * 4]
+
+    def test_capture_file_round_trip(self, tmp_path):
+        path = str(tmp_path / "session.pyorcap")
+        capture = WireCapture(path, max_bytes=4)
+        message = DbSizeMessage(_socket())
+
+        capture.request(message, b"request")
+        capture.response(message, DB_SIZE_RESPONSE)
+        capture.close()
+
+        frames = list(read_frames(path))
+        assert frames[0].direction == STATE
+        assert [(f.direction, f.message, f.data) for f in frames[1:]] == [
+            (REQUEST, "DbSizeMessage", b"request"),
+            (RESPONSE, "DbSizeMessage", DB_SIZE_RESPONSE),
+        ]
+
+    def test_not_a_capture_file(self, tmp_path):
+        path = tmp_path / "other"
+        path.write_bytes(b"garbage!")
+
+        with pytest.raises(ValueError):
+            list(read_frames(str(path)))
+
+
+class TestReplay:
+    def _record(self, path, build, response):
+        sock = _socket(WireCapture(path))
+        message = build(sock)
+        sock.capture.response(message, response)
+        sock.capture.close()
+        return message
+
+    def test_query_is_decoded_again(self, tmp_path):
+        path = str(tmp_path / "query.pyorcap")
+        self._record(path, lambda sock: CommandMessage(sock).prepare((QUERY_SYNC, "select from Person")).send(),
+                     QUERY_RESPONSE)
+
+        response, = replay(path)
+
+        assert [(r._rid, r.name) for r in response.result()] == [("#12:0", "p0"), ("#12:1", "p1")]
+        assert response.message._orientSocket.session_id == 7
+
+    def test_binary_session(self, tmp_path, binary):
+        path = str(tmp_path / "binary.pyorcap")
+
+        def query(sock):
+            sock.serialization_type = OrientSerialization.Binary
+            sock._props = GlobalProperties({0: ["name", 7]})
+            return CommandMessage(sock).prepare((QUERY_SYNC, "select from Person")).send()
+
+        self._record(path, query, records_response(record(0)))
+
+        exchange, = exchanges(path)
+        assert exchange.state
+        assert [r.oRecordData for r in exchange.decode().result()] == [{"name": "value"}]
+        assert isinstance(exchange.message()._orientSocket._props, GlobalProperties)
+
+    def test_callbacks_are_not_recorded(self, tmp_path):
+        path = str(tmp_path / "async.pyorcap")
+        received = []
+        self._record(
+            path, lambda sock: CommandMessage(sock).prepare(
+                (QUERY_ASYNC, "select from Person", 20, "*:0", received.append)).send(),
+            _header() + b"\x01" + struct.pack("!hbhqi", 0, ord("d"), 12, 0, 1) + struct.pack("!i", 6) + b"Person"
+            + b"\x00")
+
+        exchange, = exchanges(path)
+        exchange.decode().result()
+        exchange.decode().result()
+
+        assert received == []
+
+    def test_transaction_commit(self, tmp_path):
+        path = str(tmp_path / "tx.pyorcap")
+
+        def commit(sock):
+            tx = _TXCommitMessage(sock).begin()
+            tx.attach(RecordCreateMessage(sock).prepare((12, {"name": "foo"})))
+            sock.in_transaction = False
+            return tx.prepare().send()
+
+        self._record(path, commit, _header() + struct.pack("!ihqhqii", 1, -1, -2, 12, 5, 0, 0))
+
+        records = next(replay(path)).result()
+
+        assert list(records) == ["#12:5"] and records["#12:5"].name == "foo"
+
+    def test_credentials_are_not_recorded(self, tmp_path):
+        path = tmp_path / "db_open.pyorcap"
+        sock = _socket(WireCapture(str(path)))
+        sock.auth_token = b"secret-token"
+        message = DbOpenMessage(sock).prepare(("demo", "admin", "secret-password")).send()
+        sock.capture.response(message, DB_SIZE_RESPONSE + b"secret-token")
+        sock.capture.close()
+
+        data = path.read_bytes()
+        assert b"secret-token" not in data and b"secret-password" not in data
+        assert b"admin" not in data
+        replayed = exchanges(str(path))[0].message()
+        assert (replayed._db_name, replayed._orientSocket.auth_token) == ("demo", b"")
+        assert not hasattr(replayed, "_pass")
+
+    def test_only_pyorient_objects_are_replayed(self, tmp_path):
+        path = str(tmp_path / "evil.pyorcap")
+        capture = WireCapture(path)
+        capture._write(STATE, "DbSizeMessage", pickle.dumps((os.system, ("echo pwned",))))
+        capture._write(REQUEST, "DbSizeMessage", b"")
+        capture._write(RESPONSE, "DbSizeMessage", DB_SIZE_RESPONSE)
+        capture.close()
+
+        with pytest.raises(pickle.UnpicklingError, match="system can't be replayed"):
+            exchanges(path)[0].message()
+
+    def test_unpicklable_state_is_not_replayed(self, tmp_path):
+        path = str(tmp_path / "db_size.pyorcap")
+
+        def db_size(sock):
+            message = DbSizeMessage(sock).prepare(())
+            message._lock = threading.Lock()
+            return message.send()
+
+        self._record(path, db_size, DB_SIZE_RESPONSE)
+
+        assert [e.state for e in exchanges(path)] == [b""]
+        assert list(replay(path)) == []
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB, QueryCursor
+from pyorient.exceptions import PyOrientBadMethodCallException, PyOrientCommandException
+from pyorient.otypes import OrientRecordLink
+from pyorient.serializations import OrientSerializationResult
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    client.batch("\n".join("insert into Person set name = 'p%d', age = %d" % (n, n) for n in range(10)))
+    yield client
+    client.close()
+
+
+class TestQueryCursor:
+    def test_pages(self, client):
+        cursor = client.query_cursor("select from Person order by age", 4)
+        assert isinstance(cursor, QueryCursor) and cursor.has_next_page
+        assert [r.age for r in cursor.records] == [0, 1, 2, 3]
+        assert [r.age for r in cursor.next_page()] == [4, 5, 6, 7]
+        assert [r.age for r in cursor.next_page()] == [8, 9]
+        assert not cursor.has_next_page and cursor.next_page() == []
+
+    def test_iteration_fetches_the_next_pages(self, client):
+        assert [r.name for r in client.query_cursor("select from Person order by age", 3)] == \
+            ["p%d" % n for n in range(10)]
+
+    def test_resume(self, client):
+        query_id = client.query_cursor("select from Person order by age", 6).query_id
+        cursor = client.resume_query(query_id, 6)
+        assert [r.age for r in cursor] == [6, 7, 8, 9]
+
+    def test_close(self, client):
+        with client.query_cursor("select from Person", 2) as cursor:
+            query_id = cursor.query_id
+        assert not cursor.has_next_page
+        with pytest.raises(PyOrientCommandException):
+            client.resume_query(query_id).next_page()
+
+    def test_projections(self, client):
+        cursor = client.query_cursor("select name, age from Person where age < 2 order by age")
+        assert [r.oRecordData for r in cursor.records] == [{"name": "p0", "age": 0}, {"name": "p1", "age": 1}]
+        assert client.query_cursor("select count(*) from Person").records[0].count == 10
+
+    def test_needs_protocol_37(self, client):
+        client._connection.protocol = 36
+        with pytest.raises(PyOrientBadMethodCallException):
+            client.query_cursor("select from Person")
+
+    def test_async_cursor(self, client, fake_server):
+        async def run():
+            async_client = AsyncOrientDB("127.0.0.1", fake_server.port)
+            await async_client.db_open("demo", "root", "root")
+            cursor = await async_client.query_cursor("select from Person order by age", 4)
+            ages = [r.age async for r in cursor]
+            async with await async_client.query_cursor("select from Person", 2) as cursor:
+                pass
+            async_client.close()
+            return ages, cursor.has_next_page
+
+        assert asyncio.run(run()) == (list(range(10)), False)
+
+
+def test_result_serialization_round_trip():
+    serializer = OrientSerializationResult()
+    fields = {
+        "int": -5, "long": 2 ** 40, "float": 1.5, "string": "héllo", "none": None, "bool": True,
+        "list": [1, "x", None], "map": {"k": [1]}, "link": OrientRecordLink("12:3"),
+        "datetime": datetime(2020, 1, 2, 3, 4, 5), "date": date(2021, 5, 6),
+        "decimal": Decimal("-12.345"), "binary": b"\x00\x01",
+    }
+    assert serializer.decode(serializer.encode(fields)) == fields
@@ -0,0 +1,82 @@
+import re
+import struct
+
+from pyorient.constants import BOOLEAN, BYTE, FIELD_BOOLEAN, FIELD_BYTE, FIELD_FIELDS, FIELD_INT, \
+    FIELD_LONG, FIELD_SHORT, FIELD_STRING, FIELD_STRINGS, INT, QUERY_SYNC, STRING
+from pyorient.messages import encoder
+from pyorient.messages.commands import CommandMessage
+from pyorient.messages.encoder import encode_fields
+from pyorient.messages.parser import OfflineSocket
+from pyorient.messages.records import RecordCreateMessage
+
+
+def _string(v):
+    return struct.pack("!i", len(v)) + v
+
+
+def _socket():
+    return OfflineSocket(session_id=7, auth_token=b"tok", db_opened="demo")
+
+
+class TestEncoder:
+    def test_fixed_fields_and_strings(self):
+        fields = [(FIELD_BYTE, chr(41)), (FIELD_INT, 7), (FIELD_STRING, "tök"), (FIELD_SHORT, -1),
+                  (FIELD_LONG, 2 ** 40), (FIELD_BOOLEAN, True), (FIELD_STRINGS, ["a", b"bc"])]
+
+        assert encode_fields(fields) == (
+            b")" + struct.pack("!i", 7) + _string("tök".encode()) + struct.pack("!hq?", -1, 2 ** 40, True)
+            + _string(b"a") + _string(b"bc")
+        )
+
+    def test_groups_are_encoded_in_place(self):
+        group = [(FIELD_STRING, "q"), (FIELD_INT, 20)]
+
+        assert encode_fields([(FIELD_BYTE, "s"), (FIELD_FIELDS, group)]) == \
+            b"s" + _string(_string(b"q") + struct.pack("!i", 20))
+
+    def test_layouts_are_compiled_once(self, mocker):
+        compile_layout = mocker.spy(encoder, "compile_layout")
+        fields = [(FIELD_BYTE, "s"), (FIELD_INT, 1), (FIELD_STRING, b"x"), (FIELD_INT, 2), (FIELD_BOOLEAN, True)]
+
+        encoder.encode_fields(fields)
+        encoder.encode_fields(fields)
+
+        assert compile_layout.call_count <= 1
+        # one struct for the fields before the string, one after it
+        source = encoder._encoders[(BYTE, INT, STRING, INT, BOOLEAN)].source
+        assert len(re.findall(r"\bp\d+\(", source)) == 2
+
+    def test_long_layouts_are_compiled_by_segments(self, monkeypatch):
+        monkeypatch.setattr(encoder, "_encoders", {})
+        operation = [(FIELD_BYTE, chr(1)), (FIELD_SHORT, 12), (FIELD_LONG, -2), (FIELD_STRING, "name:'x'")]
+
+        for count in (40, 41, 200, 1000):
+            fields = [(FIELD_INT, 7)] + operation * count + [(FIELD_BYTE, chr(0))]
+            whole = encoder.compile_layout(tuple(field['type'] for field, _ in fields))
+            assert encode_fields(fields) == whole(fields)
+
+        # the segments repeat whatever the number of operations
+        assert len(encoder._encoders) < 16
+
+    def test_compiled_encoders_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(encoder, "_encoders", {})
+        monkeypatch.setattr(encoder, "MAX_ENCODERS", 2)
+
+        for count in range(1, 5):
+            encode_fields([(FIELD_INT, 1)] * count)
+
+        assert list(encoder._encoders) == [(INT,) * 3, (INT,) * 4]
+
+    def test_command_request(self):
+        message = CommandMessage(_socket()).prepare((QUERY_SYNC, "select from V", 5))
+
+        payload = _string(QUERY_SYNC.encode()) + _string(b"select from V") + struct.pack("!i", 5) + _string(b"*:0") \
+            + struct.pack("!i", 0)
+        assert bytes(message._output_buffer) == \
+            b")" + struct.pack("!i", 7) + _string(b"tok") + b"s" + _string(payload)
+
+    def test_record_create_request(self):
+        message = RecordCreateMessage(_socket()).prepare((12, {"name": "foo"}))
+
+        assert bytes(message._output_buffer) == b"\x1f" + struct.pack("!i", 7) + _string(b"tok") \
+            + struct.pack("!h", 12) + _string(b'name:"foo"') + b"d\x00"
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.exceptions import PyOrientCommandException, PyOrientSchemaException, PyOrientSQLParsingException, \
+    PyOrientStorageException
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    yield client
+    client.close()
+
+
+def _names(records):
+    return sorted(r.name for r in records)
+
+
+class TestFakeServer:
+    def test_databases(self, fake_server):
+        client = OrientDB("127.0.0.1", fake_server.port)
+        client.connect("root", "root")
+
+        assert client.db_exists("demo") and not client.db_exists("other")
+        client.db_create("other")
+        assert set(client.db_list().oRecordData["databases"]) == {"demo", "other"}
+        with pytest.raises(PyOrientStorageException):
+            client.db_open("missing", "root", "root")
+
+    def test_records(self, client):
+        created = client.record_create(-1, {"@Person": {"name": "ann", "age": 30, "admin": True}})
+        cluster_id, position = created._rid[1:].split(":")
+
+        loaded = client.record_load(created._rid)
+        assert (loaded._class, loaded.name, loaded.age, loaded.admin) == ("Person", "ann", 30, True)
+
+        client.record_update(cluster_id, position, {"@Person": {"name": "bob"}}, loaded._version)
+        assert client.record_load(created._rid).oRecordData == {"name": "bob"}
+
+        assert client.record_delete(cluster_id, position) is True
+        assert client.record_load(created._rid).oRecordData == {}
+
+    def test_queries(self, client):
+        for n in range(30):
+            client.command("insert into Person set name = 'p%d', age = %d" % (n, n))
+
+        assert len(client.query("select from Person")) == 20  # default limit of query()
+        assert _names(client.query("select from Person where age >= 10 and age < 12")) == ["p10", "p11"]
+        assert [r.age for r in client.query("select from Person order by age desc limit 2")] == [29, 28]
+        assert client.query("select count(*) from Person")[0].count == 30
+        assert client.command("update Person set age = age + 100 where name like 'p2_'") == [b"10"]
+        assert client.query("select from Person where name = 'p21'")[0].age == 121
+
+        records = []
+        client.query_async("select from Person where age < 3", 10, "*:0", records.append)
+        assert _names(records) == ["p0", "p1", "p2"]
+
+    def test_graph(self, client):
+        client.command("create class Knows extends E")
+        ann, bob = (client.command("create vertex Person set name = '%s'" % name)[0] for name in ("ann", "bob"))
+        client.command("create edge Knows from %s to %s set since = 2020" % (ann._rid, bob._rid))
+
+        assert client.record_load(ann._rid).oRecordData["out_Knows"][0].get_hash()
+        matched = client.query("MATCH {class:Person, as:a, where:(name = 'ann')}-Knows-{class:Person, as:b} "
+                               "RETURN $pathelements")
+        assert _names(matched) == ["ann", "bob"]
+
+        client.command("delete vertex %s" % bob._rid)
+        assert client.query("select from Knows") == []
+        assert client.record_load(ann._rid).oRecordData["out_Knows"] == []
+
+    def test_script_and_transaction(self, client):
+        edge, = client.batch("begin\nlet a = create vertex Person set name = 'x'\n"
+                             "let b = create vertex Person set name = 'y'\nlet e = create edge E from $a to $b\n"
+                             "commit\nreturn $e")
+        assert edge.oRecordData["out"].get_hash() != edge.oRecordData["in"].get_hash()
+
+        tx = client.tx_commit()
+        tx.begin()
+        tx.attach(client.record_create(-1, {"@Person": {"name": "t1"}}))
+        tx.attach(client.record_create(-1, {"@Person": {"name": "t2"}}))
+        committed = tx.commit()
+
+        assert _names(committed.values()) == ["t1", "t2"]
+        assert _names(client.query("select from Person where name like 't%'")) == ["t1", "t2"]
+
+    def test_errors(self, client):
+        with pytest.raises(PyOrientSchemaException):
+            client.command("create class Person")
+        with pytest.raises(PyOrientSQLParsingException):
+            client.command("select from")
+        with pytest.raises(PyOrientCommandException):
+            client.gremlin("g.V()")
+        # the connection is still usable
+        assert client.query("select from Person") == []
+
+    def test_latency(self, fake_server, client):
+        fake_server.latency = 0.05
+        started = time.perf_counter()
+        client.query("select from Person")
+        assert time.perf_counter() - started >= 0.05
+
+
+@pytest.mark.asyncio
+class TestFakeServerAsync:
+    async def test_async_client_and_pipeline(self, fake_server):
+        client = AsyncOrientDB("127.0.0.1", fake_server.port)
+        await client.db_open("demo", "root", "root")
+        await client.command("create class Person extends V")
+
+        results = await client.pipeline().command("insert into Person set name = 'a'") \
+            .command("insert into Person set name = 'b'").query("select from Person").execute()
+
+        assert _names(results[2]) == ["a", "b"]
+        client.close()
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB, PyOrientCommandException
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    yield client
+    client.close()
+
+
+@pytest.fixture()
+def other(fake_server):
+    other = OrientDB("127.0.0.1", fake_server.port)
+    other.db_open("demo", "root", "root")
+    yield other
+    other.close()
+
+
+def summary(events):
+    return [(e.operation, e.record.name, e.record._version) for e in events]
+
+
+class TestLiveQuery:
+    def test_events_of_other_sessions(self, client, other):
+        events = []
+        client.live_query("LIVE SELECT FROM Person WHERE age > :age", events.append, params={"age": 18})
+        other.command("insert into Person set name = 'a', age = 20")
+        other.command("insert into Person set name = 'b', age = 10")
+        other.command("update Person set age = 30 where name = 'a'")
+        other.command("delete vertex Person where name = 'a'")
+
+        assert client.poll_live_events(timeout=5) == 3
+        assert summary(events) == [("insert", "a", 1), ("update", "a", 2), ("delete", "a", 2)]
+        assert client.poll_live_events() == 0
+
+    def test_events_before_a_response(self, client, other):
+        events = []
+        live = client.live_query("LIVE SELECT FROM Person", events.append)
+        other.command("insert into Person set name = 'a'")
+        # the push is read with the header of the next response
+        assert client.query("select count(*) from Person")[0].count == 1
+        assert summary(events) == [("insert", "a", 1)]
+
+        # and errors following a push are still raised
+        other.command("insert into Person set name = 'b'")
+        with pytest.raises(PyOrientCommandException):
+            client.command("insert into Person set name = :missing")
+        assert summary(events) == [("insert", "a", 1), ("insert", "b", 1)]
+        assert live.subscribed
+
+    def test_unsubscribe(self, client, other):
+        live = client.live_query("LIVE SELECT FROM Person")
+        other.command("insert into Person set name = 'a'")
+        live.unsubscribe()
+        other.command("insert into Person set name = 'b'")
+        assert not live.subscribed and len(client._connection.live_queries) == 0
+        # queued events can still be iterated, the iteration ends with the subscription
+        assert [e.record.name for e in live] == ["a"]
+        assert client.poll_live_events(timeout=0.1) == 0
+
+    def test_cached_records_are_refreshed(self, client, other):
+        other.command("insert into Person set name = 'a'")
+        person = client.query("select from Person")[0]
+        client._connection.record_cache.put(person)
+        client.live_query("LIVE SELECT FROM Person", lambda event: None)
+        other.command("update Person set name = 'b'")
+        client.poll_live_events(timeout=5)
+        assert client.record_load(person._rid).name == "b"
+        other.command("delete vertex Person")
+        client.poll_live_events(timeout=5)
+        assert person._rid not in client._connection.record_cache
+
+    def test_async(self, client, fake_server):
+        async def run():
+            async_client = AsyncOrientDB("127.0.0.1", fake_server.port)
+            await async_client.db_open("demo", "root", "root")
+            live = await async_client.live_query("LIVE SELECT FROM Person")
+            received = []
+
+            async def consume():
+                async for event in live:
+                    received.append(event)
+                    if len(received) == 2:
+                        await live.unsubscribe()
+
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.01)
+            client.command("insert into Person set name = 'a'")
+            client.command("update Person set name = 'b'")
+            await asyncio.wait_for(task, 5)
+            async_client.close()
+            return received
+
+        assert summary(asyncio.run(run())) == [("insert", "a", 1), ("update", "b", 2)]
+
+    def test_async_poll(self, client, fake_server):
+        async def run():
+            async_client = AsyncOrientDB("127.0.0.1", fake_server.port)
+            await async_client.db_open("demo", "root", "root")
+            events = []
+            await async_client.live_query("LIVE SELECT FROM Person", events.append)
+            assert await async_client.poll_live_events(timeout=0.05) == 0
+
+            client.command("insert into Person set name = 'a'")
+            assert await async_client.poll_live_events(timeout=5) == 1
+            # the connection is still usable after a poll that timed out
+            assert (await async_client.query("select count(*) from Person"))[0].count == 1
+            async_client.close()
+            return events
+
+        assert summary(asyncio.run(run())) == [("insert", "a", 1)]
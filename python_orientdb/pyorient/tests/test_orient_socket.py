@@ -0,0 +1,36 @@
+import struct
+
+import pytest
+
+from pyorient.exceptions import PyOrientConnectionException
+
+
+class TestOrientSocketRead:
+    def test_fields_are_served_from_one_receive(self, socket_pair, mocker):
+        server, orient_socket = socket_pair
+        server.sendall(struct.pack("!bihq", 1, 2, 3, 4))
+        recv_into = mocker.spy(orient_socket, "_recv_into")
+
+        fields = [orient_socket.read(n) for n in (1, 4, 2, 8)]
+
+        assert [struct.unpack(f, v)[0] for f, v in zip("!b !i !h !q".split(), fields)] == [1, 2, 3, 4]
+        assert recv_into.call_count == 1
+
+    def test_reads_across_refills_and_larger_than_buffer(self, socket_pair):
+        server, orient_socket = socket_pair
+        orient_socket._recv_buffer = bytearray(8)
+        orient_socket._recv_view = memoryview(orient_socket._recv_buffer)
+        payload = bytes(range(256)) * 4
+        server.sendall(payload)
+
+        chunks = [orient_socket.read(3), orient_socket.read(7), orient_socket.read(1000), orient_socket.read(14)]
+
+        assert b"".join(chunks) == payload
+
+    def test_closed_peer_raises(self, socket_pair):
+        server, orient_socket = socket_pair
+        server.sendall(b"\x01")
+        server.close()
+
+        with pytest.raises(PyOrientConnectionException):
+            orient_socket.read(4)
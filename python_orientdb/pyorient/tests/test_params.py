@@ -0,0 +1,65 @@
+import asyncio
+
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.messages.commands import prepared_payloads
+
+import pytest
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    yield client
+    client.close()
+
+
+class TestQueryParams:
+    def test_named_and_positional(self, client):
+        client.command("insert into Person set name = :name, age = :age", params={"name": "Ann", "age": 40})
+        client.command("insert into Person set name = ?, age = ?", params=["Bob", 20])
+        assert client.query("select from Person where name = :name", params={"name": "Ann"})[0].age == 40
+        assert [r.name for r in client.query("select from Person where age < ?", -1, params=[30])] == ["Bob"]
+
+    def test_values_are_not_sql(self, client):
+        name = "x' or '1'='1 \"quoted\" \\"
+        client.command("insert into Person set name = :name", params={"name": name})
+        client.command("insert into Person set name = 'other'")
+        records = client.query("select from Person where name = :name", params={"name": name})
+        assert [r.name for r in records] == [name]
+
+    def test_script_stream_cursor_and_pipeline(self, client):
+        client.batch("insert into Person set name = :name, age = 1;insert into Person set name = 'b', age = 2",
+                     params={"name": "a"})
+        assert client.batch("let p = select from Person where age = :age; return $p",
+                            params={"age": 2})[0].name == "b"
+        assert [r.name for r in client.query_stream("select from Person where age = :age",
+                                                    params={"age": 1})] == ["a"]
+        assert client.query_cursor("select from Person where name = ?", params=["b"]).records[0].age == 2
+        pipeline = client.pipeline()
+        pipeline.query("select from Person where age = :age", params={"age": 1})
+        pipeline.query("select from Person where age = :age", params={"age": 2})
+        assert [records[0].name for records in pipeline.execute()] == ["a", "b"]
+
+    def test_templates_are_encoded_once(self, client):
+        prepared_payloads.clear()
+        for age in range(5):
+            client.query("select from Person where age = :age", params={"age": age})
+        client.query("select from Person where age = :age", 10, params={"age": 1})
+        assert len(prepared_payloads) == 2
+        # queries without parameters don't go through the cache
+        client.query("select from Person")
+        assert len(prepared_payloads) == 2
+
+    def test_async(self, client, fake_server):
+        client.command("insert into Person set name = 'Ann', age = 40")
+
+        async def run():
+            async_client = AsyncOrientDB("127.0.0.1", fake_server.port)
+            await async_client.db_open("demo", "root", "root")
+            records = await async_client.query("select from Person where age = :age", params={"age": 40})
+            async_client.close()
+            return records
+
+        assert asyncio.run(run())[0].name == "Ann"
@@ -0,0 +1,84 @@
+import struct
+
+import pytest
+
+from pyorient.constants import QUERY_ASYNC, QUERY_SYNC
+from pyorient.exceptions import PyOrientCommandException, PyOrientConnectionException
+from pyorient.messages.commands import CommandMessage
+from pyorient.messages.database import DbSizeMessage
+from pyorient.messages.parser import OfflineSocket, ResponseParser
+
+from .test_async_orient import ERROR_RESPONSE, QUERY_RESPONSE, _header
+
+DB_SIZE_RESPONSE = _header() + struct.pack("!q", 4096)
+
+
+def _sent(message_class, *params):
+    sock = OfflineSocket(session_id=7, db_opened="demo")
+    return message_class(sock).prepare(params).send()
+
+
+class TestResponseParser:
+    @pytest.mark.parametrize("chunk_size", [1, 7, len(QUERY_RESPONSE)])
+    def test_response_fed_in_chunks(self, chunk_size):
+        parser = ResponseParser().expect(_sent(CommandMessage, QUERY_SYNC, "select from Person"))
+
+        for i in range(0, len(QUERY_RESPONSE), chunk_size):
+            assert parser.pop() is None
+            parser.feed(QUERY_RESPONSE[i:i + chunk_size])
+
+        records = parser.pop().result()
+        assert [(r._rid, r.name) for r in records] == [("#12:0", "p0"), ("#12:1", "p1")]
+        assert parser.pending == 0 and parser.buffered() == b""
+
+    def test_responses_come_out_in_request_order(self):
+        parser = ResponseParser()
+        parser.expect(_sent(DbSizeMessage)).expect(_sent(CommandMessage, QUERY_SYNC, "select from Person"))
+
+        parser.feed(DB_SIZE_RESPONSE + QUERY_RESPONSE[:10])
+        assert parser.pop().result() == 4096
+        assert parser.pop() is None and parser.pending == 1 and parser.bytes_wanted > 0
+
+        parser.feed(QUERY_RESPONSE[10:] + b"\x01")
+        assert len(parser.pop().result()) == 2
+        assert parser.buffered() == b"\x01"
+
+    def test_server_error_does_not_break_following_responses(self):
+        parser = ResponseParser().expect(_sent(DbSizeMessage)).expect(_sent(DbSizeMessage))
+
+        parser.feed(ERROR_RESPONSE + DB_SIZE_RESPONSE)
+
+        with pytest.raises(PyOrientCommandException, match="boom"):
+            parser.pop().result()
+        assert parser.pop().result() == 4096
+
+    def test_callbacks_fire_once_per_record(self):
+        records = []
+        parser = ResponseParser().expect(
+            _sent(CommandMessage, QUERY_ASYNC, "select from Person", 20, "*:0", records.append))
+        response = _header() + b"".join(
+            b"\x01" + struct.pack("!hbhqi", 0, ord("d"), 12, n, 1) + struct.pack("!i", 6) + b"Person"
+            for n in range(3)
+        ) + b"\x00"
+
+        for byte in response:
+            parser.feed(bytes([byte]))
+
+        assert parser.pop().error is None
+        assert [r._rid for r in records] == ["#12:0", "#12:1", "#12:2"]
+
+
+class TestOrientSocketDrive:
+    def test_drive_reads_what_the_decoder_asks(self, socket_pair):
+        server, orient_socket = socket_pair
+        server.sendall(DB_SIZE_RESPONSE)
+
+        assert orient_socket.drive(_sent(DbSizeMessage).decode_response()) == 4096
+
+    def test_connection_errors_are_raised_into_the_decoder(self, socket_pair):
+        server, orient_socket = socket_pair
+        server.sendall(DB_SIZE_RESPONSE[:3])
+        server.close()
+
+        with pytest.raises(PyOrientConnectionException):
+            orient_socket.drive(_sent(DbSizeMessage).decode_response())
@@ -0,0 +1,86 @@
+import asyncio
+import struct
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.exceptions import PyOrientCommandException
+
+from .test_async_orient import DB_OPEN_RESPONSE, ERROR_RESPONSE, QUERY_RESPONSE, _header, _int, \
+    _scripted_server, _string
+
+DB_SIZE_RESPONSE = _header() + struct.pack("!q", 4096)
+
+
+def _session(request):
+    """session id of a request: (op:byte)(session-id:int)(token:bytes)..."""
+    return struct.unpack("!i", request[1:5])[0]
+
+
+@pytest.fixture()
+def sync_client(socket_pair):
+    server, orient_socket = socket_pair
+    orient_socket.protocol = 38
+    orient_socket.session_id = 7
+    orient_socket.db_opened = "demo"
+    return server, OrientDB(orient_socket)
+
+
+class TestPipeline:
+    def test_one_write_and_results_in_order(self, sync_client, mocker):
+        server, client = sync_client
+        server.sendall(DB_SIZE_RESPONSE + QUERY_RESPONSE + DB_SIZE_RESPONSE)
+        write = mocker.spy(client._connection, "write")
+
+        results = client.pipeline().db_size().query("select from Person").db_size().execute()
+
+        assert results[0] == 4096 and len(results[1]) == 2 and results[2] == 4096
+        assert write.call_count == 1
+
+    def test_errors_keep_the_following_responses_aligned(self, sync_client):
+        server, client = sync_client
+        server.sendall(ERROR_RESPONSE + DB_SIZE_RESPONSE + ERROR_RESPONSE + DB_SIZE_RESPONSE)
+
+        error, size = client.pipeline(raise_on_error=False).db_size().db_size().execute()
+        assert isinstance(error, PyOrientCommandException) and size == 4096
+
+        with pytest.raises(PyOrientCommandException):
+            client.pipeline().db_size().db_size().execute()
+        assert client.pipeline().execute() == []
+
+
+@pytest.mark.asyncio
+class TestAsyncPipelining:
+    async def test_pipeline_costs_one_round_trip(self):
+        received = []
+        server, port = await _scripted_server(
+            [DB_OPEN_RESPONSE, DB_SIZE_RESPONSE + QUERY_RESPONSE * 2], 4, received)
+        client = AsyncOrientDB("127.0.0.1", port)
+        await client.db_open("demo", "admin", "admin")
+
+        pipe = client.pipeline().db_size().query("select from Person").query("select from Person")
+        size, first, second = await pipe.execute()
+
+        assert size == 4096 and len(first) == len(second) == 2
+        assert len(received) == 2
+        client.close()
+        server.close()
+
+    async def test_sessions_are_multiplexed_on_one_socket(self, mocker):
+        other_db_open = DB_OPEN_RESPONSE.replace(_int(7) + _string(b"tok"), _int(9) + _string(b"tok2"))
+        server, port = await _scripted_server([DB_OPEN_RESPONSE, other_db_open, QUERY_RESPONSE * 2], 3)
+        client = AsyncOrientDB("127.0.0.1", port)
+        await client.db_open("demo", "admin", "admin")
+        session = client.session()
+        await session.db_open("other", "reader", "reader")
+        write = mocker.spy(client._connection, "write")
+
+        results = await asyncio.gather(client.query("select from Person"), session.query("select from Person"))
+
+        assert [len(r) for r in results] == [2, 2]
+        assert session._connection.session_id == 9 and client._connection.session_id == 7
+        assert [_session(c.args[0]) for c in write.call_args_list] == [7, 9]
+        session.close()
+        assert client._connection.connected
+        client.close()
+        server.close()
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from pyorient.exceptions import (PyOrientCommandException, PyOrientConnectionException,
+                                 PyOrientConnectionPoolException, PyOrientSerializationException)
+from pyorient.pool import OrientConnectionPool, OrientPoolRegistry
+
+
+class FakeConnection:
+    def __init__(self):
+        self.connected = True
+
+
+class FakeClient:
+    def __init__(self):
+        self._connection = FakeConnection()
+        self.pings = 0
+
+    async def db_size(self):
+        self.pings += 1
+        if not self._connection.connected:
+            raise PyOrientConnectionException("down", [])
+        return 1
+
+    def close(self):
+        self._connection.connected = False
+
+
+def _pool(**kwargs):
+    clients = []
+
+    async def factory():
+        clients.append(FakeClient())
+        return clients[-1]
+
+    return OrientConnectionPool("localhost", 2424, "demo", "admin", "admin", client_factory=factory, **kwargs), clients
+
+
+@pytest.mark.asyncio
+class TestOrientConnectionPool:
+    async def test_connections_are_reused(self):
+        pool, clients = _pool(max_size=2)
+        async with pool.connection() as first:
+            pass
+        async with pool.connection() as second:
+            pass
+
+        assert first is second
+        assert len(clients) == 1
+        assert pool.stats()["acquired"] == 2
+        assert pool.stats()["idle"] == 1
+
+    async def test_concurrent_borrowers_get_distinct_connections(self):
+        pool, clients = _pool(max_size=3)
+        borrowed = set()
+
+        async def borrow():
+            async with pool.connection() as client:
+                borrowed.add(client)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(borrow() for _ in range(6)))
+
+        assert len(clients) == 3
+        assert pool.stats()["size"] == 3
+
+    async def test_checkout_timeout(self):
+        pool, _ = _pool(max_size=1, timeout=0.05)
+        await pool.acquire()
+        with pytest.raises(PyOrientConnectionPoolException):
+            await pool.acquire()
+        assert pool.stats()["timeouts"] == 1
+
+    async def test_dead_connection_is_replaced(self):
+        pool, clients = _pool(max_size=1, ping_after=0)
+        client = await pool.acquire()
+        await pool.release(client)
+        client._connection.connected = False
+
+        replacement = await pool.acquire()
+
+        assert replacement is not client
+        assert pool.stats()["failed_checks"] == 1
+        assert pool.stats()["size"] == 1
+
+    async def test_connection_error_discards(self):
+        pool, clients = _pool()
+        with pytest.raises(PyOrientConnectionException):
+            async with pool.connection():
+                raise PyOrientConnectionException("broken", [])
+        assert pool.stats()["discarded"] == 1
+        assert pool.stats()["size"] == 0
+
+    async def test_only_clean_connections_are_returned(self):
+        pool, clients = _pool()
+        server_error = PyOrientCommandException("com.orientechnologies.OCommandExecutionException", ["bad"])
+        server_error.from_server = True
+        with pytest.raises(PyOrientCommandException):
+            async with pool.connection():
+                raise server_error
+        assert pool.stats()["discarded"] == 0
+
+        # a response may be left on the socket
+        for error in (asyncio.CancelledError(), asyncio.TimeoutError(),
+                      PyOrientSerializationException("can't decode", []), ValueError()):
+            with pytest.raises(type(error)):
+                async with pool.connection():
+                    raise error
+        assert pool.stats()["discarded"] == 4
+        # the first one was reused once, then every borrower got a new connection
+        assert len(clients) == 4
+
+    async def test_idle_eviction_keeps_min_size(self):
+        pool, clients = _pool(min_size=1, max_size=3, max_idle=0)
+        held = [await pool.acquire() for _ in range(3)]
+        for client in held:
+            await pool.release(client)
+
+        assert pool.stats()["size"] == 1
+        assert pool.stats()["evicted"] == 2
+
+    async def test_registry_keys_and_credentials(self):
+        registry = OrientPoolRegistry(max_size=2)
+        pool = registry.get("localhost", "2424", "demo", "admin", "admin")
+
+        assert registry.get("localhost", 2424, "demo", "admin", "admin") is pool
+        assert registry.get("localhost", 2424, "other", "admin", "admin") is not pool
+        assert registry.get("localhost", 2424, "demo", "admin", "wrong") is not pool
+
+    async def test_failed_login_leaves_other_pools_alone(self):
+        registry = OrientPoolRegistry(min_size=1, max_size=2, client_factory=lambda: _opened(FakeClient()))
+        pool = await registry.get("localhost", 2424, "demo", "admin", "admin").open()
+        client = await pool.acquire()
+
+        async def refused():
+            raise PyOrientConnectionException("wrong password", [])
+
+        for _ in range(3):
+            wrong = registry.get("localhost", 2424, "demo", "admin", "wrong")
+            wrong._client_factory = refused
+            with pytest.raises(PyOrientConnectionException):
+                await wrong.acquire()
+
+        assert not pool._closed and client._connection.connected
+        assert registry.get("localhost", 2424, "demo", "admin", "admin") is pool
+        # the pools of the wrong password, left without connections, don't pile up
+        assert list(registry.stats()) == ["localhost:2424/demo@admin", "localhost:2424/demo@admin #1"]
+        await pool.release(client)
+        await registry.close()
+
+
+async def _opened(client):
+    return client
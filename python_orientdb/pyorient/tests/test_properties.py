@@ -0,0 +1,182 @@
+import json
+import struct
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB, serializations
+from pyorient.exceptions import PyOrientSerializationException
+from pyorient.messages.database import BaseMessage
+from pyorient.properties import GlobalProperties, property_ids
+from pyorient.serializations import OrientSerialization, OrientSerializationBinary
+
+from .test_async_orient import DB_OPEN_RESPONSE, _header, _int, _scripted_server, _string
+from .test_pipeline import DB_SIZE_RESPONSE
+
+
+def varint(value):
+    value = (value << 1) ^ (value >> 63)  # zigzag
+    out = bytearray()
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def record(*ids, class_name=b"Person"):
+    """
+    binary record with a field of each global property id and a named one
+    """
+    header = b"".join(varint(-property_id - 1) + b"\x00\x00\x00\x00" for property_id in ids)
+    header += varint(1) + b"x" + b"\x00\x00\x00\x00" + b"\x07"
+    return b"\x00" + varint(len(class_name)) + class_name + header + varint(0) + b"data"
+
+
+#: binary record without class nor fields, followed by the JSON of a global property
+ROW = b"\x00\x00\x00"
+
+
+def records_response(*contents):
+    """
+    response to a synchronous command returning records
+    """
+    return _header() + b"l" + _int(len(contents)) + b"".join(
+        struct.pack("!h", 0) + b"d" + struct.pack("!hqi", 12, n, 1) + _string(content)
+        for n, content in enumerate(contents)
+    ) + b"\x00"
+
+
+def properties_response(*names):
+    return records_response(*(
+        ROW + json.dumps({"id": property_id, "name": name, "type": "STRING"}).encode()
+        for property_id, name in names
+    ))
+
+
+@pytest.fixture()
+def binary(monkeypatch):
+    """
+    the decoder of pyorient_native, reading the fields of the global properties
+    """
+    def decode(self, content):
+        if content.startswith(ROW):
+            return [None, json.loads(content[len(ROW):])]
+        return ["Person", {self.props[property_id][0]: "value" for property_id in property_ids(content)}]
+
+    monkeypatch.setattr(serializations, "binary_support", True)
+    monkeypatch.setattr(OrientSerializationBinary, "decode", decode)
+
+
+@pytest.fixture()
+def binary_client(socket_pair, binary):
+    server, orient_socket = socket_pair
+    orient_socket.protocol = 38
+    orient_socket.session_id = 7
+    orient_socket.db_opened = "demo"
+    orient_socket.serialization_type = OrientSerialization.Binary
+    orient_socket._props = GlobalProperties({0: ["name", 7]})
+    return server, OrientDB(orient_socket, serialization_type=OrientSerialization.Binary)
+
+
+def test_property_ids():
+    assert property_ids(record(0, 130, 5)) == {0, 5, 130}
+    assert property_ids(record(class_name=b"")) == set()
+    # truncated content, the ids read so far
+    assert property_ids(record(3, 7)[:13]) == {3}
+
+
+def test_global_properties():
+    properties = GlobalProperties({"utc": True})
+    assert properties.max_id == -1
+    assert properties.merge([{"id": 0, "name": "name", "type": "STRING"},
+                             {"id": 1, "name": "age", "type": "INTEGER"}]) == 2
+    assert properties.merge([{"id": 1, "name": "age", "type": "INTEGER"}]) == 0
+    assert properties[1] == ["age", 1] and properties.max_id == 1
+    assert properties.query().endswith("WHERE id > 1 ORDER BY id")
+    assert properties.missing(record(0, 1, 2)) == {2}
+    assert (properties.refreshes, properties.fetched) == (2, 2)
+
+    shared = GlobalProperties.shared("localhost", 2424, "demo")
+    assert GlobalProperties.shared("localhost", 2424, "demo") is shared
+    assert GlobalProperties.shared("localhost", 2424, "other") is not shared
+
+
+def test_decode_later(socket_pair, binary):
+    _, orient_socket = socket_pair
+    orient_socket.serialization_type = OrientSerialization.Binary
+    orient_socket._props = properties = GlobalProperties({0: ["name", 7]})
+    message = BaseMessage(orient_socket)
+
+    known = message._to_record("#12:0", 1, record(0))
+    assert (known._class, known.oRecordData) == ("Person", {"name": "value"})
+
+    # a property created since the last refresh: decoded once the table is refreshed
+    later = message._to_record("#12:1", 3, record(0, 1))
+    assert later.oRecordData == {} and len(message._undecoded) == 1
+    properties.merge([{"id": 1, "name": "age", "type": "INTEGER"}])
+    message._decode_undecoded()
+    assert (later._rid, later._version, later._class) == ("#12:1", 3, "Person")
+    assert later.oRecordData == {"name": "value", "age": "value"}
+    assert message._undecoded == []
+
+    # still unknown after the refresh, never handed out empty
+    message._to_record("#12:2", 1, record(0, 9))
+    with pytest.raises(PyOrientSerializationException, match=r"#12:2 .* \[9\]"):
+        message._decode_undecoded()
+
+
+def test_pipeline_refreshes_after_the_last_response(binary_client):
+    server, client = binary_client
+    server.sendall(records_response(record(0), record(0, 1)) + DB_SIZE_RESPONSE + properties_response((1, "age")))
+
+    people, size = client.pipeline().query("select from Person").db_size().execute()
+
+    assert [person.oRecordData for person in people] == [{"name": "value"}, {"name": "value", "age": "value"}]
+    assert size == 4096
+    # the refresh is written once both responses are read, asking every property above the known ones
+    requests = server.recv(65536)
+    assert requests.count(b"ORDER BY id") == 1 and b"WHERE id > 0 ORDER BY id" in requests
+
+
+def test_stream_holds_the_records_until_decoded(binary_client):
+    server, client = binary_client
+    server.sendall(records_response(record(0, 1), record(0)) + properties_response((1, "age")))
+
+    people = [person.oRecordData for person in client.query_stream("select from Person")]
+
+    assert people == [{"name": "value", "age": "value"}, {"name": "value"}]
+
+
+def test_callbacks_are_held_in_order(binary_client):
+    server, client = binary_client
+    # two pre-fetched records after the result, the first one referencing a new property
+    response = records_response()[:-1] + b"".join(
+        b"\x02" + struct.pack("!h", 0) + b"d" + struct.pack("!hqi", 12, n, 1) + _string(content)
+        for n, content in enumerate([record(0, 1), record(0)])
+    ) + b"\x00"
+    server.sendall(response + properties_response((1, "age")))
+    fetched = []
+
+    client.query("select from Person", -1, "*:-1", lambda person: fetched.append(person.oRecordData))
+
+    assert fetched == [{"name": "value", "age": "value"}, {"name": "value"}]
+    assert client._connection.record_cache.get("#12:0").oRecordData == {"name": "value", "age": "value"}
+
+
+@pytest.mark.asyncio
+async def test_async_pipeline(binary):
+    server, port = await _scripted_server([
+        DB_OPEN_RESPONSE,
+        properties_response((0, "name")),
+        records_response(record(0, 1)) + DB_SIZE_RESPONSE,
+        properties_response((1, "age")),
+    ], 5)
+    client = AsyncOrientDB("127.0.0.1", port, serialization_type=OrientSerialization.Binary)
+    await client.db_open("demo", "admin", "admin")
+
+    people, size = await client.pipeline().query("select from Person").db_size().execute()
+
+    assert people[0].oRecordData == {"name": "value", "age": "value"} and size == 4096
+    assert client._connection._props.max_id == 1
+    client.close()
+    server.close()
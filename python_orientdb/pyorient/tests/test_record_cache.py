@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB, OrientRecord
+from pyorient.cache import RecordCache
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    client.command("create class Knows extends E")
+    client.batch("create vertex Person set name = 'a';"
+                 "create vertex Person set name = 'b';"
+                 "create edge Knows from (select from Person where name = 'a') to (select from Person where name = 'b')")
+    yield client
+    client.close()
+
+
+def count_requests(client, monkeypatch):
+    sent = []
+    write = client._connection.write
+    monkeypatch.setattr(client._connection, "write", lambda buff: sent.append(buff) or write(buff))
+    return sent
+
+
+class TestRecordCache:
+    def test_newer_versions_win(self):
+        cache = RecordCache(size=2)
+        cache.put(OrientRecord({"__rid": "#1:0", "__version": 3, "name": "new"}))
+        cache.put(OrientRecord({"__rid": "#1:0", "__version": 2, "name": "old"}))
+        assert cache.get("1:0").name == "new"
+        cache.put(OrientRecord({"__rid": "#1:1", "__version": 1}))
+        cache.put(OrientRecord({"__rid": "#1:2", "__version": 1}))
+        assert "#1:0" not in cache and len(cache) == 2
+
+    def test_records_expire(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("pyorient.cache.time.monotonic", lambda: now[0])
+        cache = RecordCache(ttl=10)
+        cache.put(OrientRecord({"__rid": "#1:0", "__version": 1}))
+        now[0] += 9
+        assert cache.get("#1:0") is not None
+        now[0] += 1
+        assert cache.get("#1:0") is None and "#1:0" not in cache and len(cache) == 0
+
+    def test_commands_empty_the_cache(self, client):
+        cache = client._connection.record_cache
+        person = client.query("select from Person where name = 'a'", -1, "*:2")[0]
+        b = client.record_load(client.load_links(person.out_Knows)[0].oRecordData["in"])
+        assert b._rid in cache
+        client.query("select from Person")
+        assert b._rid in cache
+
+        client.command("update Person set name = 'bb' where name = 'b'")
+        assert len(cache) == 0
+        assert client.record_load(b._rid).name == "bb"
+
+        client.query("select from Person where name = 'a'", -1, "*:2")
+        client.batch("update Person set name = 'b' where name = 'bb'")
+        assert len(cache) == 0
+
+    def test_prefetched_records_need_no_request(self, client, monkeypatch):
+        person = client.query("select from Person where name = 'a'", -1, "*:-1")[0]
+        assert len(client._connection.record_cache) == 2  # the edge and b
+        sent = count_requests(client, monkeypatch)
+        edge = client.load_links(person.out_Knows)[0]
+        assert client.record_load(edge.oRecordData["in"]).name == "b"
+        assert sent == []
+
+    def test_missing_links_are_loaded_in_one_pipeline(self, client, monkeypatch):
+        people = client.query("select from Person order by name", -1)
+        assert len(client._connection.record_cache) == 0
+        sent = count_requests(client, monkeypatch)
+        records = client.load_links([people[1]._rid, people[0]._rid, people[1]._rid])
+        assert [r.name for r in records] == ["b", "a", "b"]
+        assert len(sent) == 1
+
+    def test_record_load_many(self, client, monkeypatch):
+        a, b = client.query("select from Person order by name", -1)
+        rids = [b._rid, a._rid.split(":")[0] + ":99", a._rid, b._rid]
+        sent = count_requests(client, monkeypatch)
+        records = client.record_load_many(rids)
+        assert [r and r.name for r in records] == ["b", None, "a", "b"]
+        assert len(sent) == 1
+
+        # a fetch plan loads again, the linked records it fetches are cached
+        client._connection.record_cache.put(a)
+        records = client.record_load_many([a._rid], "*:1")
+        assert len(sent) == 2 and records[0].name == "a"
+        assert len(client._connection.record_cache) == 2  # a and its edge
+
+    def test_session_writes_invalidate(self, client):
+        person = client.query("select from Person where name = 'a'", -1, "*:2")[0]
+        edge = client.load_links(person.out_Knows)[0]
+        b = client.record_load(edge.oRecordData["in"])
+        assert b._rid in client._connection.record_cache
+        client.record_update(b._rid, b._rid, {"@Person": {"name": "bb"}}, b._version)
+        assert b._rid not in client._connection.record_cache
+        assert client.record_load(b._rid).name == "bb"
+
+        client.db_close()
+        assert len(client._connection.record_cache) == 0
+
+    def test_async(self, client, fake_server):
+        async def run():
+            async_client = AsyncOrientDB("127.0.0.1", fake_server.port)
+            await async_client.db_open("demo", "root", "root")
+            person = (await async_client.query("select from Person where name = 'a'", -1, "*:2"))[0]
+            edge = (await async_client.load_links(person.out_Knows))[0]
+            b = await async_client.record_load(edge.oRecordData["in"])
+            missing = person._rid.split(":")[0] + ":99"
+            many = await async_client.record_load_many([missing, b._rid, person._rid], "*:-1")
+            async_client.close()
+            return async_client._connection.record_cache.hits, b.name, [r and r.name for r in many]
+
+        assert asyncio.run(run()) == (2, "b", [None, "b", "a"])
@@ -0,0 +1,70 @@
+from contextlib import aclosing
+
+import pytest
+
+from pyorient import OrientDB
+from pyorient.pool import OrientConnectionPool
+from pyorient.scan import ParallelScan, ScanPartition
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V clusters 3")
+    client.command("create class Employee extends Person")
+    client.batch("\n".join("insert into Person set n = %d" % n for n in range(30)))
+    client.batch("\n".join("insert into Employee set n = %d" % n for n in range(30, 35)))
+    client.db_reload()
+    yield client
+    client.close()
+
+
+@pytest.fixture()
+def pool(fake_server, client):
+    return OrientConnectionPool("127.0.0.1", fake_server.port, "demo", "root", "root", min_size=0, max_size=4)
+
+
+def test_data_cluster_data_range(client):
+    cluster_id = client.get_class_position(b"person_1")
+    assert client.data_cluster_data_range(cluster_id) == [0, 9]
+    assert client.data_cluster_count([cluster_id]) == 10
+
+
+@pytest.mark.asyncio
+class TestParallelScan:
+    async def test_partitions(self, client, pool):
+        person = [client.get_class_position(name) for name in (b"person", b"person_1", b"person_2")]
+        partitions = await ParallelScan(pool, "Person", partition_size=4).partitions()
+        # 10 records in each cluster of Person in 3 partitions, the 5 employees in 2
+        assert [p for p in partitions if p.cluster_id == person[1]] == [
+            ScanPartition(person[1], "person_1", 0, 3),
+            ScanPartition(person[1], "person_1", 4, 7),
+            ScanPartition(person[1], "person_1", 8, 9),
+        ]
+        assert len(partitions) == 11
+        assert len(await ParallelScan(pool, "Person", polymorphic=False, partition_size=4).partitions()) == 9
+        with pytest.raises(ValueError):
+            await ParallelScan(pool, "Nobody").partitions()
+        await pool.close()
+
+    async def test_stream(self, client, pool):
+        scan = ParallelScan(pool, "Person", partition_size=3, concurrency=3)
+        rids = [record._rid async for record in scan.stream()]
+        assert rids == [record._rid for record in client.query("select from Person", -1)]
+        assert len(rids) == 35
+        # one connection per partition read at once
+        assert pool.stats()["created"] <= 3
+
+        scan = ParallelScan(pool, "Person", where="n >= :least", params={"least": 28}, partition_size=3)
+        assert sorted([record.n async for record in scan.unordered()]) == list(range(28, 35))
+        await pool.close()
+
+    async def test_close_early(self, client, pool):
+        scan = ParallelScan(pool, "Person", partition_size=1)
+        async with aclosing(scan.stream()) as records:
+            async for record in records:
+                break
+        # the partitions read ahead are cancelled and their connections given back
+        assert pool.stats()["in_use"] == 0
+        await pool.close()
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB
+from pyorient.exceptions import PyOrientSQLParsingException
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    client.batch("\n".join("insert into Person set name = 'p%d', age = %d" % (n, n) for n in range(50)))
+    yield client
+    client.close()
+
+
+class TestQueryStream:
+    def test_yields_records_while_decoding(self, client):
+        stream = client.query_stream("select from Person order by age")
+        assert next(stream).name == "p0"
+        # the rest of the response is still on the socket
+        assert client._connection._recv_end > client._connection._recv_start
+        assert [r.age for r in stream] == list(range(1, 50))
+
+    def test_limit_and_alias(self, client):
+        assert len(list(client.query_stream("select from Person", 5))) == 5
+        assert len(list(client.iter_query("select from Person"))) == 50
+
+    def test_nothing_is_sent_before_iterating(self, client):
+        client.query_stream("select from Person")
+        assert client.query("select count(*) from Person")[0].count == 50
+
+    def test_stopping_early_keeps_the_connection_usable(self, client):
+        for record in client.query_stream("select from Person order by age"):
+            if record.age == 3:
+                break
+        assert client.query("select from Person where age = 42")[0].name == "p42"
+
+    def test_server_errors(self, client):
+        with pytest.raises(PyOrientSQLParsingException):
+            list(client.query_stream("select frm Person"))
+        assert client.query("select count(*) from Person")[0].count == 50
+
+
+class TestAsyncQueryStream:
+    def test_async_stream(self, client, fake_server):
+        async def run():
+            async_client = AsyncOrientDB("127.0.0.1", fake_server.port)
+            await async_client.db_open("demo", "root", "root")
+            ages = [r.age async for r in async_client.query_stream("select from Person order by age")]
+
+            # stopped early, the next request still gets its own response
+            async for record in async_client.iter_query("select from Person"):
+                break
+            count = await async_client.query("select count(*) from Person")
+
+            with pytest.raises(PyOrientSQLParsingException):
+                async for record in async_client.query_stream("select frm Person"):
+                    pass
+            async_client.close()
+            return ages, count[0].count
+
+        assert asyncio.run(run()) == (list(range(50)), 50)
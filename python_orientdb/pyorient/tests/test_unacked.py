@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from pyorient import AsyncOrientDB, OrientDB, PyOrientConnectionException, PyOrientSchemaException
+
+
+@pytest.fixture()
+def client(fake_server):
+    client = OrientDB("127.0.0.1", fake_server.port)
+    client.db_open("demo", "root", "root")
+    client.command("create class Person extends V")
+    client.command("create class Shape extends V abstract")
+    yield client
+    client.close()
+
+
+def count(client):
+    return client.query("select count(*) from Person")[0].count
+
+
+class TestUnackedWrites:
+    def test_acknowledged_later(self, client, monkeypatch):
+        sent = []
+        write = client._connection.write
+        monkeypatch.setattr(client._connection, "write", lambda buff: sent.append(buff) or write(buff))
+        writes = client.unacked_writes(max_pending=3)
+        for n in range(5):
+            writes.record_create(-1, {"@Person": {"n": n}})
+        # the oldest acknowledgements were read to stay within max_pending
+        assert len(sent) == 5 and writes.pending == 3
+        assert all(request[-1:] == b"\x01" for request in sent)  # asynchronous mode
+
+        # another request first reads the acknowledgements sent before it
+        assert count(client) == 5
+        assert writes.pending == 0 and writes.acknowledged == 5
+        assert writes.flush() == []
+
+    def test_failures(self, client):
+        person = client.record_create(-1, {"@Person": {"name": "a"}})
+        client._connection.record_cache.put(person)
+        writes = client.unacked_writes()
+        writes.record_create(-1, {"@Shape": {}})
+        writes.record_delete(*person._rid[1:].split(":"))
+        writes.record_create(-1, {"@Person": {"name": "b"}})
+        assert person._rid not in client._connection.record_cache
+
+        failures = writes.flush()
+        assert [(f.operation, type(f.error)) for f in failures] == [("record_create", PyOrientSchemaException)]
+        assert failures[0].args == (-1, {"@Shape": {}})
+        assert [p.name for p in client.query("select from Person")] == ["b"]
+        assert writes.flush() == []
+
+    def test_connection_lost(self, client):
+        writes = client.unacked_writes()
+        writes.record_create(-1, {"@Person": {}})
+        writes.record_create(-1, {"@Person": {}})
+        client._connection.close()
+        failures = writes.flush()
+        assert len(failures) == 2 and isinstance(failures[0].error, PyOrientConnectionException)
+        assert writes.pending == 0
+
+    def test_async(self, client, fake_server):
+        async def run():
+            async_client = AsyncOrientDB("127.0.0.1", fake_server.port)
+            await async_client.db_open("demo", "root", "root")
+            writes = async_client.unacked_writes(max_pending=2)
+            await writes.record_create(-1, {"@Person": {"n": 0}})
+            await writes.record_create(-1, {"@Shape": {}})
+            await writes.record_create(-1, {"@Person": {"n": 1}})
+            assert writes.pending <= 2
+            # responses stay matched with interleaved requests
+            assert len(await async_client.query("select from Person")) == 2
+            failures = await writes.flush()
+            async_client.close()
+            return [f.operation for f in failures], writes.acknowledged
+
+        assert asyncio.run(run()) == (["record_create"], 3)
+        assert count(client) == 2
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Record writes sent without waiting for their response.
+
+Record create, update and delete requests are sent in asynchronous mode
+back to back; their acknowledgements are read later, when the connection
+reads the response of another request, when more than ``max_pending`` of
+them are outstanding, or on :meth:`UnackedWrites.flush`, which returns
+the writes the server refused.
+
+Until it is acknowledged a write may still fail: meant for ingest that can
+be reconciled afterwards, e.g. telemetry.
+
+Usage::
+
+    >>> writes = client.unacked_writes(max_pending=1000)
+    >>> for sample in samples:
+    ...     writes.record_create(-1, {'@Sample': sample})
+    >>> failures = writes.flush()  # await writes.flush() with AsyncOrientDB
+
+"""
+from collections import deque
+
+from .exceptions import PyOrientBadMethodCallException, PyOrientException
+
+__author__ = 'Ostico <ostico@gmail.com>'
+
+
+class WriteFailure(object):
+    """Write refused by the server, or lost with the connection.
+
+    :param operation: 'record_create', 'record_update' or 'record_delete'
+    :param args: arguments of the write
+    :param error: the :class:`PyOrientException <pyorient.exceptions.PyOrientException>`
+    """
+
+    __slots__ = ('operation', 'args', 'error')
+
+    def __init__(self, operation, args, error):
+        self.operation = operation
+        self.args = args
+        self.error = error
+
+    def __repr__(self):
+        return "<WriteFailure %s%r: %s>" % (self.operation, self.args, self.error)
+
+
+class UnackedWrites(object):
+    """Record writes of an :class:`OrientDB <pyorient.orient.OrientDB>` sent without waiting for the server.
+
+    Takes the arguments of :meth:`OrientDB.record_create <pyorient.orient.OrientDB.record_create>`,
+    :meth:`record_update <pyorient.orient.OrientDB.record_update>` and
+    :meth:`record_delete <pyorient.orient.OrientDB.record_delete>`, which return nothing here.
+
+    :param client: the client sending the writes, other requests can go on meanwhile
+    :param max_pending: writes left without acknowledgement, the oldest are read beyond
+    """
+
+    _operations = {
+        'RecordCreateMessage': 'record_create',
+        'RecordUpdateMessage': 'record_update',
+        'RecordDeleteMessage': 'record_delete',
+    }
+
+    def __init__(self, client, max_pending=1000):
+        if max_pending < 1:
+            raise ValueError("max_pending must be positive")
+        self._client = client
+        self.max_pending = max_pending
+        #: writes sent and acknowledged (refused ones included)
+        self.sent = 0
+        self.acknowledged = 0
+        self._failures = []
+
+    @property
+    def pending(self):
+        """Writes sent and not acknowledged yet."""
+        return self.sent - self.acknowledged
+
+    def record_create(self, *args):
+        self._write('RecordCreateMessage', args)
+
+    def record_update(self, *args):
+        self._write('RecordUpdateMessage', args)
+
+    def record_delete(self, *args):
+        self._write('RecordDeleteMessage', args)
+
+    def flush(self):
+        """Read the acknowledgement of every write sent.
+
+        :return: list of :class:`WriteFailure` of the writes refused since the last flush
+        """
+        self._client._connection.settle()
+        return self._take_failures()
+
+    def _write(self, name, args):
+        connection = self._client._connection
+        while self.pending >= self.max_pending:
+            connection.settle(1)
+        message = self._send(name, args)
+        connection.unacked.append((message, lambda error: self._acked(name, args, error)))
+
+    def _send(self, name, args):
+        connection = self._client._connection
+        if connection.in_transaction:
+            raise PyOrientBadMethodCallException("Unacknowledged writes can't be sent inside a transaction", [])
+        message = self._client.get_message(name).set_mode_async().prepare(args).send()
+        if name != 'RecordCreateMessage':
+            # the cached copy is stale from now on, not from the acknowledgement
+            message._forget(message._cluster_id, message._cluster_position)
+        self.sent += 1
+        return message
+
+    def _acked(self, name, args, error):
+        self.acknowledged += 1
+        if error is not None:
+            self._failures.append(WriteFailure(self._operations[name], args, error))
+
+    def _take_failures(self):
+        failures, self._failures = self._failures, []
+        return failures
+
+    def __repr__(self):
+        return "<%s %d pending, %d failed>" % (type(self).__name__, self.pending, len(self._failures))
+
+
+class AsyncUnackedWrites(UnackedWrites):
+    """:class:`UnackedWrites` of an :class:`AsyncOrientDB <pyorient.async_orient.AsyncOrientDB>`,
+    writes and :meth:`flush` are coroutines.
+
+    A write only waits when ``max_pending`` writes are outstanding or the
+    transport buffer is full.
+    """
+
+    def __init__(self, client, max_pending=1000):
+        super(AsyncUnackedWrites, self).__init__(client, max_pending)
+        # (message name, args, future of the response), oldest first
+        self._futures = deque()
+
+    async def record_create(self, *args):
+        await self._write('RecordCreateMessage', args)
+
+    async def record_update(self, *args):
+        await self._write('RecordUpdateMessage', args)
+
+    async def record_delete(self, *args):
+        await self._write('RecordDeleteMessage', args)
+
+    async def flush(self):
+        """
+        Async counterpart of :meth:`UnackedWrites.flush`
+        """
+        if self._futures:
+            await self._client._connection.drain()
+        while self._futures:
+            await self._ack()
+        return self._take_failures()
+
+    async def _write(self, name, args):
+        while self.pending >= self.max_pending:
+            await self._ack()
+        client = self._client
+        async with client._lock:
+            if not client._connection.connected:
+                await client._connection.connect()
+            message = self._send(name, args)
+            self._futures.append((name, args, client._connection.expect(message)))
+        await client._connection.drain()
+
+    async def _ack(self):
+        name, args, future = self._futures.popleft()
+        try:
+            await self._client._connection.wait(future)
+        except PyOrientException as e:
+            self._acked(name, args, e)
+        else:
+            self._acked(name, args, None)
@@ -6,19 +6,17 @@ from pyorient.exceptions import PyOrientConnectionException, PyOrientDatabaseExc
 from pyorient.otypes import OrientRecordLink
 
 
+# read once, the environment is not looked up again on every debug check
+_DEBUG = os.environ.get('DEBUG', '').lower() in ('1', 'true')
+_DEBUG_VERBOSE = _DEBUG and os.environ.get('DEBUG_VERBOSE', '').lower() in ('1', 'true')
+
+
 def is_debug_active():
-    if 'DEBUG' in os.environ:
-        if os.environ['DEBUG'].lower() in ('1', 'true'):
-            return True
-    return False
+    return _DEBUG
 
 
 def is_debug_verbose():
-    if 'DEBUG_VERBOSE' in os.environ:
-        if is_debug_active() and os.environ['DEBUG_VERBOSE'].lower() \
-                in ('1', 'true'):
-            return True
-    return False
+    return _DEBUG_VERBOSE
 
 
 def dlog(msg):